@@ -1,10 +1,13 @@
 """Provide pre-made queries on top of the recorder component."""
 from __future__ import annotations
 
-from collections.abc import Iterable
+from array import array
+from collections.abc import Iterable, MutableMapping
 from datetime import datetime as dt, timedelta
 from http import HTTPStatus
 import logging
+import struct
+import sys
 import time
 from typing import Any, cast
 
@@ -23,11 +26,15 @@ from homeassistant.components.recorder.filters import (
     sqlalchemy_filter_from_include_exclude_conf,
 )
 from homeassistant.components.recorder.util import session_scope
-from homeassistant.components.websocket_api import messages
+from homeassistant.components.websocket_api import (
+    COMPRESSED_STATE_LAST_UPDATED,
+    COMPRESSED_STATE_STATE,
+    messages,
+)
 from homeassistant.core import HomeAssistant
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entityfilter import INCLUDE_EXCLUDE_BASE_FILTER_SCHEMA
-from homeassistant.helpers.json import JSON_DUMP
+from homeassistant.helpers.json import JSON_DUMP, json_dumps_with_fragments
 from homeassistant.helpers.typing import ConfigType
 import homeassistant.util.dt as dt_util
 
@@ -39,6 +46,16 @@ HISTORY_USE_INCLUDE_ORDER = "history_use_include_order"
 
 CONF_ORDER = "use_include_order"
 
+# Header of the packed columnar format: magic, version and number of entities.
+# Each entity follows with the length of its entity_id, the entity_id, the
+# number of points and then the timestamps and the states as float64 arrays.
+PACKED_COLUMNS_MAGIC = b"HAHC"
+PACKED_COLUMNS_VERSION = 1
+PACKED_COLUMNS_CONTENT_TYPE = "application/octet-stream"
+_PACKED_HEADER = struct.Struct("<4sBI")
+_PACKED_ENTITY_HEADER = struct.Struct("<H")
+_PACKED_POINTS_HEADER = struct.Struct("<I")
+
 
 CONFIG_SCHEMA = vol.Schema(
     {
@@ -119,8 +136,30 @@ def _ws_get_significant_states(
     significant_changes_only: bool,
     minimal_response: bool,
     no_attributes: bool,
+    columnar: bool = False,
+    numeric_only: bool = False,
+    max_points: int | None = None,
 ) -> str:
     """Fetch history significant_states and convert them to json in the executor."""
+    if columnar:
+        columns = _order_by_include(
+            history.get_significant_states_columnar(
+                hass,
+                start_time,
+                end_time,
+                entity_ids,
+                filters,
+                include_start_time_state,
+                significant_changes_only,
+                numeric_only,
+                max_points,
+            ),
+            filters if use_include_order else None,
+        )
+        return JSON_DUMP(
+            messages.result_message(msg_id, _columns_to_compressed(columns))
+        )
+
     states = history.get_significant_states(
         hass,
         start_time,
@@ -132,12 +171,16 @@ def _ws_get_significant_states(
         minimal_response,
         no_attributes,
         True,
+        max_points,
+        raw_attributes=True,
     )
 
+    # The attributes are inserted in the response
+    # as they are stored without decoding them
     if not use_include_order or not filters:
-        return JSON_DUMP(messages.result_message(msg_id, states))
+        return json_dumps_with_fragments(messages.result_message(msg_id, states))
 
-    return JSON_DUMP(
+    return json_dumps_with_fragments(
         messages.result_message(
             msg_id,
             {
@@ -160,6 +203,9 @@ def _ws_get_significant_states(
         vol.Optional("significant_changes_only", default=True): bool,
         vol.Optional("minimal_response", default=False): bool,
         vol.Optional("no_attributes", default=False): bool,
+        vol.Optional("columnar", default=False): bool,
+        vol.Optional("numeric_only", default=False): bool,
+        vol.Optional("max_points"): vol.All(int, vol.Range(min=2)),
     }
 )
 @websocket_api.async_response
@@ -218,10 +264,64 @@ async def ws_get_history_during_period(
             significant_changes_only,
             minimal_response,
             no_attributes,
+            msg["columnar"],
+            msg["numeric_only"],
+            msg.get("max_points"),
         )
     )
 
 
+def _order_by_include(
+    columns: MutableMapping[str, tuple[list[float], list[Any]]],
+    filters: Filters | None,
+) -> MutableMapping[str, tuple[list[float], list[Any]]]:
+    """Reorder columns to respect the entities included in the configuration."""
+    if not filters:
+        return columns
+    return {
+        order_entity: columns.pop(order_entity)
+        for order_entity in filters.included_entities
+        if order_entity in columns
+    } | columns
+
+
+def _columns_to_compressed(
+    columns: MutableMapping[str, tuple[list[float], list[Any]]]
+) -> dict[str, dict[str, list[Any]]]:
+    """Convert history columns to a JSON friendly dict with compressed keys."""
+    return {
+        entity_id: {
+            COMPRESSED_STATE_LAST_UPDATED: timestamps,
+            COMPRESSED_STATE_STATE: values,
+        }
+        for entity_id, (timestamps, values) in columns.items()
+    }
+
+
+def pack_columns(columns: MutableMapping[str, tuple[list[float], list[Any]]]) -> bytes:
+    """Pack numeric history columns into the packed columnar format.
+
+    States that are not numeric are packed as NaN.
+    """
+    nan = float("nan")
+    parts = [
+        _PACKED_HEADER.pack(PACKED_COLUMNS_MAGIC, PACKED_COLUMNS_VERSION, len(columns))
+    ]
+    for entity_id, (timestamps, values) in columns.items():
+        encoded_entity_id = entity_id.encode()
+        timestamps_array = array("d", timestamps)
+        values_array = array("d", (nan if val is None else val for val in values))
+        if sys.byteorder == "big":
+            timestamps_array.byteswap()
+            values_array.byteswap()
+        parts.append(_PACKED_ENTITY_HEADER.pack(len(encoded_entity_id)))
+        parts.append(encoded_entity_id)
+        parts.append(_PACKED_POINTS_HEADER.pack(len(timestamps_array)))
+        parts.append(timestamps_array.tobytes())
+        parts.append(values_array.tobytes())
+    return b"".join(parts)
+
+
 class HistoryPeriodView(HomeAssistantView):
     """Handle history period requests."""
 
@@ -271,6 +371,17 @@ class HistoryPeriodView(HomeAssistantView):
 
         minimal_response = "minimal_response" in request.query
         no_attributes = "no_attributes" in request.query
+        packed = "packed" in request.query
+        columnar = packed or "columnar" in request.query
+        numeric_only = packed or "numeric_only" in request.query
+        max_points = None
+        if max_points_str := request.query.get("max_points"):
+            try:
+                max_points = int(max_points_str)
+            except ValueError:
+                max_points = 0
+            if max_points < 2:
+                return self.json_message("Invalid max_points", HTTPStatus.BAD_REQUEST)
 
         hass = request.app["hass"]
 
@@ -281,6 +392,23 @@ class HistoryPeriodView(HomeAssistantView):
         ):
             return self.json([])
 
+        if columnar:
+            return cast(
+                web.Response,
+                await get_instance(hass).async_add_executor_job(
+                    self._significant_states_columns,
+                    hass,
+                    start_time,
+                    end_time,
+                    entity_ids,
+                    include_start_time_state,
+                    significant_changes_only,
+                    numeric_only,
+                    packed,
+                    max_points,
+                ),
+            )
+
         return cast(
             web.Response,
             await get_instance(hass).async_add_executor_job(
@@ -293,9 +421,43 @@ class HistoryPeriodView(HomeAssistantView):
                 significant_changes_only,
                 minimal_response,
                 no_attributes,
+                max_points,
             ),
         )
 
+    def _significant_states_columns(
+        self,
+        hass: HomeAssistant,
+        start_time: dt,
+        end_time: dt,
+        entity_ids: list[str] | None,
+        include_start_time_state: bool,
+        significant_changes_only: bool,
+        numeric_only: bool,
+        packed: bool,
+        max_points: int | None,
+    ) -> web.Response:
+        """Fetch significant states from the database as columns."""
+        columns = _order_by_include(
+            history.get_significant_states_columnar(
+                hass,
+                start_time,
+                end_time,
+                entity_ids,
+                self.filters,
+                include_start_time_state,
+                significant_changes_only,
+                numeric_only,
+                max_points,
+            ),
+            self.filters if self.use_include_order else None,
+        )
+        if packed:
+            return web.Response(
+                body=pack_columns(columns), content_type=PACKED_COLUMNS_CONTENT_TYPE
+            )
+        return self.json(_columns_to_compressed(columns))
+
     def _sorted_significant_states_json(
         self,
         hass: HomeAssistant,
@@ -306,6 +468,7 @@ class HistoryPeriodView(HomeAssistantView):
         significant_changes_only: bool,
         minimal_response: bool,
         no_attributes: bool,
+        max_points: int | None,
     ) -> web.Response:
         """Fetch significant stats from the database as json."""
         timer_start = time.perf_counter()
@@ -322,6 +485,7 @@ class HistoryPeriodView(HomeAssistantView):
                 significant_changes_only,
                 minimal_response,
                 no_attributes,
+                max_points=max_points,
             )
 
         if _LOGGER.isEnabledFor(logging.DEBUG):
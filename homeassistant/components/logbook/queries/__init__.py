@@ -1,34 +1,47 @@
 """Queries for logbook."""
 from __future__ import annotations
 
-from datetime import datetime as dt
-
 from sqlalchemy.sql.lambdas import StatementLambdaElement
 
+from homeassistant.components.recorder.db_schema import SCHEMA_VERSION
 from homeassistant.components.recorder.filters import Filters
+from homeassistant.components.recorder.models import bytes_to_ulid_or_none
 from homeassistant.helpers.json import json_dumps
 
 from .all import all_stmt
+from .common import logbook_columns
 from .devices import devices_stmt
 from .entities import entities_stmt
 from .entities_and_devices import entities_devices_stmt
 
 
 def statement_for_request(
-    start_day: dt,
-    end_day: dt,
+    start_day: float,
+    end_day: float,
     event_types: tuple[str, ...],
     entity_ids: list[str] | None = None,
     device_ids: list[str] | None = None,
     filters: Filters | None = None,
-    context_id: str | None = None,
+    context_id_bin: bytes | None = None,
+    states_meta: bool = False,
+    schema_version: int = SCHEMA_VERSION,
 ) -> StatementLambdaElement:
     """Generate the logbook statement for a logbook request."""
+    columns = logbook_columns(schema_version)
+    context_id: bytes | str | None = context_id_bin
+    if context_id_bin is not None and schema_version < 32:
+        # The context ids are compared as the strings they are
+        # stored as until the schema migration adds the binary ones
+        context_id = bytes_to_ulid_or_none(context_id_bin)
 
     # No entities: logbook sends everything for the timeframe
     # limited by the context_id and the yaml configured filter
     if not entity_ids and not device_ids:
-        states_entity_filter = filters.states_entity_filter() if filters else None
+        states_entity_filter = None
+        if filters and states_meta:
+            states_entity_filter = filters.states_metadata_entity_filter()
+        elif filters:
+            states_entity_filter = filters.states_entity_filter()
         events_entity_filter = filters.events_entity_filter() if filters else None
         return all_stmt(
             start_day,
@@ -37,6 +50,8 @@ def statement_for_request(
             states_entity_filter,
             events_entity_filter,
             context_id,
+            states_meta,
+            columns,
         )
 
     # sqlalchemy caches object quoting, the
@@ -55,6 +70,8 @@ def statement_for_request(
             entity_ids,
             json_quoted_entity_ids,
             json_quoted_device_ids,
+            states_meta,
+            columns,
         )
 
     # entities: logbook sends everything for the timeframe for the entities
@@ -66,6 +83,8 @@ def statement_for_request(
             event_types,
             entity_ids,
             json_quoted_entity_ids,
+            states_meta,
+            columns,
         )
 
     # devices: logbook sends everything for the timeframe for the devices
@@ -76,4 +95,6 @@ def statement_for_request(
         end_day,
         event_types,
         json_quoted_device_ids,
+        states_meta,
+        columns,
     )
@@ -1,8 +1,6 @@
 """All queries for logbook."""
 from __future__ import annotations
 
-from datetime import datetime as dt
-
 from sqlalchemy import lambda_stmt
 from sqlalchemy.orm import Query
 from sqlalchemy.sql.elements import ClauseList
@@ -10,11 +8,14 @@ from sqlalchemy.sql.lambdas import StatementLambdaElement
 
 from homeassistant.components.recorder.db_schema import (
     LAST_UPDATED_INDEX,
+    LAST_UPDATED_TS_INDEX,
     Events,
     States,
 )
 
 from .common import (
+    LOGBOOK_COLUMNS,
+    LogbookColumns,
     apply_states_filters,
     legacy_select_events_context_id,
     select_events_without_states,
@@ -23,52 +24,105 @@ from .common import (
 
 
 def all_stmt(
-    start_day: dt,
-    end_day: dt,
+    start_day: float,
+    end_day: float,
     event_types: tuple[str, ...],
     states_entity_filter: ClauseList | None = None,
     events_entity_filter: ClauseList | None = None,
-    context_id: str | None = None,
+    context_id_bin: bytes | str | None = None,
+    states_meta: bool = False,
+    columns: LogbookColumns = LOGBOOK_COLUMNS,
 ) -> StatementLambdaElement:
     """Generate a logbook query for all entities."""
     stmt = lambda_stmt(
-        lambda: select_events_without_states(start_day, end_day, event_types)
+        lambda: select_events_without_states(start_day, end_day, event_types, columns)
     )
-    if context_id is not None:
+    if context_id_bin is not None and states_meta:
+        stmt += lambda s: s.where(
+            columns.events_context_id == context_id_bin
+        ).union_all(
+            _states_query_for_context_id(
+                start_day, end_day, context_id_bin, True, columns
+            ),
+            legacy_select_events_context_id(
+                start_day, end_day, context_id_bin, True, columns
+            ),
+        )
+    elif context_id_bin is not None:
         # Once all the old `state_changed` events
         # are gone from the database remove the
         # _legacy_select_events_context_id()
-        stmt += lambda s: s.where(Events.context_id == context_id).union_all(
-            _states_query_for_context_id(start_day, end_day, context_id),
-            legacy_select_events_context_id(start_day, end_day, context_id),
+        stmt += lambda s: s.where(
+            columns.events_context_id == context_id_bin
+        ).union_all(
+            _states_query_for_context_id(
+                start_day, end_day, context_id_bin, False, columns
+            ),
+            legacy_select_events_context_id(
+                start_day, end_day, context_id_bin, False, columns
+            ),
         )
     else:
         if events_entity_filter is not None:
             stmt += lambda s: s.where(events_entity_filter)
 
-        if states_entity_filter is not None:
+        if states_entity_filter is not None and states_meta:
+            stmt += lambda s: s.union_all(
+                _states_query_for_all(start_day, end_day, True, columns).where(
+                    states_entity_filter
+                )
+            )
+        elif states_entity_filter is not None:
+            stmt += lambda s: s.union_all(
+                _states_query_for_all(start_day, end_day, False, columns).where(
+                    states_entity_filter
+                )
+            )
+        elif states_meta:
             stmt += lambda s: s.union_all(
-                _states_query_for_all(start_day, end_day).where(states_entity_filter)
+                _states_query_for_all(start_day, end_day, True, columns)
             )
         else:
-            stmt += lambda s: s.union_all(_states_query_for_all(start_day, end_day))
+            stmt += lambda s: s.union_all(
+                _states_query_for_all(start_day, end_day, False, columns)
+            )
 
-    stmt += lambda s: s.order_by(Events.time_fired)
+    stmt += lambda s: s.order_by(Events.time_fired_ts)
     return stmt
 
 
-def _states_query_for_all(start_day: dt, end_day: dt) -> Query:
-    return apply_states_filters(_apply_all_hints(select_states()), start_day, end_day)
+def _states_query_for_all(
+    start_day: float,
+    end_day: float,
+    states_meta: bool = False,
+    columns: LogbookColumns = LOGBOOK_COLUMNS,
+) -> Query:
+    return apply_states_filters(
+        _apply_all_hints(select_states(states_meta, columns), columns),
+        start_day,
+        end_day,
+        states_meta,
+        columns,
+    )
 
 
-def _apply_all_hints(query: Query) -> Query:
+def _apply_all_hints(query: Query, columns: LogbookColumns) -> Query:
     """Force mysql to use the right index on large selects."""
-    return query.with_hint(
-        States, f"FORCE INDEX ({LAST_UPDATED_INDEX})", dialect_name="mysql"
+    index = (
+        LAST_UPDATED_TS_INDEX
+        if columns.states_last_updated is States.last_updated_ts
+        else LAST_UPDATED_INDEX
     )
+    return query.with_hint(States, f"FORCE INDEX ({index})", dialect_name="mysql")
 
 
-def _states_query_for_context_id(start_day: dt, end_day: dt, context_id: str) -> Query:
-    return apply_states_filters(select_states(), start_day, end_day).where(
-        States.context_id == context_id
-    )
+def _states_query_for_context_id(
+    start_day: float,
+    end_day: float,
+    context_id_bin: bytes | str,
+    states_meta: bool = False,
+    columns: LogbookColumns = LOGBOOK_COLUMNS,
+) -> Query:
+    return apply_states_filters(
+        select_states(states_meta, columns), start_day, end_day, states_meta, columns
+    ).where(columns.states_context_id == context_id_bin)
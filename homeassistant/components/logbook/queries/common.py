@@ -1,25 +1,31 @@
 """Queries for logbook."""
 from __future__ import annotations
 
-from datetime import datetime as dt
+from typing import NamedTuple
 
 import sqlalchemy
-from sqlalchemy import select
+from sqlalchemy import select, type_coerce
 from sqlalchemy.orm import Query
-from sqlalchemy.sql.elements import ClauseList
+from sqlalchemy.sql.elements import ClauseList, ColumnElement
 from sqlalchemy.sql.expression import literal
 from sqlalchemy.sql.selectable import Select
 
 from homeassistant.components.recorder.db_schema import (
+    EVENTS_CONTEXT_ID_BIN_INDEX,
     EVENTS_CONTEXT_ID_INDEX,
     OLD_FORMAT_ATTRS_JSON,
     OLD_STATE,
     SHARED_ATTRS_JSON,
+    STATES_CONTEXT_ID_BIN_INDEX,
     STATES_CONTEXT_ID_INDEX,
+    ContextIdAsBinary,
+    DatetimeAsTimestamp,
     EventData,
     Events,
     StateAttributes,
     States,
+    StatesMeta,
+    UserIdAsBinary,
 )
 from homeassistant.components.recorder.filters import like_domain_matchers
 
@@ -43,14 +49,78 @@ PSUEDO_EVENT_STATE_CHANGED = None
 # since it avoids another column being sent
 # in the payload
 
+
+class LogbookColumns(NamedTuple):
+    """The columns of the events and states which changed with the schema.
+
+    While a live schema migration is running the queries read the
+    columns of the schema the database is still on. The existing rows
+    are converted in the background once the schema migration is done.
+    """
+
+    events_context_id: ColumnElement
+    events_context_user_id: ColumnElement
+    events_context_parent_id: ColumnElement
+    states_context_id: ColumnElement
+    states_context_user_id: ColumnElement
+    states_context_parent_id: ColumnElement
+    events_time_fired: ColumnElement
+    states_last_updated: ColumnElement
+    states_last_changed: ColumnElement
+
+
+LOGBOOK_COLUMNS = LogbookColumns(
+    Events.context_id_bin,
+    Events.context_user_id_bin,
+    Events.context_parent_id_bin,
+    States.context_id_bin,
+    States.context_user_id_bin,
+    States.context_parent_id_bin,
+    Events.time_fired_ts,
+    States.last_updated_ts,
+    States.last_changed_ts,
+)
+# Remove LOGBOOK_COLUMNS_PRE_SCHEMA_33 and LOGBOOK_COLUMNS_PRE_SCHEMA_32
+# once the timestamps are always stored as epoch floats
+LOGBOOK_COLUMNS_PRE_SCHEMA_33 = LogbookColumns(
+    *LOGBOOK_COLUMNS[:6],
+    type_coerce(Events.time_fired, DatetimeAsTimestamp),
+    type_coerce(States.last_updated, DatetimeAsTimestamp),
+    type_coerce(States.last_changed, DatetimeAsTimestamp),
+)
+LOGBOOK_COLUMNS_PRE_SCHEMA_32 = LogbookColumns(
+    type_coerce(Events.context_id, ContextIdAsBinary),
+    type_coerce(Events.context_user_id, UserIdAsBinary),
+    type_coerce(Events.context_parent_id, ContextIdAsBinary),
+    type_coerce(States.context_id, ContextIdAsBinary),
+    type_coerce(States.context_user_id, UserIdAsBinary),
+    type_coerce(States.context_parent_id, ContextIdAsBinary),
+    *LOGBOOK_COLUMNS_PRE_SCHEMA_33[6:],
+)
+
+
+def logbook_columns(schema_version: int) -> LogbookColumns:
+    """Return the columns to query for the schema version of the database."""
+    if schema_version < 32:
+        return LOGBOOK_COLUMNS_PRE_SCHEMA_32
+    if schema_version < 33:
+        return LOGBOOK_COLUMNS_PRE_SCHEMA_33
+    return LOGBOOK_COLUMNS
+
+
+def time_between(
+    column: ColumnElement, start_day: float, end_day: float
+) -> ColumnElement:
+    """Match the rows of a time column between start_day and end_day."""
+    return (column > type_coerce(start_day, column.type)) & (
+        column < type_coerce(end_day, column.type)
+    )
+
+
 EVENT_COLUMNS = (
     Events.event_id.label("event_id"),
     Events.event_type.label("event_type"),
     Events.event_data.label("event_data"),
-    Events.time_fired.label("time_fired"),
-    Events.context_id.label("context_id"),
-    Events.context_user_id.label("context_user_id"),
-    Events.context_parent_id.label("context_parent_id"),
 )
 
 STATE_COLUMNS = (
@@ -69,6 +139,24 @@ STATE_CONTEXT_ONLY_COLUMNS = (
     literal(value=None, type_=sqlalchemy.String).label("old_format_icon"),
 )
 
+# Once all states have a metadata_id the entity_id
+# is only stored in the states_meta table
+STATE_COLUMNS_STATES_META = (
+    States.state_id.label("state_id"),
+    States.state.label("state"),
+    StatesMeta.entity_id.label("entity_id"),
+    SHARED_ATTRS_JSON["icon"].as_string().label("icon"),
+    OLD_FORMAT_ATTRS_JSON["icon"].as_string().label("old_format_icon"),
+)
+
+STATE_CONTEXT_ONLY_COLUMNS_STATES_META = (
+    States.state_id.label("state_id"),
+    States.state.label("state"),
+    StatesMeta.entity_id.label("entity_id"),
+    literal(value=None, type_=sqlalchemy.String).label("icon"),
+    literal(value=None, type_=sqlalchemy.String).label("old_format_icon"),
+)
+
 EVENT_COLUMNS_FOR_STATE_SELECT = [
     literal(value=None, type_=sqlalchemy.Text).label("event_id"),
     # We use PSUEDO_EVENT_STATE_CHANGED aka None for
@@ -79,11 +167,6 @@ EVENT_COLUMNS_FOR_STATE_SELECT = [
         "event_type"
     ),
     literal(value=None, type_=sqlalchemy.Text).label("event_data"),
-    States.last_updated.label("time_fired"),
-    States.context_id.label("context_id"),
-    States.context_user_id.label("context_user_id"),
-    States.context_parent_id.label("context_parent_id"),
-    literal(value=None, type_=sqlalchemy.Text).label("shared_data"),
 ]
 
 EMPTY_STATE_COLUMNS = (
@@ -95,114 +178,182 @@ EMPTY_STATE_COLUMNS = (
 )
 
 
-EVENT_ROWS_NO_STATES = (
-    *EVENT_COLUMNS,
-    EventData.shared_data.label("shared_data"),
-    *EMPTY_STATE_COLUMNS,
-)
-
 # Virtual column to tell logbook if it should avoid processing
 # the event as its only used to link contexts
 CONTEXT_ONLY = literal("1").label("context_only")
 NOT_CONTEXT_ONLY = literal(None).label("context_only")
 
 
+def _events_time_and_context_columns(
+    columns: LogbookColumns,
+) -> tuple[ColumnElement, ...]:
+    return (
+        columns.events_time_fired.label("time_fired_ts"),
+        columns.events_context_id.label("context_id_bin"),
+        columns.events_context_user_id.label("context_user_id_bin"),
+        columns.events_context_parent_id.label("context_parent_id_bin"),
+    )
+
+
+def _states_time_and_context_columns(
+    columns: LogbookColumns,
+) -> tuple[ColumnElement, ...]:
+    return (
+        columns.states_last_updated.label("time_fired_ts"),
+        columns.states_context_id.label("context_id_bin"),
+        columns.states_context_user_id.label("context_user_id_bin"),
+        columns.states_context_parent_id.label("context_parent_id_bin"),
+    )
+
+
+def _event_rows_no_states(columns: LogbookColumns) -> tuple[ColumnElement, ...]:
+    return (
+        *EVENT_COLUMNS,
+        *_events_time_and_context_columns(columns),
+        EventData.shared_data.label("shared_data"),
+        *EMPTY_STATE_COLUMNS,
+    )
+
+
+def _event_columns_for_state_select(
+    columns: LogbookColumns,
+) -> tuple[ColumnElement, ...]:
+    return (
+        *EVENT_COLUMNS_FOR_STATE_SELECT,
+        *_states_time_and_context_columns(columns),
+        literal(value=None, type_=sqlalchemy.Text).label("shared_data"),
+    )
+
+
 def select_events_context_id_subquery(
-    start_day: dt,
-    end_day: dt,
+    start_day: float,
+    end_day: float,
     event_types: tuple[str, ...],
+    columns: LogbookColumns = LOGBOOK_COLUMNS,
 ) -> Select:
     """Generate the select for a context_id subquery."""
     return (
-        select(Events.context_id)
-        .where((Events.time_fired > start_day) & (Events.time_fired < end_day))
+        select(columns.events_context_id.label("context_id_bin"))
+        .where(time_between(columns.events_time_fired, start_day, end_day))
         .where(Events.event_type.in_(event_types))
         .outerjoin(EventData, (Events.data_id == EventData.data_id))
     )
 
 
-def select_events_context_only() -> Select:
+def select_events_context_only(columns: LogbookColumns = LOGBOOK_COLUMNS) -> Select:
     """Generate an events query that mark them as for context_only.
 
     By marking them as context_only we know they are only for
     linking context ids and we can avoid processing them.
     """
-    return select(*EVENT_ROWS_NO_STATES, CONTEXT_ONLY)
+    return select(*_event_rows_no_states(columns), CONTEXT_ONLY)
 
 
-def select_states_context_only() -> Select:
+def select_states_context_only(
+    states_meta: bool = False, columns: LogbookColumns = LOGBOOK_COLUMNS
+) -> Select:
     """Generate an states query that mark them as for context_only.
 
     By marking them as context_only we know they are only for
     linking context ids and we can avoid processing them.
     """
     return select(
-        *EVENT_COLUMNS_FOR_STATE_SELECT, *STATE_CONTEXT_ONLY_COLUMNS, CONTEXT_ONLY
+        *_event_columns_for_state_select(columns),
+        *(
+            STATE_CONTEXT_ONLY_COLUMNS_STATES_META
+            if states_meta
+            else STATE_CONTEXT_ONLY_COLUMNS
+        ),
+        CONTEXT_ONLY,
     )
 
 
 def select_events_without_states(
-    start_day: dt, end_day: dt, event_types: tuple[str, ...]
+    start_day: float,
+    end_day: float,
+    event_types: tuple[str, ...],
+    columns: LogbookColumns = LOGBOOK_COLUMNS,
 ) -> Select:
     """Generate an events select that does not join states."""
     return (
-        select(*EVENT_ROWS_NO_STATES, NOT_CONTEXT_ONLY)
-        .where((Events.time_fired > start_day) & (Events.time_fired < end_day))
+        select(*_event_rows_no_states(columns), NOT_CONTEXT_ONLY)
+        .where(time_between(columns.events_time_fired, start_day, end_day))
         .where(Events.event_type.in_(event_types))
         .outerjoin(EventData, (Events.data_id == EventData.data_id))
     )
 
 
-def select_states() -> Select:
+def select_states(
+    states_meta: bool = False, columns: LogbookColumns = LOGBOOK_COLUMNS
+) -> Select:
     """Generate a states select that formats the states table as event rows."""
     return select(
-        *EVENT_COLUMNS_FOR_STATE_SELECT,
-        *STATE_COLUMNS,
+        *_event_columns_for_state_select(columns),
+        *(STATE_COLUMNS_STATES_META if states_meta else STATE_COLUMNS),
         NOT_CONTEXT_ONLY,
     )
 
 
 def legacy_select_events_context_id(
-    start_day: dt, end_day: dt, context_id: str
+    start_day: float,
+    end_day: float,
+    context_id_bin: bytes | str,
+    states_meta: bool = False,
+    columns: LogbookColumns = LOGBOOK_COLUMNS,
 ) -> Select:
     """Generate a legacy events context id select that also joins states."""
     # This can be removed once we no longer have event_ids in the states table
+    query = select(
+        *EVENT_COLUMNS,
+        *_events_time_and_context_columns(columns),
+        literal(value=None, type_=sqlalchemy.String).label("shared_data"),
+        *(STATE_COLUMNS_STATES_META if states_meta else STATE_COLUMNS),
+        NOT_CONTEXT_ONLY,
+    ).outerjoin(States, (Events.event_id == States.event_id))
+    if states_meta:
+        query = apply_states_meta_join(query)
     return (
-        select(
-            *EVENT_COLUMNS,
-            literal(value=None, type_=sqlalchemy.String).label("shared_data"),
-            *STATE_COLUMNS,
-            NOT_CONTEXT_ONLY,
-        )
-        .outerjoin(States, (Events.event_id == States.event_id))
-        .where(
-            (States.last_updated == States.last_changed) | States.last_changed.is_(None)
+        query.where(
+            (columns.states_last_updated == columns.states_last_changed)
+            | columns.states_last_changed.is_(None)
         )
-        .where(_not_continuous_entity_matcher())
+        .where(_not_continuous_entity_matcher(states_meta))
         .outerjoin(
             StateAttributes, (States.attributes_id == StateAttributes.attributes_id)
         )
-        .where((Events.time_fired > start_day) & (Events.time_fired < end_day))
-        .where(Events.context_id == context_id)
+        .where(time_between(columns.events_time_fired, start_day, end_day))
+        .where(columns.events_context_id == context_id_bin)
     )
 
 
-def apply_states_filters(query: Query, start_day: dt, end_day: dt) -> Query:
+def apply_states_meta_join(query: Query) -> Query:
+    """Join the states_meta table which holds the entity_id of the states."""
+    return query.outerjoin(StatesMeta, (States.metadata_id == StatesMeta.metadata_id))
+
+
+def apply_states_filters(
+    query: Query,
+    start_day: float,
+    end_day: float,
+    states_meta: bool = False,
+    columns: LogbookColumns = LOGBOOK_COLUMNS,
+) -> Query:
     """Filter states by time range.
 
     Filters states that do not have an old state or new state (added / removed)
     Filters states that are in a continuous domain with a UOM.
     Filters states that do not have matching last_updated and last_changed.
     """
+    if states_meta:
+        query = apply_states_meta_join(query)
     return (
-        query.filter(
-            (States.last_updated > start_day) & (States.last_updated < end_day)
-        )
+        query.filter(time_between(columns.states_last_updated, start_day, end_day))
         .outerjoin(OLD_STATE, (States.old_state_id == OLD_STATE.state_id))
         .where(_missing_state_matcher())
-        .where(_not_continuous_entity_matcher())
+        .where(_not_continuous_entity_matcher(states_meta))
         .where(
-            (States.last_updated == States.last_changed) | States.last_changed.is_(None)
+            (columns.states_last_updated == columns.states_last_changed)
+            | columns.states_last_changed.is_(None)
         )
         .outerjoin(
             StateAttributes, (States.attributes_id == StateAttributes.attributes_id)
@@ -221,20 +372,24 @@ def _missing_state_matcher() -> sqlalchemy.and_:
     )
 
 
-def _not_continuous_entity_matcher() -> sqlalchemy.or_:
+def _not_continuous_entity_matcher(states_meta: bool) -> sqlalchemy.or_:
     """Match non continuous entities."""
+    entity_id_column = StatesMeta.entity_id if states_meta else States.entity_id
     return sqlalchemy.or_(
         # First exclude domains that may be continuous
-        _not_possible_continuous_domain_matcher(),
+        _not_possible_continuous_domain_matcher(entity_id_column),
         # But let in the entities in the possible continuous domains
         # that are not actually continuous sensors because they lack a UOM
         sqlalchemy.and_(
-            _conditionally_continuous_domain_matcher, _not_uom_attributes_matcher()
+            _conditionally_continuous_domain_matcher(entity_id_column),
+            _not_uom_attributes_matcher(),
         ).self_group(),
     )
 
 
-def _not_possible_continuous_domain_matcher() -> sqlalchemy.and_:
+def _not_possible_continuous_domain_matcher(
+    entity_id_column: sqlalchemy.Column,
+) -> sqlalchemy.and_:
     """Match not continuous domains.
 
     This matches domain that are always considered continuous
@@ -243,7 +398,7 @@ def _not_possible_continuous_domain_matcher() -> sqlalchemy.and_:
     """
     return sqlalchemy.and_(
         *[
-            ~States.entity_id.like(entity_domain)
+            ~entity_id_column.like(entity_domain)
             for entity_domain in (
                 *ALWAYS_CONTINUOUS_ENTITY_ID_LIKE,
                 *CONDITIONALLY_CONTINUOUS_ENTITY_ID_LIKE,
@@ -252,7 +407,9 @@ def _not_possible_continuous_domain_matcher() -> sqlalchemy.and_:
     ).self_group()
 
 
-def _conditionally_continuous_domain_matcher() -> sqlalchemy.or_:
+def _conditionally_continuous_domain_matcher(
+    entity_id_column: sqlalchemy.Column,
+) -> sqlalchemy.or_:
     """Match conditionally continuous domains.
 
     This matches domain that are only considered
@@ -260,28 +417,43 @@ def _conditionally_continuous_domain_matcher() -> sqlalchemy.or_:
     """
     return sqlalchemy.or_(
         *[
-            States.entity_id.like(entity_domain)
+            entity_id_column.like(entity_domain)
             for entity_domain in CONDITIONALLY_CONTINUOUS_ENTITY_ID_LIKE
         ],
     ).self_group()
 
 
 def _not_uom_attributes_matcher() -> ClauseList:
-    """Prefilter ATTR_UNIT_OF_MEASUREMENT as its much faster in sql."""
-    return ~StateAttributes.shared_attrs.like(
-        UNIT_OF_MEASUREMENT_JSON_LIKE
-    ) | ~States.attributes.like(UNIT_OF_MEASUREMENT_JSON_LIKE)
+    """Prefilter ATTR_UNIT_OF_MEASUREMENT as its much faster in sql.
+
+    Attributes with a UOM are never stored compressed.
+    """
+    return (
+        ~StateAttributes.shared_attrs.like(UNIT_OF_MEASUREMENT_JSON_LIKE)
+        | ~States.attributes.like(UNIT_OF_MEASUREMENT_JSON_LIKE)
+        | StateAttributes.shared_attrs_bin.is_not(None)
+    )
 
 
-def apply_states_context_hints(query: Query) -> Query:
+def apply_states_context_hints(
+    query: Query, columns: LogbookColumns = LOGBOOK_COLUMNS
+) -> Query:
     """Force mysql to use the right index on large context_id selects."""
-    return query.with_hint(
-        States, f"FORCE INDEX ({STATES_CONTEXT_ID_INDEX})", dialect_name="mysql"
+    index = (
+        STATES_CONTEXT_ID_BIN_INDEX
+        if columns.states_context_id is States.context_id_bin
+        else STATES_CONTEXT_ID_INDEX
     )
+    return query.with_hint(States, f"FORCE INDEX ({index})", dialect_name="mysql")
 
 
-def apply_events_context_hints(query: Query) -> Query:
+def apply_events_context_hints(
+    query: Query, columns: LogbookColumns = LOGBOOK_COLUMNS
+) -> Query:
     """Force mysql to use the right index on large context_id selects."""
-    return query.with_hint(
-        Events, f"FORCE INDEX ({EVENTS_CONTEXT_ID_INDEX})", dialect_name="mysql"
+    index = (
+        EVENTS_CONTEXT_ID_BIN_INDEX
+        if columns.events_context_id is Events.context_id_bin
+        else EVENTS_CONTEXT_ID_INDEX
     )
+    return query.with_hint(Events, f"FORCE INDEX ({index})", dialect_name="mysql")
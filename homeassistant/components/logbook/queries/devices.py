@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 from collections.abc import Iterable
-from datetime import datetime as dt
 
 import sqlalchemy
 from sqlalchemy import lambda_stmt, select
@@ -19,8 +18,11 @@ from homeassistant.components.recorder.db_schema import (
 )
 
 from .common import (
+    LOGBOOK_COLUMNS,
+    LogbookColumns,
     apply_events_context_hints,
     apply_states_context_hints,
+    apply_states_meta_join,
     select_events_context_id_subquery,
     select_events_context_only,
     select_events_without_states,
@@ -29,24 +31,27 @@ from .common import (
 
 
 def _select_device_id_context_ids_sub_query(
-    start_day: dt,
-    end_day: dt,
+    start_day: float,
+    end_day: float,
     event_types: tuple[str, ...],
     json_quotable_device_ids: list[str],
+    columns: LogbookColumns,
 ) -> CompoundSelect:
     """Generate a subquery to find context ids for multiple devices."""
-    inner = select_events_context_id_subquery(start_day, end_day, event_types).where(
-        apply_event_device_id_matchers(json_quotable_device_ids)
-    )
-    return select(inner.c.context_id).group_by(inner.c.context_id)
+    inner = select_events_context_id_subquery(
+        start_day, end_day, event_types, columns
+    ).where(apply_event_device_id_matchers(json_quotable_device_ids))
+    return select(inner.c.context_id_bin).group_by(inner.c.context_id_bin)
 
 
 def _apply_devices_context_union(
     query: Query,
-    start_day: dt,
-    end_day: dt,
+    start_day: float,
+    end_day: float,
     event_types: tuple[str, ...],
     json_quotable_device_ids: list[str],
+    states_meta: bool,
+    columns: LogbookColumns,
 ) -> CompoundSelect:
     """Generate a CTE to find the device context ids and a query to find linked row."""
     devices_cte: CTE = _select_device_id_context_ids_sub_query(
@@ -54,38 +59,63 @@ def _apply_devices_context_union(
         end_day,
         event_types,
         json_quotable_device_ids,
+        columns,
     ).cte()
+    states_context_only = (
+        select_states_context_only(states_meta, columns)
+        .select_from(devices_cte)
+        .outerjoin(States, devices_cte.c.context_id_bin == columns.states_context_id)
+    )
+    if states_meta:
+        states_context_only = apply_states_meta_join(states_context_only)
     return query.union_all(
         apply_events_context_hints(
-            select_events_context_only()
+            select_events_context_only(columns)
             .select_from(devices_cte)
-            .outerjoin(Events, devices_cte.c.context_id == Events.context_id)
+            .outerjoin(
+                Events, devices_cte.c.context_id_bin == columns.events_context_id
+            ),
+            columns,
         ).outerjoin(EventData, (Events.data_id == EventData.data_id)),
-        apply_states_context_hints(
-            select_states_context_only()
-            .select_from(devices_cte)
-            .outerjoin(States, devices_cte.c.context_id == States.context_id)
-        ),
+        apply_states_context_hints(states_context_only, columns),
     )
 
 
 def devices_stmt(
-    start_day: dt,
-    end_day: dt,
+    start_day: float,
+    end_day: float,
     event_types: tuple[str, ...],
     json_quotable_device_ids: list[str],
+    states_meta: bool = False,
+    columns: LogbookColumns = LOGBOOK_COLUMNS,
 ) -> StatementLambdaElement:
     """Generate a logbook query for multiple devices."""
+    if states_meta:
+        return lambda_stmt(
+            lambda: _apply_devices_context_union(
+                select_events_without_states(
+                    start_day, end_day, event_types, columns
+                ).where(apply_event_device_id_matchers(json_quotable_device_ids)),
+                start_day,
+                end_day,
+                event_types,
+                json_quotable_device_ids,
+                True,
+                columns,
+            ).order_by(Events.time_fired_ts)
+        )
     stmt = lambda_stmt(
         lambda: _apply_devices_context_union(
-            select_events_without_states(start_day, end_day, event_types).where(
-                apply_event_device_id_matchers(json_quotable_device_ids)
-            ),
+            select_events_without_states(
+                start_day, end_day, event_types, columns
+            ).where(apply_event_device_id_matchers(json_quotable_device_ids)),
             start_day,
             end_day,
             event_types,
             json_quotable_device_ids,
-        ).order_by(Events.time_fired)
+            False,
+            columns,
+        ).order_by(Events.time_fired_ts)
     )
     return stmt
 
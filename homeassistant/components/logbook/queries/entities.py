@@ -2,61 +2,73 @@
 from __future__ import annotations
 
 from collections.abc import Iterable
-from datetime import datetime as dt
 
 import sqlalchemy
 from sqlalchemy import lambda_stmt, select, union_all
 from sqlalchemy.orm import Query
+from sqlalchemy.sql.elements import ClauseList
 from sqlalchemy.sql.lambdas import StatementLambdaElement
 from sqlalchemy.sql.selectable import CTE, CompoundSelect
 
 from homeassistant.components.recorder.db_schema import (
     ENTITY_ID_IN_EVENT,
     ENTITY_ID_LAST_UPDATED_INDEX,
+    METADATA_ID_LAST_UPDATED_TS_INDEX,
     OLD_ENTITY_ID_IN_EVENT,
     EventData,
     Events,
     States,
+    StatesMeta,
 )
 
 from .common import (
+    LOGBOOK_COLUMNS,
+    LogbookColumns,
     apply_events_context_hints,
     apply_states_context_hints,
     apply_states_filters,
+    apply_states_meta_join,
     select_events_context_id_subquery,
     select_events_context_only,
     select_events_without_states,
     select_states,
     select_states_context_only,
+    time_between,
 )
 
 
 def _select_entities_context_ids_sub_query(
-    start_day: dt,
-    end_day: dt,
+    start_day: float,
+    end_day: float,
     event_types: tuple[str, ...],
     entity_ids: list[str],
     json_quoted_entity_ids: list[str],
+    states_meta: bool,
+    columns: LogbookColumns,
 ) -> CompoundSelect:
     """Generate a subquery to find context ids for multiple entities."""
     union = union_all(
-        select_events_context_id_subquery(start_day, end_day, event_types).where(
-            apply_event_entity_id_matchers(json_quoted_entity_ids)
-        ),
-        apply_entities_hints(select(States.context_id))
-        .filter((States.last_updated > start_day) & (States.last_updated < end_day))
-        .where(States.entity_id.in_(entity_ids)),
+        select_events_context_id_subquery(
+            start_day, end_day, event_types, columns
+        ).where(apply_event_entity_id_matchers(json_quoted_entity_ids)),
+        apply_entities_hints(
+            select(columns.states_context_id.label("context_id_bin")), states_meta
+        )
+        .filter(time_between(columns.states_last_updated, start_day, end_day))
+        .where(apply_states_entity_id_matchers(entity_ids, states_meta)),
     )
-    return select(union.c.context_id).group_by(union.c.context_id)
+    return select(union.c.context_id_bin).group_by(union.c.context_id_bin)
 
 
 def _apply_entities_context_union(
     query: Query,
-    start_day: dt,
-    end_day: dt,
+    start_day: float,
+    end_day: float,
     event_types: tuple[str, ...],
     entity_ids: list[str],
     json_quoted_entity_ids: list[str],
+    states_meta: bool,
+    columns: LogbookColumns,
 ) -> CompoundSelect:
     """Generate a CTE to find the entity and device context ids and a query to find linked row."""
     entities_cte: CTE = _select_entities_context_ids_sub_query(
@@ -65,56 +77,104 @@ def _apply_entities_context_union(
         event_types,
         entity_ids,
         json_quoted_entity_ids,
+        states_meta,
+        columns,
     ).cte()
+    states_context_only = (
+        select_states_context_only(states_meta, columns)
+        .select_from(entities_cte)
+        .outerjoin(States, entities_cte.c.context_id_bin == columns.states_context_id)
+    )
+    if states_meta:
+        states_context_only = apply_states_meta_join(states_context_only)
     # We used to optimize this to exclude rows we already in the union with
     # a States.entity_id.not_in(entity_ids) but that made the
     # query much slower on MySQL, and since we already filter them away
     # in the python code anyways since they will have context_only
     # set on them the impact is minimal.
     return query.union_all(
-        states_query_for_entity_ids(start_day, end_day, entity_ids),
+        states_query_for_entity_ids(
+            start_day, end_day, entity_ids, states_meta, columns
+        ),
         apply_events_context_hints(
-            select_events_context_only()
+            select_events_context_only(columns)
             .select_from(entities_cte)
-            .outerjoin(Events, entities_cte.c.context_id == Events.context_id)
+            .outerjoin(
+                Events, entities_cte.c.context_id_bin == columns.events_context_id
+            ),
+            columns,
         ).outerjoin(EventData, (Events.data_id == EventData.data_id)),
-        apply_states_context_hints(
-            select_states_context_only()
-            .select_from(entities_cte)
-            .outerjoin(States, entities_cte.c.context_id == States.context_id)
-        ),
+        apply_states_context_hints(states_context_only, columns),
     )
 
 
 def entities_stmt(
-    start_day: dt,
-    end_day: dt,
+    start_day: float,
+    end_day: float,
     event_types: tuple[str, ...],
     entity_ids: list[str],
     json_quoted_entity_ids: list[str],
+    states_meta: bool = False,
+    columns: LogbookColumns = LOGBOOK_COLUMNS,
 ) -> StatementLambdaElement:
     """Generate a logbook query for multiple entities."""
+    if states_meta:
+        return lambda_stmt(
+            lambda: _apply_entities_context_union(
+                select_events_without_states(
+                    start_day, end_day, event_types, columns
+                ).where(apply_event_entity_id_matchers(json_quoted_entity_ids)),
+                start_day,
+                end_day,
+                event_types,
+                entity_ids,
+                json_quoted_entity_ids,
+                True,
+                columns,
+            ).order_by(Events.time_fired_ts)
+        )
     return lambda_stmt(
         lambda: _apply_entities_context_union(
-            select_events_without_states(start_day, end_day, event_types).where(
-                apply_event_entity_id_matchers(json_quoted_entity_ids)
-            ),
+            select_events_without_states(
+                start_day, end_day, event_types, columns
+            ).where(apply_event_entity_id_matchers(json_quoted_entity_ids)),
             start_day,
             end_day,
             event_types,
             entity_ids,
             json_quoted_entity_ids,
-        ).order_by(Events.time_fired)
+            False,
+            columns,
+        ).order_by(Events.time_fired_ts)
     )
 
 
 def states_query_for_entity_ids(
-    start_day: dt, end_day: dt, entity_ids: list[str]
+    start_day: float,
+    end_day: float,
+    entity_ids: list[str],
+    states_meta: bool = False,
+    columns: LogbookColumns = LOGBOOK_COLUMNS,
 ) -> Query:
     """Generate a select for states from the States table for specific entities."""
     return apply_states_filters(
-        apply_entities_hints(select_states()), start_day, end_day
-    ).where(States.entity_id.in_(entity_ids))
+        apply_entities_hints(select_states(states_meta, columns), states_meta),
+        start_day,
+        end_day,
+        states_meta,
+        columns,
+    ).where(apply_states_entity_id_matchers(entity_ids, states_meta))
+
+
+def apply_states_entity_id_matchers(
+    entity_ids: list[str], states_meta: bool
+) -> ClauseList:
+    """Create matchers for the entity_id of the states."""
+    if states_meta:
+        return States.metadata_id.in_(
+            select(StatesMeta.metadata_id).where(StatesMeta.entity_id.in_(entity_ids))
+        )
+    return States.entity_id.in_(entity_ids)
 
 
 def apply_event_entity_id_matchers(
@@ -133,8 +193,14 @@ def apply_event_entity_id_matchers(
     )
 
 
-def apply_entities_hints(query: Query) -> Query:
+def apply_entities_hints(query: Query, states_meta: bool = False) -> Query:
     """Force mysql to use the right index on large selects."""
+    if states_meta:
+        return query.with_hint(
+            States,
+            f"FORCE INDEX ({METADATA_ID_LAST_UPDATED_TS_INDEX})",
+            dialect_name="mysql",
+        )
     return query.with_hint(
         States, f"FORCE INDEX ({ENTITY_ID_LAST_UPDATED_INDEX})", dialect_name="mysql"
     )
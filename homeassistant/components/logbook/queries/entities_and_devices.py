@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 from collections.abc import Iterable
-from datetime import datetime as dt
 
 import sqlalchemy
 from sqlalchemy import lambda_stmt, select, union_all
@@ -13,51 +12,64 @@ from sqlalchemy.sql.selectable import CTE, CompoundSelect
 from homeassistant.components.recorder.db_schema import EventData, Events, States
 
 from .common import (
+    LOGBOOK_COLUMNS,
+    LogbookColumns,
     apply_events_context_hints,
     apply_states_context_hints,
+    apply_states_meta_join,
     select_events_context_id_subquery,
     select_events_context_only,
     select_events_without_states,
     select_states_context_only,
+    time_between,
 )
 from .devices import apply_event_device_id_matchers
 from .entities import (
     apply_entities_hints,
     apply_event_entity_id_matchers,
+    apply_states_entity_id_matchers,
     states_query_for_entity_ids,
 )
 
 
 def _select_entities_device_id_context_ids_sub_query(
-    start_day: dt,
-    end_day: dt,
+    start_day: float,
+    end_day: float,
     event_types: tuple[str, ...],
     entity_ids: list[str],
     json_quoted_entity_ids: list[str],
     json_quoted_device_ids: list[str],
+    states_meta: bool,
+    columns: LogbookColumns,
 ) -> CompoundSelect:
     """Generate a subquery to find context ids for multiple entities and multiple devices."""
     union = union_all(
-        select_events_context_id_subquery(start_day, end_day, event_types).where(
+        select_events_context_id_subquery(
+            start_day, end_day, event_types, columns
+        ).where(
             _apply_event_entity_id_device_id_matchers(
                 json_quoted_entity_ids, json_quoted_device_ids
             )
         ),
-        apply_entities_hints(select(States.context_id))
-        .filter((States.last_updated > start_day) & (States.last_updated < end_day))
-        .where(States.entity_id.in_(entity_ids)),
+        apply_entities_hints(
+            select(columns.states_context_id.label("context_id_bin")), states_meta
+        )
+        .filter(time_between(columns.states_last_updated, start_day, end_day))
+        .where(apply_states_entity_id_matchers(entity_ids, states_meta)),
     )
-    return select(union.c.context_id).group_by(union.c.context_id)
+    return select(union.c.context_id_bin).group_by(union.c.context_id_bin)
 
 
 def _apply_entities_devices_context_union(
     query: Query,
-    start_day: dt,
-    end_day: dt,
+    start_day: float,
+    end_day: float,
     event_types: tuple[str, ...],
     entity_ids: list[str],
     json_quoted_entity_ids: list[str],
     json_quoted_device_ids: list[str],
+    states_meta: bool,
+    columns: LogbookColumns,
 ) -> CompoundSelect:
     devices_entities_cte: CTE = _select_entities_device_id_context_ids_sub_query(
         start_day,
@@ -66,39 +78,77 @@ def _apply_entities_devices_context_union(
         entity_ids,
         json_quoted_entity_ids,
         json_quoted_device_ids,
+        states_meta,
+        columns,
     ).cte()
+    states_context_only = (
+        select_states_context_only(states_meta, columns)
+        .select_from(devices_entities_cte)
+        .outerjoin(
+            States,
+            devices_entities_cte.c.context_id_bin == columns.states_context_id,
+        )
+    )
+    if states_meta:
+        states_context_only = apply_states_meta_join(states_context_only)
     # We used to optimize this to exclude rows we already in the union with
     # a States.entity_id.not_in(entity_ids) but that made the
     # query much slower on MySQL, and since we already filter them away
     # in the python code anyways since they will have context_only
     # set on them the impact is minimal.
     return query.union_all(
-        states_query_for_entity_ids(start_day, end_day, entity_ids),
+        states_query_for_entity_ids(
+            start_day, end_day, entity_ids, states_meta, columns
+        ),
         apply_events_context_hints(
-            select_events_context_only()
+            select_events_context_only(columns)
             .select_from(devices_entities_cte)
-            .outerjoin(Events, devices_entities_cte.c.context_id == Events.context_id)
+            .outerjoin(
+                Events,
+                devices_entities_cte.c.context_id_bin == columns.events_context_id,
+            ),
+            columns,
         ).outerjoin(EventData, (Events.data_id == EventData.data_id)),
-        apply_states_context_hints(
-            select_states_context_only()
-            .select_from(devices_entities_cte)
-            .outerjoin(States, devices_entities_cte.c.context_id == States.context_id)
-        ),
+        apply_states_context_hints(states_context_only, columns),
     )
 
 
 def entities_devices_stmt(
-    start_day: dt,
-    end_day: dt,
+    start_day: float,
+    end_day: float,
     event_types: tuple[str, ...],
     entity_ids: list[str],
     json_quoted_entity_ids: list[str],
     json_quoted_device_ids: list[str],
+    states_meta: bool = False,
+    columns: LogbookColumns = LOGBOOK_COLUMNS,
 ) -> StatementLambdaElement:
     """Generate a logbook query for multiple entities."""
+    if states_meta:
+        return lambda_stmt(
+            lambda: _apply_entities_devices_context_union(
+                select_events_without_states(
+                    start_day, end_day, event_types, columns
+                ).where(
+                    _apply_event_entity_id_device_id_matchers(
+                        json_quoted_entity_ids, json_quoted_device_ids
+                    )
+                ),
+                start_day,
+                end_day,
+                event_types,
+                entity_ids,
+                json_quoted_entity_ids,
+                json_quoted_device_ids,
+                True,
+                columns,
+            ).order_by(Events.time_fired_ts)
+        )
     stmt = lambda_stmt(
         lambda: _apply_entities_devices_context_union(
-            select_events_without_states(start_day, end_day, event_types).where(
+            select_events_without_states(
+                start_day, end_day, event_types, columns
+            ).where(
                 _apply_event_entity_id_device_id_matchers(
                     json_quoted_entity_ids, json_quoted_device_ids
                 )
@@ -109,7 +159,9 @@ def entities_devices_stmt(
             entity_ids,
             json_quoted_entity_ids,
             json_quoted_device_ids,
-        ).order_by(Events.time_fired)
+            False,
+            columns,
+        ).order_by(Events.time_fired_ts)
     )
     return stmt
 
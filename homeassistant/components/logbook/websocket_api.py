@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import asyncio
+from collections import deque
 from collections.abc import Callable
 from dataclasses import dataclass
 from datetime import datetime as dt, timedelta
@@ -15,12 +16,11 @@ from homeassistant.components.recorder import get_instance
 from homeassistant.components.websocket_api import messages
 from homeassistant.components.websocket_api.connection import ActiveConnection
 from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
-from homeassistant.helpers.entityfilter import EntityFilter
 from homeassistant.helpers.event import async_track_point_in_utc_time
 from homeassistant.helpers.json import JSON_DUMP
 import homeassistant.util.dt as dt_util
 
-from .const import LOGBOOK_ENTITIES_FILTER
+from .const import LOGBOOK_ENTITIES_FILTER, LOGBOOK_ENTRY_WHEN, LOGBOOK_LIVE_HUB
 from .helpers import (
     async_determine_event_types,
     async_filter_entities,
@@ -35,6 +35,10 @@ EVENT_COALESCE_TIME = 0.35
 BIG_QUERY_HOURS = 25
 # how many hours to deliver in the first chunk when we split the query
 BIG_QUERY_RECENT_HOURS = 24
+# how long the shared live stream keeps the events it sent
+# so new streams which start within it skip the database
+LIVE_BUFFER_TIME = timedelta(minutes=10)
+MAX_LIVE_BUFFER_EVENTS = 10000
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -50,6 +54,241 @@ class LogbookLiveStream:
     wait_sync_task: asyncio.Task | None = None
 
 
+class _LiveSubscriber:
+    """A live stream which gets its events from the live hub."""
+
+    __slots__ = ("connection", "msg_id", "cancel", "live_after", "pending")
+
+    def __init__(
+        self,
+        connection: ActiveConnection,
+        msg_id: int,
+        cancel: CALLBACK_TYPE,
+        live_after: float | None = None,
+    ) -> None:
+        """Initialize the subscriber.
+
+        If live_after is set the events are held back until the
+        historical events have been sent and only the events after
+        it are sent.
+        """
+        self.connection = connection
+        self.msg_id = msg_id
+        self.cancel = cancel
+        self.live_after = live_after
+        self.pending: list[dict[str, Any]] | None = None if live_after is None else []
+
+    @callback
+    def async_send(self, logbook_events: list[dict[str, Any]], template: str) -> None:
+        """Send humanified events or hold them back."""
+        if self.pending is None:
+            if (live_after := self.live_after) is not None:
+                # A batch humanified after going live can still have events
+                # from before live_after which were sent from the database
+                live_events = [
+                    event
+                    for event in logbook_events
+                    if event[LOGBOOK_ENTRY_WHEN] > live_after
+                ]
+                if len(live_events) != len(logbook_events):
+                    if live_events:
+                        self._async_send_events(live_events)
+                    return
+                self.live_after = None
+            self.connection.send_message(
+                template.replace(messages.IDEN_JSON_TEMPLATE, str(self.msg_id), 1)
+            )
+            return
+        self.pending.extend(logbook_events)
+        if len(self.pending) > MAX_PENDING_LOGBOOK_EVENTS:
+            _LOGGER.debug(
+                "Client exceeded max pending messages of %s",
+                MAX_PENDING_LOGBOOK_EVENTS,
+            )
+            self.pending.clear()
+            self.cancel()
+
+    @callback
+    def async_go_live(self) -> None:
+        """Send the held back events and the next ones as they come."""
+        if self.pending is None:
+            return
+        live_after = self.live_after
+        assert live_after is not None
+        logbook_events = [
+            event for event in self.pending if event[LOGBOOK_ENTRY_WHEN] > live_after
+        ]
+        self.pending = None
+        if logbook_events:
+            self._async_send_events(logbook_events)
+
+    @callback
+    def _async_send_events(self, logbook_events: list[dict[str, Any]]) -> None:
+        """Send humanified events which are only for this subscriber."""
+        self.connection.send_message(
+            JSON_DUMP(messages.event_message(self.msg_id, {"events": logbook_events}))
+        )
+
+
+class LogbookLiveHub:
+    """Humanify the events of the unfiltered live streams once.
+
+    Streams which are not limited to entities or devices all need the
+    same events. The hub listens for the events of its event types once,
+    humanifies each batch once and sends the serialized batch to every
+    stream. The events of the last LIVE_BUFFER_TIME are kept so streams
+    which start within it are answered from memory instead of the database.
+    There is one hub per event types so the streams of a hub never change
+    the events of another one.
+    """
+
+    def __init__(self, hass: HomeAssistant, event_types: tuple[str, ...]) -> None:
+        """Initialize the hub."""
+        self.hass = hass
+        self.event_types = event_types
+        self._subscribers: list[_LiveSubscriber] = []
+        self._subscriptions: list[CALLBACK_TYPE] = []
+        self._event_processor = EventProcessor(
+            hass,
+            event_types,
+            None,
+            None,
+            None,
+            timestamp=True,
+            include_entity_name=False,
+        )
+        self._event_processor.switch_to_live()
+        self._queue: list[Event] = []
+        self._task: asyncio.Task | None = None
+        self._buffer: deque[dict[str, Any]] = deque()
+        self._buffer_start = 0.0
+
+    @callback
+    def async_covers(self, start_time: dt) -> bool:
+        """Return if all events since start_time are in the buffer."""
+        return (
+            bool(self._subscriptions)
+            and dt_util.utc_to_timestamp(start_time) > self._buffer_start
+        )
+
+    @callback
+    def async_buffered_events(self, start_time: dt) -> list[dict[str, Any]]:
+        """Return the buffered events since start_time."""
+        start_ts = dt_util.utc_to_timestamp(start_time)
+        return [
+            event for event in self._buffer if event[LOGBOOK_ENTRY_WHEN] >= start_ts
+        ]
+
+    @callback
+    def async_subscribe(self, subscriber: _LiveSubscriber) -> CALLBACK_TYPE:
+        """Send the live events to a subscriber."""
+        if not self._subscriptions:
+            self._async_listen()
+        self._subscribers.append(subscriber)
+
+        @callback
+        def _async_unsubscribe() -> None:
+            """Unsubscribe and stop listening if it was the last one."""
+            self._subscribers.remove(subscriber)
+            if not self._subscribers:
+                self._async_stop()
+
+        return _async_unsubscribe
+
+    @callback
+    def _async_listen(self) -> None:
+        """Listen for the events of the event types.
+
+        The buffer is only complete from the time the listeners are set up.
+        """
+        async_subscribe_events(
+            self.hass,
+            self._subscriptions,
+            self._async_queue_event,
+            self.event_types,
+            self.hass.data[LOGBOOK_ENTITIES_FILTER],
+            None,
+            None,
+        )
+        self._buffer_start = dt_util.utcnow().timestamp()
+
+    @callback
+    def _async_stop(self) -> None:
+        """Stop listening and remove the hub."""
+        for subscription in self._subscriptions:
+            subscription()
+        self._subscriptions.clear()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._queue.clear()
+        self._buffer.clear()
+        hubs: dict[tuple[str, ...], LogbookLiveHub] = self.hass.data[LOGBOOK_LIVE_HUB]
+        if hubs.get(self.event_types) is self:
+            del hubs[self.event_types]
+
+    @callback
+    def _async_queue_event(self, event: Event) -> None:
+        """Queue an event to be humanified with the next batch."""
+        self._queue.append(event)
+        if self._task is None:
+            self._task = self.hass.async_create_task(self._async_send_batch())
+
+    async def _async_send_batch(self) -> None:
+        """Humanify the queued events and send them to the subscribers."""
+        # We sleep for the EVENT_COALESCE_TIME so
+        # we can group events together to minimize
+        # the number of websocket messages when the
+        # system is overloaded with an event storm
+        await asyncio.sleep(EVENT_COALESCE_TIME)
+        self._task = None
+        events = self._queue
+        self._queue = []
+        if not (
+            logbook_events := self._event_processor.humanify(
+                async_event_to_row(e) for e in events
+            )
+        ):
+            return
+        self._async_buffer(logbook_events)
+        template = JSON_DUMP(
+            messages.event_message(
+                messages.IDEN_TEMPLATE,
+                {"events": logbook_events},
+            )
+        )
+        for subscriber in list(self._subscribers):
+            subscriber.async_send(logbook_events, template)
+
+    @callback
+    def _async_buffer(self, logbook_events: list[dict[str, Any]]) -> None:
+        """Add events to the buffer and drop the ones which are too old."""
+        buffer = self._buffer
+        buffer.extend(logbook_events)
+        oldest = (dt_util.utcnow() - LIVE_BUFFER_TIME).timestamp()
+        while buffer and (
+            len(buffer) > MAX_LIVE_BUFFER_EVENTS
+            or buffer[0][LOGBOOK_ENTRY_WHEN] < oldest
+        ):
+            self._buffer_start = max(
+                self._buffer_start, buffer.popleft()[LOGBOOK_ENTRY_WHEN]
+            )
+        self._buffer_start = max(self._buffer_start, oldest)
+
+
+@callback
+def async_get_live_hub(
+    hass: HomeAssistant, event_types: tuple[str, ...]
+) -> LogbookLiveHub:
+    """Return the live hub of the unfiltered streams of the event types."""
+    hubs: dict[tuple[str, ...], LogbookLiveHub] = hass.data.setdefault(
+        LOGBOOK_LIVE_HUB, {}
+    )
+    if (hub := hubs.get(event_types)) is None:
+        hub = hubs[event_types] = LogbookLiveHub(hass, event_types)
+    return hub
+
+
 @callback
 def async_setup(hass: HomeAssistant) -> None:
     """Set up the logbook websocket API."""
@@ -358,20 +597,48 @@ async def ws_event_stream(
             )
             _unsub()
 
-    entities_filter: EntityFilter | None = None
-    if not event_processor.limited_select:
-        entities_filter = hass.data[LOGBOOK_ENTITIES_FILTER]
+    live_subscriber: _LiveSubscriber | None = None
+    if event_processor.limited_select:
+        async_subscribe_events(
+            hass,
+            subscriptions,
+            _queue_or_cancel,
+            event_types,
+            None,
+            entity_ids,
+            device_ids,
+        )
+    else:
+        # Unfiltered streams share the humanified events of the live hub
+        live_hub = async_get_live_hub(hass, event_types)
+        if live_hub.async_covers(start_time):
+            # Everything since start_time has already been
+            # humanified so there is no need to go to the database
+            subscriptions.append(
+                live_hub.async_subscribe(_LiveSubscriber(connection, msg_id, _unsub))
+            )
+            connection.subscriptions[msg_id] = _unsub
+            connection.send_result(msg_id)
+            connection.send_message(
+                JSON_DUMP(
+                    messages.event_message(
+                        msg_id,
+                        _generate_stream_message(
+                            live_hub.async_buffered_events(start_time),
+                            start_time,
+                            utc_now,
+                        ),
+                    )
+                )
+            )
+            return
+        # The events are held back until the historical events are sent
+        live_subscriber = _LiveSubscriber(connection, msg_id, _unsub, 0.0)
+        subscriptions.append(live_hub.async_subscribe(live_subscriber))
 
-    async_subscribe_events(
-        hass,
-        subscriptions,
-        _queue_or_cancel,
-        event_types,
-        entities_filter,
-        entity_ids,
-        device_ids,
-    )
     subscriptions_setup_complete_time = dt_util.utcnow()
+    if live_subscriber:
+        live_subscriber.live_after = subscriptions_setup_complete_time.timestamp()
     connection.subscriptions[msg_id] = _unsub
     connection.send_result(msg_id)
     # Fetch everything from history
@@ -386,20 +653,24 @@ async def ws_event_stream(
         partial=True,
     )
 
-    live_stream.task = asyncio.create_task(
-        _async_events_consumer(
-            subscriptions_setup_complete_time,
-            connection,
-            msg_id,
-            stream_queue,
-            event_processor,
+    if live_subscriber is None:
+        live_stream.task = asyncio.create_task(
+            _async_events_consumer(
+                subscriptions_setup_complete_time,
+                connection,
+                msg_id,
+                stream_queue,
+                event_processor,
+            )
         )
-    )
 
     if msg_id not in connection.subscriptions:
         # Unsubscribe happened while sending historical events
         return
 
+    if live_subscriber:
+        live_subscriber.async_go_live()
+
     live_stream.wait_sync_task = asyncio.create_task(
         get_instance(hass).async_block_till_done()
     )
@@ -0,0 +1,76 @@
+"""Bloom filter of the hashes of shared event data and state attributes."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+# 16 bits per hash keep the false positive rate below 0.5% for the
+# number of hashes the filter is sized for, it is below 3.5% once the
+# number of hashes doubled
+BLOOM_FILTER_BITS_PER_HASH = 16
+
+# A filter takes at least 8KiB and at most 32MiB
+MIN_BLOOM_FILTER_BITS_LOG2 = 16
+MAX_BLOOM_FILTER_BITS_LOG2 = 28
+
+# Multipliers of the multiplicative hashes used to derive the bits
+# of a 32 bit hash, see Knuth, The Art of Computer Programming 6.4
+_MULTIPLIERS = (0x9E3779B1, 0x85EBCA77, 0xC2B2AE3D)
+
+
+class HashBloomFilter:
+    """A bloom filter of 32 bit hashes.
+
+    The recorder keeps one for the hashes of the shared event data and
+    state attributes in the database. A hash which is not in the filter
+    is not in the database so the database lookup can be skipped. Hashes
+    are never removed, a hash of a purged row is a false positive which
+    costs the same database lookup as without the filter.
+    """
+
+    def __init__(self, bits_log2: int = MIN_BLOOM_FILTER_BITS_LOG2) -> None:
+        """Initialize the bloom filter."""
+        self._shift = 32 - bits_log2
+        self._bits = bytearray(1 << (bits_log2 - 3))
+
+    @classmethod
+    def for_count(cls, count: int) -> HashBloomFilter:
+        """Return a bloom filter sized for a number of hashes."""
+        bits_log2 = (count * BLOOM_FILTER_BITS_PER_HASH - 1).bit_length()
+        return cls(
+            min(
+                max(bits_log2, MIN_BLOOM_FILTER_BITS_LOG2),
+                MAX_BLOOM_FILTER_BITS_LOG2,
+            )
+        )
+
+    @property
+    def bits_log2(self) -> int:
+        """Return the log2 of the number of bits of the filter."""
+        return 32 - self._shift
+
+    def _positions(self, hash_: int) -> list[int]:
+        """Return the positions of the bits of a hash."""
+        shift = self._shift
+        return [
+            ((hash_ * multiplier) & 0xFFFFFFFF) >> shift for multiplier in _MULTIPLIERS
+        ]
+
+    def add(self, hash_: int) -> None:
+        """Add a hash to the filter."""
+        bits = self._bits
+        for position in self._positions(hash_):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def update(self, hashes: Iterable[int | None]) -> None:
+        """Add hashes to the filter."""
+        for hash_ in hashes:
+            if hash_ is not None:
+                self.add(hash_)
+
+    def __contains__(self, hash_: int) -> bool:
+        """Return if the hash may have been added to the filter."""
+        bits = self._bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(hash_)
+        )
@@ -0,0 +1,154 @@
+"""Bulk insert the pending events and states of a commit."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Any
+
+from sqlalchemy import insert
+from sqlalchemy.orm.session import Session
+
+from .const import MAX_ROWS_TO_INSERT, MAX_ROWS_TO_PURGE, SupportedDialect
+from .db_schema import Events, States
+
+EVENTS_INSERT_COLUMNS = (
+    "event_type",
+    "event_data",
+    "origin",
+    "origin_idx",
+    "time_fired_ts",
+    "data_id",
+    "context_id_bin",
+    "context_user_id_bin",
+    "context_parent_id_bin",
+)
+
+STATES_INSERT_COLUMNS = (
+    "entity_id",
+    "state",
+    "attributes",
+    "last_changed_ts",
+    "last_updated_ts",
+    "old_state_id",
+    "attributes_id",
+    "origin_idx",
+    "metadata_id",
+    "context_id_bin",
+    "context_user_id_bin",
+    "context_parent_id_bin",
+)
+
+# sqlite3 has a limit of 999 bound parameters until version 3.32.0
+# so the number of states per multi-VALUES insert is kept below it
+SQLITE_MAX_STATES_TO_INSERT = MAX_ROWS_TO_PURGE // len(STATES_INSERT_COLUMNS)
+
+
+def _row_to_mapping(row: Events | States, columns: Iterable[str]) -> dict[str, Any]:
+    """Convert a pending row to the parameters of an insert."""
+    return {column: getattr(row, column) for column in columns}
+
+
+def bulk_insert_events(session: Session, events: list[Events]) -> None:
+    """Insert the pending events with a single executemany.
+
+    The event data must already be flushed so the data_id of
+    any pending EventData is known.
+    """
+    for dbevent in events:
+        if (event_data := dbevent.event_data_rel) is not None:
+            dbevent.data_id = event_data.data_id
+    session.execute(
+        insert(Events),
+        [_row_to_mapping(dbevent, EVENTS_INSERT_COLUMNS) for dbevent in events],
+    )
+
+
+def _states_by_generation(states: list[States]) -> list[list[States]]:
+    """Split the pending states so each entity appears once per generation.
+
+    The nth state of an entity in the commit is in the nth generation,
+    which means the old state of every state has been inserted and has a
+    state_id by the time its generation is inserted.
+    """
+    generations: list[list[States]] = []
+    seen: dict[int, int] = {}
+    for dbstate in states:
+        generation = seen.get(dbstate.metadata_id, 0)
+        seen[dbstate.metadata_id] = generation + 1
+        if generation == len(generations):
+            generations.append([])
+        generations[generation].append(dbstate)
+    return generations
+
+
+def bulk_insert_states(
+    session: Session, states: list[States], dialect_name: SupportedDialect | None
+) -> None:
+    """Insert the pending states and set their state_id.
+
+    The state attributes and states metadata must already be flushed so the
+    attributes_id and metadata_id of any pending rows are known.
+
+    Each generation is written with multi-VALUES inserts on PostgreSQL, which
+    returns the new state_ids, and on SQLite, where the single writer gives
+    the rows of an insert consecutive state_ids ending at the lastrowid.
+    MySQL and MariaDB only guarantee consecutive ids depending on the
+    innodb_autoinc_lock_mode of the server so the states are inserted one by
+    one there, still without going through the unit of work of the session.
+    """
+    for dbstate in states:
+        if (state_attributes := dbstate.state_attributes) is not None:
+            dbstate.attributes_id = state_attributes.attributes_id
+        if (states_meta := dbstate.states_meta_rel) is not None:
+            dbstate.metadata_id = states_meta.metadata_id
+
+    for generation in _states_by_generation(states):
+        for dbstate in generation:
+            if (old_state := dbstate.old_state) is not None:
+                dbstate.old_state_id = old_state.state_id
+        if dialect_name == SupportedDialect.POSTGRESQL:
+            _insert_states_returning(session, generation)
+        elif dialect_name == SupportedDialect.SQLITE:
+            _insert_states_consecutive(session, generation)
+        else:
+            for dbstate in generation:
+                dbstate.state_id = session.execute(
+                    insert(States), _row_to_mapping(dbstate, STATES_INSERT_COLUMNS)
+                ).inserted_primary_key[0]
+
+
+def _insert_states_returning(session: Session, generation: list[States]) -> None:
+    """Insert a generation of states with INSERT ... RETURNING."""
+    for idx in range(0, len(generation), MAX_ROWS_TO_INSERT):
+        chunk = generation[idx : idx + MAX_ROWS_TO_INSERT]
+        # The metadata_id is unique within a generation which makes it
+        # possible to match the new state_ids without relying on the
+        # order of the returned rows
+        state_ids: dict[int, int] = {
+            metadata_id: state_id
+            for state_id, metadata_id in session.execute(
+                insert(States)
+                .values(
+                    [
+                        _row_to_mapping(dbstate, STATES_INSERT_COLUMNS)
+                        for dbstate in chunk
+                    ]
+                )
+                .returning(States.state_id, States.metadata_id)
+            )
+        }
+        for dbstate in chunk:
+            dbstate.state_id = state_ids[dbstate.metadata_id]
+
+
+def _insert_states_consecutive(session: Session, generation: list[States]) -> None:
+    """Insert a generation of states which get consecutive state_ids."""
+    for idx in range(0, len(generation), SQLITE_MAX_STATES_TO_INSERT):
+        chunk = generation[idx : idx + SQLITE_MAX_STATES_TO_INSERT]
+        last_state_id: int = session.execute(
+            insert(States).values(
+                [_row_to_mapping(dbstate, STATES_INSERT_COLUMNS) for dbstate in chunk]
+            )
+        ).lastrowid
+        first_state_id = last_state_id - len(chunk) + 1
+        for offset, dbstate in enumerate(chunk):
+            dbstate.state_id = first_state_id + offset
@@ -0,0 +1,95 @@
+"""Compression of shared state attributes with a trained dictionary."""
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable
+import zlib
+
+# zlib only uses the last 32KiB of a preset dictionary
+DICTIONARY_MAX_SIZE = 32768
+
+# The number of attributes a dictionary is trained from
+# and the minimum needed to train a useful dictionary
+DICTIONARY_TRAINING_SAMPLES = 2000
+DICTIONARY_MIN_TRAINING_SAMPLES = 100
+
+# Smaller attributes gain too little to pay for decompressing them
+MIN_SIZE_TO_COMPRESS = 256
+
+# The logbook matches these attributes in the shared_attrs column
+# with sql so attributes containing them are never compressed
+SQL_MATCHED_ATTRIBUTES = (b'"unit_of_measurement":', b'"icon":')
+
+COMPRESSION_LEVEL = 9
+
+_FRAGMENT_SEPARATOR = b',"'
+
+# The dictionaries by dictionary_id, loaded from the database
+# by the recorder so rows can be decompressed in any thread
+_DICTIONARIES: dict[int, bytes] = {}
+
+
+def load_dictionaries(dictionaries: Iterable[tuple[int, bytes]]) -> None:
+    """Replace the known dictionaries with the ones from the database."""
+    _DICTIONARIES.clear()
+    _DICTIONARIES.update(dictionaries)
+
+
+def add_dictionary(dictionary_id: int, zdict: bytes) -> None:
+    """Add a dictionary stored in the database."""
+    _DICTIONARIES[dictionary_id] = zdict
+
+
+def should_compress(shared_attrs_bytes: bytes) -> bool:
+    """Return if json encoded shared attributes should be compressed."""
+    return len(shared_attrs_bytes) >= MIN_SIZE_TO_COMPRESS and not any(
+        matched in shared_attrs_bytes for matched in SQL_MATCHED_ATTRIBUTES
+    )
+
+
+def train_dictionary(samples: Iterable[bytes]) -> bytes:
+    """Train a dictionary from json encoded shared attributes.
+
+    The attributes are split into their key value pairs and the pairs
+    which save the most bytes are kept. zlib finds matches closer to
+    the end of the dictionary faster so the best pairs are put last.
+    """
+    fragments: Counter[bytes] = Counter()
+    for sample in samples:
+        head, *tail = sample.split(_FRAGMENT_SEPARATOR)
+        fragments.update({head, *(_FRAGMENT_SEPARATOR + pair for pair in tail)})
+    chosen: list[bytes] = []
+    size = 0
+    for fragment, count in sorted(
+        fragments.items(), key=lambda item: item[1] * len(item[0]), reverse=True
+    ):
+        if count < 2:
+            break
+        if size + len(fragment) > DICTIONARY_MAX_SIZE:
+            continue
+        chosen.append(fragment)
+        size += len(fragment)
+    return b"".join(reversed(chosen))
+
+
+def compress_attributes(shared_attrs_bytes: bytes, zdict: bytes) -> bytes | None:
+    """Compress json encoded shared attributes with a dictionary.
+
+    Returns None if compressing does not make the attributes smaller.
+    """
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=zdict)
+    compressed = compressor.compress(shared_attrs_bytes) + compressor.flush()
+    if len(compressed) >= len(shared_attrs_bytes):
+        return None
+    return compressed
+
+
+def decompress_attributes(shared_attrs_bin: bytes, dictionary_id: int) -> bytes:
+    """Decompress shared attributes compressed with a stored dictionary."""
+    try:
+        decompressor = zlib.decompressobj(zdict=_DICTIONARIES[dictionary_id])
+        return decompressor.decompress(shared_attrs_bin) + decompressor.flush()
+    except (KeyError, zlib.error) as err:
+        raise ValueError(
+            f"Unable to decompress attributes with dictionary {dictionary_id}"
+        ) from err
@@ -26,8 +26,42 @@ MAX_QUEUE_BACKLOG = 40000
 # have upgraded their sqlite version
 MAX_ROWS_TO_PURGE = 998
 
+# The maximum number of states we add a metadata_id to in one
+# batch when migrating the entity_ids to the states_meta table
+MAX_ROWS_TO_MIGRATE = 10000
+
+# The maximum number of shared attributes we look at in one
+# batch when compressing the attributes stored as text
+MAX_ROWS_TO_COMPRESS = 1000
+
+# The maximum number of hashes of shared attributes or event data
+# we load into the bloom filters in one batch
+MAX_HASHES_TO_LOAD = 10000
+
+# The maximum number of states we write in one multi-VALUES
+# insert when the database supports RETURNING
+MAX_ROWS_TO_INSERT = 500
+
+# The maximum number of statistics we import in one batch, the
+# import task is queued again until all statistics are imported
+MAX_ROWS_TO_IMPORT = 5000
+
+# The maximum number of days or months of long term statistics
+# we roll up in one batch when backfilling the rollup tables
+MAX_PERIODS_TO_ROLL_UP = 100
+
+# The maximum number of ranges of days or months without rolled up
+# statistics which are read from the hourly statistics instead
+MAX_ROLLUP_GAPS = 10
+
+# The last_used_ts of shared event data and state attributes is
+# only written when it is older than this many seconds
+SHARED_DATA_LAST_USED_INTERVAL = 3600
+
 DB_WORKER_PREFIX = "DbWorker"
 
+EVENT_RECORDER_STATISTICS_IMPORT_PROGRESS = "recorder_statistics_import_progress"
+
 ALL_DOMAIN_EXCLUDE_ATTRS = {ATTR_ATTRIBUTION, ATTR_RESTORED, ATTR_SUPPORTED_FEATURES}
 
 ATTR_KEEP_DAYS = "keep_days"
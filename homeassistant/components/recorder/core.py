@@ -32,6 +32,7 @@ from homeassistant.const import (
 )
 from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
 from homeassistant.helpers.event import (
+    async_call_later,
     async_track_time_change,
     async_track_time_interval,
     async_track_utc_time_change,
@@ -42,51 +43,87 @@ from homeassistant.helpers.typing import UNDEFINED, UndefinedType
 import homeassistant.util.dt as dt_util
 
 from . import migration, statistics
+from .bloom import HashBloomFilter
+from .bulk_insert import bulk_insert_events, bulk_insert_states
+from .compression import (
+    compress_attributes,
+    decompress_attributes,
+    load_dictionaries,
+    should_compress,
+)
 from .const import (
     DB_WORKER_PREFIX,
     DOMAIN,
     KEEPALIVE_TIME,
     MARIADB_PYMYSQL_URL_PREFIX,
     MARIADB_URL_PREFIX,
+    MAX_HASHES_TO_LOAD,
     MAX_QUEUE_BACKLOG,
     MYSQLDB_PYMYSQL_URL_PREFIX,
     MYSQLDB_URL_PREFIX,
+    SHARED_DATA_LAST_USED_INTERVAL,
     SQLITE_URL_PREFIX,
     SupportedDialect,
 )
 from .db_schema import (
     SCHEMA_VERSION,
+    TABLE_EVENT_DATA,
+    TABLE_STATE_ATTRIBUTES,
     Base,
     EventData,
     Events,
     StateAttributes,
     States,
+    StatesMeta,
     Statistics,
     StatisticsRuns,
     StatisticsShortTerm,
 )
 from .executor import DBInterruptibleThreadPoolExecutor
+from .metrics import PurgeMetrics, RecorderMetrics
 from .models import (
     StatisticData,
     StatisticMetaData,
     UnsupportedDialect,
     process_timestamp,
 )
-from .pool import POOL_SIZE, MutexPool, RecorderPool
-from .queries import find_shared_attributes_id, find_shared_data_id
+from .pool import MutexPool, RecorderPool
+from .queries import (
+    count_shared_attributes,
+    count_shared_data,
+    find_attributes_dictionaries,
+    find_shared_attributes_id,
+    find_shared_data_id,
+    find_shared_attributes_hashes,
+    find_shared_data_hashes,
+    find_states_metadata_id,
+    has_entity_ids_to_migrate,
+    has_events_context_ids_to_migrate,
+    has_events_timestamps_to_migrate,
+    has_states_context_ids_to_migrate,
+    has_states_timestamps_to_migrate,
+)
 from .run_history import RunHistory
 from .tasks import (
     AdjustStatisticsTask,
     ChangeStatisticsUnitTask,
     ClearStatisticsTask,
     CommitTask,
+    CompressAttributesTask,
     DatabaseLockTask,
+    EntityIDMigrationTask,
+    EventsContextIDMigrationTask,
+    EventsTimestampMigrationTask,
     EventTask,
     ImportStatisticsTask,
     KeepAliveTask,
     PerodicCleanupTask,
     PurgeTask,
     RecorderTask,
+    SharedHashesTask,
+    StatesContextIDMigrationTask,
+    StatesTimestampMigrationTask,
+    StatisticsRollupsBackfillTask,
     StatisticsTask,
     StopTask,
     SynchronizeTask,
@@ -115,6 +152,14 @@ DEFAULT_URL = "sqlite:///{hass_config_path}"
 # States and Events objects
 EXPIRE_AFTER_COMMITS = 120
 
+# The commit interval doubles after a commit that leaves more than
+# COMMIT_INTERVAL_BACKLOG_THRESHOLD tasks in the queue, up to
+# MAX_COMMIT_INTERVAL_MULTIPLIER times the configured commit interval.
+# It halves back towards the configured commit interval once the
+# queue is empty after a commit.
+COMMIT_INTERVAL_BACKLOG_THRESHOLD = 100
+MAX_COMMIT_INTERVAL_MULTIPLIER = 5
+
 # The number of attribute ids to cache in memory
 #
 # Based on:
@@ -124,6 +169,12 @@ EXPIRE_AFTER_COMMITS = 120
 STATE_ATTRIBUTES_ID_CACHE_SIZE = 2048
 EVENT_DATA_ID_CACHE_SIZE = 2048
 
+# The number of metadata ids to cache in memory
+#
+# This should be large enough to hold
+# the entity_ids of a large install
+STATES_META_ID_CACHE_SIZE = 8192
+
 SHUTDOWN_TASK = object()
 
 COMMIT_TASK = CommitTask()
@@ -137,9 +188,6 @@ DB_LOCK_QUEUE_CHECK_TIMEOUT = 1
 INVALIDATED_ERR = "Database connection invalidated"
 CONNECTIVITY_ERR = "Error in database connectivity during commit"
 
-# Pool size must accommodate Recorder thread + All db executors
-MAX_DB_EXECUTOR_WORKERS = POOL_SIZE - 1
-
 
 class Recorder(threading.Thread):
     """A threaded recorder class."""
@@ -156,9 +204,11 @@ class Recorder(threading.Thread):
         uri: str,
         db_max_retries: int,
         db_retry_wait: int,
+        db_max_readers: int,
         entity_filter: Callable[[str], bool],
         exclude_t: list[str],
         exclude_attributes_by_domain: dict[str, set[str]],
+        compress_attributes: bool,
     ) -> None:
         """Initialize the recorder."""
         threading.Thread.__init__(self, name="Recorder")
@@ -173,6 +223,7 @@ class Recorder(threading.Thread):
         self.db_url = uri
         self.db_max_retries = db_max_retries
         self.db_retry_wait = db_retry_wait
+        self.db_max_readers = db_max_readers
         self.engine_version: AwesomeVersion | None = None
         # Database connection is ready, but non-live migration may be in progress
         db_connected: asyncio.Future[bool] = hass.data[DOMAIN].db_connected
@@ -187,15 +238,51 @@ class Recorder(threading.Thread):
 
         self.entity_filter = entity_filter
         self.exclude_t = exclude_t
+        self.compress_attributes = compress_attributes
 
         self.schema_version = 0
         self._commits_without_expire = 0
         self._old_states: dict[str, States] = {}
         self._state_attributes_ids: LRU = LRU(STATE_ATTRIBUTES_ID_CACHE_SIZE)
         self._event_data_ids: LRU = LRU(EVENT_DATA_ID_CACHE_SIZE)
+        self._states_meta_ids: LRU = LRU(STATES_META_ID_CACHE_SIZE)
         self._pending_state_attributes: dict[str, StateAttributes] = {}
         self._pending_event_data: dict[str, EventData] = {}
-        self._pending_expunge: list[States] = []
+        self._pending_states_meta: dict[str, StatesMeta] = {}
+        # The last_used_ts of the cached attributes and event data ids and
+        # the ones to write in the next commit
+        self._state_attributes_last_used: LRU = LRU(STATE_ATTRIBUTES_ID_CACHE_SIZE)
+        self._event_data_last_used: LRU = LRU(EVENT_DATA_ID_CACHE_SIZE)
+        self._pending_state_attributes_last_used: dict[int, float] = {}
+        self._pending_event_data_last_used: dict[int, float] = {}
+        # Bloom filters of the hashes of the attributes and event data in
+        # the database, loaded in the background after startup. Attributes
+        # and event data with a hash which is not in the filter are not
+        # looked up in the database once the filter is loaded.
+        self._state_attributes_hashes: HashBloomFilter | None = None
+        self._event_data_hashes: HashBloomFilter | None = None
+        # The id and data of the dictionary new shared attributes are
+        # compressed with, set when attribute compression is enabled
+        self.attributes_dictionary: tuple[int, bytes] | None = None
+        # Set once all states have a metadata_id, new states
+        # are then written without the entity_id
+        self.states_meta_active = False
+        # Set once the long term statistics are rolled up per day and month,
+        # statistics_during_period then reads the rolled up statistics
+        self.statistics_rollups_active = False
+        self.statistics_cache = statistics.StatisticsDuringPeriodCache()
+        # Events and states are not added to the session, they
+        # are bulk inserted when the session is committed
+        self._pending_events: list[Events] = []
+        self._pending_states: list[States] = []
+        self.metrics = RecorderMetrics(commit_interval=commit_interval)
+        self.purge_metrics = PurgeMetrics()
+        self._pending_build_time = 0.0
+        self._last_event_time_fired: datetime | None = None
+        self._last_commit_time: float | None = None
+        # Recorder platforms that keep their own view of
+        # the recorded states, called from the recorder thread
+        self.state_changed_event_processors: list[Callable[[Event], None]] = []
         self.event_session: Session | None = None
         self._get_session: Callable[[], Session] | None = None
         self._completed_first_database_setup: bool | None = None
@@ -207,6 +294,7 @@ class Recorder(threading.Thread):
         self._exclude_attributes_by_domain = exclude_attributes_by_domain
 
         self._event_listener: CALLBACK_TYPE | None = None
+        self._dropped_event_listener: CALLBACK_TYPE | None = None
         self._queue_watcher: CALLBACK_TYPE | None = None
         self._keep_alive_listener: CALLBACK_TYPE | None = None
         self._commit_listener: CALLBACK_TYPE | None = None
@@ -257,7 +345,7 @@ class Recorder(threading.Thread):
         """Start the executor."""
         self._db_executor = DBInterruptibleThreadPoolExecutor(
             thread_name_prefix=DB_WORKER_PREFIX,
-            max_workers=MAX_DB_EXECUTOR_WORKERS,
+            max_workers=self.db_max_readers,
             shutdown_hook=self._shutdown_pool,
         )
 
@@ -269,6 +357,7 @@ class Recorder(threading.Thread):
     @callback
     def async_initialize(self) -> None:
         """Initialize the recorder."""
+        self._async_stop_counting_dropped_events()
         self._event_listener = self.hass.bus.async_listen(
             MATCH_ALL,
             self.event_listener,
@@ -294,6 +383,14 @@ class Recorder(threading.Thread):
         ):
             self.queue_task(COMMIT_TASK)
 
+    @callback
+    def _async_commit_interval_elapsed(self, now: datetime) -> None:
+        """Queue a commit and schedule the next one."""
+        self._commit_listener = async_call_later(
+            self.hass, self.metrics.commit_interval, self._async_commit_interval_elapsed
+        )
+        self._async_commit(now)
+
     @callback
     def async_add_executor_job(
         self, target: Callable[..., T], *args: Any
@@ -326,6 +423,26 @@ class Recorder(threading.Thread):
             MAX_QUEUE_BACKLOG,
         )
         self._async_stop_queue_watcher_and_event_listener()
+        # The dropped events are counted until the recorder is initialized
+        # again, the listener is removed once recording resumes
+        self._dropped_event_listener = self.hass.bus.async_listen(
+            MATCH_ALL,
+            self._async_count_dropped_event,
+            run_immediately=True,
+        )
+
+    @callback
+    def _async_count_dropped_event(self, event: Event) -> None:
+        """Count an event that is not recorded because the queue overflowed."""
+        if self._async_event_filter(event):
+            self.metrics.dropped_events += 1
+
+    @callback
+    def _async_stop_counting_dropped_events(self) -> None:
+        """Stop counting the events that are not recorded."""
+        if self._dropped_event_listener:
+            self._dropped_event_listener()
+            self._dropped_event_listener = None
 
     @callback
     def _async_stop_queue_watcher_and_event_listener(self) -> None:
@@ -341,6 +458,7 @@ class Recorder(threading.Thread):
     def _async_stop_listeners(self) -> None:
         """Stop listeners."""
         self._async_stop_queue_watcher_and_event_listener()
+        self._async_stop_counting_dropped_events()
         if self._keep_alive_listener:
             self._keep_alive_listener()
             self._keep_alive_listener = None
@@ -393,9 +511,11 @@ class Recorder(threading.Thread):
         # is a request to shutdown.
         while True:
             try:
-                self._queue.get_nowait()
+                task = self._queue.get_nowait()
             except queue.Empty:
                 break
+            if isinstance(task, EventTask):
+                self.metrics.dropped_events += 1
         self.queue_task(StopTask())
 
     async def _async_shutdown(self, event: Event) -> None:
@@ -471,6 +591,9 @@ class Recorder(threading.Thread):
             self.queue_task(PurgeTask(purge_before, repack=repack, apply_filter=False))
         else:
             self.queue_task(PerodicCleanupTask())
+        if self.compress_attributes and self.attributes_dictionary is None:
+            # Train the dictionary once enough attributes are recorded
+            self._schedule_compress_attributes()
 
     @callback
     def async_periodic_statistics(self, now: datetime) -> None:
@@ -557,8 +680,8 @@ class Recorder(threading.Thread):
 
         # If the commit interval is not 0, we need to commit periodically
         if self.commit_interval:
-            self._commit_listener = async_track_time_interval(
-                self.hass, self._async_commit, timedelta(seconds=self.commit_interval)
+            self._commit_listener = async_call_later(
+                self.hass, self.commit_interval, self._async_commit_interval_elapsed
             )
 
         # Run nightly tasks at 4:12am
@@ -656,6 +779,13 @@ class Recorder(threading.Thread):
         # Catch up with missed statistics
         with session_scope(session=self.get_session()) as session:
             self._schedule_compile_missing_statistics(session)
+            self._activate_states_meta_or_schedule_migration(session)
+            self._schedule_context_ids_migration(session)
+            self._schedule_timestamps_migration(session)
+            self._load_attributes_dictionaries(session)
+        self._schedule_load_shared_hashes()
+        self._schedule_statistics_rollups_backfill()
+        self._schedule_compress_attributes()
 
         _LOGGER.debug("Recorder processing the queue")
         self.hass.add_job(self._async_set_recorder_ready_migration_done)
@@ -781,16 +911,76 @@ class Recorder(threading.Thread):
     def _process_one_event(self, event: Event) -> None:
         if not self.enabled:
             return
+        start = time.perf_counter()
         if event.event_type == EVENT_STATE_CHANGED:
             self._process_state_changed_event_into_session(event)
+            for processor in self.state_changed_event_processors:
+                processor(event)
         else:
             self._process_non_state_changed_event_into_session(event)
+        self._pending_build_time += time.perf_counter() - start
+        self._last_event_time_fired = event.time_fired
         # Commit if the commit interval is zero
         if not self.commit_interval:
             self._commit_event_session_or_retry()
 
-    def _find_shared_attr_in_db(self, attr_hash: int, shared_attrs: str) -> int | None:
-        """Find shared attributes in the db from the hash and shared_attrs."""
+    def _load_shared_hashes(
+        self, table: str, hashes: HashBloomFilter | None, start_id: int
+    ) -> tuple[HashBloomFilter, int | None]:
+        """Load a batch of the hashes of the shared attributes or event data.
+
+        The filter is sized from the number of rows when the first batch is
+        loaded. Returns the filter and the id to continue after or None when
+        all hashes are loaded and the filter is used to skip the lookups.
+        """
+        if table == TABLE_STATE_ATTRIBUTES:
+            count_stmt, find_stmt = (
+                count_shared_attributes,
+                find_shared_attributes_hashes,
+            )
+        else:
+            count_stmt, find_stmt = count_shared_data, find_shared_data_hashes
+        with session_scope(session=self.get_session()) as session:
+            if hashes is None:
+                hashes = HashBloomFilter.for_count(
+                    session.execute(count_stmt()).scalar_one()
+                )
+            rows = session.execute(find_stmt(start_id)).all()
+        hashes.update(hash_ for _, hash_ in rows)
+        if len(rows) == MAX_HASHES_TO_LOAD:
+            return hashes, rows[-1][0]
+        _LOGGER.debug("Loaded the hashes of the %s", table)
+        if table == TABLE_STATE_ATTRIBUTES:
+            self._state_attributes_hashes = hashes
+        else:
+            self._event_data_hashes = hashes
+        return hashes, None
+
+    def _load_attributes_dictionaries(self, session: Session) -> None:
+        """Load the dictionaries the shared attributes are compressed with."""
+        if self.schema_version < 36:
+            # The state_attributes_dictionary table does not exist yet
+            return
+        dictionaries = [
+            (dictionary_id, zdict)
+            for dictionary_id, zdict in session.execute(find_attributes_dictionaries())
+        ]
+        # Compressed attributes are decompressed even when compression
+        # has been disabled since they were written
+        load_dictionaries(dictionaries)
+        if self.compress_attributes and dictionaries:
+            self.attributes_dictionary = dictionaries[-1]
+
+    def _find_shared_attr_in_db(
+        self, attr_hash: int, shared_attrs_bytes: bytes, shared_attrs: str
+    ) -> tuple[int, float | None] | None:
+        """Find shared attributes and their last_used_ts in the db from the hash and shared_attrs."""
+        if (
+            self._state_attributes_hashes is not None
+            and attr_hash not in self._state_attributes_hashes
+        ):
+            # The bloom filter has no false negatives
+            return None
         #
         # Avoid the event session being flushed since it will
         # commit all the pending events and states to the database.
@@ -801,14 +991,47 @@ class Recorder(threading.Thread):
         #
         assert self.event_session is not None
         with self.event_session.no_autoflush:
-            if attributes_id := self.event_session.execute(
+            rows = self.event_session.execute(
                 find_shared_attributes_id(attr_hash, shared_attrs)
+            ).all()
+            for attributes_id, last_used_ts, shared_attrs_bin, dictionary_id in rows:
+                # Rows stored as text have already been compared by the query
+                if shared_attrs_bin is not None:
+                    try:
+                        decompressed = decompress_attributes(
+                            shared_attrs_bin, dictionary_id
+                        )
+                    except ValueError:
+                        continue
+                    if decompressed != shared_attrs_bytes:
+                        continue
+                return cast(int, attributes_id), last_used_ts
+        return None
+
+    def _find_states_metadata_id_in_db(self, entity_id: str) -> int | None:
+        """Find the metadata_id of an entity_id in the db."""
+        #
+        # Avoid the event session being flushed since it will
+        # commit all the pending events and states to the database.
+        #
+        assert self.event_session is not None
+        with self.event_session.no_autoflush:
+            if metadata_id := self.event_session.execute(
+                find_states_metadata_id(entity_id)
             ).first():
-                return cast(int, attributes_id[0])
+                return cast(int, metadata_id[0])
         return None
 
-    def _find_shared_data_in_db(self, data_hash: int, shared_data: str) -> int | None:
-        """Find shared event data in the db from the hash and shared_attrs."""
+    def _find_shared_data_in_db(
+        self, data_hash: int, shared_data: str
+    ) -> tuple[int, float | None] | None:
+        """Find shared event data and its last_used_ts in the db from the hash and shared_data."""
+        if (
+            self._event_data_hashes is not None
+            and data_hash not in self._event_data_hashes
+        ):
+            # The bloom filter has no false negatives
+            return None
         #
         # Avoid the event session being flushed since it will
         # commit all the pending events and states to the database.
@@ -819,18 +1042,36 @@ class Recorder(threading.Thread):
         #
         assert self.event_session is not None
         with self.event_session.no_autoflush:
-            if data_id := self.event_session.execute(
+            if data := self.event_session.execute(
                 find_shared_data_id(data_hash, shared_data)
             ).first():
-                return cast(int, data_id[0])
+                return cast(int, data[0]), data[1]
         return None
 
+    @staticmethod
+    def _mark_shared_data_used(
+        last_used: LRU,
+        pending_last_used: dict[int, float],
+        shared_id: int,
+        used_ts: float,
+    ) -> None:
+        """Write the last_used_ts of shared data when it is outdated.
+
+        It is written at most once per SHARED_DATA_LAST_USED_INTERVAL, see purge.
+        """
+        last_used_ts = last_used.get(shared_id)
+        if (
+            last_used_ts is None
+            or used_ts - last_used_ts > SHARED_DATA_LAST_USED_INTERVAL
+        ):
+            last_used[shared_id] = pending_last_used[shared_id] = used_ts
+
     def _process_non_state_changed_event_into_session(self, event: Event) -> None:
         """Process any event into the session except state changed."""
         assert self.event_session is not None
         dbevent = Events.from_event(event)
         if not event.data:
-            self.event_session.add(dbevent)
+            self._pending_events.append(dbevent)
             return
 
         try:
@@ -840,26 +1081,49 @@ class Recorder(threading.Thread):
             return
 
         shared_data = shared_data_bytes.decode("utf-8")
+        time_fired_ts: float = dbevent.time_fired_ts
         # Matching attributes found in the pending commit
         if pending_event_data := self._pending_event_data.get(shared_data):
             dbevent.event_data_rel = pending_event_data
+            pending_event_data.last_used_ts = max(
+                pending_event_data.last_used_ts, time_fired_ts
+            )
         # Matching attributes id found in the cache
         elif data_id := self._event_data_ids.get(shared_data):
             dbevent.data_id = data_id
+            self._mark_shared_data_used(
+                self._event_data_last_used,
+                self._pending_event_data_last_used,
+                data_id,
+                time_fired_ts,
+            )
         else:
             data_hash = EventData.hash_shared_data_bytes(shared_data_bytes)
             # Matching attributes found in the database
-            if data_id := self._find_shared_data_in_db(data_hash, shared_data):
+            if data := self._find_shared_data_in_db(data_hash, shared_data):
+                data_id, last_used_ts = data
                 self._event_data_ids[shared_data] = dbevent.data_id = data_id
+                if last_used_ts is not None:
+                    self._event_data_last_used[data_id] = last_used_ts
+                self._mark_shared_data_used(
+                    self._event_data_last_used,
+                    self._pending_event_data_last_used,
+                    data_id,
+                    time_fired_ts,
+                )
             # No matching attributes found, save them in the DB
             else:
-                dbevent_data = EventData(shared_data=shared_data, hash=data_hash)
+                dbevent_data = EventData(
+                    shared_data=shared_data, hash=data_hash, last_used_ts=time_fired_ts
+                )
                 dbevent.event_data_rel = self._pending_event_data[
                     shared_data
                 ] = dbevent_data
                 self.event_session.add(dbevent_data)
+                if self._event_data_hashes is not None:
+                    self._event_data_hashes.add(data_hash)
 
-        self.event_session.add(dbevent)
+        self._pending_events.append(dbevent)
 
     def _process_state_changed_event_into_session(self, event: Event) -> None:
         """Process a state_changed event into the session."""
@@ -878,39 +1142,94 @@ class Recorder(threading.Thread):
             return
 
         shared_attrs = shared_attrs_bytes.decode("utf-8")
+        last_updated_ts: float = dbstate.last_updated_ts
         dbstate.attributes = None
         # Matching attributes found in the pending commit
         if pending_attributes := self._pending_state_attributes.get(shared_attrs):
             dbstate.state_attributes = pending_attributes
+            pending_attributes.last_used_ts = max(
+                pending_attributes.last_used_ts, last_updated_ts
+            )
         # Matching attributes id found in the cache
         elif attributes_id := self._state_attributes_ids.get(shared_attrs):
             dbstate.attributes_id = attributes_id
+            self._mark_shared_data_used(
+                self._state_attributes_last_used,
+                self._pending_state_attributes_last_used,
+                attributes_id,
+                last_updated_ts,
+            )
         else:
             attr_hash = StateAttributes.hash_shared_attrs_bytes(shared_attrs_bytes)
             # Matching attributes found in the database
-            if attributes_id := self._find_shared_attr_in_db(attr_hash, shared_attrs):
+            if attributes := self._find_shared_attr_in_db(
+                attr_hash, shared_attrs_bytes, shared_attrs
+            ):
+                attributes_id, last_used_ts = attributes
                 dbstate.attributes_id = attributes_id
                 self._state_attributes_ids[shared_attrs] = attributes_id
+                if last_used_ts is not None:
+                    self._state_attributes_last_used[attributes_id] = last_used_ts
+                self._mark_shared_data_used(
+                    self._state_attributes_last_used,
+                    self._pending_state_attributes_last_used,
+                    attributes_id,
+                    last_updated_ts,
+                )
             # No matching attributes found, save them in the DB
             else:
                 dbstate_attributes = StateAttributes(
-                    shared_attrs=shared_attrs, hash=attr_hash
+                    hash=attr_hash, last_used_ts=last_updated_ts
                 )
+                if (
+                    (dictionary := self.attributes_dictionary)
+                    and should_compress(shared_attrs_bytes)
+                    and (
+                        shared_attrs_bin := compress_attributes(
+                            shared_attrs_bytes, dictionary[1]
+                        )
+                    )
+                ):
+                    dbstate_attributes.shared_attrs_bin = shared_attrs_bin
+                    dbstate_attributes.dictionary_id = dictionary[0]
+                else:
+                    dbstate_attributes.shared_attrs = shared_attrs
                 dbstate.state_attributes = dbstate_attributes
                 self._pending_state_attributes[shared_attrs] = dbstate_attributes
                 self.event_session.add(dbstate_attributes)
-
-        if old_state := self._old_states.pop(dbstate.entity_id, None):
+                if self._state_attributes_hashes is not None:
+                    self._state_attributes_hashes.add(attr_hash)
+
+        entity_id: str = dbstate.entity_id
+        # Matching metadata found in the pending commit
+        if pending_states_meta := self._pending_states_meta.get(entity_id):
+            dbstate.states_meta_rel = pending_states_meta
+        # Matching metadata id found in the cache
+        elif metadata_id := self._states_meta_ids.get(entity_id):
+            dbstate.metadata_id = metadata_id
+        # Matching metadata found in the database
+        elif metadata_id := self._find_states_metadata_id_in_db(entity_id):
+            self._states_meta_ids[entity_id] = dbstate.metadata_id = metadata_id
+        # No matching metadata found, save it in the DB
+        else:
+            dbstates_meta = StatesMeta(entity_id=entity_id)
+            dbstate.states_meta_rel = self._pending_states_meta[
+                entity_id
+            ] = dbstates_meta
+            self.event_session.add(dbstates_meta)
+        if self.states_meta_active:
+            dbstate.entity_id = None
+
+        if old_state := self._old_states.pop(entity_id, None):
             if old_state.state_id:
                 dbstate.old_state_id = old_state.state_id
             else:
                 dbstate.old_state = old_state
         if event.data.get("new_state"):
-            self._old_states[dbstate.entity_id] = dbstate
-            self._pending_expunge.append(dbstate)
+            self._old_states[entity_id] = dbstate
         else:
             dbstate.state = None
-        self.event_session.add(dbstate)
+        self._pending_states.append(dbstate)
 
     def _handle_database_error(self, err: Exception) -> bool:
         """Handle a database error that may result in moving away the corrupt db."""
@@ -924,7 +1243,13 @@ class Recorder(threading.Thread):
 
     def _event_session_has_pending_writes(self) -> bool:
         return bool(
-            self.event_session and (self.event_session.new or self.event_session.dirty)
+            self.event_session
+            and (
+                self._pending_events
+                or self._pending_states
+                or self.event_session.new
+                or self.event_session.dirty
+            )
         )
 
     def _commit_event_session_or_retry(self) -> None:
@@ -953,27 +1278,54 @@ class Recorder(threading.Thread):
         assert self.event_session is not None
         self._commits_without_expire += 1
 
-        self.event_session.commit()
-        if self._pending_expunge:
-            for dbstate in self._pending_expunge:
-                # Expunge the state so its not expired
-                # until we use it later for dbstate.old_state
-                if dbstate in self.event_session:
-                    self.event_session.expunge(dbstate)
-            self._pending_expunge = []
+        rows = len(self._pending_events) + len(self._pending_states)
+        flush_start = time.perf_counter()
+        if rows:
+            # Flush the pending event data, state attributes and states
+            # metadata first so their ids are known for the bulk inserts
+            self.event_session.flush()
+            try:
+                self._write_shared_data_last_used()
+                if self._pending_events:
+                    bulk_insert_events(self.event_session, self._pending_events)
+                if self._pending_states:
+                    bulk_insert_states(
+                        self.event_session, self._pending_states, self.dialect_name
+                    )
+                commit_start = time.perf_counter()
+                self.event_session.commit()
+            except Exception:
+                # The inserts are rolled back so the state_ids
+                # must be assigned again when the commit is retried
+                for dbstate in self._pending_states:
+                    dbstate.state_id = None
+                raise
+            self._pending_events = []
+            self._pending_states = []
+        else:
+            commit_start = flush_start
+            self.event_session.commit()
+        self._update_commit_metrics(rows, flush_start, commit_start)
 
         # We just committed the state attributes to the database
         # and we now know the attributes_ids.  We can save
         # many selects for matching attributes by loading them
         # into the LRU cache now.
-        for state_attr in self._pending_state_attributes.values():
-            self._state_attributes_ids[
-                state_attr.shared_attrs
-            ] = state_attr.attributes_id
+        for shared_attrs, state_attr in self._pending_state_attributes.items():
+            self._state_attributes_ids[shared_attrs] = state_attr.attributes_id
+            self._state_attributes_last_used[
+                state_attr.attributes_id
+            ] = state_attr.last_used_ts
         self._pending_state_attributes = {}
         for event_data in self._pending_event_data.values():
             self._event_data_ids[event_data.shared_data] = event_data.data_id
+            self._event_data_last_used[event_data.data_id] = event_data.last_used_ts
         self._pending_event_data = {}
+        self._pending_state_attributes_last_used = {}
+        self._pending_event_data_last_used = {}
+        for states_meta in self._pending_states_meta.values():
+            self._states_meta_ids[states_meta.entity_id] = states_meta.metadata_id
+        self._pending_states_meta = {}
 
         # Expire is an expensive operation (frequently more expensive
         # than the flush and commit itself) so we only
@@ -982,6 +1334,63 @@ class Recorder(threading.Thread):
             self._commits_without_expire = 0
             self.event_session.expire_all()
 
+    def _write_shared_data_last_used(self) -> None:
+        """Write the outdated last_used_ts of attributes and event data."""
+        assert self.event_session is not None
+        if self._pending_state_attributes_last_used:
+            self.event_session.bulk_update_mappings(
+                StateAttributes,
+                [
+                    {"attributes_id": attributes_id, "last_used_ts": last_used_ts}
+                    for attributes_id, last_used_ts in (
+                        self._pending_state_attributes_last_used.items()
+                    )
+                ],
+            )
+        if self._pending_event_data_last_used:
+            self.event_session.bulk_update_mappings(
+                EventData,
+                [
+                    {"data_id": data_id, "last_used_ts": last_used_ts}
+                    for data_id, last_used_ts in (
+                        self._pending_event_data_last_used.items()
+                    )
+                ],
+            )
+
+    def _update_commit_metrics(
+        self, rows: int, flush_start: float, commit_start: float
+    ) -> None:
+        """Update the metrics after a commit and adapt the commit interval."""
+        now = time.perf_counter()
+        metrics = self.metrics
+        metrics.build_time = self._pending_build_time
+        metrics.flush_time = commit_start - flush_start
+        metrics.commit_time = now - commit_start
+        metrics.rows_committed += rows
+        if self._last_commit_time is not None and now > self._last_commit_time:
+            metrics.rows_per_second = rows / (now - self._last_commit_time)
+        if self._last_event_time_fired is not None:
+            metrics.queue_wait = max(
+                time.time() - self._last_event_time_fired.timestamp(), 0
+            )
+            self._last_event_time_fired = None
+        self._last_commit_time = now
+        self._pending_build_time = 0.0
+
+        if not self.commit_interval:
+            return
+        backlog = self.backlog
+        if backlog > COMMIT_INTERVAL_BACKLOG_THRESHOLD:
+            metrics.commit_interval = min(
+                metrics.commit_interval * 2,
+                self.commit_interval * MAX_COMMIT_INTERVAL_MULTIPLIER,
+            )
+        elif not backlog:
+            metrics.commit_interval = max(
+                metrics.commit_interval / 2, self.commit_interval
+            )
+
     def _handle_sqlite_corruption(self) -> None:
         """Handle the sqlite3 database being corrupt."""
         self._close_event_session()
@@ -994,10 +1403,18 @@ class Recorder(threading.Thread):
     def _close_event_session(self) -> None:
         """Close the event session."""
         self._old_states = {}
+        self._pending_events = []
+        self._pending_states = []
         self._state_attributes_ids = {}
         self._event_data_ids = {}
+        self._states_meta_ids = {}
         self._pending_state_attributes = {}
         self._pending_event_data = {}
+        self._pending_states_meta = {}
+        self._state_attributes_last_used = {}
+        self._event_data_last_used = {}
+        self._pending_state_attributes_last_used = {}
+        self._pending_event_data_last_used = {}
 
         if not self.event_session:
             return
@@ -1129,6 +1546,10 @@ class Recorder(threading.Thread):
             kwargs["pool_reset_on_return"] = None
         elif self.db_url.startswith(SQLITE_URL_PREFIX):
             kwargs["poolclass"] = RecorderPool
+            # One connection for the recorder thread and one for each
+            # db executor worker, WAL mode lets the workers read
+            # concurrently while the recorder thread writes
+            kwargs["pool_size"] = self.db_max_readers + 1
         elif self.db_url.startswith(
             (
                 MARIADB_URL_PREFIX,
@@ -1150,6 +1571,9 @@ class Recorder(threading.Thread):
         # Disable extended logging for non SQLite databases
         if not self.db_url.startswith(SQLITE_URL_PREFIX):
             kwargs["echo"] = False
+            # Keep a connection open for the recorder thread and
+            # each db executor worker
+            kwargs["pool_size"] = self.db_max_readers + 1
 
         if self._using_file_sqlite:
             validate_or_move_away_sqlite_database(self.db_url)
@@ -1196,6 +1620,59 @@ class Recorder(threading.Thread):
             self.queue_task(StatisticsTask(start))
             start = end
 
+    def _activate_states_meta_or_schedule_migration(self, session: Session) -> None:
+        """Write new states without entity_id or migrate the existing states."""
+        if self.schema_version < 31:
+            # The states table does not have the metadata_id column yet
+            return
+        if session.execute(has_entity_ids_to_migrate()).first():
+            _LOGGER.debug("Scheduling migration of entity_ids to states_meta")
+            self.queue_task(EntityIDMigrationTask())
+            return
+        self.states_meta_active = True
+
+    def _schedule_context_ids_migration(self, session: Session) -> None:
+        """Convert the string context ids of the existing rows to bytes."""
+        if self.schema_version < 32:
+            # The tables do not have the binary context id columns yet
+            return
+        if session.execute(has_events_context_ids_to_migrate()).first():
+            _LOGGER.debug("Scheduling migration of the context ids of the events")
+            self.queue_task(EventsContextIDMigrationTask())
+        if session.execute(has_states_context_ids_to_migrate()).first():
+            _LOGGER.debug("Scheduling migration of the context ids of the states")
+            self.queue_task(StatesContextIDMigrationTask())
+
+    def _schedule_timestamps_migration(self, session: Session) -> None:
+        """Convert the datetimes of the existing rows to epoch floats."""
+        if self.schema_version < 33:
+            # The tables do not have the timestamp columns yet
+            return
+        if session.execute(has_events_timestamps_to_migrate()).first():
+            _LOGGER.debug("Scheduling migration of the timestamps of the events")
+            self.queue_task(EventsTimestampMigrationTask())
+        if session.execute(has_states_timestamps_to_migrate()).first():
+            _LOGGER.debug("Scheduling migration of the timestamps of the states")
+            self.queue_task(StatesTimestampMigrationTask())
+
+    def _schedule_load_shared_hashes(self) -> None:
+        """Load the hashes of the shared attributes and event data."""
+        self.queue_task(SharedHashesTask(TABLE_STATE_ATTRIBUTES))
+        self.queue_task(SharedHashesTask(TABLE_EVENT_DATA))
+
+    def _schedule_compress_attributes(self) -> None:
+        """Compress the shared attributes which are stored as text."""
+        if not self.compress_attributes or self.schema_version < 36:
+            return
+        self.queue_task(CompressAttributesTask())
+
+    def _schedule_statistics_rollups_backfill(self) -> None:
+        """Roll up the long term statistics which are not rolled up yet."""
+        if self.schema_version < 34:
+            # The statistics rollup tables are not used yet
+            return
+        self.queue_task(StatisticsRollupsBackfillTask())
+
     def _end_session(self) -> None:
         """End the recorder session."""
         if self.event_session is None:
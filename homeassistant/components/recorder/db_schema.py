@@ -4,6 +4,7 @@ from __future__ import annotations
 from collections.abc import Callable
 from datetime import datetime, timedelta
 import logging
+import time
 from typing import Any, TypeVar, cast
 
 import ciso8601
@@ -19,16 +20,18 @@ from sqlalchemy import (
     Identity,
     Index,
     Integer,
+    LargeBinary,
     SmallInteger,
     String,
     Text,
-    distinct,
+    func,
     type_coerce,
 )
 from sqlalchemy.dialects import mysql, oracle, postgresql, sqlite
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.orm import aliased, declarative_base, relationship
 from sqlalchemy.orm.session import Session
+from sqlalchemy.types import TypeDecorator
 
 from homeassistant.const import (
     MAX_LENGTH_EVENT_CONTEXT_ID,
@@ -46,14 +49,23 @@ from homeassistant.helpers.json import (
 )
 import homeassistant.util.dt as dt_util
 
+from .compression import decompress_attributes
 from .const import ALL_DOMAIN_EXCLUDE_ATTRS
-from .models import StatisticData, StatisticMetaData, process_timestamp
+from .models import (
+    StatisticData,
+    StatisticMetaData,
+    bytes_to_ulid_or_none,
+    bytes_to_uuid_hex_or_none,
+    process_datetime_to_timestamp,
+    ulid_to_bytes_or_none,
+    uuid_hex_to_bytes_or_none,
+)
 
 # SQLAlchemy Schema
 # pylint: disable=invalid-name
 Base = declarative_base()
 
-SCHEMA_VERSION = 30
+SCHEMA_VERSION = 36
 
 _StatisticsBaseSelfT = TypeVar("_StatisticsBaseSelfT", bound="StatisticsBase")
 
@@ -63,16 +75,22 @@ TABLE_EVENTS = "events"
 TABLE_EVENT_DATA = "event_data"
 TABLE_STATES = "states"
 TABLE_STATE_ATTRIBUTES = "state_attributes"
+TABLE_STATE_ATTRIBUTES_DICTIONARY = "state_attributes_dictionary"
+TABLE_STATES_META = "states_meta"
 TABLE_RECORDER_RUNS = "recorder_runs"
 TABLE_SCHEMA_CHANGES = "schema_changes"
 TABLE_STATISTICS = "statistics"
 TABLE_STATISTICS_META = "statistics_meta"
 TABLE_STATISTICS_RUNS = "statistics_runs"
 TABLE_STATISTICS_SHORT_TERM = "statistics_short_term"
+TABLE_STATISTICS_DAILY = "statistics_daily"
+TABLE_STATISTICS_MONTHLY = "statistics_monthly"
 
 ALL_TABLES = [
     TABLE_STATES,
     TABLE_STATE_ATTRIBUTES,
+    TABLE_STATE_ATTRIBUTES_DICTIONARY,
+    TABLE_STATES_META,
     TABLE_EVENTS,
     TABLE_EVENT_DATA,
     TABLE_RECORDER_RUNS,
@@ -81,6 +99,8 @@ ALL_TABLES = [
     TABLE_STATISTICS_META,
     TABLE_STATISTICS_RUNS,
     TABLE_STATISTICS_SHORT_TERM,
+    TABLE_STATISTICS_DAILY,
+    TABLE_STATISTICS_MONTHLY,
 ]
 
 TABLES_TO_CHECK = [
@@ -91,9 +111,21 @@ TABLES_TO_CHECK = [
 ]
 
 LAST_UPDATED_INDEX = "ix_states_last_updated"
+LAST_UPDATED_TS_INDEX = "ix_states_last_updated_ts"
 ENTITY_ID_LAST_UPDATED_INDEX = "ix_states_entity_id_last_updated"
+METADATA_ID_LAST_UPDATED_INDEX = "ix_states_metadata_id_last_updated"
+METADATA_ID_LAST_UPDATED_TS_INDEX = "ix_states_metadata_id_last_updated_ts"
+EVENTS_TIME_FIRED_INDEX = "ix_events_time_fired"
+EVENTS_TIME_FIRED_TS_INDEX = "ix_events_time_fired_ts"
+EVENTS_EVENT_TYPE_TIME_FIRED_INDEX = "ix_events_event_type_time_fired"
+EVENTS_EVENT_TYPE_TIME_FIRED_TS_INDEX = "ix_events_event_type_time_fired_ts"
 EVENTS_CONTEXT_ID_INDEX = "ix_events_context_id"
 STATES_CONTEXT_ID_INDEX = "ix_states_context_id"
+EVENTS_CONTEXT_ID_BIN_INDEX = "ix_events_context_id_bin"
+STATES_CONTEXT_ID_BIN_INDEX = "ix_states_context_id_bin"
+EVENT_DATA_LAST_USED_TS_INDEX = "ix_event_data_last_used_ts"
+STATE_ATTRIBUTES_LAST_USED_TS_INDEX = "ix_state_attributes_last_used_ts"
+CONTEXT_ID_BIN_MAX_LENGTH = 16
 
 
 class FAST_PYSQLITE_DATETIME(sqlite.DATETIME):  # type: ignore[misc]
@@ -121,6 +153,59 @@ DOUBLE_TYPE = (
     .with_variant(oracle.DOUBLE_PRECISION(), "oracle")
     .with_variant(postgresql.DOUBLE_PRECISION(), "postgresql")
 )
+# Timestamps are stored as epoch floats to avoid
+# parsing datetimes when reading back rows
+TIMESTAMP_TYPE = DOUBLE_TYPE
+CONTEXT_BINARY_TYPE = LargeBinary(CONTEXT_ID_BIN_MAX_LENGTH).with_variant(
+    mysql.VARBINARY(CONTEXT_ID_BIN_MAX_LENGTH), "mysql"
+)
+
+
+class DatetimeAsTimestamp(TypeDecorator):  # type: ignore[misc]
+    """Read and compare a datetime column as epoch floats.
+
+    The timestamps of the rows recorded before schema 33 are only
+    stored as datetimes until the live migration has converted them.
+    """
+
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value: float | None, dialect: Any) -> datetime | None:
+        """Convert an epoch float to a datetime."""
+        return None if value is None else dt_util.utc_from_timestamp(value)
+
+    def process_result_value(
+        self, value: datetime | None, dialect: Any
+    ) -> float | None:
+        """Convert a datetime to an epoch float."""
+        return None if value is None else process_datetime_to_timestamp(value)
+
+
+class ContextIdAsBinary(TypeDecorator):  # type: ignore[misc]
+    """Read a string context id column as 16 bytes.
+
+    The context ids of the rows recorded before schema 32 are only
+    stored as strings until the live migration has converted them.
+    """
+
+    impl = String
+    cache_ok = True
+
+    def process_result_value(self, value: str | None, dialect: Any) -> bytes | None:
+        """Convert a string context id to 16 bytes."""
+        return ulid_to_bytes_or_none(value)
+
+
+class UserIdAsBinary(TypeDecorator):  # type: ignore[misc]
+    """Read a uuid hex context user id column as 16 bytes."""
+
+    impl = String
+    cache_ok = True
+
+    def process_result_value(self, value: str | None, dialect: Any) -> bytes | None:
+        """Convert a uuid hex string to 16 bytes."""
+        return uuid_hex_to_bytes_or_none(value)
 
 
 class JSONLiteral(JSON):  # type: ignore[misc]
@@ -146,7 +231,9 @@ class Events(Base):  # type: ignore[misc,valid-type]
     __table_args__ = (
         # Used for fetching events at a specific time
         # see logbook
-        Index("ix_events_event_type_time_fired", "event_type", "time_fired"),
+        Index(EVENTS_EVENT_TYPE_TIME_FIRED_TS_INDEX, "event_type", "time_fired_ts"),
+        # Used for linking the contexts in the logbook
+        Index(EVENTS_CONTEXT_ID_BIN_INDEX, "context_id_bin"),
         {"mysql_default_charset": "utf8mb4", "mysql_collate": "utf8mb4_unicode_ci"},
     )
     __tablename__ = TABLE_EVENTS
@@ -155,11 +242,15 @@ class Events(Base):  # type: ignore[misc,valid-type]
     event_data = Column(Text().with_variant(mysql.LONGTEXT, "mysql"))
     origin = Column(String(MAX_LENGTH_EVENT_ORIGIN))  # no longer used for new rows
     origin_idx = Column(SmallInteger)
-    time_fired = Column(DATETIME_TYPE, index=True)
-    context_id = Column(String(MAX_LENGTH_EVENT_CONTEXT_ID), index=True)
-    context_user_id = Column(String(MAX_LENGTH_EVENT_CONTEXT_ID))
-    context_parent_id = Column(String(MAX_LENGTH_EVENT_CONTEXT_ID))
+    time_fired = Column(DATETIME_TYPE)  # no longer used
+    time_fired_ts = Column(TIMESTAMP_TYPE, index=True)
+    context_id = Column(String(MAX_LENGTH_EVENT_CONTEXT_ID))  # no longer used
+    context_user_id = Column(String(MAX_LENGTH_EVENT_CONTEXT_ID))  # no longer used
+    context_parent_id = Column(String(MAX_LENGTH_EVENT_CONTEXT_ID))  # no longer used
     data_id = Column(Integer, ForeignKey("event_data.data_id"), index=True)
+    context_id_bin = Column(CONTEXT_BINARY_TYPE)
+    context_user_id_bin = Column(CONTEXT_BINARY_TYPE)
+    context_parent_id_bin = Column(CONTEXT_BINARY_TYPE)
     event_data_rel = relationship("EventData")
 
     def __repr__(self) -> str:
@@ -167,10 +258,19 @@ class Events(Base):  # type: ignore[misc,valid-type]
         return (
             f"<recorder.Events("
             f"id={self.event_id}, type='{self.event_type}', "
-            f"origin_idx='{self.origin_idx}', time_fired='{self.time_fired}'"
+            f"origin_idx='{self.origin_idx}', time_fired='{self._time_fired_isotime}'"
             f", data_id={self.data_id})>"
         )
 
+    @property
+    def _time_fired_isotime(self) -> str | None:
+        """Return time_fired as an isotime string."""
+        if self.time_fired_ts is None:
+            return None
+        return dt_util.utc_from_timestamp(self.time_fired_ts).isoformat(
+            sep=" ", timespec="seconds"
+        )
+
     @staticmethod
     def from_event(event: Event) -> Events:
         """Create an event database object from a native event."""
@@ -178,18 +278,18 @@ class Events(Base):  # type: ignore[misc,valid-type]
             event_type=event.event_type,
             event_data=None,
             origin_idx=EVENT_ORIGIN_TO_IDX.get(event.origin),
-            time_fired=event.time_fired,
-            context_id=event.context.id,
-            context_user_id=event.context.user_id,
-            context_parent_id=event.context.parent_id,
+            time_fired_ts=dt_util.utc_to_timestamp(event.time_fired),
+            context_id_bin=ulid_to_bytes_or_none(event.context.id),
+            context_user_id_bin=uuid_hex_to_bytes_or_none(event.context.user_id),
+            context_parent_id_bin=ulid_to_bytes_or_none(event.context.parent_id),
         )
 
     def to_native(self, validate_entity_id: bool = True) -> Event | None:
         """Convert to a native HA Event."""
         context = Context(
-            id=self.context_id,
-            user_id=self.context_user_id,
-            parent_id=self.context_parent_id,
+            id=bytes_to_ulid_or_none(self.context_id_bin),
+            user_id=bytes_to_uuid_hex_or_none(self.context_user_id_bin),
+            parent_id=bytes_to_ulid_or_none(self.context_parent_id_bin),
         )
         try:
             return Event(
@@ -198,7 +298,7 @@ class Events(Base):  # type: ignore[misc,valid-type]
                 EventOrigin(self.origin)
                 if self.origin
                 else EVENT_ORIGIN_ORDER[self.origin_idx],
-                process_timestamp(self.time_fired),
+                dt_util.utc_from_timestamp(self.time_fired_ts or 0),
                 context=context,
             )
         except JSON_DECODE_EXCEPTIONS:
@@ -218,6 +318,9 @@ class EventData(Base):  # type: ignore[misc,valid-type]
     hash = Column(BigInteger, index=True)
     # Note that this is not named attributes to avoid confusion with the states table
     shared_data = Column(Text().with_variant(mysql.LONGTEXT, "mysql"))
+    # The time_fired_ts of the newest event using the data, written at most
+    # once per SHARED_DATA_LAST_USED_INTERVAL so it may lag behind by that much
+    last_used_ts = Column(TIMESTAMP_TYPE, index=True)
 
     def __repr__(self) -> str:
         """Return string representation of instance for debugging."""
@@ -261,12 +364,16 @@ class States(Base):  # type: ignore[misc,valid-type]
     __table_args__ = (
         # Used for fetching the state of entities at a specific time
         # (get_states in history.py)
-        Index(ENTITY_ID_LAST_UPDATED_INDEX, "entity_id", "last_updated"),
+        Index(METADATA_ID_LAST_UPDATED_TS_INDEX, "metadata_id", "last_updated_ts"),
+        # Used for linking the contexts in the logbook
+        Index(STATES_CONTEXT_ID_BIN_INDEX, "context_id_bin"),
         {"mysql_default_charset": "utf8mb4", "mysql_collate": "utf8mb4_unicode_ci"},
     )
     __tablename__ = TABLE_STATES
     state_id = Column(Integer, Identity(), primary_key=True)
-    entity_id = Column(String(MAX_LENGTH_STATE_ENTITY_ID))
+    entity_id = Column(
+        String(MAX_LENGTH_STATE_ENTITY_ID)
+    )  # no longer used for new rows once the states_meta migration is done
     state = Column(String(MAX_LENGTH_STATE_STATE))
     attributes = Column(
         Text().with_variant(mysql.LONGTEXT, "mysql")
@@ -274,30 +381,47 @@ class States(Base):  # type: ignore[misc,valid-type]
     event_id = Column(  # no longer used for new rows
         Integer, ForeignKey("events.event_id", ondelete="CASCADE"), index=True
     )
-    last_changed = Column(DATETIME_TYPE)
-    last_updated = Column(DATETIME_TYPE, default=dt_util.utcnow, index=True)
+    last_changed = Column(DATETIME_TYPE)  # no longer used
+    last_changed_ts = Column(TIMESTAMP_TYPE)
+    last_updated = Column(DATETIME_TYPE)  # no longer used
+    last_updated_ts = Column(TIMESTAMP_TYPE, default=time.time, index=True)
     old_state_id = Column(Integer, ForeignKey("states.state_id"), index=True)
     attributes_id = Column(
         Integer, ForeignKey("state_attributes.attributes_id"), index=True
     )
-    context_id = Column(String(MAX_LENGTH_EVENT_CONTEXT_ID), index=True)
-    context_user_id = Column(String(MAX_LENGTH_EVENT_CONTEXT_ID))
-    context_parent_id = Column(String(MAX_LENGTH_EVENT_CONTEXT_ID))
+    context_id = Column(String(MAX_LENGTH_EVENT_CONTEXT_ID))  # no longer used
+    context_user_id = Column(String(MAX_LENGTH_EVENT_CONTEXT_ID))  # no longer used
+    context_parent_id = Column(String(MAX_LENGTH_EVENT_CONTEXT_ID))  # no longer used
     origin_idx = Column(SmallInteger)  # 0 is local, 1 is remote
+    metadata_id = Column(Integer, ForeignKey("states_meta.metadata_id"))
+    context_id_bin = Column(CONTEXT_BINARY_TYPE)
+    context_user_id_bin = Column(CONTEXT_BINARY_TYPE)
+    context_parent_id_bin = Column(CONTEXT_BINARY_TYPE)
     old_state = relationship("States", remote_side=[state_id])
     state_attributes = relationship("StateAttributes")
+    states_meta_rel = relationship("StatesMeta")
 
     def __repr__(self) -> str:
         """Return string representation of instance for debugging."""
         return (
             f"<recorder.States("
             f"id={self.state_id}, entity_id='{self.entity_id}', "
+            f"metadata_id={self.metadata_id}, "
             f"state='{self.state}', event_id='{self.event_id}', "
-            f"last_updated='{self.last_updated.isoformat(sep=' ', timespec='seconds')}', "
+            f"last_updated='{self._last_updated_isotime}', "
             f"old_state_id={self.old_state_id}, attributes_id={self.attributes_id}"
             f")>"
         )
 
+    @property
+    def _last_updated_isotime(self) -> str | None:
+        """Return last_updated as an isotime string."""
+        if self.last_updated_ts is None:
+            return None
+        return dt_util.utc_from_timestamp(self.last_updated_ts).isoformat(
+            sep=" ", timespec="seconds"
+        )
+
     @staticmethod
     def from_event(event: Event) -> States:
         """Create object from a state_changed event."""
@@ -306,34 +430,34 @@ class States(Base):  # type: ignore[misc,valid-type]
         dbstate = States(
             entity_id=entity_id,
             attributes=None,
-            context_id=event.context.id,
-            context_user_id=event.context.user_id,
-            context_parent_id=event.context.parent_id,
+            context_id_bin=ulid_to_bytes_or_none(event.context.id),
+            context_user_id_bin=uuid_hex_to_bytes_or_none(event.context.user_id),
+            context_parent_id_bin=ulid_to_bytes_or_none(event.context.parent_id),
             origin_idx=EVENT_ORIGIN_TO_IDX.get(event.origin),
         )
 
         # None state means the state was removed from the state machine
         if state is None:
             dbstate.state = ""
-            dbstate.last_updated = event.time_fired
-            dbstate.last_changed = None
+            dbstate.last_updated_ts = dt_util.utc_to_timestamp(event.time_fired)
+            dbstate.last_changed_ts = None
             return dbstate
 
         dbstate.state = state.state
-        dbstate.last_updated = state.last_updated
+        dbstate.last_updated_ts = dt_util.utc_to_timestamp(state.last_updated)
         if state.last_updated == state.last_changed:
-            dbstate.last_changed = None
+            dbstate.last_changed_ts = None
         else:
-            dbstate.last_changed = state.last_changed
+            dbstate.last_changed_ts = dt_util.utc_to_timestamp(state.last_changed)
 
         return dbstate
 
     def to_native(self, validate_entity_id: bool = True) -> State | None:
         """Convert to an HA state object."""
         context = Context(
-            id=self.context_id,
-            user_id=self.context_user_id,
-            parent_id=self.context_parent_id,
+            id=bytes_to_ulid_or_none(self.context_id_bin),
+            user_id=bytes_to_uuid_hex_or_none(self.context_user_id_bin),
+            parent_id=bytes_to_ulid_or_none(self.context_parent_id_bin),
         )
         try:
             attrs = json_loads(self.attributes) if self.attributes else {}
@@ -341,13 +465,17 @@ class States(Base):  # type: ignore[misc,valid-type]
             # When json_loads fails
             _LOGGER.exception("Error converting row to state: %s", self)
             return None
-        if self.last_changed is None or self.last_changed == self.last_updated:
-            last_changed = last_updated = process_timestamp(self.last_updated)
+        last_updated = dt_util.utc_from_timestamp(self.last_updated_ts or 0)
+        if self.last_changed_ts is None or self.last_changed_ts == self.last_updated_ts:
+            last_changed = last_updated
         else:
-            last_updated = process_timestamp(self.last_updated)
-            last_changed = process_timestamp(self.last_changed)
+            last_changed = dt_util.utc_from_timestamp(self.last_changed_ts)
+        entity_id = self.entity_id
+        if entity_id is None and self.states_meta_rel is not None:
+            # The entity_id is only stored in the states_meta table
+            entity_id = self.states_meta_rel.entity_id
         return State(
-            self.entity_id,
+            entity_id,
             self.state,
             # Join the state_attributes table on attributes_id to get the attributes
             # for newer states
@@ -370,6 +498,13 @@ class StateAttributes(Base):  # type: ignore[misc,valid-type]
     hash = Column(BigInteger, index=True)
     # Note that this is not named attributes to avoid confusion with the states table
     shared_attrs = Column(Text().with_variant(mysql.LONGTEXT, "mysql"))
+    # Large attributes may be stored compressed with the dictionary
+    # dictionary_id instead, shared_attrs is NULL for them
+    shared_attrs_bin = Column(LargeBinary().with_variant(mysql.LONGBLOB, "mysql"))
+    dictionary_id = Column(Integer)
+    # The last_updated_ts of the newest state using the attributes, written at most
+    # once per SHARED_DATA_LAST_USED_INTERVAL so it may lag behind by that much
+    last_used_ts = Column(TIMESTAMP_TYPE, index=True)
 
     def __repr__(self) -> str:
         """Return string representation of instance for debugging."""
@@ -414,13 +549,56 @@ class StateAttributes(Base):  # type: ignore[misc,valid-type]
     def to_native(self) -> dict[str, Any]:
         """Convert to an HA state object."""
         try:
+            if self.shared_attrs is None and self.shared_attrs_bin is not None:
+                return cast(
+                    dict[str, Any],
+                    json_loads(
+                        decompress_attributes(self.shared_attrs_bin, self.dictionary_id)
+                    ),
+                )
             return cast(dict[str, Any], json_loads(self.shared_attrs))
-        except JSON_DECODE_EXCEPTIONS:
-            # When json_loads fails
+        except ValueError:
+            # When json_loads or decompressing fails
             _LOGGER.exception("Error converting row to state attributes: %s", self)
             return {}
 
 
+class StateAttributesDictionary(Base):  # type: ignore[misc,valid-type]
+    """Dictionary the shared attributes are compressed with."""
+
+    __tablename__ = TABLE_STATE_ATTRIBUTES_DICTIONARY
+    dictionary_id = Column(Integer, Identity(), primary_key=True)
+    created_ts = Column(TIMESTAMP_TYPE, default=time.time)
+    zdict = Column(LargeBinary().with_variant(mysql.LONGBLOB, "mysql"))
+
+    def __repr__(self) -> str:
+        """Return string representation of instance for debugging."""
+        return (
+            "<recorder.StateAttributesDictionary("
+            f"id={self.dictionary_id}, size={len(self.zdict or b'')}"
+            ")>"
+        )
+
+
+class StatesMeta(Base):  # type: ignore[misc,valid-type]
+    """Metadata for states."""
+
+    __table_args__ = (
+        {"mysql_default_charset": "utf8mb4", "mysql_collate": "utf8mb4_unicode_ci"},
+    )
+    __tablename__ = TABLE_STATES_META
+    metadata_id = Column(Integer, Identity(), primary_key=True)
+    entity_id = Column(String(MAX_LENGTH_STATE_ENTITY_ID), index=True, unique=True)
+
+    def __repr__(self) -> str:
+        """Return string representation of instance for debugging."""
+        return (
+            "<recorder.StatesMeta("
+            f"id={self.metadata_id}, entity_id='{self.entity_id}'"
+            ")>"
+        )
+
+
 class StatisticsBase:
     """Statistics base class."""
 
@@ -484,6 +662,36 @@ class StatisticsShortTerm(Base, StatisticsBase):  # type: ignore[misc,valid-type
     __tablename__ = TABLE_STATISTICS_SHORT_TERM
 
 
+class StatisticsDaily(Base, StatisticsBase):  # type: ignore[misc,valid-type]
+    """Long term statistics rolled up per local day."""
+
+    __table_args__ = (
+        # Used for fetching statistics for a certain entity at a specific time
+        Index(
+            "ix_statistics_daily_statistic_id_start",
+            "metadata_id",
+            "start",
+            unique=True,
+        ),
+    )
+    __tablename__ = TABLE_STATISTICS_DAILY
+
+
+class StatisticsMonthly(Base, StatisticsBase):  # type: ignore[misc,valid-type]
+    """Long term statistics rolled up per local month."""
+
+    __table_args__ = (
+        # Used for fetching statistics for a certain entity at a specific time
+        Index(
+            "ix_statistics_monthly_statistic_id_start",
+            "metadata_id",
+            "start",
+            unique=True,
+        ),
+    )
+    __tablename__ = TABLE_STATISTICS_MONTHLY
+
+
 class StatisticsMeta(Base):  # type: ignore[misc,valid-type]
     """Statistics meta data."""
 
@@ -539,14 +747,24 @@ class RecorderRuns(Base):  # type: ignore[misc,valid-type]
 
         assert session is not None, "RecorderRuns need to be persisted"
 
-        query = session.query(distinct(States.entity_id)).filter(
-            States.last_updated >= self.start
+        query = (
+            session.query(
+                func.coalesce(StatesMeta.entity_id, States.entity_id).label("entity_id")
+            )
+            .select_from(States)
+            .outerjoin(StatesMeta, States.metadata_id == StatesMeta.metadata_id)
+            .distinct()
+            .filter(States.last_updated_ts >= process_datetime_to_timestamp(self.start))
         )
 
         if point_in_time is not None:
-            query = query.filter(States.last_updated < point_in_time)
+            query = query.filter(
+                States.last_updated_ts < process_datetime_to_timestamp(point_in_time)
+            )
         elif self.end is not None:
-            query = query.filter(States.last_updated < self.end)
+            query = query.filter(
+                States.last_updated_ts < process_datetime_to_timestamp(self.end)
+            )
 
         return [row[0] for row in query]
 
@@ -0,0 +1,129 @@
+"""Downsample history rows while streaming them from the database."""
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any, Generic, TypeVar
+
+_T = TypeVar("_T")
+
+_NUMERIC_STATE = object()
+
+
+def state_to_float(state: Any) -> float | None:
+    """Convert a state to a float or None if it is not numeric."""
+    try:
+        return float(state)
+    except (TypeError, ValueError):
+        return None
+
+
+class _LargestTriangleThreeBuckets(Generic[_T]):
+    """Streaming Largest-Triangle-Three-Buckets selection.
+
+    Buckets are fixed time slices so the points can be selected without
+    knowing the number of rows in advance. Only the points of the current
+    and the following bucket are kept in memory.
+    """
+
+    def __init__(self, start_time_ts: float, bucket_width: float) -> None:
+        """Initialize the selection."""
+        self._start_time_ts = start_time_ts
+        self._bucket_width = bucket_width
+        self._anchor: tuple[float, float] | None = None
+        self._current: list[tuple[float, float, _T]] = []
+        self._current_bucket = 0
+        self._following: list[tuple[float, float, _T]] = []
+        self._following_bucket = 0
+
+    def add(self, timestamp: float, value: float, item: _T) -> Iterator[_T]:
+        """Add a point and yield the items that have been selected."""
+        if self._anchor is None:
+            # The first point is always kept
+            self._anchor = (timestamp, value)
+            yield item
+            return
+
+        point = (timestamp, value, item)
+        bucket = int((timestamp - self._start_time_ts) // self._bucket_width)
+        if not self._current:
+            self._current_bucket = bucket
+            self._current.append(point)
+        elif bucket == self._current_bucket and not self._following:
+            self._current.append(point)
+        elif not self._following or bucket == self._following_bucket:
+            self._following_bucket = bucket
+            self._following.append(point)
+        else:
+            yield self._select()
+            self._current = self._following
+            self._current_bucket = self._following_bucket
+            self._following = [point]
+            self._following_bucket = bucket
+
+    def flush(self) -> Iterator[_T]:
+        """Yield the remaining selected items and start over."""
+        if self._following:
+            yield self._select()
+            self._current = self._following
+        if self._current:
+            # The last point is always kept
+            last = self._current.pop()
+            if self._current:
+                self._following = [last]
+                yield self._select()
+            yield last[2]
+        self._anchor = None
+        self._current = []
+        self._following = []
+
+    def _select(self) -> _T:
+        """Select the point of the current bucket with the largest triangle.
+
+        The triangle is formed with the previously selected point and the
+        average of the following bucket.
+        """
+        following = self._following
+        count = len(following)
+        next_ts = sum(point[0] for point in following) / count
+        next_value = sum(point[1] for point in following) / count
+        anchor_ts, anchor_value = self._anchor  # type: ignore[misc]
+        best = max(
+            self._current,
+            key=lambda point: abs(
+                (anchor_ts - next_ts) * (point[1] - anchor_value)
+                - (anchor_ts - point[0]) * (next_value - anchor_value)
+            ),
+        )
+        self._anchor = (best[0], best[1])
+        return best[2]
+
+
+def downsample(
+    items: Iterable[_T],
+    get_timestamp: Callable[[_T], float],
+    get_state: Callable[[_T], Any],
+    start_time_ts: float,
+    end_time_ts: float,
+    max_points: int,
+) -> Iterator[_T]:
+    """Downsample items sorted by time to about max_points.
+
+    Numeric states are reduced with Largest-Triangle-Three-Buckets over
+    max_points time buckets between start_time_ts and end_time_ts. Runs of
+    the same non-numeric state are compressed to their first item.
+    """
+    lttb: _LargestTriangleThreeBuckets[_T] = _LargestTriangleThreeBuckets(
+        start_time_ts, max((end_time_ts - start_time_ts) / max_points, 1e-6)
+    )
+    last_state: Any = _NUMERIC_STATE
+    for item in items:
+        state = get_state(item)
+        if (value := state_to_float(state)) is not None:
+            last_state = _NUMERIC_STATE
+            yield from lttb.add(get_timestamp(item), value, item)
+            continue
+        yield from lttb.flush()
+        if state != last_state:
+            last_state = state
+            yield item
+    yield from lttb.flush()
@@ -1,8 +1,10 @@
 """Database executor helpers."""
 from __future__ import annotations
 
+from collections import OrderedDict, deque
 from collections.abc import Callable
 from concurrent.futures.thread import _threads_queues, _worker
+import queue
 import threading
 from typing import Any
 import weakref
@@ -18,6 +20,55 @@ def _worker_with_shutdown_hook(
     shutdown_hook()
 
 
+def _work_item_key(work_item: Any) -> str | None:
+    """Return the module that submitted a work item."""
+    if (fn := getattr(work_item, "fn", None)) is None:
+        return None
+    return getattr(getattr(fn, "func", fn), "__module__", None)
+
+
+class FairWorkQueue:
+    """A work queue that takes turns between the modules submitting jobs.
+
+    A burst of jobs from one module, such as the history graphs of a
+    dashboard, only gets every other free worker while jobs from another
+    module, such as the logbook, are waiting.
+    """
+
+    def __init__(self) -> None:
+        """Init the queue."""
+        self._condition = threading.Condition()
+        self._queues: OrderedDict[str | None, deque[Any]] = OrderedDict()
+
+    def put(self, work_item: Any) -> None:
+        """Add a work item to the queue of its module."""
+        key = _work_item_key(work_item)
+        with self._condition:
+            if (work_items := self._queues.get(key)) is None:
+                work_items = self._queues[key] = deque()
+            work_items.append(work_item)
+            self._condition.notify()
+
+    def get(self, block: bool = True) -> Any:
+        """Remove and return the next work item from the next module."""
+        with self._condition:
+            while not self._queues:
+                if not block:
+                    raise queue.Empty
+                self._condition.wait()
+            key, work_items = next(iter(self._queues.items()))
+            work_item = work_items.popleft()
+            if work_items:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            return work_item
+
+    def get_nowait(self) -> Any:
+        """Remove and return the next work item without blocking."""
+        return self.get(block=False)
+
+
 class DBInterruptibleThreadPoolExecutor(InterruptibleThreadPoolExecutor):
     """A database instance that will not deadlock on shutdown."""
 
@@ -25,6 +76,7 @@ class DBInterruptibleThreadPoolExecutor(InterruptibleThreadPoolExecutor):
         """Init the executor with a shutdown hook support."""
         self._shutdown_hook: Callable[[], None] = kwargs.pop("shutdown_hook")
         super().__init__(*args, **kwargs)
+        self._work_queue = FairWorkQueue()  # type: ignore[assignment]
 
     def _adjust_thread_count(self) -> None:
         """Overridden to add support for shutdown hook.
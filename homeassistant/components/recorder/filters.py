@@ -12,7 +12,7 @@ from homeassistant.const import CONF_DOMAINS, CONF_ENTITIES, CONF_EXCLUDE, CONF_
 from homeassistant.helpers.entityfilter import CONF_ENTITY_GLOBS
 from homeassistant.helpers.typing import ConfigType
 
-from .db_schema import ENTITY_ID_IN_EVENT, OLD_ENTITY_ID_IN_EVENT, States
+from .db_schema import ENTITY_ID_IN_EVENT, OLD_ENTITY_ID_IN_EVENT, States, StatesMeta
 
 DOMAIN = "history"
 HISTORY_FILTERS = "history_filters"
@@ -196,6 +196,15 @@ class Filters:
 
         return self._generate_filter_for_columns((States.entity_id,), _encoder)
 
+    def states_metadata_entity_filter(self) -> ClauseList:
+        """Generate the entity filter query for states joined with states_meta."""
+
+        def _encoder(data: Any) -> Any:
+            """Nothing to encode for states since there is no json."""
+            return data
+
+        return self._generate_filter_for_columns((StatesMeta.entity_id,), _encoder)
+
     def events_entity_filter(self) -> ClauseList:
         """Generate the entity filter query."""
         _encoder = json.dumps
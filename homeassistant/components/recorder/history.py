@@ -4,12 +4,25 @@ from __future__ import annotations
 from collections import defaultdict
 from collections.abc import Callable, Iterable, Iterator, MutableMapping
 from datetime import datetime
+from functools import partial
 from itertools import groupby
 import logging
+from operator import attrgetter
 import time
 from typing import Any, cast
 
-from sqlalchemy import Column, Text, and_, func, lambda_stmt, or_, select
+from sqlalchemy import (
+    Column,
+    Integer,
+    LargeBinary,
+    Text,
+    and_,
+    func,
+    lambda_stmt,
+    or_,
+    select,
+    type_coerce,
+)
 from sqlalchemy.engine.row import Row
 from sqlalchemy.orm.query import Query
 from sqlalchemy.orm.session import Session
@@ -25,13 +38,19 @@ from homeassistant.core import HomeAssistant, State, split_entity_id
 import homeassistant.util.dt as dt_util
 
 from .. import recorder
-from .db_schema import RecorderRuns, StateAttributes, States
+from .db_schema import (
+    DatetimeAsTimestamp,
+    RecorderRuns,
+    StateAttributes,
+    States,
+    StatesMeta,
+)
+from .downsample import downsample, state_to_float
 from .filters import Filters
 from .models import (
     LazyState,
     process_datetime_to_timestamp,
     process_timestamp,
-    process_timestamp_to_utc_isoformat,
     row_to_compressed_state,
 )
 from .util import execute_stmt_lambda_element, session_scope
@@ -62,49 +81,121 @@ NEED_ATTRIBUTE_DOMAINS = {
 BASE_STATES = [
     States.entity_id,
     States.state,
-    States.last_changed,
-    States.last_updated,
+    States.last_changed_ts,
+    States.last_updated_ts,
 ]
 BASE_STATES_NO_LAST_CHANGED = [
     States.entity_id,
     States.state,
-    literal(value=None, type_=Text).label("last_changed"),
-    States.last_updated,
+    literal(value=None).label("last_changed_ts"),
+    States.last_updated_ts,
+]
+NO_COMPRESSED_ATTRS = [
+    literal(value=None, type_=LargeBinary).label("shared_attrs_bin"),
+    literal(value=None, type_=Integer).label("dictionary_id"),
+]
+# Remove the PRE_SCHEMA_33 columns once the
+# timestamps are always stored as epoch floats
+BASE_STATES_PRE_SCHEMA_33 = [
+    States.entity_id,
+    States.state,
+    type_coerce(States.last_changed, DatetimeAsTimestamp).label("last_changed_ts"),
+    type_coerce(States.last_updated, DatetimeAsTimestamp).label("last_updated_ts"),
+]
+BASE_STATES_NO_LAST_CHANGED_PRE_SCHEMA_33 = [
+    States.entity_id,
+    States.state,
+    literal(value=None).label("last_changed_ts"),
+    type_coerce(States.last_updated, DatetimeAsTimestamp).label("last_updated_ts"),
 ]
 QUERY_STATE_NO_ATTR = [
     *BASE_STATES,
     literal(value=None, type_=Text).label("attributes"),
     literal(value=None, type_=Text).label("shared_attrs"),
+    *NO_COMPRESSED_ATTRS,
 ]
 QUERY_STATE_NO_ATTR_NO_LAST_CHANGED = [
     *BASE_STATES_NO_LAST_CHANGED,
     literal(value=None, type_=Text).label("attributes"),
     literal(value=None, type_=Text).label("shared_attrs"),
+    *NO_COMPRESSED_ATTRS,
+]
+QUERY_STATE_NO_ATTR_PRE_SCHEMA_33 = [
+    *BASE_STATES_PRE_SCHEMA_33,
+    *QUERY_STATE_NO_ATTR[len(BASE_STATES) :],
+]
+QUERY_STATE_NO_ATTR_NO_LAST_CHANGED_PRE_SCHEMA_33 = [
+    *BASE_STATES_NO_LAST_CHANGED_PRE_SCHEMA_33,
+    *QUERY_STATE_NO_ATTR_NO_LAST_CHANGED[len(BASE_STATES_NO_LAST_CHANGED) :],
 ]
 # Remove QUERY_STATES_PRE_SCHEMA_25
 # and the migration_in_progress check
 # once schema 26 is created
 QUERY_STATES_PRE_SCHEMA_25 = [
-    *BASE_STATES,
+    *BASE_STATES_PRE_SCHEMA_33,
     States.attributes,
     literal(value=None, type_=Text).label("shared_attrs"),
+    *NO_COMPRESSED_ATTRS,
 ]
 QUERY_STATES_PRE_SCHEMA_25_NO_LAST_CHANGED = [
-    *BASE_STATES_NO_LAST_CHANGED,
+    *BASE_STATES_NO_LAST_CHANGED_PRE_SCHEMA_33,
     States.attributes,
     literal(value=None, type_=Text).label("shared_attrs"),
+    *NO_COMPRESSED_ATTRS,
+]
+QUERY_STATES_PRE_SCHEMA_33 = [
+    *BASE_STATES_PRE_SCHEMA_33,
+    States.attributes,
+    StateAttributes.shared_attrs,
+    *NO_COMPRESSED_ATTRS,
+]
+QUERY_STATES_PRE_SCHEMA_33_NO_LAST_CHANGED = [
+    *BASE_STATES_NO_LAST_CHANGED_PRE_SCHEMA_33,
+    States.attributes,
+    StateAttributes.shared_attrs,
+    *NO_COMPRESSED_ATTRS,
+]
+# Remove QUERY_STATES_PRE_SCHEMA_36 once the
+# compressed attributes columns always exist
+QUERY_STATES_PRE_SCHEMA_36 = [
+    *BASE_STATES,
+    States.attributes,
+    StateAttributes.shared_attrs,
+    *NO_COMPRESSED_ATTRS,
+]
+QUERY_STATES_PRE_SCHEMA_36_NO_LAST_CHANGED = [
+    *BASE_STATES_NO_LAST_CHANGED,
+    States.attributes,
+    StateAttributes.shared_attrs,
+    *NO_COMPRESSED_ATTRS,
 ]
 QUERY_STATES = [
     *BASE_STATES,
     # Remove States.attributes once all attributes are in StateAttributes.shared_attrs
     States.attributes,
     StateAttributes.shared_attrs,
+    StateAttributes.shared_attrs_bin,
+    StateAttributes.dictionary_id,
 ]
 QUERY_STATES_NO_LAST_CHANGED = [
     *BASE_STATES_NO_LAST_CHANGED,
     # Remove States.attributes once all attributes are in StateAttributes.shared_attrs
     States.attributes,
     StateAttributes.shared_attrs,
+    StateAttributes.shared_attrs_bin,
+    StateAttributes.dictionary_id,
+]
+# Once all states have a metadata_id the entity_id
+# is only stored in the states_meta table
+QUERY_STATE_NO_ATTR_STATES_META = [StatesMeta.entity_id, *QUERY_STATE_NO_ATTR[1:]]
+QUERY_STATE_NO_ATTR_NO_LAST_CHANGED_STATES_META = [
+    StatesMeta.entity_id,
+    *QUERY_STATE_NO_ATTR_NO_LAST_CHANGED[1:],
+]
+QUERY_STATES_STATES_META = [StatesMeta.entity_id, *QUERY_STATES[1:]]
+QUERY_STATES_NO_LAST_CHANGED_STATES_META = [
+    StatesMeta.entity_id,
+    *QUERY_STATES_NO_LAST_CHANGED[1:],
 ]
 
 
@@ -112,17 +203,78 @@ def _schema_version(hass: HomeAssistant) -> int:
     return recorder.get_instance(hass).schema_version
 
 
+def _states_meta_active(hass: HomeAssistant) -> bool:
+    return recorder.get_instance(hass).states_meta_active
+
+
+def _last_updated_last_changed(schema_version: int) -> tuple[Column, Column]:
+    """Return the columns to filter and order the states by time."""
+    if schema_version < 33:
+        return States.last_updated, States.last_changed
+    return States.last_updated_ts, States.last_changed_ts
+
+
+def _time_bound(schema_version: int, time: datetime) -> datetime | float:
+    """Return a time in the format of the last_updated column."""
+    if schema_version < 33:
+        return time
+    return process_datetime_to_timestamp(time)
+
+
+def _lambda_stmt_and_join_attributes_states_meta(
+    no_attributes: bool, include_last_changed: bool
+) -> tuple[StatementLambdaElement, bool]:
+    """Return the lambda_stmt selecting the entity_id from StatesMeta.
+
+    The states_meta table is always joined.
+    """
+    if no_attributes:
+        if include_last_changed:
+            stmt = lambda_stmt(lambda: select(*QUERY_STATE_NO_ATTR_STATES_META))
+        else:
+            stmt = lambda_stmt(
+                lambda: select(*QUERY_STATE_NO_ATTR_NO_LAST_CHANGED_STATES_META)
+            )
+    elif include_last_changed:
+        stmt = lambda_stmt(lambda: select(*QUERY_STATES_STATES_META))
+    else:
+        stmt = lambda_stmt(lambda: select(*QUERY_STATES_NO_LAST_CHANGED_STATES_META))
+    stmt += lambda q: q.join(StatesMeta, States.metadata_id == StatesMeta.metadata_id)
+    return stmt, not no_attributes
+
+
 def lambda_stmt_and_join_attributes(
-    schema_version: int, no_attributes: bool, include_last_changed: bool = True
+    schema_version: int,
+    no_attributes: bool,
+    include_last_changed: bool = True,
+    states_meta: bool = False,
 ) -> tuple[StatementLambdaElement, bool]:
     """Return the lambda_stmt and if StateAttributes should be joined.
 
     Because these are lambda_stmt the values inside the lambdas need
     to be explicitly written out to avoid caching the wrong values.
     """
+    # If all states have been migrated to the states_meta table
+    # the entity_id is no longer stored in the states table
+    if states_meta:
+        return _lambda_stmt_and_join_attributes_states_meta(
+            no_attributes, include_last_changed
+        )
     # If no_attributes was requested we do the query
     # without the attributes fields and do not join the
     # state_attributes table
+    if no_attributes and schema_version < 33:
+        if include_last_changed:
+            return (
+                lambda_stmt(lambda: select(*QUERY_STATE_NO_ATTR_PRE_SCHEMA_33)),
+                False,
+            )
+        return (
+            lambda_stmt(
+                lambda: select(*QUERY_STATE_NO_ATTR_NO_LAST_CHANGED_PRE_SCHEMA_33)
+            ),
+            False,
+        )
     if no_attributes:
         if include_last_changed:
             return lambda_stmt(lambda: select(*QUERY_STATE_NO_ATTR)), False
@@ -143,6 +295,24 @@ def lambda_stmt_and_join_attributes(
             lambda_stmt(lambda: select(*QUERY_STATES_PRE_SCHEMA_25_NO_LAST_CHANGED)),
             False,
         )
+    # The timestamp columns are added by a live
+    # migration so they may not be there yet
+    if schema_version < 33:
+        if include_last_changed:
+            return lambda_stmt(lambda: select(*QUERY_STATES_PRE_SCHEMA_33)), True
+        return (
+            lambda_stmt(lambda: select(*QUERY_STATES_PRE_SCHEMA_33_NO_LAST_CHANGED)),
+            True,
+        )
+    # The compressed attributes columns are added by a live
+    # migration so they may not be there yet either
+    if schema_version < 36:
+        if include_last_changed:
+            return lambda_stmt(lambda: select(*QUERY_STATES_PRE_SCHEMA_36)), True
+        return (
+            lambda_stmt(lambda: select(*QUERY_STATES_PRE_SCHEMA_36_NO_LAST_CHANGED)),
+            True,
+        )
     # Finally if no migration is in progress and no_attributes
     # was not requested, we query both attributes columns and
     # join state_attributes
@@ -162,6 +332,8 @@ def get_significant_states(
     minimal_response: bool = False,
     no_attributes: bool = False,
     compressed_state_format: bool = False,
+    max_points: int | None = None,
+    raw_attributes: bool = False,
 ) -> MutableMapping[str, list[State | dict[str, Any]]]:
     """Wrap get_significant_states_with_session with an sql session."""
     with session_scope(hass=hass) as session:
@@ -177,6 +349,8 @@ def get_significant_states(
             minimal_response,
             no_attributes,
             compressed_state_format,
+            max_points,
+            raw_attributes,
         )
 
 
@@ -192,8 +366,21 @@ def _ignore_domains_filter(query: Query) -> Query:
     )
 
 
+def _ignore_domains_filter_states_meta(query: Query) -> Query:
+    """Add a filter to ignore domains we do not fetch history for."""
+    return query.filter(
+        and_(
+            *[
+                ~StatesMeta.entity_id.like(entity_domain)
+                for entity_domain in IGNORE_DOMAINS_ENTITY_ID_LIKE
+            ]
+        )
+    )
+
+
 def _significant_states_stmt(
     schema_version: int,
+    states_meta: bool,
     start_time: datetime,
     end_time: datetime | None,
     entity_ids: list[str] | None,
@@ -203,8 +390,12 @@ def _significant_states_stmt(
 ) -> StatementLambdaElement:
     """Query the database for significant state changes."""
     stmt, join_attributes = lambda_stmt_and_join_attributes(
-        schema_version, no_attributes, include_last_changed=not significant_changes_only
+        schema_version,
+        no_attributes,
+        include_last_changed=not significant_changes_only,
+        states_meta=states_meta,
     )
+    last_updated, last_changed = _last_updated_last_changed(schema_version)
     if (
         entity_ids
         and len(entity_ids) == 1
@@ -212,7 +403,17 @@ def _significant_states_stmt(
         and split_entity_id(entity_ids[0])[0] not in SIGNIFICANT_DOMAINS
     ):
         stmt += lambda q: q.filter(
-            (States.last_changed == States.last_updated) | States.last_changed.is_(None)
+            (last_changed == last_updated) | last_changed.is_(None)
+        )
+    elif significant_changes_only and states_meta:
+        stmt += lambda q: q.filter(
+            or_(
+                *[
+                    StatesMeta.entity_id.like(entity_domain)
+                    for entity_domain in SIGNIFICANT_DOMAINS_ENTITY_ID_LIKE
+                ],
+                ((last_changed == last_updated) | last_changed.is_(None)),
+            )
         )
     elif significant_changes_only:
         stmt += lambda q: q.filter(
@@ -221,15 +422,21 @@ def _significant_states_stmt(
                     States.entity_id.like(entity_domain)
                     for entity_domain in SIGNIFICANT_DOMAINS_ENTITY_ID_LIKE
                 ],
-                (
-                    (States.last_changed == States.last_updated)
-                    | States.last_changed.is_(None)
-                ),
+                ((last_changed == last_updated) | last_changed.is_(None)),
             )
         )
 
-    if entity_ids:
+    if entity_ids and states_meta:
+        stmt += lambda q: q.filter(StatesMeta.entity_id.in_(entity_ids))
+    elif entity_ids:
         stmt += lambda q: q.filter(States.entity_id.in_(entity_ids))
+    elif states_meta:
+        stmt += _ignore_domains_filter_states_meta
+        if filters and filters.has_config:
+            entity_filter = filters.states_metadata_entity_filter()
+            stmt = stmt.add_criteria(
+                lambda q: q.filter(entity_filter), track_on=[filters]
+            )
     else:
         stmt += _ignore_domains_filter
         if filters and filters.has_config:
@@ -238,15 +445,20 @@ def _significant_states_stmt(
                 lambda q: q.filter(entity_filter), track_on=[filters]
             )
 
-    stmt += lambda q: q.filter(States.last_updated > start_time)
+    start_time_ts = _time_bound(schema_version, start_time)
+    stmt += lambda q: q.filter(last_updated > start_time_ts)
     if end_time:
-        stmt += lambda q: q.filter(States.last_updated < end_time)
+        end_time_ts = _time_bound(schema_version, end_time)
+        stmt += lambda q: q.filter(last_updated < end_time_ts)
 
     if join_attributes:
         stmt += lambda q: q.outerjoin(
             StateAttributes, States.attributes_id == StateAttributes.attributes_id
         )
-    stmt += lambda q: q.order_by(States.entity_id, States.last_updated)
+    if states_meta:
+        stmt += lambda q: q.order_by(StatesMeta.entity_id, last_updated)
+    else:
+        stmt += lambda q: q.order_by(States.entity_id, last_updated)
     return stmt
 
 
@@ -262,6 +474,8 @@ def get_significant_states_with_session(
     minimal_response: bool = False,
     no_attributes: bool = False,
     compressed_state_format: bool = False,
+    max_points: int | None = None,
+    raw_attributes: bool = False,
 ) -> MutableMapping[str, list[State | dict[str, Any]]]:
     """
     Return states changes during UTC period start_time - end_time.
@@ -274,9 +488,16 @@ def get_significant_states_with_session(
     Significant states are all states where there is a state change,
     as well as all states from certain domains (for instance
     thermostat so that we get current temperature in our graphs).
+
+    max_points optionally downsamples the states of each entity to about
+    max_points while the rows are streamed from the database.
+
+    raw_attributes returns the attributes of compressed states as the
+    json they are stored as, see row_to_compressed_state.
     """
     stmt = _significant_states_stmt(
         _schema_version(hass),
+        _states_meta_active(hass),
         start_time,
         end_time,
         entity_ids,
@@ -285,7 +506,7 @@ def get_significant_states_with_session(
         no_attributes,
     )
     states = execute_stmt_lambda_element(
-        session, stmt, None if entity_ids else start_time, end_time
+        session, stmt, None if entity_ids and not max_points else start_time, end_time
     )
     return _sorted_states_to_dict(
         hass,
@@ -298,6 +519,86 @@ def get_significant_states_with_session(
         minimal_response,
         no_attributes,
         compressed_state_format,
+        end_time,
+        max_points,
+        raw_attributes,
+    )
+
+
+def get_significant_states_columnar(
+    hass: HomeAssistant,
+    start_time: datetime,
+    end_time: datetime | None = None,
+    entity_ids: list[str] | None = None,
+    filters: Filters | None = None,
+    include_start_time_state: bool = True,
+    significant_changes_only: bool = True,
+    numeric_only: bool = False,
+    max_points: int | None = None,
+) -> MutableMapping[str, tuple[list[float], list[Any]]]:
+    """Wrap get_significant_states_columnar_with_session with an sql session."""
+    with session_scope(hass=hass) as session:
+        return get_significant_states_columnar_with_session(
+            hass,
+            session,
+            start_time,
+            end_time,
+            entity_ids,
+            filters,
+            include_start_time_state,
+            significant_changes_only,
+            numeric_only,
+            max_points,
+        )
+
+
+def get_significant_states_columnar_with_session(
+    hass: HomeAssistant,
+    session: Session,
+    start_time: datetime,
+    end_time: datetime | None = None,
+    entity_ids: list[str] | None = None,
+    filters: Filters | None = None,
+    include_start_time_state: bool = True,
+    significant_changes_only: bool = True,
+    numeric_only: bool = False,
+    max_points: int | None = None,
+) -> MutableMapping[str, tuple[list[float], list[Any]]]:
+    """Return states changes during UTC period start_time - end_time as columns.
+
+    For each entity a tuple of two parallel lists is returned, the first
+    with the last_updated epoch timestamps and the second with the states.
+
+    Attributes are never fetched. If numeric_only is set, states are converted
+    to float and states that are not numeric are returned as None.
+
+    max_points optionally downsamples the states of each entity to about
+    max_points while the rows are streamed from the database.
+    """
+    stmt = _significant_states_stmt(
+        _schema_version(hass),
+        _states_meta_active(hass),
+        start_time,
+        end_time,
+        entity_ids,
+        filters,
+        significant_changes_only,
+        True,
+    )
+    states = execute_stmt_lambda_element(
+        session, stmt, None if entity_ids and not max_points else start_time, end_time
+    )
+    return _sorted_states_to_columns(
+        hass,
+        session,
+        states,
+        start_time,
+        entity_ids,
+        filters,
+        include_start_time_state,
+        numeric_only,
+        end_time,
+        max_points,
     )
 
 
@@ -332,6 +633,7 @@ def get_full_significant_states_with_session(
 
 def _state_changed_during_period_stmt(
     schema_version: int,
+    states_meta: bool,
     start_time: datetime,
     end_time: datetime | None,
     entity_id: str | None,
@@ -340,24 +642,36 @@ def _state_changed_during_period_stmt(
     limit: int | None,
 ) -> StatementLambdaElement:
     stmt, join_attributes = lambda_stmt_and_join_attributes(
-        schema_version, no_attributes, include_last_changed=False
+        schema_version,
+        no_attributes,
+        include_last_changed=False,
+        states_meta=states_meta,
     )
+    last_updated, last_changed = _last_updated_last_changed(schema_version)
+    start_time_ts = _time_bound(schema_version, start_time)
     stmt += lambda q: q.filter(
-        ((States.last_changed == States.last_updated) | States.last_changed.is_(None))
-        & (States.last_updated > start_time)
+        ((last_changed == last_updated) | last_changed.is_(None))
+        & (last_updated > start_time_ts)
     )
     if end_time:
-        stmt += lambda q: q.filter(States.last_updated < end_time)
-    if entity_id:
+        end_time_ts = _time_bound(schema_version, end_time)
+        stmt += lambda q: q.filter(last_updated < end_time_ts)
+    if entity_id and states_meta:
+        stmt += lambda q: q.filter(StatesMeta.entity_id == entity_id)
+    elif entity_id:
         stmt += lambda q: q.filter(States.entity_id == entity_id)
     if join_attributes:
         stmt += lambda q: q.outerjoin(
             StateAttributes, States.attributes_id == StateAttributes.attributes_id
         )
-    if descending:
-        stmt += lambda q: q.order_by(States.entity_id, States.last_updated.desc())
+    if states_meta and descending:
+        stmt += lambda q: q.order_by(StatesMeta.entity_id, last_updated.desc())
+    elif states_meta:
+        stmt += lambda q: q.order_by(StatesMeta.entity_id, last_updated)
+    elif descending:
+        stmt += lambda q: q.order_by(States.entity_id, last_updated.desc())
     else:
-        stmt += lambda q: q.order_by(States.entity_id, States.last_updated)
+        stmt += lambda q: q.order_by(States.entity_id, last_updated)
     if limit:
         stmt += lambda q: q.limit(limit)
     return stmt
@@ -380,6 +694,7 @@ def state_changes_during_period(
     with session_scope(hass=hass) as session:
         stmt = _state_changed_during_period_stmt(
             _schema_version(hass),
+            _states_meta_active(hass),
             start_time,
             end_time,
             entity_id,
@@ -404,23 +719,32 @@ def state_changes_during_period(
 
 
 def _get_last_state_changes_stmt(
-    schema_version: int, number_of_states: int, entity_id: str | None
+    schema_version: int,
+    states_meta: bool,
+    number_of_states: int,
+    entity_id: str | None,
 ) -> StatementLambdaElement:
     stmt, join_attributes = lambda_stmt_and_join_attributes(
-        schema_version, False, include_last_changed=False
+        schema_version, False, include_last_changed=False, states_meta=states_meta
     )
-    stmt += lambda q: q.filter(
-        (States.last_changed == States.last_updated) | States.last_changed.is_(None)
-    )
-    if entity_id:
+    last_updated, last_changed = _last_updated_last_changed(schema_version)
+    stmt += lambda q: q.filter((last_changed == last_updated) | last_changed.is_(None))
+    if entity_id and states_meta:
+        stmt += lambda q: q.filter(StatesMeta.entity_id == entity_id)
+    elif entity_id:
         stmt += lambda q: q.filter(States.entity_id == entity_id)
     if join_attributes:
         stmt += lambda q: q.outerjoin(
             StateAttributes, States.attributes_id == StateAttributes.attributes_id
         )
-    stmt += lambda q: q.order_by(States.entity_id, States.last_updated.desc()).limit(
-        number_of_states
-    )
+    if states_meta:
+        stmt += lambda q: q.order_by(States.metadata_id, last_updated.desc()).limit(
+            number_of_states
+        )
+    else:
+        stmt += lambda q: q.order_by(States.entity_id, last_updated.desc()).limit(
+            number_of_states
+        )
     return stmt
 
 
@@ -434,7 +758,10 @@ def get_last_state_changes(
 
     with session_scope(hass=hass) as session:
         stmt = _get_last_state_changes_stmt(
-            _schema_version(hass), number_of_states, entity_id
+            _schema_version(hass),
+            _states_meta_active(hass),
+            number_of_states,
+            entity_id,
         )
         states = list(execute_stmt_lambda_element(session, stmt))
         return cast(
@@ -452,6 +779,7 @@ def get_last_state_changes(
 
 def _get_states_for_entites_stmt(
     schema_version: int,
+    states_meta: bool,
     run_start: datetime,
     utc_point_in_time: datetime,
     entity_ids: list[str],
@@ -459,23 +787,50 @@ def _get_states_for_entites_stmt(
 ) -> StatementLambdaElement:
     """Baked query to get states for specific entities."""
     stmt, join_attributes = lambda_stmt_and_join_attributes(
-        schema_version, no_attributes, include_last_changed=True
+        schema_version,
+        no_attributes,
+        include_last_changed=True,
+        states_meta=states_meta,
     )
+    last_updated, _ = _last_updated_last_changed(schema_version)
+    run_start_ts = _time_bound(schema_version, run_start)
+    utc_point_in_time_ts = _time_bound(schema_version, utc_point_in_time)
     # We got an include-list of entities, accelerate the query by filtering already
     # in the inner query.
-    stmt += lambda q: q.where(
-        States.state_id
-        == (
-            select(func.max(States.state_id).label("max_state_id"))
-            .filter(
-                (States.last_updated >= run_start)
-                & (States.last_updated < utc_point_in_time)
-            )
-            .filter(States.entity_id.in_(entity_ids))
-            .group_by(States.entity_id)
-            .subquery()
-        ).c.max_state_id
-    )
+    if states_meta:
+        stmt += lambda q: q.where(
+            States.state_id
+            == (
+                select(func.max(States.state_id).label("max_state_id"))
+                .filter(
+                    (last_updated >= run_start_ts)
+                    & (last_updated < utc_point_in_time_ts)
+                )
+                .filter(
+                    States.metadata_id.in_(
+                        select(StatesMeta.metadata_id).where(
+                            StatesMeta.entity_id.in_(entity_ids)
+                        )
+                    )
+                )
+                .group_by(States.metadata_id)
+                .subquery()
+            ).c.max_state_id
+        )
+    else:
+        stmt += lambda q: q.where(
+            States.state_id
+            == (
+                select(func.max(States.state_id).label("max_state_id"))
+                .filter(
+                    (last_updated >= run_start_ts)
+                    & (last_updated < utc_point_in_time_ts)
+                )
+                .filter(States.entity_id.in_(entity_ids))
+                .group_by(States.entity_id)
+                .subquery()
+            ).c.max_state_id
+        )
     if join_attributes:
         stmt += lambda q: q.outerjoin(
             StateAttributes, (States.attributes_id == StateAttributes.attributes_id)
@@ -484,26 +839,42 @@ def _get_states_for_entites_stmt(
 
 
 def _generate_most_recent_states_by_date(
-    run_start: datetime,
-    utc_point_in_time: datetime,
+    run_start_ts: datetime | float,
+    utc_point_in_time_ts: datetime | float,
+    last_updated: Column,
 ) -> Subquery:
     """Generate the sub query for the most recent states by data."""
     return (
         select(
             States.entity_id.label("max_entity_id"),
-            func.max(States.last_updated).label("max_last_updated"),
-        )
-        .filter(
-            (States.last_updated >= run_start)
-            & (States.last_updated < utc_point_in_time)
+            func.max(last_updated).label("max_last_updated"),
         )
+        .filter((last_updated >= run_start_ts) & (last_updated < utc_point_in_time_ts))
         .group_by(States.entity_id)
         .subquery()
     )
 
 
+def _generate_most_recent_states_by_date_states_meta(
+    run_start_ts: datetime | float,
+    utc_point_in_time_ts: datetime | float,
+    last_updated: Column,
+) -> Subquery:
+    """Generate the sub query for the most recent states by data."""
+    return (
+        select(
+            States.metadata_id.label("max_metadata_id"),
+            func.max(last_updated).label("max_last_updated"),
+        )
+        .filter((last_updated >= run_start_ts) & (last_updated < utc_point_in_time_ts))
+        .group_by(States.metadata_id)
+        .subquery()
+    )
+
+
 def _get_states_for_all_stmt(
     schema_version: int,
+    states_meta: bool,
     run_start: datetime,
     utc_point_in_time: datetime,
     filters: Filters | None,
@@ -511,14 +882,53 @@ def _get_states_for_all_stmt(
 ) -> StatementLambdaElement:
     """Baked query to get states for all entities."""
     stmt, join_attributes = lambda_stmt_and_join_attributes(
-        schema_version, no_attributes, include_last_changed=True
+        schema_version,
+        no_attributes,
+        include_last_changed=True,
+        states_meta=states_meta,
     )
     # We did not get an include-list of entities, query all states in the inner
     # query, then filter out unwanted domains as well as applying the custom filter.
     # This filtering can't be done in the inner query because the domain column is
     # not indexed and we can't control what's in the custom filter.
+    last_updated, _ = _last_updated_last_changed(schema_version)
+    run_start_ts = _time_bound(schema_version, run_start)
+    utc_point_in_time_ts = _time_bound(schema_version, utc_point_in_time)
+    if states_meta:
+        most_recent_states_by_date = _generate_most_recent_states_by_date_states_meta(
+            run_start_ts, utc_point_in_time_ts, last_updated
+        )
+        stmt += lambda q: q.where(
+            States.state_id
+            == (
+                select(func.max(States.state_id).label("max_state_id"))
+                .join(
+                    most_recent_states_by_date,
+                    and_(
+                        States.metadata_id
+                        == most_recent_states_by_date.c.max_metadata_id,
+                        last_updated == most_recent_states_by_date.c.max_last_updated,
+                    ),
+                )
+                .group_by(States.metadata_id)
+                .subquery()
+            ).c.max_state_id,
+        )
+        stmt += _ignore_domains_filter_states_meta
+        if filters and filters.has_config:
+            entity_filter = filters.states_metadata_entity_filter()
+            stmt = stmt.add_criteria(
+                lambda q: q.filter(entity_filter), track_on=[filters]
+            )
+        if join_attributes:
+            stmt += lambda q: q.outerjoin(
+                StateAttributes, (States.attributes_id == StateAttributes.attributes_id)
+            )
+        # The metadata_ids are not in the order of the entity_ids
+        stmt += lambda q: q.order_by(StatesMeta.entity_id)
+        return stmt
     most_recent_states_by_date = _generate_most_recent_states_by_date(
-        run_start, utc_point_in_time
+        run_start_ts, utc_point_in_time_ts, last_updated
     )
     stmt += lambda q: q.where(
         States.state_id
@@ -528,8 +938,7 @@ def _get_states_for_all_stmt(
                 most_recent_states_by_date,
                 and_(
                     States.entity_id == most_recent_states_by_date.c.max_entity_id,
-                    States.last_updated
-                    == most_recent_states_by_date.c.max_last_updated,
+                    last_updated == most_recent_states_by_date.c.max_last_updated,
                 ),
             )
             .group_by(States.entity_id)
@@ -558,11 +967,16 @@ def _get_rows_with_session(
 ) -> Iterable[Row]:
     """Return the states at a specific point in time."""
     schema_version = _schema_version(hass)
+    states_meta = _states_meta_active(hass)
     if entity_ids and len(entity_ids) == 1:
         return execute_stmt_lambda_element(
             session,
             _get_single_entity_states_stmt(
-                schema_version, utc_point_in_time, entity_ids[0], no_attributes
+                schema_version,
+                states_meta,
+                utc_point_in_time,
+                entity_ids[0],
+                no_attributes,
             ),
         )
 
@@ -577,11 +991,21 @@ def _get_rows_with_session(
     # since the last recorder run started.
     if entity_ids:
         stmt = _get_states_for_entites_stmt(
-            schema_version, run.start, utc_point_in_time, entity_ids, no_attributes
+            schema_version,
+            states_meta,
+            run.start,
+            utc_point_in_time,
+            entity_ids,
+            no_attributes,
         )
     else:
         stmt = _get_states_for_all_stmt(
-            schema_version, run.start, utc_point_in_time, filters, no_attributes
+            schema_version,
+            states_meta,
+            run.start,
+            utc_point_in_time,
+            filters,
+            no_attributes,
         )
 
     return execute_stmt_lambda_element(session, stmt)
@@ -589,6 +1013,7 @@ def _get_rows_with_session(
 
 def _get_single_entity_states_stmt(
     schema_version: int,
+    states_meta: bool,
     utc_point_in_time: datetime,
     entity_id: str,
     no_attributes: bool = False,
@@ -596,16 +1021,31 @@ def _get_single_entity_states_stmt(
     # Use an entirely different (and extremely fast) query if we only
     # have a single entity id
     stmt, join_attributes = lambda_stmt_and_join_attributes(
-        schema_version, no_attributes, include_last_changed=True
+        schema_version,
+        no_attributes,
+        include_last_changed=True,
+        states_meta=states_meta,
     )
-    stmt += (
-        lambda q: q.filter(
-            States.last_updated < utc_point_in_time,
-            States.entity_id == entity_id,
+    last_updated, _ = _last_updated_last_changed(schema_version)
+    utc_point_in_time_ts = _time_bound(schema_version, utc_point_in_time)
+    if states_meta:
+        stmt += (
+            lambda q: q.filter(
+                last_updated < utc_point_in_time_ts,
+                StatesMeta.entity_id == entity_id,
+            )
+            .order_by(last_updated.desc())
+            .limit(1)
+        )
+    else:
+        stmt += (
+            lambda q: q.filter(
+                last_updated < utc_point_in_time_ts,
+                States.entity_id == entity_id,
+            )
+            .order_by(last_updated.desc())
+            .limit(1)
         )
-        .order_by(States.last_updated.desc())
-        .limit(1)
-    )
     if join_attributes:
         stmt += lambda q: q.outerjoin(
             StateAttributes, States.attributes_id == StateAttributes.attributes_id
@@ -624,6 +1064,9 @@ def _sorted_states_to_dict(
     minimal_response: bool = False,
     no_attributes: bool = False,
     compressed_state_format: bool = False,
+    end_time: datetime | None = None,
+    max_points: int | None = None,
+    raw_attributes: bool = False,
 ) -> MutableMapping[str, list[State | dict[str, Any]]]:
     """Convert SQL results into JSON friendly data structure.
 
@@ -637,15 +1080,17 @@ def _sorted_states_to_dict(
     axis correctly.
     """
     if compressed_state_format:
-        state_class = row_to_compressed_state
-        _process_timestamp: Callable[
-            [datetime], float | str
-        ] = process_datetime_to_timestamp
+        state_class = (
+            partial(row_to_compressed_state, raw_attributes=True)
+            if raw_attributes
+            else row_to_compressed_state
+        )
+        _process_timestamp: Callable[[float], float | str] = _timestamp_passthrough
         attr_time = COMPRESSED_STATE_LAST_UPDATED
         attr_state = COMPRESSED_STATE_STATE
     else:
         state_class = LazyState  # type: ignore[assignment]
-        _process_timestamp = process_timestamp_to_utc_isoformat
+        _process_timestamp = _timestamp_to_utc_isoformat
         attr_time = LAST_CHANGED_KEY
         attr_state = STATE_KEY
 
@@ -682,9 +1127,14 @@ def _sorted_states_to_dict(
     else:
         states_iter = groupby(states, lambda state: state.entity_id)
 
+    if max_points:
+        states_iter = _downsample_states_iter(
+            states_iter, start_time, end_time, max_points
+        )
+
     # Append all changes to it
     for ent_id, group in states_iter:
-        attr_cache: dict[str, dict[str, Any]] = {}
+        attr_cache: dict[str | bytes, dict[str, Any]] = {}
         prev_state: Column | str
         ent_results = result[ent_id]
         if row := initial_states.pop(ent_id, None):
@@ -719,7 +1169,7 @@ def _sorted_states_to_dict(
                     #
                     # We use last_updated for for last_changed since its the same
                     #
-                    attr_time: _process_timestamp(row.last_updated),
+                    attr_time: _process_timestamp(row.last_updated_ts),
                 }
             )
             prev_state = state
@@ -731,3 +1181,113 @@ def _sorted_states_to_dict(
 
     # Filter out the empty lists if some states had 0 results.
     return {key: val for key, val in result.items() if val}
+
+
+def _timestamp_passthrough(timestamp: float) -> float:
+    """Return the epoch timestamp as stored in the database."""
+    return timestamp
+
+
+def _timestamp_to_utc_isoformat(timestamp: float) -> str:
+    """Convert an epoch timestamp to UTC isotime."""
+    return dt_util.utc_from_timestamp(timestamp).isoformat()
+
+
+def _sorted_states_to_columns(
+    hass: HomeAssistant,
+    session: Session,
+    states: Iterable[Row],
+    start_time: datetime,
+    entity_ids: list[str] | None,
+    filters: Filters | None = None,
+    include_start_time_state: bool = True,
+    numeric_only: bool = False,
+    end_time: datetime | None = None,
+    max_points: int | None = None,
+) -> MutableMapping[str, tuple[list[float], list[Any]]]:
+    """Convert SQL results into parallel lists of timestamps and states.
+
+    Unlike _sorted_states_to_dict no State or LazyState objects are
+    created, the columns are built directly from the rows.
+
+    States must be sorted by entity_id and last_updated
+    """
+    result: dict[str, tuple[list[float], list[Any]]] = {}
+    # Set all entity IDs to empty lists in result set to maintain the order
+    if entity_ids is not None:
+        for ent_id in entity_ids:
+            result[ent_id] = ([], [])
+
+    initial_states: dict[str, Row] = {}
+    if include_start_time_state:
+        initial_states = {
+            row.entity_id: row
+            for row in _get_rows_with_session(
+                hass,
+                session,
+                start_time,
+                entity_ids,
+                filters=filters,
+                no_attributes=True,
+            )
+        }
+
+    start_time_ts = start_time.timestamp()
+    _process_state: Callable[[str | None], Any] = (
+        state_to_float if numeric_only else lambda state: state
+    )
+
+    states_iter: Iterable[tuple[str, Iterator[Row]]] = groupby(
+        states, lambda state: state.entity_id
+    )
+    if max_points:
+        states_iter = _downsample_states_iter(
+            states_iter, start_time, end_time, max_points
+        )
+
+    for ent_id, group in states_iter:
+        if (columns := result.get(ent_id)) is None:
+            columns = result[ent_id] = ([], [])
+        timestamps, values = columns
+        if row := initial_states.pop(ent_id, None):
+            timestamps.append(start_time_ts)
+            values.append(_process_state(row.state))
+        for row in group:
+            timestamps.append(row.last_updated_ts)
+            values.append(_process_state(row.state))
+
+    # If there are no states beyond the initial state,
+    # the state a was never popped from initial_states
+    for ent_id, row in initial_states.items():
+        if (columns := result.get(ent_id)) is None:
+            columns = result[ent_id] = ([], [])
+        columns[0].append(start_time_ts)
+        columns[1].append(_process_state(row.state))
+
+    # Filter out the empty lists if some states had 0 results.
+    return {key: val for key, val in result.items() if val[0]}
+
+
+def _row_to_timestamp(row: Row) -> float:
+    """Return the last_updated epoch timestamp of a row."""
+    return cast(float, row.last_updated_ts)
+
+
+def _downsample_states_iter(
+    states_iter: Iterable[tuple[Any, Iterator[Any]]],
+    start_time: datetime,
+    end_time: datetime | None,
+    max_points: int,
+) -> Iterator[tuple[Any, Iterator[Any]]]:
+    """Downsample the rows of each entity while they are streamed."""
+    start_time_ts = start_time.timestamp()
+    end_time_ts = (end_time or dt_util.utcnow()).timestamp()
+    for ent_id, group in states_iter:
+        yield ent_id, downsample(
+            group,
+            _row_to_timestamp,
+            attrgetter("state"),
+            start_time_ts,
+            end_time_ts,
+            max_points,
+        )
@@ -0,0 +1,38 @@
+"""Metrics of the recorder write path."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+
+
+@dataclass
+class RecorderMetrics:
+    """Metrics of the recorder write path.
+
+    The timings are in seconds and describe the last commit.
+    """
+
+    commit_interval: float
+    queue_wait: float = 0.0
+    build_time: float = 0.0
+    flush_time: float = 0.0
+    commit_time: float = 0.0
+    rows_per_second: float = 0.0
+    rows_committed: int = 0
+    dropped_events: int = 0
+
+
+@dataclass
+class PurgeMetrics:
+    """Metrics of the last purge.
+
+    The timings are in seconds and cover all runs of the purge.
+    """
+
+    purge_before: datetime | None = None
+    in_progress: bool = False
+    runs: int = 0
+    states_purged: int = 0
+    events_purged: int = 0
+    purge_time: float = 0.0
+    rows_per_second: float = 0.0
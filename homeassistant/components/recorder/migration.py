@@ -6,7 +6,8 @@ import contextlib
 from dataclasses import dataclass
 from datetime import timedelta
 import logging
-from typing import TYPE_CHECKING
+import time
+from typing import TYPE_CHECKING, Any, cast
 
 import sqlalchemy
 from sqlalchemy import ForeignKeyConstraint, MetaData, Table, func, text
@@ -21,21 +22,68 @@ from sqlalchemy.exc import (
 from sqlalchemy.orm.session import Session
 from sqlalchemy.schema import AddConstraint, DropConstraint
 from sqlalchemy.sql.expression import true
+from sqlalchemy.sql.lambdas import StatementLambdaElement
 
 from homeassistant.core import HomeAssistant
 
-from .const import SupportedDialect
+from .compression import (
+    DICTIONARY_MIN_TRAINING_SAMPLES,
+    add_dictionary,
+    compress_attributes,
+    should_compress,
+    train_dictionary,
+)
+from .const import MAX_ROWS_TO_COMPRESS, MAX_ROWS_TO_MIGRATE, SupportedDialect
 from .db_schema import (
+    CONTEXT_ID_BIN_MAX_LENGTH,
+    ENTITY_ID_LAST_UPDATED_INDEX,
+    EVENT_DATA_LAST_USED_TS_INDEX,
+    EVENTS_CONTEXT_ID_BIN_INDEX,
+    EVENTS_CONTEXT_ID_INDEX,
+    EVENTS_EVENT_TYPE_TIME_FIRED_INDEX,
+    EVENTS_EVENT_TYPE_TIME_FIRED_TS_INDEX,
+    EVENTS_TIME_FIRED_INDEX,
+    EVENTS_TIME_FIRED_TS_INDEX,
+    LAST_UPDATED_INDEX,
+    LAST_UPDATED_TS_INDEX,
+    METADATA_ID_LAST_UPDATED_INDEX,
+    METADATA_ID_LAST_UPDATED_TS_INDEX,
     SCHEMA_VERSION,
+    STATE_ATTRIBUTES_LAST_USED_TS_INDEX,
+    STATES_CONTEXT_ID_BIN_INDEX,
+    STATES_CONTEXT_ID_INDEX,
+    TABLE_EVENT_DATA,
+    TABLE_EVENTS,
+    TABLE_STATE_ATTRIBUTES,
     TABLE_STATES,
     Base,
+    Events,
     SchemaChanges,
+    StateAttributes,
+    StateAttributesDictionary,
+    States,
+    StatesMeta,
     Statistics,
     StatisticsMeta,
     StatisticsRuns,
     StatisticsShortTerm,
 )
-from .models import process_timestamp
+from .models import (
+    process_datetime_to_timestamp,
+    process_timestamp,
+    ulid_to_bytes_or_none,
+    uuid_hex_to_bytes_or_none,
+)
+from .queries import (
+    find_attributes_to_compress,
+    find_attributes_to_train_dictionary,
+    find_entity_ids_to_migrate,
+    find_events_context_ids_to_migrate,
+    find_events_timestamps_to_migrate,
+    find_states_context_ids_to_migrate,
+    find_states_metadata_id,
+    find_states_timestamps_to_migrate,
+)
 from .statistics import (
     delete_statistics_duplicates,
     delete_statistics_meta_duplicates,
@@ -786,10 +834,382 @@ def _apply_update(  # noqa: C901
         # Once we require SQLite >= 3.35.5, we should drop the column:
         # ALTER TABLE statistics_meta DROP COLUMN state_unit_of_measurement
         pass
+    elif new_version == 31:
+        # The states_meta table is created by create_all, the
+        # metadata_id of existing states is filled in by
+        # migrate_entity_ids after the schema migration is done
+        _add_columns(session_maker, "states", [f"metadata_id {big_int}"])
+        _create_index(session_maker, "states", METADATA_ID_LAST_UPDATED_INDEX)
+    elif new_version == 32:
+        # Context ids are stored as 16 bytes instead of strings
+        if dialect == SupportedDialect.POSTGRESQL:
+            context_bin_type = "BYTEA"
+        elif dialect in (SupportedDialect.MYSQL, "mssql"):
+            context_bin_type = f"VARBINARY({CONTEXT_ID_BIN_MAX_LENGTH})"
+        else:
+            context_bin_type = "BLOB"
+        for table in (TABLE_EVENTS, TABLE_STATES):
+            _add_columns(
+                session_maker,
+                table,
+                [
+                    f"context_id_bin {context_bin_type}",
+                    f"context_user_id_bin {context_bin_type}",
+                    f"context_parent_id_bin {context_bin_type}",
+                ],
+            )
+        # The context ids of the existing rows are converted by
+        # migrate_events_context_ids and migrate_states_context_ids
+        # after the schema migration is done
+        _create_index(session_maker, TABLE_EVENTS, EVENTS_CONTEXT_ID_BIN_INDEX)
+        _create_index(session_maker, TABLE_STATES, STATES_CONTEXT_ID_BIN_INDEX)
+    elif new_version == 33:
+        # Timestamps are stored as epoch floats instead of datetimes
+        _add_columns(session_maker, TABLE_EVENTS, ["time_fired_ts DOUBLE PRECISION"])
+        _add_columns(
+            session_maker,
+            TABLE_STATES,
+            ["last_updated_ts DOUBLE PRECISION", "last_changed_ts DOUBLE PRECISION"],
+        )
+        # The timestamps of the existing rows are converted by
+        # migrate_events_timestamps and migrate_states_timestamps
+        # after the schema migration is done
+        _create_index(session_maker, TABLE_EVENTS, EVENTS_TIME_FIRED_TS_INDEX)
+        _create_index(
+            session_maker, TABLE_EVENTS, EVENTS_EVENT_TYPE_TIME_FIRED_TS_INDEX
+        )
+        _create_index(session_maker, TABLE_STATES, LAST_UPDATED_TS_INDEX)
+        _create_index(session_maker, TABLE_STATES, METADATA_ID_LAST_UPDATED_TS_INDEX)
+    elif new_version == 34:
+        # The statistics_daily and statistics_monthly tables are created by
+        # create_all, they are filled in by backfill_statistics_rollups
+        # after the schema migration is done
+        pass
+    elif new_version == 35:
+        # Shared event data and state attributes remember when they were last
+        # used. The existing rows are marked as used now, they are purged once
+        # the events and states recorded before the migration are purged.
+        now = time.time()
+        for table, id_column, index in (
+            (TABLE_EVENT_DATA, "data_id", EVENT_DATA_LAST_USED_TS_INDEX),
+            (
+                TABLE_STATE_ATTRIBUTES,
+                "attributes_id",
+                STATE_ATTRIBUTES_LAST_USED_TS_INDEX,
+            ),
+        ):
+            _add_columns(session_maker, table, ["last_used_ts DOUBLE PRECISION"])
+            _mark_shared_data_used(session_maker, table, id_column, now)
+            _create_index(session_maker, table, index)
+    elif new_version == 36:
+        # Large shared attributes may be stored compressed with a dictionary
+        # from the state_attributes_dictionary table which is created by
+        # create_all. The attributes stored as text are compressed in the
+        # background by compress_state_attributes if compression is enabled.
+        if dialect == SupportedDialect.POSTGRESQL:
+            bin_type = "BYTEA"
+        elif dialect == SupportedDialect.MYSQL:
+            bin_type = "LONGBLOB"
+        else:
+            bin_type = "BLOB"
+        _add_columns(
+            session_maker,
+            TABLE_STATE_ATTRIBUTES,
+            [f"shared_attrs_bin {bin_type}", "dictionary_id INTEGER"],
+        )
     else:
         raise ValueError(f"No schema migration defined for version {new_version}")
 
 
+def _mark_shared_data_used(
+    session_maker: Callable[[], Session], table: str, id_column: str, now: float
+) -> None:
+    """Set last_used_ts of the existing shared data rows of a table.
+
+    The rows are updated in batches of primary key ranges and each
+    batch is committed so the transactions stay small on large databases.
+    """
+    last_row_id = 0
+    while True:
+        with session_scope(session=session_maker()) as session:
+            row_ids = (
+                session.connection()
+                .execute(
+                    text(
+                        f"SELECT {id_column} FROM {table}"
+                        f" WHERE {id_column} > :last_row_id"
+                        f" ORDER BY {id_column} LIMIT :limit"
+                    ),
+                    {"last_row_id": last_row_id, "limit": MAX_ROWS_TO_MIGRATE},
+                )
+                .scalars()
+                .all()
+            )
+            if row_ids:
+                session.connection().execute(
+                    text(
+                        f"UPDATE {table} SET last_used_ts = :now"
+                        f" WHERE {id_column} > :last_row_id"
+                        f" AND {id_column} <= :max_row_id"
+                    ),
+                    {
+                        "now": now,
+                        "last_row_id": last_row_id,
+                        "max_row_id": row_ids[-1],
+                    },
+                )
+        if len(row_ids) < MAX_ROWS_TO_MIGRATE:
+            return
+        last_row_id = row_ids[-1]
+
+
+def _migrate_context_ids(
+    session_maker: Callable[[], Session],
+    table: type[Events] | type[States],
+    id_key: str,
+    find_context_ids_to_migrate: Callable[[], StatementLambdaElement],
+    context_id_index: str,
+) -> bool:
+    """Convert a batch of the string context ids of a table to bytes.
+
+    The string context ids of the converted rows are removed so the
+    migration picks up where it stopped when the recorder is restarted.
+
+    Returns True if the migration is done.
+    """
+    _LOGGER.debug("Migrating context ids of table %s", table.__tablename__)
+    with session_scope(session=session_maker()) as session:
+        if rows := session.execute(find_context_ids_to_migrate()).all():
+            session.bulk_update_mappings(
+                table,
+                [
+                    {
+                        id_key: row_id,
+                        "context_id": None,
+                        "context_id_bin": ulid_to_bytes_or_none(context_id),
+                        "context_user_id": None,
+                        "context_user_id_bin": uuid_hex_to_bytes_or_none(
+                            context_user_id
+                        ),
+                        "context_parent_id": None,
+                        "context_parent_id_bin": ulid_to_bytes_or_none(
+                            context_parent_id
+                        ),
+                    }
+                    for row_id, context_id, context_user_id, context_parent_id in rows
+                ],
+            )
+
+    if len(rows) == MAX_ROWS_TO_MIGRATE:
+        return False
+
+    # Once all rows have binary context ids the
+    # string context id index is no longer used by any query
+    _drop_index(session_maker, table.__tablename__, context_id_index)
+    _LOGGER.debug("Migrating context ids of table %s done", table.__tablename__)
+    return True
+
+
+def migrate_events_context_ids(instance: Recorder) -> bool:
+    """Migrate a batch of the string context ids of the events to bytes.
+
+    Returns True if the migration is done.
+    """
+    return _migrate_context_ids(
+        instance.get_session,
+        Events,
+        "event_id",
+        find_events_context_ids_to_migrate,
+        EVENTS_CONTEXT_ID_INDEX,
+    )
+
+
+def migrate_states_context_ids(instance: Recorder) -> bool:
+    """Migrate a batch of the string context ids of the states to bytes.
+
+    Returns True if the migration is done.
+    """
+    return _migrate_context_ids(
+        instance.get_session,
+        States,
+        "state_id",
+        find_states_context_ids_to_migrate,
+        STATES_CONTEXT_ID_INDEX,
+    )
+
+
+def migrate_events_timestamps(instance: Recorder) -> bool:
+    """Convert a batch of the time_fired datetimes of the events to epoch floats.
+
+    The datetimes of the converted rows are removed. The old datetime
+    indexes are dropped once all rows are converted.
+
+    Returns True if the migration is done.
+    """
+    _LOGGER.debug("Migrating timestamps of table %s", TABLE_EVENTS)
+    session_maker = instance.get_session
+    with session_scope(session=session_maker()) as session:
+        if rows := session.execute(find_events_timestamps_to_migrate()).all():
+            session.bulk_update_mappings(
+                Events,
+                [
+                    {
+                        "event_id": event_id,
+                        "time_fired": None,
+                        "time_fired_ts": process_datetime_to_timestamp(time_fired),
+                    }
+                    for event_id, time_fired in rows
+                ],
+            )
+
+    if len(rows) == MAX_ROWS_TO_MIGRATE:
+        return False
+
+    _drop_index(session_maker, TABLE_EVENTS, EVENTS_TIME_FIRED_INDEX)
+    _drop_index(session_maker, TABLE_EVENTS, EVENTS_EVENT_TYPE_TIME_FIRED_INDEX)
+    _LOGGER.debug("Migrating timestamps of table %s done", TABLE_EVENTS)
+    return True
+
+
+def migrate_states_timestamps(instance: Recorder) -> bool:
+    """Convert a batch of the last_updated and last_changed datetimes of the states.
+
+    The datetimes of the converted rows are removed. The old datetime
+    indexes are dropped once all rows are converted.
+
+    Returns True if the migration is done.
+    """
+    _LOGGER.debug("Migrating timestamps of table %s", TABLE_STATES)
+    session_maker = instance.get_session
+    with session_scope(session=session_maker()) as session:
+        if rows := session.execute(find_states_timestamps_to_migrate()).all():
+            session.bulk_update_mappings(
+                States,
+                [
+                    {
+                        "state_id": state_id,
+                        "last_updated": None,
+                        "last_updated_ts": process_datetime_to_timestamp(last_updated),
+                        "last_changed": None,
+                        "last_changed_ts": process_datetime_to_timestamp(last_changed)
+                        if last_changed is not None
+                        else None,
+                    }
+                    for state_id, last_updated, last_changed in rows
+                ],
+            )
+
+    if len(rows) == MAX_ROWS_TO_MIGRATE:
+        return False
+
+    _drop_index(session_maker, TABLE_STATES, LAST_UPDATED_INDEX)
+    _drop_index(session_maker, TABLE_STATES, METADATA_ID_LAST_UPDATED_INDEX)
+    _LOGGER.debug("Migrating timestamps of table %s done", TABLE_STATES)
+    return True
+
+
+def migrate_entity_ids(instance: Recorder) -> bool:
+    """Migrate the entity_ids of the states to the states_meta table.
+
+    The states are migrated in batches so the recorder can keep
+    processing events while the migration is running.
+
+    Returns True if the migration is done.
+    """
+    _LOGGER.debug("Migrating entity_ids to the states_meta table")
+    session_maker = instance.get_session
+    with session_scope(session=session_maker()) as session:
+        if states := session.execute(find_entity_ids_to_migrate()).all():
+            metadata_ids: dict[str, int] = {}
+            for entity_id in {entity_id for _, entity_id in states}:
+                if row := session.execute(find_states_metadata_id(entity_id)).first():
+                    metadata_ids[entity_id] = row[0]
+                    continue
+                states_meta = StatesMeta(entity_id=entity_id)
+                session.add(states_meta)
+                session.flush()
+                metadata_ids[entity_id] = states_meta.metadata_id
+            session.bulk_update_mappings(
+                States,
+                [
+                    {"state_id": state_id, "metadata_id": metadata_ids[entity_id]}
+                    for state_id, entity_id in states
+                ],
+            )
+
+    if len(states) == MAX_ROWS_TO_MIGRATE:
+        return False
+
+    # Once all states have a metadata_id the entity_id
+    # index is no longer used by any query
+    _drop_index(session_maker, TABLE_STATES, ENTITY_ID_LAST_UPDATED_INDEX)
+    _LOGGER.debug("Migrating entity_ids to the states_meta table done")
+    return True
+
+
+def compress_state_attributes(instance: Recorder, start_id: int) -> int | None:
+    """Compress the shared attributes stored as text.
+
+    A dictionary is trained from the newest attributes first if there is
+    none yet. The attributes are compressed in batches so the recorder can
+    keep processing events while the migration is running.
+
+    Returns the attributes_id to continue after or None if the migration is done.
+    """
+    with session_scope(session=instance.get_session()) as session:
+        if instance.attributes_dictionary is None:
+            if (dictionary := _train_attributes_dictionary(session)) is None:
+                _LOGGER.debug("Not enough attributes to train a dictionary")
+                return None
+            instance.attributes_dictionary = dictionary
+        dictionary_id, zdict = instance.attributes_dictionary
+        rows = session.execute(find_attributes_to_compress(start_id)).all()
+        compressed: list[dict[str, Any]] = []
+        for attributes_id, shared_attrs in rows:
+            shared_attrs_bytes = shared_attrs.encode("utf-8")
+            if should_compress(shared_attrs_bytes) and (
+                shared_attrs_bin := compress_attributes(shared_attrs_bytes, zdict)
+            ):
+                compressed.append(
+                    {
+                        "attributes_id": attributes_id,
+                        "shared_attrs": None,
+                        "shared_attrs_bin": shared_attrs_bin,
+                        "dictionary_id": dictionary_id,
+                    }
+                )
+        session.bulk_update_mappings(StateAttributes, compressed)
+
+    if len(rows) < MAX_ROWS_TO_COMPRESS:
+        _LOGGER.debug("Compressing the shared attributes done")
+        return None
+    return cast(int, rows[-1].attributes_id)
+
+
+def _train_attributes_dictionary(session: Session) -> tuple[int, bytes] | None:
+    """Train a dictionary from the shared attributes and store it."""
+    samples = [
+        shared_attrs_bytes
+        for (shared_attrs,) in session.execute(find_attributes_to_train_dictionary())
+        if should_compress(shared_attrs_bytes := shared_attrs.encode("utf-8"))
+    ]
+    if len(samples) < DICTIONARY_MIN_TRAINING_SAMPLES or not (
+        zdict := train_dictionary(samples)
+    ):
+        return None
+    dictionary = StateAttributesDictionary(zdict=zdict)
+    session.add(dictionary)
+    session.flush()
+    dictionary_id = cast(int, dictionary.dictionary_id)
+    add_dictionary(dictionary_id, zdict)
+    _LOGGER.debug(
+        "Trained a %s byte attributes dictionary from %s attributes",
+        len(zdict),
+        len(samples),
+    )
+    return dictionary_id, zdict
+
+
 def _initialize_database(session: Session) -> bool:
     """Initialize a new database, or a database created before introducing schema changes.
 
@@ -805,7 +1225,7 @@ def _initialize_database(session: Session) -> bool:
     indexes = inspector.get_indexes("events")
 
     for index in indexes:
-        if index["column_names"] == ["time_fired"]:
+        if index["column_names"] in (["time_fired"], ["time_fired_ts"]):
             # Schema addition from version 1 detected. New DB.
             session.add(StatisticsRuns(start=get_start_time()))
             session.add(SchemaChanges(schema_version=SCHEMA_VERSION))
@@ -14,8 +14,11 @@ from homeassistant.components.websocket_api import (
     COMPRESSED_STATE_STATE,
 )
 from homeassistant.core import Context, State
-from homeassistant.helpers.json import json_loads
+from homeassistant.helpers.json import JSONFragment, json_loads
 import homeassistant.util.dt as dt_util
+from homeassistant.util.ulid import bytes_to_ulid, ulid_to_bytes
+
+from .compression import decompress_attributes
 
 # pylint: disable=invalid-name
 
@@ -120,6 +123,48 @@ def process_datetime_to_timestamp(ts: datetime) -> float:
     return ts.timestamp()
 
 
+def ulid_to_bytes_or_none(ulid: str | None) -> bytes | None:
+    """Convert a context id to the 16 bytes stored in the database.
+
+    Context ids created before they were ulids are 32 character
+    uuid hex strings which also fit in 16 bytes.
+    """
+    if ulid is None:
+        return None
+    try:
+        return ulid_to_bytes(ulid)
+    except ValueError:
+        return uuid_hex_to_bytes_or_none(ulid)
+
+
+def bytes_to_ulid_or_none(_bytes: bytes | None) -> str | None:
+    """Convert the 16 bytes of a context id from the database to a ulid."""
+    if _bytes is None:
+        return None
+    try:
+        return bytes_to_ulid(_bytes)
+    except IndexError:
+        _LOGGER.debug("Invalid context id bytes %s", _bytes)
+        return None
+
+
+def uuid_hex_to_bytes_or_none(uuid_hex: str | None) -> bytes | None:
+    """Convert a uuid hex string, like the id of a user, to 16 bytes."""
+    if uuid_hex is None or len(uuid_hex) != 32:
+        return None
+    try:
+        return bytes.fromhex(uuid_hex)
+    except ValueError:
+        return None
+
+
+def bytes_to_uuid_hex_or_none(_bytes: bytes | None) -> str | None:
+    """Convert 16 bytes from the database to a uuid hex string."""
+    if _bytes is None or len(_bytes) != 16:
+        return None
+    return _bytes.hex()
+
+
 class LazyState(State):
     """A lazy version of core State."""
 
@@ -135,7 +180,7 @@ class LazyState(State):
     def __init__(  # pylint: disable=super-init-not-called
         self,
         row: Row,
-        attr_cache: dict[str, dict[str, Any]],
+        attr_cache: dict[str | bytes, dict[str, Any]],
         start_time: datetime | None = None,
     ) -> None:
         """Init the lazy state."""
@@ -176,8 +221,8 @@ class LazyState(State):
     def last_changed(self) -> datetime:
         """Last changed datetime."""
         if self._last_changed is None:
-            if (last_changed := self._row.last_changed) is not None:
-                self._last_changed = process_timestamp(last_changed)
+            if (last_changed_ts := self._row.last_changed_ts) is not None:
+                self._last_changed = dt_util.utc_from_timestamp(last_changed_ts)
             else:
                 self._last_changed = self.last_updated
         return self._last_changed
@@ -191,7 +236,7 @@ class LazyState(State):
     def last_updated(self) -> datetime:
         """Last updated datetime."""
         if self._last_updated is None:
-            self._last_updated = process_timestamp(self._row.last_updated)
+            self._last_updated = dt_util.utc_from_timestamp(self._row.last_updated_ts)
         return self._last_updated
 
     @last_updated.setter
@@ -207,18 +252,18 @@ class LazyState(State):
         To be used for JSON serialization.
         """
         if self._last_changed is None and self._last_updated is None:
-            last_updated_isoformat = process_timestamp_to_utc_isoformat(
-                self._row.last_updated
-            )
+            last_updated_ts = self._row.last_updated_ts
+            last_updated_isoformat = dt_util.utc_from_timestamp(
+                last_updated_ts
+            ).isoformat()
             if (
-                self._row.last_changed is None
-                or self._row.last_changed == self._row.last_updated
-            ):
+                last_changed_ts := self._row.last_changed_ts
+            ) is None or last_changed_ts == last_updated_ts:
                 last_changed_isoformat = last_updated_isoformat
             else:
-                last_changed_isoformat = process_timestamp_to_utc_isoformat(
-                    self._row.last_changed
-                )
+                last_changed_isoformat = dt_util.utc_from_timestamp(
+                    last_changed_ts
+                ).isoformat()
         else:
             last_updated_isoformat = self.last_updated.isoformat()
             if self.last_changed == self.last_updated:
@@ -244,43 +289,87 @@ class LazyState(State):
 
 
 def decode_attributes_from_row(
-    row: Row, attr_cache: dict[str, dict[str, Any]]
+    row: Row, attr_cache: dict[str | bytes, dict[str, Any]]
 ) -> dict[str, Any]:
-    """Decode attributes from a database row."""
-    source: str = row.shared_attrs or row.attributes
+    """Decode attributes from a database row.
+
+    Compressed attributes are cached by their compressed bytes so
+    they are only decompressed once per query.
+    """
+    source: str | bytes = row.shared_attrs or row.attributes or row.shared_attrs_bin
     if (attributes := attr_cache.get(source)) is not None:
         return attributes
     if not source or source == EMPTY_JSON_OBJECT:
         return {}
     try:
-        attr_cache[source] = attributes = json_loads(source)
+        if isinstance(source, bytes):
+            attributes = json_loads(decompress_attributes(source, row.dictionary_id))
+        else:
+            attributes = json_loads(source)
+        attr_cache[source] = attributes
     except ValueError:
         _LOGGER.exception("Error converting row to state attributes: %s", source)
         attr_cache[source] = attributes = {}
     return attributes
 
 
+def raw_attributes_from_row(
+    row: Row, attr_cache: dict[str, dict[str, Any]]
+) -> JSONFragment | dict[str, Any]:
+    """Return the attributes of a database row as the json they are stored as.
+
+    The json is only inserted into a response as is when it is a valid
+    json object, broken attributes are logged and returned as an empty dict.
+    Each distinct source is only parsed once, the result is kept in attr_cache.
+    """
+    source: str | bytes = row.shared_attrs or row.attributes or row.shared_attrs_bin
+    if not source or source == EMPTY_JSON_OBJECT:
+        return {}
+    if isinstance(source, bytes):
+        try:
+            source = decompress_attributes(source, row.dictionary_id).decode("utf-8")
+        except ValueError:
+            _LOGGER.exception("Error converting row to state attributes: %s", source)
+            return {}
+    if (attributes := attr_cache.get(source)) is None:
+        try:
+            attributes = json_loads(source)
+            if not isinstance(attributes, dict):
+                raise ValueError("Attributes are not a json object")
+        except ValueError:
+            _LOGGER.exception("Error converting row to state attributes: %s", source)
+            attributes = {}
+        attr_cache[source] = attributes
+    if not attributes:
+        return {}
+    return JSONFragment(source)
+
+
 def row_to_compressed_state(
     row: Row,
-    attr_cache: dict[str, dict[str, Any]],
+    attr_cache: dict[str | bytes, dict[str, Any]],
     start_time: datetime | None = None,
+    raw_attributes: bool = False,
 ) -> dict[str, Any]:
-    """Convert a database row to a compressed state."""
+    """Convert a database row to a compressed state.
+
+    With raw_attributes the attributes are a JSONFragment of the json they
+    are stored as so they can be dumped with json_dumps_with_fragments
+    without decoding them.
+    """
     comp_state = {
         COMPRESSED_STATE_STATE: row.state,
-        COMPRESSED_STATE_ATTRIBUTES: decode_attributes_from_row(row, attr_cache),
+        COMPRESSED_STATE_ATTRIBUTES: raw_attributes_from_row(row, attr_cache)
+        if raw_attributes
+        else decode_attributes_from_row(row, attr_cache),
     }
     if start_time:
         comp_state[COMPRESSED_STATE_LAST_UPDATED] = start_time.timestamp()
     else:
-        row_last_updated: datetime = row.last_updated
-        comp_state[COMPRESSED_STATE_LAST_UPDATED] = process_datetime_to_timestamp(
-            row_last_updated
-        )
+        row_last_updated_ts: float = row.last_updated_ts
+        comp_state[COMPRESSED_STATE_LAST_UPDATED] = row_last_updated_ts
         if (
-            row_changed_changed := row.last_changed
-        ) and row_last_updated != row_changed_changed:
-            comp_state[COMPRESSED_STATE_LAST_CHANGED] = process_datetime_to_timestamp(
-                row_changed_changed
-            )
+            row_last_changed_ts := row.last_changed_ts
+        ) and row_last_updated_ts != row_last_changed_ts:
+            comp_state[COMPRESSED_STATE_LAST_CHANGED] = row_last_changed_ts
     return comp_state
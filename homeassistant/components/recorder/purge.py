@@ -2,19 +2,24 @@
 from __future__ import annotations
 
 from collections.abc import Callable, Iterable
+from dataclasses import dataclass
 from datetime import datetime
 from functools import partial
 from itertools import islice, zip_longest
 import logging
+import time
 from typing import TYPE_CHECKING, Any
 
 from sqlalchemy.orm.session import Session
 from sqlalchemy.sql.expression import distinct
+from sqlalchemy.sql.lambdas import StatementLambdaElement
 
 from homeassistant.const import EVENT_STATE_CHANGED
+import homeassistant.util.dt as dt_util
 
-from .const import MAX_ROWS_TO_PURGE, SupportedDialect
-from .db_schema import Events, StateAttributes, States
+from .const import MAX_ROWS_TO_PURGE, SHARED_DATA_LAST_USED_INTERVAL, SupportedDialect
+from .db_schema import Events, StateAttributes, States, StatesMeta
+from .metrics import PurgeMetrics
 from .queries import (
     attributes_ids_exist_in_states,
     attributes_ids_exist_in_states_sqlite,
@@ -28,6 +33,10 @@ from .queries import (
     delete_statistics_runs_rows,
     delete_statistics_short_term_rows,
     disconnect_states_rows,
+    find_attributes_ids_last_used_before,
+    find_attributes_last_used,
+    find_data_ids_last_used_before,
+    find_event_data_last_used,
     find_events_to_purge,
     find_latest_statistics_runs_run_id,
     find_legacy_event_state_and_attributes_and_data_ids_to_purge,
@@ -47,6 +56,23 @@ _LOGGER = logging.getLogger(__name__)
 
 DEFAULT_STATES_BATCHES_PER_PURGE = 20  # We expect ~95% de-dupe rate
 DEFAULT_EVENTS_BATCHES_PER_PURGE = 15  # We expect ~92% de-dupe rate
+# The time in seconds a purge task may spend deleting batches of states
+# and events before it yields back to the recorder to process events
+DEFAULT_PURGE_TIME_BUDGET = 0.5
+
+
+@dataclass
+class PurgeCursor:
+    """Position of an incremental purge.
+
+    No rows older than these timestamps are left to purge, the next run
+    starts its index range scans here instead of at the start of the index
+    where the entries of the rows deleted by the previous runs may linger
+    until the database has vacuumed them.
+    """
+
+    states_ts: float = 0.0
+    events_ts: float = 0.0
 
 
 def take(take_num: int, iterable: Iterable) -> list[Any]:
@@ -73,16 +99,66 @@ def purge_old_data(
     apply_filter: bool = False,
     events_batch_size: int = DEFAULT_EVENTS_BATCHES_PER_PURGE,
     states_batch_size: int = DEFAULT_STATES_BATCHES_PER_PURGE,
+    time_budget: float | None = None,
+    cursor: PurgeCursor | None = None,
 ) -> bool:
     """Purge events and states older than purge_before.
 
     Cleans up an timeframe of an hour, based on the oldest record.
+
+    If time_budget is set, no more batches are deleted once the budget is
+    spent. The position reached is saved in cursor to resume the purge
+    in the next run.
     """
     _LOGGER.debug(
         "Purging states and events before target %s",
         purge_before.isoformat(sep=" ", timespec="seconds"),
     )
     using_sqlite = instance.dialect_name == SupportedDialect.SQLITE
+    start = time.monotonic()
+    deadline = None if time_budget is None else start + time_budget
+    if cursor is None:
+        cursor = PurgeCursor()
+    metrics = instance.purge_metrics
+    if not metrics.in_progress or metrics.purge_before != purge_before:
+        # A new purge is started
+        metrics = instance.purge_metrics = PurgeMetrics(purge_before=purge_before)
+    metrics.in_progress = True
+    metrics.runs += 1
+    try:
+        done = _purge_old_data(
+            instance,
+            purge_before,
+            repack,
+            apply_filter,
+            events_batch_size,
+            states_batch_size,
+            using_sqlite,
+            deadline,
+            cursor,
+        )
+    finally:
+        metrics.purge_time += time.monotonic() - start
+        if metrics.purge_time:
+            metrics.rows_per_second = (
+                metrics.states_purged + metrics.events_purged
+            ) / metrics.purge_time
+    metrics.in_progress = not done
+    return done
+
+
+def _purge_old_data(
+    instance: Recorder,
+    purge_before: datetime,
+    repack: bool,
+    apply_filter: bool,
+    events_batch_size: int,
+    states_batch_size: int,
+    using_sqlite: bool,
+    deadline: float | None,
+    cursor: PurgeCursor,
+) -> bool:
+    """Purge events and states older than purge_before until deadline."""
 
     with session_scope(session=instance.get_session()) as session:
         # Purge a max of MAX_ROWS_TO_PURGE, based on the oldest states or events record
@@ -100,10 +176,22 @@ def purge_old_data(
             )
             # Once we are done purging legacy rows, we use the new method
             has_more_to_purge |= _purge_states_and_attributes_ids(
-                instance, session, states_batch_size, purge_before, using_sqlite
+                instance,
+                session,
+                states_batch_size,
+                purge_before,
+                using_sqlite,
+                deadline,
+                cursor,
             )
             has_more_to_purge |= _purge_events_and_data_ids(
-                instance, session, events_batch_size, purge_before, using_sqlite
+                instance,
+                session,
+                events_batch_size,
+                purge_before,
+                using_sqlite,
+                deadline,
+                cursor,
             )
 
         statistics_runs = _select_statistics_runs_to_purge(session, purge_before)
@@ -150,9 +238,11 @@ def _purge_legacy_format(
     )
     if state_ids:
         _purge_state_ids(instance, session, state_ids)
+        instance.purge_metrics.states_purged += len(state_ids)
     _purge_unused_attributes_ids(instance, session, attributes_ids, using_sqlite)
     if event_ids:
         _purge_event_ids(session, event_ids)
+        instance.purge_metrics.events_purged += len(event_ids)
     _purge_unused_data_ids(instance, session, data_ids, using_sqlite)
     return bool(event_ids or state_ids or attributes_ids or data_ids)
 
@@ -163,10 +253,12 @@ def _purge_states_and_attributes_ids(
     states_batch_size: int,
     purge_before: datetime,
     using_sqlite: bool,
+    deadline: float | None,
+    cursor: PurgeCursor,
 ) -> bool:
     """Purge states and linked attributes id in a batch.
 
-    Returns true if there are more states to purge.
+    Returns true if there are more states or attributes to purge.
     """
     has_remaining_state_ids_to_purge = True
     # There are more states relative to attributes_ids so
@@ -176,15 +268,38 @@ def _purge_states_and_attributes_ids(
     attributes_ids_batch: set[int] = set()
     for _ in range(states_batch_size):
         state_ids, attributes_ids = _select_state_attributes_ids_to_purge(
-            session, purge_before
+            session, purge_before, cursor
         )
         if not state_ids:
             has_remaining_state_ids_to_purge = False
             break
         _purge_state_ids(instance, session, state_ids)
+        instance.purge_metrics.states_purged += len(state_ids)
         attributes_ids_batch = attributes_ids_batch | attributes_ids
+        if deadline is not None and time.monotonic() >= deadline:
+            break
 
-    _purge_unused_attributes_ids(instance, session, attributes_ids_batch, using_sqlite)
+    # The attributes last used before the states purged so far are not
+    # used anymore and are purged without checking the states
+    last_used_before = _shared_data_last_used_before(
+        purge_before, cursor.states_ts, has_remaining_state_ids_to_purge
+    )
+    has_remaining_attributes_ids_to_purge = _purge_attributes_ids_last_used_before(
+        instance, session, last_used_before
+    )
+    _purge_unused_attributes_ids(
+        instance,
+        session,
+        _select_shared_ids_to_check(
+            session,
+            attributes_ids_batch,
+            purge_before,
+            last_used_before,
+            find_attributes_last_used,
+        ),
+        using_sqlite,
+    )
+    has_remaining_state_ids_to_purge |= has_remaining_attributes_ids_to_purge
     _LOGGER.debug(
         "After purging states and attributes_ids remaining=%s",
         has_remaining_state_ids_to_purge,
@@ -198,10 +313,12 @@ def _purge_events_and_data_ids(
     events_batch_size: int,
     purge_before: datetime,
     using_sqlite: bool,
+    deadline: float | None,
+    cursor: PurgeCursor,
 ) -> bool:
-    """Purge states and linked attributes id in a batch.
+    """Purge events and linked data ids in a batch.
 
-    Returns true if there are more states to purge.
+    Returns true if there are more events or event data to purge.
     """
     has_remaining_event_ids_to_purge = True
     # There are more events relative to data_ids so
@@ -210,14 +327,39 @@ def _purge_events_and_data_ids(
     # MAX_ROWS_TO_PURGE
     data_ids_batch: set[int] = set()
     for _ in range(events_batch_size):
-        event_ids, data_ids = _select_event_data_ids_to_purge(session, purge_before)
+        event_ids, data_ids = _select_event_data_ids_to_purge(
+            session, purge_before, cursor
+        )
         if not event_ids:
             has_remaining_event_ids_to_purge = False
             break
         _purge_event_ids(session, event_ids)
+        instance.purge_metrics.events_purged += len(event_ids)
         data_ids_batch = data_ids_batch | data_ids
+        if deadline is not None and time.monotonic() >= deadline:
+            break
 
-    _purge_unused_data_ids(instance, session, data_ids_batch, using_sqlite)
+    # The event data last used before the events purged so far is not
+    # used anymore and is purged without checking the events
+    last_used_before = _shared_data_last_used_before(
+        purge_before, cursor.events_ts, has_remaining_event_ids_to_purge
+    )
+    has_remaining_data_ids_to_purge = _purge_data_ids_last_used_before(
+        instance, session, last_used_before
+    )
+    _purge_unused_data_ids(
+        instance,
+        session,
+        _select_shared_ids_to_check(
+            session,
+            data_ids_batch,
+            purge_before,
+            last_used_before,
+            find_event_data_last_used,
+        ),
+        using_sqlite,
+    )
+    has_remaining_event_ids_to_purge |= has_remaining_data_ids_to_purge
     _LOGGER.debug(
         "After purging event and data_ids remaining=%s",
         has_remaining_event_ids_to_purge,
@@ -225,16 +367,97 @@ def _purge_events_and_data_ids(
     return has_remaining_event_ids_to_purge
 
 
+def _shared_data_last_used_before(
+    purge_before: datetime, cursor_ts: float, has_remaining_rows_to_purge: bool
+) -> float:
+    """Return the timestamp before which shared data is not used anymore.
+
+    The last_used_ts of attributes and event data lags behind by at most
+    SHARED_DATA_LAST_USED_INTERVAL, rows last used before the oldest state
+    or event that is kept minus the interval are not used by any of them.
+    """
+    oldest_kept_ts = dt_util.utc_to_timestamp(purge_before)
+    if has_remaining_rows_to_purge:
+        # The rows are purged in timestamp order, all
+        # rows older than the cursor are purged
+        oldest_kept_ts = min(oldest_kept_ts, cursor_ts)
+    return oldest_kept_ts - SHARED_DATA_LAST_USED_INTERVAL
+
+
+def _select_shared_ids_to_check(
+    session: Session,
+    shared_ids: set[int],
+    purge_before: datetime,
+    last_used_before: float,
+    find_last_used: Callable[[Iterable[int]], StatementLambdaElement],
+) -> set[int]:
+    """Return the attributes or data ids which must be checked for use.
+
+    Rows last used before last_used_before are purged by their last_used_ts,
+    rows last used after purge_before are still used. Only rows without a
+    last_used_ts or last used in between need to be checked.
+    """
+    purge_before_ts = dt_util.utc_to_timestamp(purge_before)
+    return {
+        shared_id
+        for shared_ids_chunk in chunked(shared_ids, MAX_ROWS_TO_PURGE)
+        for shared_id, last_used_ts in session.execute(find_last_used(shared_ids_chunk))
+        if last_used_ts is None or last_used_before <= last_used_ts < purge_before_ts
+    }
+
+
+def _purge_attributes_ids_last_used_before(
+    instance: Recorder, session: Session, last_used_before: float
+) -> bool:
+    """Purge a batch of attributes last used before last_used_before.
+
+    Returns true if there are more attributes to purge.
+    """
+    attributes_ids = {
+        attributes_id
+        for (attributes_id,) in session.execute(
+            find_attributes_ids_last_used_before(last_used_before)
+        )
+    }
+    _LOGGER.debug("Selected %s unused attributes to remove", len(attributes_ids))
+    if attributes_ids:
+        _purge_batch_attributes_ids(instance, session, attributes_ids)
+    return len(attributes_ids) == MAX_ROWS_TO_PURGE
+
+
+def _purge_data_ids_last_used_before(
+    instance: Recorder, session: Session, last_used_before: float
+) -> bool:
+    """Purge a batch of event data last used before last_used_before.
+
+    Returns true if there is more event data to purge.
+    """
+    data_ids = {
+        data_id
+        for (data_id,) in session.execute(
+            find_data_ids_last_used_before(last_used_before)
+        )
+    }
+    _LOGGER.debug("Selected %s unused event data to remove", len(data_ids))
+    if data_ids:
+        _purge_batch_data_ids(instance, session, data_ids)
+    return len(data_ids) == MAX_ROWS_TO_PURGE
+
+
 def _select_state_attributes_ids_to_purge(
-    session: Session, purge_before: datetime
+    session: Session, purge_before: datetime, cursor: PurgeCursor
 ) -> tuple[set[int], set[int]]:
     """Return sets of state and attribute ids to purge."""
     state_ids = set()
     attributes_ids = set()
-    for state in session.execute(find_states_to_purge(purge_before)).all():
+    for state in session.execute(
+        find_states_to_purge(dt_util.utc_to_timestamp(purge_before), cursor.states_ts)
+    ).all():
         state_ids.add(state.state_id)
         if state.attributes_id:
             attributes_ids.add(state.attributes_id)
+        # The rows are ordered by last_updated_ts
+        cursor.states_ts = state.last_updated_ts
     _LOGGER.debug(
         "Selected %s state ids and %s attributes_ids to remove",
         len(state_ids),
@@ -244,15 +467,19 @@ def _select_state_attributes_ids_to_purge(
 
 
 def _select_event_data_ids_to_purge(
-    session: Session, purge_before: datetime
+    session: Session, purge_before: datetime, cursor: PurgeCursor
 ) -> tuple[set[int], set[int]]:
     """Return sets of event and data ids to purge."""
     event_ids = set()
     data_ids = set()
-    for event in session.execute(find_events_to_purge(purge_before)).all():
+    for event in session.execute(
+        find_events_to_purge(dt_util.utc_to_timestamp(purge_before), cursor.events_ts)
+    ).all():
         event_ids.add(event.event_id)
         if event.data_id:
             data_ids.add(event.data_id)
+        # The rows are ordered by time_fired_ts
+        cursor.events_ts = event.time_fired_ts
     _LOGGER.debug(
         "Selected %s event ids and %s data_ids to remove", len(event_ids), len(data_ids)
     )
@@ -418,7 +645,9 @@ def _select_legacy_event_state_and_attributes_and_data_ids_to_purge(
     still need to be able to purge them.
     """
     events = session.execute(
-        find_legacy_event_state_and_attributes_and_data_ids_to_purge(purge_before)
+        find_legacy_event_state_and_attributes_and_data_ids_to_purge(
+            dt_util.utc_to_timestamp(purge_before)
+        )
     ).all()
     _LOGGER.debug("Selected %s event ids to remove", len(events))
     event_ids = set()
@@ -484,6 +713,13 @@ def _evict_purged_data_from_data_cache(
     for purged_attribute_id in purged_data_ids.intersection(event_data_ids_reversed):
         event_data_ids.pop(event_data_ids_reversed[purged_attribute_id], None)
 
+    # Evict any purged data from the event_data_last_used cache
+    event_data_last_used = (
+        instance._event_data_last_used  # pylint: disable=protected-access
+    )
+    for purged_data_id in purged_data_ids:
+        event_data_last_used.pop(purged_data_id, None)
+
 
 def _evict_purged_attributes_from_attributes_cache(
     instance: Recorder, purged_attributes_ids: set[int]
@@ -506,6 +742,13 @@ def _evict_purged_attributes_from_attributes_cache(
             state_attributes_ids_reversed[purged_attribute_id], None
         )
 
+    # Evict any purged attributes from the state_attributes_last_used cache
+    state_attributes_last_used = (
+        instance._state_attributes_last_used  # pylint: disable=protected-access
+    )
+    for purged_attribute_id in purged_attributes_ids:
+        state_attributes_last_used.pop(purged_attribute_id, None)
+
 
 def _purge_batch_attributes_ids(
     instance: Recorder, session: Session, attributes_ids: set[int]
@@ -574,11 +817,12 @@ def _purge_filtered_data(instance: Recorder, session: Session) -> bool:
     # Check if excluded entity_ids are in database
     excluded_entity_ids: list[str] = [
         entity_id
-        for (entity_id,) in session.query(distinct(States.entity_id)).all()
+        for entity_id in _select_entity_ids(instance, session)
         if not instance.entity_filter(entity_id)
     ]
-    if len(excluded_entity_ids) > 0:
-        _purge_filtered_states(instance, session, excluded_entity_ids, using_sqlite)
+    if excluded_entity_ids and _purge_filtered_states(
+        instance, session, excluded_entity_ids, using_sqlite
+    ):
         return False
 
     # Check if excluded event_types are in database
@@ -594,24 +838,36 @@ def _purge_filtered_data(instance: Recorder, session: Session) -> bool:
     return True
 
 
+def _select_entity_ids(instance: Recorder, session: Session) -> list[str]:
+    """Return the entity_ids that are in the database."""
+    if instance.states_meta_active:
+        return [entity_id for (entity_id,) in session.query(StatesMeta.entity_id)]
+    return [entity_id for (entity_id,) in session.query(distinct(States.entity_id))]
+
+
 def _purge_filtered_states(
     instance: Recorder,
     session: Session,
     excluded_entity_ids: list[str],
     using_sqlite: bool,
-) -> None:
-    """Remove filtered states and linked events."""
+) -> bool:
+    """Remove filtered states and linked events.
+
+    Returns False if there were no states to remove.
+    """
+    query = session.query(States.state_id, States.attributes_id, States.event_id)
+    if instance.states_meta_active:
+        query = query.join(
+            StatesMeta, States.metadata_id == StatesMeta.metadata_id
+        ).filter(StatesMeta.entity_id.in_(excluded_entity_ids))
+    else:
+        query = query.filter(States.entity_id.in_(excluded_entity_ids))
+    if not (rows := query.limit(MAX_ROWS_TO_PURGE).all()):
+        return False
     state_ids: list[int]
     attributes_ids: list[int]
     event_ids: list[int]
-    state_ids, attributes_ids, event_ids = zip(
-        *(
-            session.query(States.state_id, States.attributes_id, States.event_id)
-            .filter(States.entity_id.in_(excluded_entity_ids))
-            .limit(MAX_ROWS_TO_PURGE)
-            .all()
-        )
-    )
+    state_ids, attributes_ids, event_ids = zip(*rows)
     event_ids = [id_ for id_ in event_ids if id_ is not None]
     _LOGGER.debug(
         "Selected %s state_ids to remove that should be filtered", len(state_ids)
@@ -622,6 +878,7 @@ def _purge_filtered_states(
         session, {id_ for id_ in attributes_ids if id_ is not None}, using_sqlite
     )
     _purge_batch_attributes_ids(instance, session, unused_attribute_ids_set)
+    return True
 
 
 def _purge_filtered_events(
@@ -662,13 +919,14 @@ def purge_entity_data(instance: Recorder, entity_filter: Callable[[str], bool])
     with session_scope(session=instance.get_session()) as session:
         selected_entity_ids: list[str] = [
             entity_id
-            for (entity_id,) in session.query(distinct(States.entity_id)).all()
+            for entity_id in _select_entity_ids(instance, session)
             if entity_filter(entity_id)
         ]
         _LOGGER.debug("Purging entity data for %s", selected_entity_ids)
-        if len(selected_entity_ids) > 0:
-            # Purge a max of MAX_ROWS_TO_PURGE, based on the oldest states or events record
-            _purge_filtered_states(instance, session, selected_entity_ids, using_sqlite)
+        # Purge a max of MAX_ROWS_TO_PURGE, based on the oldest states or events record
+        if selected_entity_ids and _purge_filtered_states(
+            instance, session, selected_entity_ids, using_sqlite
+        ):
             _LOGGER.debug("Purging entity data hasn't fully completed yet")
             return False
 
@@ -8,13 +8,21 @@ from sqlalchemy import delete, distinct, func, lambda_stmt, select, union_all, u
 from sqlalchemy.sql.lambdas import StatementLambdaElement
 from sqlalchemy.sql.selectable import Select
 
-from .const import MAX_ROWS_TO_PURGE
+from .compression import DICTIONARY_TRAINING_SAMPLES, MIN_SIZE_TO_COMPRESS
+from .const import (
+    MAX_HASHES_TO_LOAD,
+    MAX_ROWS_TO_COMPRESS,
+    MAX_ROWS_TO_MIGRATE,
+    MAX_ROWS_TO_PURGE,
+)
 from .db_schema import (
     EventData,
     Events,
     RecorderRuns,
     StateAttributes,
+    StateAttributesDictionary,
     States,
+    StatesMeta,
     StatisticsRuns,
     StatisticsShortTerm,
 )
@@ -23,23 +31,182 @@ from .db_schema import (
 def find_shared_attributes_id(
     data_hash: int, shared_attrs: str
 ) -> StatementLambdaElement:
-    """Find an attributes_id by hash and shared_attrs."""
+    """Find an attributes_id and its last_used_ts by hash and shared_attrs.
+
+    Compressed attributes with the same hash are returned as well
+    since they can only be compared after decompressing them.
+    """
     return lambda_stmt(
-        lambda: select(StateAttributes.attributes_id)
+        lambda: select(
+            StateAttributes.attributes_id,
+            StateAttributes.last_used_ts,
+            StateAttributes.shared_attrs_bin,
+            StateAttributes.dictionary_id,
+        )
         .filter(StateAttributes.hash == data_hash)
-        .filter(StateAttributes.shared_attrs == shared_attrs)
+        .filter(
+            (StateAttributes.shared_attrs == shared_attrs)
+            | StateAttributes.shared_attrs_bin.is_not(None)
+        )
     )
 
 
 def find_shared_data_id(attr_hash: int, shared_data: str) -> StatementLambdaElement:
-    """Find a data_id by hash and shared_data."""
+    """Find a data_id and its last_used_ts by hash and shared_data."""
     return lambda_stmt(
-        lambda: select(EventData.data_id)
+        lambda: select(EventData.data_id, EventData.last_used_ts)
         .filter(EventData.hash == attr_hash)
         .filter(EventData.shared_data == shared_data)
     )
 
 
+def count_shared_attributes() -> StatementLambdaElement:
+    """Count the shared attributes."""
+    return lambda_stmt(lambda: select(func.count(StateAttributes.attributes_id)))
+
+
+def count_shared_data() -> StatementLambdaElement:
+    """Count the shared event data."""
+    return lambda_stmt(lambda: select(func.count(EventData.data_id)))
+
+
+def find_shared_attributes_hashes(start_id: int) -> StatementLambdaElement:
+    """Find the hashes of the shared attributes after an attributes_id."""
+    return lambda_stmt(
+        lambda: select(StateAttributes.attributes_id, StateAttributes.hash)
+        .filter(StateAttributes.attributes_id > start_id)
+        .order_by(StateAttributes.attributes_id)
+        .limit(MAX_HASHES_TO_LOAD)
+    )
+
+
+def find_shared_data_hashes(start_id: int) -> StatementLambdaElement:
+    """Find the hashes of the shared event data after a data_id."""
+    return lambda_stmt(
+        lambda: select(EventData.data_id, EventData.hash)
+        .filter(EventData.data_id > start_id)
+        .order_by(EventData.data_id)
+        .limit(MAX_HASHES_TO_LOAD)
+    )
+
+
+def find_states_metadata_id(entity_id: str) -> StatementLambdaElement:
+    """Find a metadata_id by entity_id."""
+    return lambda_stmt(
+        lambda: select(StatesMeta.metadata_id).filter(StatesMeta.entity_id == entity_id)
+    )
+
+
+def find_entity_ids_to_migrate() -> StatementLambdaElement:
+    """Find states that do not have a metadata_id yet."""
+    return lambda_stmt(
+        lambda: select(States.state_id, States.entity_id)
+        .filter(States.metadata_id.is_(None))
+        .filter(States.entity_id.is_not(None))
+        .limit(MAX_ROWS_TO_MIGRATE)
+    )
+
+
+def has_entity_ids_to_migrate() -> StatementLambdaElement:
+    """Check if there are states that do not have a metadata_id yet."""
+    return lambda_stmt(
+        lambda: select(States.state_id)
+        .filter(States.metadata_id.is_(None))
+        .filter(States.entity_id.is_not(None))
+        .limit(1)
+    )
+
+
+def find_events_context_ids_to_migrate() -> StatementLambdaElement:
+    """Find events that have string context ids."""
+    return lambda_stmt(
+        lambda: select(
+            Events.event_id,
+            Events.context_id,
+            Events.context_user_id,
+            Events.context_parent_id,
+        )
+        .filter(Events.context_id_bin.is_(None))
+        .filter(Events.context_id.is_not(None))
+        .limit(MAX_ROWS_TO_MIGRATE)
+    )
+
+
+def has_events_context_ids_to_migrate() -> StatementLambdaElement:
+    """Check if there are events that have string context ids."""
+    return lambda_stmt(
+        lambda: select(Events.event_id)
+        .filter(Events.context_id_bin.is_(None))
+        .filter(Events.context_id.is_not(None))
+        .limit(1)
+    )
+
+
+def find_states_context_ids_to_migrate() -> StatementLambdaElement:
+    """Find states that have string context ids."""
+    return lambda_stmt(
+        lambda: select(
+            States.state_id,
+            States.context_id,
+            States.context_user_id,
+            States.context_parent_id,
+        )
+        .filter(States.context_id_bin.is_(None))
+        .filter(States.context_id.is_not(None))
+        .limit(MAX_ROWS_TO_MIGRATE)
+    )
+
+
+def has_states_context_ids_to_migrate() -> StatementLambdaElement:
+    """Check if there are states that have string context ids."""
+    return lambda_stmt(
+        lambda: select(States.state_id)
+        .filter(States.context_id_bin.is_(None))
+        .filter(States.context_id.is_not(None))
+        .limit(1)
+    )
+
+
+def find_events_timestamps_to_migrate() -> StatementLambdaElement:
+    """Find events that have datetime timestamps."""
+    return lambda_stmt(
+        lambda: select(Events.event_id, Events.time_fired)
+        .filter(Events.time_fired_ts.is_(None))
+        .filter(Events.time_fired.is_not(None))
+        .limit(MAX_ROWS_TO_MIGRATE)
+    )
+
+
+def has_events_timestamps_to_migrate() -> StatementLambdaElement:
+    """Check if there are events that have datetime timestamps."""
+    return lambda_stmt(
+        lambda: select(Events.event_id)
+        .filter(Events.time_fired_ts.is_(None))
+        .filter(Events.time_fired.is_not(None))
+        .limit(1)
+    )
+
+
+def find_states_timestamps_to_migrate() -> StatementLambdaElement:
+    """Find states that have datetime timestamps."""
+    return lambda_stmt(
+        lambda: select(States.state_id, States.last_updated, States.last_changed)
+        .filter(States.last_updated_ts.is_(None))
+        .filter(States.last_updated.is_not(None))
+        .limit(MAX_ROWS_TO_MIGRATE)
+    )
+
+
+def has_states_timestamps_to_migrate() -> StatementLambdaElement:
+    """Check if there are states that have datetime timestamps."""
+    return lambda_stmt(
+        lambda: select(States.state_id)
+        .filter(States.last_updated_ts.is_(None))
+        .filter(States.last_updated.is_not(None))
+        .limit(1)
+    )
+
+
 def _state_attrs_exist(attr: int | None) -> Select:
     """Check if a state attributes id exists in the states table."""
     return select(func.min(States.attributes_id)).where(States.attributes_id == attr)
@@ -522,6 +689,48 @@ def delete_event_data_rows(data_ids: Iterable[int]) -> StatementLambdaElement:
     )
 
 
+def find_attributes_last_used(
+    attributes_ids: Iterable[int],
+) -> StatementLambdaElement:
+    """Find the last_used_ts of states_attributes rows."""
+    return lambda_stmt(
+        lambda: select(
+            StateAttributes.attributes_id, StateAttributes.last_used_ts
+        ).filter(StateAttributes.attributes_id.in_(attributes_ids))
+    )
+
+
+def find_event_data_last_used(data_ids: Iterable[int]) -> StatementLambdaElement:
+    """Find the last_used_ts of event_data rows."""
+    return lambda_stmt(
+        lambda: select(EventData.data_id, EventData.last_used_ts).filter(
+            EventData.data_id.in_(data_ids)
+        )
+    )
+
+
+def find_attributes_ids_last_used_before(
+    last_used_before: float,
+) -> StatementLambdaElement:
+    """Find states_attributes rows last used before a timestamp."""
+    return lambda_stmt(
+        lambda: select(StateAttributes.attributes_id)
+        .filter(StateAttributes.last_used_ts < last_used_before)
+        .limit(MAX_ROWS_TO_PURGE)
+    )
+
+
+def find_data_ids_last_used_before(
+    last_used_before: float,
+) -> StatementLambdaElement:
+    """Find event_data rows last used before a timestamp."""
+    return lambda_stmt(
+        lambda: select(EventData.data_id)
+        .filter(EventData.last_used_ts < last_used_before)
+        .limit(MAX_ROWS_TO_PURGE)
+    )
+
+
 def delete_states_attributes_rows(
     attributes_ids: Iterable[int],
 ) -> StatementLambdaElement:
@@ -578,20 +787,28 @@ def delete_recorder_runs_rows(
     )
 
 
-def find_events_to_purge(purge_before: datetime) -> StatementLambdaElement:
-    """Find events to purge."""
+def find_events_to_purge(
+    purge_before: float, oldest_ts: float
+) -> StatementLambdaElement:
+    """Find the oldest events to purge, starting at oldest_ts."""
     return lambda_stmt(
-        lambda: select(Events.event_id, Events.data_id)
-        .filter(Events.time_fired < purge_before)
+        lambda: select(Events.event_id, Events.data_id, Events.time_fired_ts)
+        .filter(Events.time_fired_ts >= oldest_ts)
+        .filter(Events.time_fired_ts < purge_before)
+        .order_by(Events.time_fired_ts)
         .limit(MAX_ROWS_TO_PURGE)
     )
 
 
-def find_states_to_purge(purge_before: datetime) -> StatementLambdaElement:
-    """Find states to purge."""
+def find_states_to_purge(
+    purge_before: float, oldest_ts: float
+) -> StatementLambdaElement:
+    """Find the oldest states to purge, starting at oldest_ts."""
     return lambda_stmt(
-        lambda: select(States.state_id, States.attributes_id)
-        .filter(States.last_updated < purge_before)
+        lambda: select(States.state_id, States.attributes_id, States.last_updated_ts)
+        .filter(States.last_updated_ts >= oldest_ts)
+        .filter(States.last_updated_ts < purge_before)
+        .order_by(States.last_updated_ts)
         .limit(MAX_ROWS_TO_PURGE)
     )
 
@@ -624,7 +841,7 @@ def find_latest_statistics_runs_run_id() -> StatementLambdaElement:
 
 
 def find_legacy_event_state_and_attributes_and_data_ids_to_purge(
-    purge_before: datetime,
+    purge_before: float,
 ) -> StatementLambdaElement:
     """Find the latest row in the legacy format to purge."""
     return lambda_stmt(
@@ -632,7 +849,7 @@ def find_legacy_event_state_and_attributes_and_data_ids_to_purge(
             Events.event_id, Events.data_id, States.state_id, States.attributes_id
         )
         .outerjoin(States, Events.event_id == States.event_id)
-        .filter(Events.time_fired < purge_before)
+        .filter(Events.time_fired_ts < purge_before)
         .limit(MAX_ROWS_TO_PURGE)
     )
 
@@ -640,3 +857,33 @@ def find_legacy_event_state_and_attributes_and_data_ids_to_purge(
 def find_legacy_row() -> StatementLambdaElement:
     """Check if there are still states in the table with an event_id."""
     return lambda_stmt(lambda: select(func.max(States.event_id)))
+
+
+def find_attributes_dictionaries() -> StatementLambdaElement:
+    """Find the dictionaries the shared attributes are compressed with."""
+    return lambda_stmt(
+        lambda: select(
+            StateAttributesDictionary.dictionary_id, StateAttributesDictionary.zdict
+        ).order_by(StateAttributesDictionary.dictionary_id)
+    )
+
+
+def find_attributes_to_train_dictionary() -> StatementLambdaElement:
+    """Find the newest shared attributes large enough to be compressed."""
+    return lambda_stmt(
+        lambda: select(StateAttributes.shared_attrs)
+        .filter(func.length(StateAttributes.shared_attrs) >= MIN_SIZE_TO_COMPRESS)
+        .order_by(StateAttributes.attributes_id.desc())
+        .limit(DICTIONARY_TRAINING_SAMPLES)
+    )
+
+
+def find_attributes_to_compress(start_id: int) -> StatementLambdaElement:
+    """Find shared attributes stored as text large enough to be compressed."""
+    return lambda_stmt(
+        lambda: select(StateAttributes.attributes_id, StateAttributes.shared_attrs)
+        .filter(StateAttributes.attributes_id > start_id)
+        .filter(func.length(StateAttributes.shared_attrs) >= MIN_SIZE_TO_COMPRESS)
+        .order_by(StateAttributes.attributes_id)
+        .limit(MAX_ROWS_TO_COMPRESS)
+    )
@@ -24,6 +24,9 @@ def repack_database(instance: Recorder) -> None:
     if dialect_name == SupportedDialect.SQLITE:
         _LOGGER.debug("Vacuuming SQL DB to free space")
         with instance.engine.connect() as conn:
+            # Databases created before the incremental auto_vacuum mode
+            # was used are changed to it when they are vacuumed
+            conn.execute(text("PRAGMA auto_vacuum=INCREMENTAL"))
             conn.execute(text("VACUUM"))
             conn.commit()
         return
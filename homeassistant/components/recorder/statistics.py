@@ -2,20 +2,23 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from collections.abc import Callable, Iterable
+from collections.abc import Callable, Iterable, Sequence
 import contextlib
 import dataclasses
 from datetime import datetime, timedelta
 from functools import partial
+import heapq
 from itertools import chain, groupby
 import json
 import logging
 import os
 import re
-from statistics import mean
+from statistics import fmean
+import threading
 from typing import TYPE_CHECKING, Any, Literal
 
-from sqlalchemy import bindparam, func, lambda_stmt, select
+from lru import LRU  # pylint: disable=no-name-in-module
+from sqlalchemy import bindparam, func, insert, lambda_stmt, or_, select
 from sqlalchemy.engine.row import Row
 from sqlalchemy.exc import SQLAlchemyError, StatementError
 from sqlalchemy.orm.session import Session
@@ -45,11 +48,19 @@ from homeassistant.util.unit_conversion import (
     VolumeConverter,
 )
 
-from .const import DOMAIN, MAX_ROWS_TO_PURGE, SupportedDialect
+from .const import (
+    DOMAIN,
+    MAX_PERIODS_TO_ROLL_UP,
+    MAX_ROLLUP_GAPS,
+    MAX_ROWS_TO_PURGE,
+    SupportedDialect,
+)
 from .db_schema import (
     Statistics,
     StatisticsBase,
+    StatisticsDaily,
     StatisticsMeta,
+    StatisticsMonthly,
     StatisticsRuns,
     StatisticsShortTerm,
 )
@@ -114,6 +125,27 @@ QUERY_STATISTICS_SUMMARY_SUM = [
     .label("rownum"),
 ]
 
+QUERY_STATISTICS_ROLLUP_MEAN = [
+    Statistics.metadata_id,
+    func.avg(Statistics.mean),
+    func.min(Statistics.min),
+    func.max(Statistics.max),
+]
+
+QUERY_STATISTICS_ROLLUP_SUM = [
+    Statistics.metadata_id,
+    Statistics.start,
+    Statistics.last_reset,
+    Statistics.state,
+    Statistics.sum,
+    func.row_number()
+    .over(
+        partition_by=Statistics.metadata_id,
+        order_by=Statistics.start.desc(),
+    )
+    .label("rownum"),
+]
+
 QUERY_STATISTIC_META = [
     StatisticsMeta.id,
     StatisticsMeta.statistic_id,
@@ -137,6 +169,11 @@ STATISTIC_UNIT_TO_UNIT_CONVERTER: dict[str | None, type[BaseUnitConverter]] = {
 }
 
 
+STATISTICS_DURING_PERIOD_CACHE_SIZE = 32
+
+SHORT_TERM_PERIODS = ("5minute",)
+LONG_TERM_PERIODS = ("hour", "day", "week", "month")
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -247,6 +284,92 @@ class PlatformCompiledStatistics:
     current_metadata: dict[str, tuple[int, StatisticMetaData]]
 
 
+@dataclasses.dataclass
+class CachedStatistics:
+    """Statistics cached by statistics_during_period."""
+
+    metadata: dict[str, tuple[int, StatisticMetaData]]
+    state_units: dict[str, str | None]
+    result: dict[str, list[dict[str, Any]]]
+    # The statistics from stale_from have changed since they were cached
+    stale_from: datetime | None = None
+
+
+def _copy_statistics(
+    stats: dict[str, list[dict[str, Any]]]
+) -> dict[str, list[dict[str, Any]]]:
+    """Copy statistics so changing the copy does not change the cache.
+
+    The values of the statistics are immutable, copying the dicts is enough.
+    """
+    return {
+        statistic_id: [dict(stat) for stat in stat_list]
+        for statistic_id, stat_list in stats.items()
+    }
+
+
+class StatisticsDuringPeriodCache:
+    """Cache the results of statistics_during_period.
+
+    The statistics are read in the database executor while they are written
+    by the recorder thread. A result is only cached if the cache was not
+    invalidated while it was read, the cache must be invalidated after the
+    changed statistics are committed.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the cache."""
+        self._lock = threading.Lock()
+        self._cache: LRU = LRU(STATISTICS_DURING_PERIOD_CACHE_SIZE)
+        self.generation = 0
+
+    def get(self, key: tuple) -> CachedStatistics | None:
+        """Return a copy of the statistics cached for key."""
+        with self._lock:
+            if (cached := self._cache.get(key)) is None:
+                return None
+            return dataclasses.replace(cached, result=_copy_statistics(cached.result))
+
+    def set(self, key: tuple, cached: CachedStatistics, generation: int) -> None:
+        """Cache a copy of statistics which were read at generation."""
+        with self._lock:
+            if generation == self.generation:
+                self._cache[key] = dataclasses.replace(
+                    cached, result=_copy_statistics(cached.result)
+                )
+
+    def invalidate(
+        self,
+        metadata_ids: Iterable[int] | None,
+        start_time: datetime | None,
+        periods: Iterable[str] = (*SHORT_TERM_PERIODS, *LONG_TERM_PERIODS),
+    ) -> None:
+        """Invalidate the cached statistics which changed from start_time.
+
+        None invalidates the statistics of all metadata_ids or from any time.
+        Cached statistics starting before start_time are kept, only their
+        periods from start_time are read again.
+        """
+        invalidated_ids = None if metadata_ids is None else set(metadata_ids)
+        invalidated_periods = set(periods)
+        with self._lock:
+            self.generation += 1
+            for key, cached in self._cache.items():
+                _, period, cached_start_time, cached_end_time, *_ = key
+                if period not in invalidated_periods:
+                    continue
+                if invalidated_ids is not None and invalidated_ids.isdisjoint(
+                    metadata_id for metadata_id, _ in cached.metadata.values()
+                ):
+                    continue
+                if start_time is None or start_time <= cached_start_time:
+                    del self._cache[key]
+                elif cached_end_time is not None and cached_end_time <= start_time:
+                    continue
+                elif cached.stale_from is None or start_time < cached.stale_from:
+                    cached.stale_from = start_time
+
+
 def split_statistic_id(entity_id: str) -> list[str]:
     """Split a state entity ID into domain and object ID."""
     return entity_id.split(":", 1)
@@ -645,6 +768,182 @@ def _compile_hourly_statistics(session: Session, start: datetime) -> None:
         session.add(Statistics.from_stats(metadata_id, stat))
 
 
+def _compile_rollup_statistics_summary_mean_stmt(
+    start_time: datetime, end_time: datetime
+) -> StatementLambdaElement:
+    """Generate the summary mean statement for rolled up statistics."""
+    return lambda_stmt(
+        lambda: select(*QUERY_STATISTICS_ROLLUP_MEAN)
+        .filter(Statistics.start >= start_time)
+        .filter(Statistics.start < end_time)
+        .group_by(Statistics.metadata_id)
+        .order_by(Statistics.metadata_id)
+    )
+
+
+def _compile_rollup_statistics(
+    session: Session,
+    table: type[StatisticsDaily | StatisticsMonthly],
+    start_time: datetime,
+    end_time: datetime,
+) -> None:
+    """Roll up the hourly statistics of a complete day or month.
+
+    This summarizes the hourly statistics the same way they are reduced
+    by statistics_during_period:
+    - average, min max is computed by a database query
+    - sum is taken from the last hourly entry during the period
+    Any existing rolled up statistics of the period are replaced.
+    """
+    session.flush()
+    session.query(table).filter(table.start == start_time).delete(
+        synchronize_session=False
+    )
+
+    # Compute the period's average, min, max
+    summary: dict[int, StatisticData] = {}
+    stmt = _compile_rollup_statistics_summary_mean_stmt(start_time, end_time)
+    for metadata_id, _mean, _min, _max in execute_stmt_lambda_element(session, stmt):
+        summary[metadata_id] = {
+            "start": start_time,
+            "mean": _mean,
+            "min": _min,
+            "max": _max,
+        }
+
+    # Get the period's last sum
+    subquery = (
+        session.query(*QUERY_STATISTICS_ROLLUP_SUM)
+        .filter(Statistics.start >= bindparam("start_time"))
+        .filter(Statistics.start < bindparam("end_time"))
+        .subquery()
+    )
+    query = (
+        session.query(subquery)
+        .filter(subquery.c.rownum == 1)
+        .order_by(subquery.c.metadata_id)
+    )
+    for stat in execute(query.params(start_time=start_time, end_time=end_time)):
+        metadata_id, _, last_reset, state, _sum, _ = stat
+        summary.setdefault(metadata_id, {"start": start_time}).update(
+            {
+                "last_reset": process_timestamp(last_reset),
+                "state": state,
+                "sum": _sum,
+            }
+        )
+
+    # Insert the rolled up statistics in the database
+    for metadata_id, stat in summary.items():
+        session.add(table.from_stats(metadata_id, stat))
+
+
+def _statistics_rollup_end(
+    instance: Recorder,
+    session: Session,
+    table: type[StatisticsDaily | StatisticsMonthly],
+    period_start_end: Callable[[datetime], tuple[datetime, datetime]],
+) -> datetime | None:
+    """Return the end of the periods which may be rolled up into table.
+
+    Only complete periods are rolled up. Until the backfill is done, the
+    periods after the newest rolled up period are left to the backfill.
+    """
+    rollup_end, _ = period_start_end(dt_util.utcnow())
+    if instance.statistics_rollups_active:
+        return rollup_end
+    if (newest := session.query(func.max(table.start)).scalar()) is None:
+        return None
+    return min(rollup_end, period_start_end(process_timestamp(newest))[1])
+
+
+def _compile_statistics_rollups(
+    instance: Recorder, session: Session, hour_start: datetime
+) -> None:
+    """Roll up the days and months whose last hour starts at hour_start.
+
+    The local days and months don't end with an hour in time zones with a
+    UTC offset which is not a whole number of hours, the hour a period ends
+    in is the last hour of the period, like when reducing the statistics.
+    """
+    hour_end = hour_start + timedelta(hours=1)
+    for table, period_start_end in STATISTICS_ROLLUPS.items():
+        period_start, period_end = period_start_end(hour_start)
+        if period_end > hour_end:
+            continue
+        rollup_end = _statistics_rollup_end(instance, session, table, period_start_end)
+        if rollup_end is not None and period_end <= rollup_end:
+            _compile_rollup_statistics(session, table, period_start, period_end)
+
+
+def _update_statistics_rollups(
+    instance: Recorder, session: Session, starts: Iterable[datetime]
+) -> None:
+    """Roll up the days and months of hourly statistics which have been changed."""
+    starts = list(starts)
+    for table, period_start_end in STATISTICS_ROLLUPS.items():
+        rollup_end = _statistics_rollup_end(instance, session, table, period_start_end)
+        if rollup_end is None:
+            continue
+        for period_start, period_end in sorted(
+            {period_start_end(start) for start in starts}
+        ):
+            if period_end <= rollup_end:
+                _compile_rollup_statistics(session, table, period_start, period_end)
+
+
+def _statistics_rollups_aligned(
+    session: Session,
+    table: type[StatisticsDaily | StatisticsMonthly],
+    period_start_end: Callable[[datetime], tuple[datetime, datetime]],
+) -> bool:
+    """Return False if the rolled up periods don't match the time zone."""
+    for start in session.query(func.min(table.start), func.max(table.start)).one():
+        if start is None:
+            continue
+        start = process_timestamp(start)
+        if period_start_end(start)[0] != start:
+            return False
+    return True
+
+
+def backfill_statistics_rollups(instance: Recorder) -> bool:
+    """Roll up the days and months of long term statistics not rolled up yet.
+
+    The periods are rolled up in batches so the recorder can keep
+    processing events while the backfill is running. The rolled up
+    periods are rebuilt if the time zone has changed.
+
+    Returns True if the backfill is done.
+    """
+    done = True
+    with session_scope(session=instance.get_session()) as session:
+        for table, period_start_end in STATISTICS_ROLLUPS.items():
+            if not _statistics_rollups_aligned(session, table, period_start_end):
+                _LOGGER.info(
+                    "Rebuilding %s after a time zone change", table.__tablename__
+                )
+                session.query(table).delete(synchronize_session=False)
+            rollup_end, _ = period_start_end(dt_util.utcnow())
+            next_start: datetime | None = None
+            if newest := session.query(func.max(table.start)).scalar():
+                next_start = period_start_end(process_timestamp(newest))[1]
+            for _ in range(MAX_PERIODS_TO_ROLL_UP):
+                query = session.query(func.min(Statistics.start))
+                if next_start is not None:
+                    query = query.filter(Statistics.start >= next_start)
+                if (start := query.scalar()) is None:
+                    break
+                period_start, next_start = period_start_end(process_timestamp(start))
+                if next_start > rollup_end:
+                    break
+                _compile_rollup_statistics(session, table, period_start, next_start)
+            else:
+                done = False
+
+    return done
+
+
 @retryable_database_job("statistics")
 def compile_statistics(instance: Recorder, start: datetime) -> bool:
     """Compile 5-minute statistics for all integrations with a recorder platform.
@@ -681,6 +980,7 @@ def compile_statistics(instance: Recorder, start: datetime) -> bool:
         current_metadata.update(compiled.current_metadata)
 
     # Insert collected statistics in the database
+    compiled_metadata_ids: set[int] = set()
     with session_scope(
         session=instance.get_session(),
         exception_filter=_filter_unique_constraint_integrity_error(instance),
@@ -689,6 +989,7 @@ def compile_statistics(instance: Recorder, start: datetime) -> bool:
             metadata_id = _update_or_add_metadata(
                 session, stats["meta"], current_metadata
             )
+            compiled_metadata_ids.add(metadata_id)
             _insert_statistics(
                 session,
                 StatisticsShortTerm,
@@ -699,15 +1000,24 @@ def compile_statistics(instance: Recorder, start: datetime) -> bool:
         if start.minute == 55:
             # A full hour is ready, summarize it
             _compile_hourly_statistics(session, start)
+            _compile_statistics_rollups(instance, session, start.replace(minute=0))
 
         session.add(StatisticsRuns(start=start))
 
+    instance.statistics_cache.invalidate(
+        compiled_metadata_ids, start, SHORT_TERM_PERIODS
+    )
+    if start.minute == 55:
+        instance.statistics_cache.invalidate(
+            None, start.replace(minute=0), LONG_TERM_PERIODS
+        )
+
     return True
 
 
 def _adjust_sum_statistics(
     session: Session,
-    table: type[Statistics | StatisticsShortTerm],
+    table: type[StatisticsBase],
     metadata_id: int,
     start_time: datetime,
     adj: float,
@@ -746,31 +1056,72 @@ def _insert_statistics(
         )
 
 
-def _update_statistics(
+def _statistics_ids_by_start(
     session: Session,
     table: type[Statistics | StatisticsShortTerm],
-    stat_id: int,
-    statistic: StatisticData,
-) -> None:
-    """Insert statistics in the database."""
-    try:
-        session.query(table).filter_by(id=stat_id).update(
-            {
-                table.mean: statistic.get("mean"),
-                table.min: statistic.get("min"),
-                table.max: statistic.get("max"),
-                table.last_reset: statistic.get("last_reset"),
-                table.state: statistic.get("state"),
-                table.sum: statistic.get("sum"),
-            },
-            synchronize_session=False,
-        )
-    except SQLAlchemyError:
-        _LOGGER.exception(
-            "Unexpected exception when updating statistics %s:%s ",
-            stat_id,
-            statistic,
+    metadata_id: int,
+    starts: Iterable[datetime],
+) -> dict[datetime, int]:
+    """Return ids of existing statistics entries, keyed by start.
+
+    All entries in the range spanned by starts are fetched with a single query.
+    """
+    starts = set(starts)
+    if not starts:
+        return {}
+    return {
+        start: stat_id
+        for stat_start, stat_id in session.query(table.start, table.id).filter(
+            (table.metadata_id == metadata_id)
+            & (table.start >= min(starts))
+            & (table.start <= max(starts))
         )
+        if (start := process_timestamp(stat_start)) in starts
+    }
+
+
+def _statistic_row(statistic: StatisticData) -> dict[str, Any]:
+    """Return the columns of a statistic, missing columns are set to None."""
+    return {
+        "start": statistic["start"],
+        "mean": statistic.get("mean"),
+        "min": statistic.get("min"),
+        "max": statistic.get("max"),
+        "last_reset": statistic.get("last_reset"),
+        "state": statistic.get("state"),
+        "sum": statistic.get("sum"),
+    }
+
+
+def _bulk_insert_statistics(
+    session: Session,
+    table: type[Statistics | StatisticsShortTerm],
+    metadata_id: int,
+    statistics: list[StatisticData],
+) -> None:
+    """Insert statistics in the database with a single multi-row statement."""
+    session.execute(
+        insert(table),
+        [
+            {"metadata_id": metadata_id, **_statistic_row(statistic)}
+            for statistic in statistics
+        ],
+    )
+
+
+def _bulk_update_statistics(
+    session: Session,
+    table: type[Statistics | StatisticsShortTerm],
+    statistics: dict[int, StatisticData],
+) -> None:
+    """Update statistics in the database, statistics is keyed by row id."""
+    session.bulk_update_mappings(
+        table,
+        [
+            {"id": stat_id, **_statistic_row(statistic)}
+            for stat_id, statistic in statistics.items()
+        ],
+    )
 
 
 def _generate_get_metadata_stmt(
@@ -942,51 +1293,85 @@ def list_statistic_ids(
     ]
 
 
+def _reduced_statistic(
+    statistic_id: str,
+    start: datetime,
+    end: datetime,
+    last_stat: dict[str, Any],
+    max_values: list[float],
+    mean_values: list[float],
+    min_values: list[float],
+) -> dict[str, Any]:
+    """Return the reduced statistic of a period."""
+    return {
+        "statistic_id": statistic_id,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "mean": fmean(mean_values) if mean_values else None,
+        "min": min(min_values) if min_values else None,
+        "max": max(max_values) if max_values else None,
+        "last_reset": last_stat.get("last_reset"),
+        "state": last_stat.get("state"),
+        "sum": last_stat["sum"],
+    }
+
+
 def _reduce_statistics(
     stats: dict[str, list[dict[str, Any]]],
-    same_period: Callable[[datetime, datetime], bool],
     period_start_end: Callable[[datetime], tuple[datetime, datetime]],
-    period: timedelta,
 ) -> dict[str, list[dict[str, Any]]]:
-    """Reduce hourly statistics to daily or monthly statistics."""
+    """Reduce hourly statistics to daily, weekly or monthly statistics.
+
+    The hourly statistics are sorted by start, which means the bounds of a
+    period only need to be calculated once, when its first hour is seen.
+    """
     result: dict[str, list[dict[str, Any]]] = defaultdict(list)
     for statistic_id, stat_list in stats.items():
+        reduced = result[statistic_id]
         max_values: list[float] = []
         mean_values: list[float] = []
         min_values: list[float] = []
         prev_stat: dict[str, Any] = stat_list[0]
+        start, end = period_start_end(prev_stat["start"])
 
-        # Loop over the hourly statistics + a fake entry to end the period
-        for statistic in chain(
-            stat_list, ({"start": stat_list[-1]["start"] + period},)
-        ):
-            if not same_period(prev_stat["start"], statistic["start"]):
-                start, end = period_start_end(prev_stat["start"])
+        for statistic in stat_list:
+            if statistic["start"] >= end:
                 # The previous statistic was the last entry of the period
-                result[statistic_id].append(
-                    {
-                        "statistic_id": statistic_id,
-                        "start": start.isoformat(),
-                        "end": end.isoformat(),
-                        "mean": mean(mean_values) if mean_values else None,
-                        "min": min(min_values) if min_values else None,
-                        "max": max(max_values) if max_values else None,
-                        "last_reset": prev_stat.get("last_reset"),
-                        "state": prev_stat.get("state"),
-                        "sum": prev_stat["sum"],
-                    }
+                reduced.append(
+                    _reduced_statistic(
+                        statistic_id,
+                        start,
+                        end,
+                        prev_stat,
+                        max_values,
+                        mean_values,
+                        min_values,
+                    )
                 )
                 max_values = []
                 mean_values = []
                 min_values = []
-            if statistic.get("max") is not None:
-                max_values.append(statistic["max"])
-            if statistic.get("mean") is not None:
-                mean_values.append(statistic["mean"])
-            if statistic.get("min") is not None:
-                min_values.append(statistic["min"])
+                start, end = period_start_end(statistic["start"])
+            if (value := statistic.get("max")) is not None:
+                max_values.append(value)
+            if (value := statistic.get("mean")) is not None:
+                mean_values.append(value)
+            if (value := statistic.get("min")) is not None:
+                min_values.append(value)
             prev_stat = statistic
 
+        reduced.append(
+            _reduced_statistic(
+                statistic_id,
+                start,
+                end,
+                prev_stat,
+                max_values,
+                mean_values,
+                min_values,
+            )
+        )
+
     return result
 
 
@@ -999,10 +1384,11 @@ def same_day(time1: datetime, time2: datetime) -> bool:
 
 def day_start_end(time: datetime) -> tuple[datetime, datetime]:
     """Return the start and end of the period (day) time is within."""
-    start = dt_util.as_utc(
-        dt_util.as_local(time).replace(hour=0, minute=0, second=0, microsecond=0)
+    start_local = dt_util.as_local(time).replace(
+        hour=0, minute=0, second=0, microsecond=0
     )
-    end = start + timedelta(days=1)
+    start = dt_util.as_utc(start_local)
+    end = dt_util.as_utc(start_local + timedelta(days=1))
     return (start, end)
 
 
@@ -1011,7 +1397,7 @@ def _reduce_statistics_per_day(
 ) -> dict[str, list[dict[str, Any]]]:
     """Reduce hourly statistics to daily statistics."""
 
-    return _reduce_statistics(stats, same_day, day_start_end, timedelta(days=1))
+    return _reduce_statistics(stats, day_start_end)
 
 
 def same_week(time1: datetime, time2: datetime) -> bool:
@@ -1040,7 +1426,7 @@ def _reduce_statistics_per_week(
 ) -> dict[str, list[dict[str, Any]]]:
     """Reduce hourly statistics to weekly statistics."""
 
-    return _reduce_statistics(stats, same_week, week_start_end, timedelta(days=7))
+    return _reduce_statistics(stats, week_start_end)
 
 
 def same_month(time1: datetime, time2: datetime) -> bool:
@@ -1066,7 +1452,21 @@ def _reduce_statistics_per_month(
 ) -> dict[str, list[dict[str, Any]]]:
     """Reduce hourly statistics to monthly statistics."""
 
-    return _reduce_statistics(stats, same_month, month_start_end, timedelta(days=31))
+    return _reduce_statistics(stats, month_start_end)
+
+
+STATISTICS_ROLLUPS: dict[
+    type[StatisticsDaily | StatisticsMonthly],
+    Callable[[datetime], tuple[datetime, datetime]],
+] = {
+    StatisticsDaily: day_start_end,
+    StatisticsMonthly: month_start_end,
+}
+
+STATISTICS_ROLLUP_TABLES: dict[str, type[StatisticsDaily | StatisticsMonthly]] = {
+    "day": StatisticsDaily,
+    "month": StatisticsMonthly,
+}
 
 
 def _statistics_during_period_stmt(
@@ -1113,6 +1513,272 @@ def _statistics_during_period_stmt_short_term(
     return stmt
 
 
+def _statistics_during_period_with_rollups(
+    session: Session,
+    table: type[StatisticsDaily | StatisticsMonthly],
+    start_time: datetime,
+    end_time: datetime | None,
+    metadata_ids: list[int] | None,
+) -> list[Row] | None:
+    """Return statistics during a given period using rolled up statistics.
+
+    The complete days or months within the period are read from table, the
+    hourly statistics are only read for the rest of the period and for the
+    days or months which are not rolled up. Each rolled up row is the only
+    row of its day or month, which means reducing the returned rows gives
+    the same result as reducing the hourly statistics.
+
+    Returns None if the period does not contain any rolled up day or month.
+    """
+    period_start_end = STATISTICS_ROLLUPS[table]
+    if (newest := session.query(func.max(table.start)).scalar()) is None:
+        return None
+    period_start, period_end = period_start_end(start_time)
+    rollup_start = period_start if period_start == start_time else period_end
+    _, rollup_end = period_start_end(process_timestamp(newest))
+    if end_time is not None:
+        rollup_end = min(rollup_end, period_start_end(end_time)[0])
+    if rollup_start >= rollup_end:
+        return None
+
+    rollup_query = (
+        session.query(
+            table.metadata_id,
+            table.start,
+            table.mean,
+            table.min,
+            table.max,
+            table.last_reset,
+            table.state,
+            table.sum,
+        )
+        .filter(table.start >= rollup_start)
+        .filter(table.start < rollup_end)
+    )
+    if metadata_ids:
+        rollup_query = rollup_query.filter(table.metadata_id.in_(metadata_ids))
+    rollup_stats = execute(rollup_query.order_by(table.metadata_id, table.start))
+
+    # The rolled up periods don't match the time zone until they are rebuilt
+    rolled_up: set[datetime] = set()
+    for stat in rollup_stats:
+        start = process_timestamp(stat.start)
+        if period_start_end(start)[0] != start:
+            return None
+        rolled_up.add(start)
+
+    # The periods which are not rolled up, like the periods which were
+    # skipped while the rollups were not active, are read from the hourly
+    # statistics
+    gaps: list[tuple[datetime, datetime]] = []
+    period_start = rollup_start
+    while period_start < rollup_end:
+        _, period_end = period_start_end(period_start)
+        if period_start not in rolled_up:
+            if gaps and gaps[-1][1] == period_start:
+                gaps[-1] = (gaps[-1][0], period_end)
+            else:
+                gaps.append((period_start, period_end))
+        period_start = period_end
+    if len(gaps) > MAX_ROLLUP_GAPS:
+        return None
+
+    query = (
+        session.query(*QUERY_STATISTICS)
+        .filter(Statistics.start >= start_time)
+        .filter(
+            or_(
+                Statistics.start < rollup_start,
+                Statistics.start >= rollup_end,
+                *(
+                    (Statistics.start >= gap_start) & (Statistics.start < gap_end)
+                    for gap_start, gap_end in gaps
+                ),
+            )
+        )
+    )
+    if end_time is not None:
+        query = query.filter(Statistics.start < end_time)
+    if metadata_ids:
+        query = query.filter(Statistics.metadata_id.in_(metadata_ids))
+    stats = execute(query.order_by(Statistics.metadata_id, Statistics.start))
+
+    # The last statistics before start_time are added for statistics which
+    # don't have an hourly statistic at start_time, like when only reading
+    # the hourly statistics
+    stats_at_start_time: list[Row] = []
+    if need_stat_at_start_time := {
+        stat.metadata_id
+        for stat in rollup_stats
+        if process_timestamp(stat.start) == start_time
+    }:
+        need_stat_at_start_time.difference_update(
+            metadata_id
+            for metadata_id, in session.query(Statistics.metadata_id)
+            .filter(Statistics.start == start_time)
+            .filter(Statistics.metadata_id.in_(need_stat_at_start_time))
+        )
+    if need_stat_at_start_time and (
+        tmp := _statistics_at_time(
+            session, need_stat_at_start_time, Statistics, start_time
+        )
+    ):
+        stats_at_start_time = sorted(tmp, key=lambda stat: stat.metadata_id)
+
+    return list(
+        heapq.merge(
+            stats_at_start_time,
+            stats,
+            rollup_stats,
+            key=lambda stat: (stat.metadata_id, stat.start),
+        )
+    )
+
+
+def _statistics_during_period_with_session(
+    hass: HomeAssistant,
+    session: Session,
+    metadata: dict[str, tuple[int, StatisticMetaData]],
+    start_time: datetime,
+    end_time: datetime | None,
+    statistic_ids: list[str] | None,
+    period: Literal["5minute", "day", "hour", "week", "month"],
+    start_time_as_datetime: bool,
+    units: dict[str, str] | None,
+) -> dict[str, list[dict[str, Any]]]:
+    """Return statistics during UTC period start_time - end_time for the statistic_ids."""
+    metadata_ids = None
+    if statistic_ids is not None:
+        metadata_ids = [metadata_id for metadata_id, _ in metadata.values()]
+
+    table: type[Statistics | StatisticsShortTerm] = Statistics
+    stats: list[Row] | None = None
+    if period == "5minute":
+        table = StatisticsShortTerm
+        stats = execute_stmt_lambda_element(
+            session,
+            _statistics_during_period_stmt_short_term(
+                start_time, end_time, metadata_ids
+            ),
+        )
+    elif (
+        period in STATISTICS_ROLLUP_TABLES
+        and get_instance(hass).statistics_rollups_active
+    ):
+        stats = _statistics_during_period_with_rollups(
+            session,
+            STATISTICS_ROLLUP_TABLES[period],
+            start_time,
+            end_time,
+            metadata_ids,
+        )
+    if stats is None:
+        stats = execute_stmt_lambda_element(
+            session,
+            _statistics_during_period_stmt(start_time, end_time, metadata_ids),
+        )
+
+    if not stats:
+        return {}
+    # Return statistics combined with metadata
+    if period not in ("day", "week", "month"):
+        return _sorted_statistics_to_dict(
+            hass,
+            session,
+            stats,
+            statistic_ids,
+            metadata,
+            True,
+            table,
+            start_time,
+            start_time_as_datetime,
+            units,
+        )
+
+    result = _sorted_statistics_to_dict(
+        hass,
+        session,
+        stats,
+        statistic_ids,
+        metadata,
+        True,
+        table,
+        start_time,
+        True,
+        units,
+    )
+
+    if period == "day":
+        return _reduce_statistics_per_day(result)
+
+    if period == "week":
+        return _reduce_statistics_per_week(result)
+
+    return _reduce_statistics_per_month(result)
+
+
+def _period_start(
+    period: Literal["5minute", "day", "hour", "week", "month"], time: datetime
+) -> datetime:
+    """Return the start of the period time is within."""
+    if period == "5minute":
+        return time.replace(
+            minute=time.minute - time.minute % 5, second=0, microsecond=0
+        )
+    if period == "hour":
+        return time.replace(minute=0, second=0, microsecond=0)
+    if period == "day":
+        return day_start_end(time)[0]
+    if period == "week":
+        return week_start_end(time)[0]
+    return month_start_end(time)[0]
+
+
+def _statistic_start(statistic: dict[str, Any]) -> datetime:
+    """Return the start of a statistic returned by statistics_during_period."""
+    if isinstance(start := statistic["start"], datetime):
+        return start
+    return dt_util.parse_datetime(start)  # type: ignore[return-value]
+
+
+def _replace_statistics_from(
+    cached: dict[str, list[dict[str, Any]]],
+    fresh: dict[str, list[dict[str, Any]]],
+    start_time: datetime,
+) -> dict[str, list[dict[str, Any]]]:
+    """Replace the cached statistics from start_time with fresh statistics.
+
+    The statistic ids keep the order of the cached result, a statistic id
+    which only has fresh statistics goes before the cached statistic id it
+    precedes in the fresh result.
+    """
+    positions: dict[str, tuple[int, ...]] = {
+        statistic_id: (idx, 0) for idx, statistic_id in enumerate(cached)
+    }
+    next_idx = len(cached)
+    for fresh_idx, statistic_id in reversed(list(enumerate(fresh))):
+        if (position := positions.get(statistic_id)) is not None:
+            next_idx = position[0]
+        else:
+            positions[statistic_id] = (next_idx, -1, fresh_idx)
+    result: dict[str, list[dict[str, Any]]] = {}
+    for statistic_id in sorted(positions, key=positions.__getitem__):
+        if statistic_id not in cached:
+            result[statistic_id] = fresh[statistic_id]
+            continue
+        stats = [
+            stat for stat in cached[statistic_id] if _statistic_start(stat) < start_time
+        ]
+        stats.extend(
+            stat
+            for stat in fresh.get(statistic_id, ())
+            if _statistic_start(stat) >= start_time
+        )
+        if stats:
+            result[statistic_id] = stats
+    return result
+
+
 def statistics_during_period(
     hass: HomeAssistant,
     start_time: datetime,
@@ -1126,65 +1792,77 @@ def statistics_during_period(
 
     If end_time is omitted, returns statistics newer than or equal to start_time.
     If statistic_ids is omitted, returns statistics for all statistics ids.
+
+    The result is cached until the statistics it was read from change.
     """
-    metadata = None
+    cache = get_instance(hass).statistics_cache
+    generation = cache.generation
+    key = (
+        tuple(statistic_ids) if statistic_ids is not None else None,
+        period,
+        start_time,
+        end_time,
+        tuple(sorted(units.items())) if units else None,
+        start_time_as_datetime,
+        dt_util.DEFAULT_TIME_ZONE,
+    )
     with session_scope(hass=hass) as session:
         # Fetch metadata for the given (or all) statistic_ids
         metadata = get_metadata_with_session(session, statistic_ids=statistic_ids)
         if not metadata:
             return {}
 
-        metadata_ids = None
-        if statistic_ids is not None:
-            metadata_ids = [metadata_id for metadata_id, _ in metadata.values()]
-
-        if period == "5minute":
-            table = StatisticsShortTerm
-            stmt = _statistics_during_period_stmt_short_term(
-                start_time, end_time, metadata_ids
-            )
-        else:
-            table = Statistics
-            stmt = _statistics_during_period_stmt(start_time, end_time, metadata_ids)
-        stats = execute_stmt_lambda_element(session, stmt)
-
-        if not stats:
-            return {}
-        # Return statistics combined with metadata
-        if period not in ("day", "week", "month"):
-            return _sorted_statistics_to_dict(
-                hass,
-                session,
-                stats,
-                statistic_ids,
-                metadata,
-                True,
-                table,
-                start_time,
-                start_time_as_datetime,
-                units,
-            )
+        # The statistics are converted to the unit of the state
+        state_units = {
+            statistic_id: state.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
+            for statistic_id in metadata
+            if (state := hass.states.get(statistic_id))
+        }
+        cached = cache.get(key)
+        if (
+            cached is not None
+            and cached.metadata == metadata
+            and cached.state_units == state_units
+        ):
+            if cached.stale_from is None:
+                return cached.result
+            # Only read the periods which have changed since they were cached
+            if (period_start := _period_start(period, cached.stale_from)) > start_time:
+                result = _replace_statistics_from(
+                    cached.result,
+                    _statistics_during_period_with_session(
+                        hass,
+                        session,
+                        metadata,
+                        period_start,
+                        end_time,
+                        statistic_ids,
+                        period,
+                        start_time_as_datetime,
+                        units,
+                    ),
+                    period_start,
+                )
+                cache.set(
+                    key,
+                    CachedStatistics(metadata, state_units, result),
+                    generation,
+                )
+                return result
 
-        result = _sorted_statistics_to_dict(
+        result = _statistics_during_period_with_session(
             hass,
             session,
-            stats,
-            statistic_ids,
             metadata,
-            True,
-            table,
             start_time,
-            True,
+            end_time,
+            statistic_ids,
+            period,
+            start_time_as_datetime,
             units,
         )
-
-        if period == "day":
-            return _reduce_statistics_per_day(result)
-
-        if period == "week":
-            return _reduce_statistics_per_week(result)
-
-        return _reduce_statistics_per_month(result)
+        cache.set(key, CachedStatistics(metadata, state_units, result), generation)
+        return result
 
 
 def _get_last_statistics_stmt(
@@ -1453,19 +2131,22 @@ def validate_statistics(hass: HomeAssistant) -> dict[str, list[ValidationIssue]]
     return platform_validation
 
 
-def _statistics_exists(
-    session: Session,
-    table: type[Statistics | StatisticsShortTerm],
-    metadata_id: int,
-    start: datetime,
-) -> int | None:
-    """Return id if a statistics entry already exists."""
-    result = (
-        session.query(table.id)
-        .filter((table.metadata_id == metadata_id) & (table.start == start))
-        .first()
-    )
-    return result["id"] if result else None
+def _validate_statistic(statistic: StatisticData) -> StatisticData:
+    """Validate timestamps of a statistic and convert them to UTC."""
+    start = statistic["start"]
+    if start.tzinfo is None or start.tzinfo.utcoffset(start) is None:
+        raise HomeAssistantError("Naive timestamp")
+    if start.minute != 0 or start.second != 0 or start.microsecond != 0:
+        raise HomeAssistantError("Invalid timestamp")
+    statistic["start"] = dt_util.as_utc(start)
+
+    if "last_reset" in statistic and statistic["last_reset"] is not None:
+        last_reset = statistic["last_reset"]
+        if last_reset.tzinfo is None or last_reset.tzinfo.utcoffset(last_reset) is None:
+            raise HomeAssistantError("Naive timestamp")
+        statistic["last_reset"] = dt_util.as_utc(last_reset)
+
+    return statistic
 
 
 @callback
@@ -1474,23 +2155,17 @@ def _async_import_statistics(
     metadata: StatisticMetaData,
     statistics: Iterable[StatisticData],
 ) -> None:
-    """Validate timestamps and insert an import_statistics job in the recorder's queue."""
-    for statistic in statistics:
-        start = statistic["start"]
-        if start.tzinfo is None or start.tzinfo.utcoffset(start) is None:
-            raise HomeAssistantError("Naive timestamp")
-        if start.minute != 0 or start.second != 0 or start.microsecond != 0:
-            raise HomeAssistantError("Invalid timestamp")
-        statistic["start"] = dt_util.as_utc(start)
-
-        if "last_reset" in statistic and statistic["last_reset"] is not None:
-            last_reset = statistic["last_reset"]
-            if (
-                last_reset.tzinfo is None
-                or last_reset.tzinfo.utcoffset(last_reset) is None
-            ):
-                raise HomeAssistantError("Naive timestamp")
-            statistic["last_reset"] = dt_util.as_utc(last_reset)
+    """Validate timestamps and insert an import_statistics job in the recorder's queue.
+
+    Sequences are validated immediately. Other iterables, for example generators
+    producing years of history, are consumed lazily by the recorder in batches of
+    MAX_ROWS_TO_IMPORT statistics and are validated as they are consumed.
+    """
+    if isinstance(statistics, Sequence):
+        for statistic in statistics:
+            _validate_statistic(statistic)
+    else:
+        statistics = map(_validate_statistic, statistics)
 
     # Insert job in recorder's queue
     get_instance(hass).async_import_statistics(metadata, statistics, Statistics)
@@ -1585,7 +2260,14 @@ def import_statistics(
     statistics: Iterable[StatisticData],
     table: type[Statistics | StatisticsShortTerm],
 ) -> bool:
-    """Process an import_statistics job."""
+    """Process an import_statistics job.
+
+    Existing statistics are looked up with a single query and new and changed
+    statistics are written with one multi-row statement each.
+    """
+    # Deduplicate on start, the last statistic for a start wins
+    statistics_by_start = {stat["start"]: stat for stat in statistics}
+    starts = list(statistics_by_start)
 
     with session_scope(
         session=instance.get_session(),
@@ -1595,13 +2277,30 @@ def import_statistics(
             session, statistic_ids=[metadata["statistic_id"]]
         )
         metadata_id = _update_or_add_metadata(session, metadata, old_metadata_dict)
-        for stat in statistics:
-            if stat_id := _statistics_exists(
-                session, table, metadata_id, stat["start"]
-            ):
-                _update_statistics(session, table, stat_id, stat)
-            else:
-                _insert_statistics(session, table, metadata_id, stat)
+        existing = _statistics_ids_by_start(session, table, metadata_id, starts)
+        if new_statistics := [
+            stat for start, stat in statistics_by_start.items() if start not in existing
+        ]:
+            _bulk_insert_statistics(session, table, metadata_id, new_statistics)
+        if existing:
+            _bulk_update_statistics(
+                session,
+                table,
+                {
+                    stat_id: statistics_by_start[start]
+                    for start, stat_id in existing.items()
+                },
+            )
+
+        if table == Statistics:
+            _update_statistics_rollups(instance, session, starts)
+
+    if starts:
+        instance.statistics_cache.invalidate(
+            {metadata_id},
+            min(starts),
+            SHORT_TERM_PERIODS if table == StatisticsShortTerm else LONG_TERM_PERIODS,
+        )
 
     return True
 
@@ -1643,6 +2342,24 @@ def adjust_statistics(
             sum_adjustment,
         )
 
+        # The periods after start_time are adjusted like the hourly statistics,
+        # the period start_time is in is rolled up again
+        for table in STATISTICS_ROLLUPS:
+            _adjust_sum_statistics(
+                session,
+                table,
+                metadata[statistic_id][0],
+                start_time,
+                sum_adjustment,
+            )
+        _update_statistics_rollups(instance, session, [start_time.replace(minute=0)])
+
+    metadata_id = metadata[statistic_id][0]
+    instance.statistics_cache.invalidate({metadata_id}, start_time, SHORT_TERM_PERIODS)
+    instance.statistics_cache.invalidate(
+        {metadata_id}, start_time.replace(minute=0), LONG_TERM_PERIODS
+    )
+
     return True
 
 
@@ -1694,12 +2411,14 @@ def change_statistics_unit(
         metadata_id = metadata[0]
 
         convert = _get_unit_converter(old_unit, new_unit)
-        for table in (StatisticsShortTerm, Statistics):
+        for table in (StatisticsShortTerm, Statistics, *STATISTICS_ROLLUPS):
             _change_statistics_unit_for_table(session, table, metadata_id, convert)
         session.query(StatisticsMeta).filter(
             StatisticsMeta.statistic_id == statistic_id
         ).update({StatisticsMeta.unit_of_measurement: new_unit})
 
+    instance.statistics_cache.invalidate({metadata_id}, None)
+
 
 @callback
 def async_change_statistics_unit(
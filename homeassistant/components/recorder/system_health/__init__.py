@@ -54,6 +54,21 @@ def _async_get_db_engine_info(instance: Recorder) -> dict[str, Any]:
     return db_engine_info
 
 
+@callback
+def _async_get_write_metrics(instance: Recorder) -> dict[str, Any]:
+    """Get the metrics of the recorder write path."""
+    metrics = instance.metrics
+    return {
+        "commit_interval": round(metrics.commit_interval, 2),
+        "queue_wait": round(metrics.queue_wait * 1000, 1),
+        "build_time": round(metrics.build_time * 1000, 1),
+        "flush_time": round(metrics.flush_time * 1000, 1),
+        "commit_time": round(metrics.commit_time * 1000, 1),
+        "rows_per_second": round(metrics.rows_per_second, 1),
+        "dropped_events": metrics.dropped_events,
+    }
+
+
 async def system_health_info(hass: HomeAssistant) -> dict[str, Any]:
     """Get info for the info page."""
     instance = get_instance(hass)
@@ -71,4 +86,4 @@ async def system_health_info(hass: HomeAssistant) -> dict[str, Any]:
             "oldest_recorder_run": run_history.first.start,
             "current_recorder_run": run_history.current.start,
         }
-    return db_runs | db_stats | db_engine_info
+    return db_runs | db_stats | db_engine_info | _async_get_write_metrics(instance)
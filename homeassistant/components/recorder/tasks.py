@@ -3,17 +3,27 @@ from __future__ import annotations
 
 import abc
 import asyncio
-from collections.abc import Callable, Iterable
-from dataclasses import dataclass
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, field
 from datetime import datetime
+from functools import partial
+from itertools import chain, islice
+import logging
 import threading
 from typing import TYPE_CHECKING, Any
 
 from homeassistant.core import Event
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.typing import UndefinedType
 
-from . import purge, statistics
-from .const import DOMAIN, EXCLUDE_ATTRIBUTES
+from . import migration, purge, statistics
+from .bloom import HashBloomFilter
+from .const import (
+    DOMAIN,
+    EVENT_RECORDER_STATISTICS_IMPORT_PROGRESS,
+    EXCLUDE_ATTRIBUTES,
+    MAX_ROWS_TO_IMPORT,
+)
 from .db_schema import Statistics, StatisticsShortTerm
 from .models import StatisticData, StatisticMetaData
 from .util import periodic_db_cleanups
@@ -21,6 +31,8 @@ from .util import periodic_db_cleanups
 if TYPE_CHECKING:
     from .core import Recorder
 
+_LOGGER = logging.getLogger(__name__)
+
 
 class RecorderTask(abc.ABC):
     """ABC for recorder tasks."""
@@ -86,12 +98,21 @@ class PurgeTask(RecorderTask):
     purge_before: datetime
     repack: bool
     apply_filter: bool
+    cursor: purge.PurgeCursor = field(default_factory=purge.PurgeCursor)
 
     def run(self, instance: Recorder) -> None:
         """Purge the database."""
-        if purge.purge_old_data(
-            instance, self.purge_before, self.repack, self.apply_filter
-        ):
+        purge_done = purge.purge_old_data(
+            instance,
+            self.purge_before,
+            self.repack,
+            self.apply_filter,
+            time_budget=purge.DEFAULT_PURGE_TIME_BUDGET,
+            cursor=self.cursor,
+        )
+        # The purged short term statistics may be cached
+        instance.statistics_cache.invalidate(None, None, statistics.SHORT_TERM_PERIODS)
+        if purge_done:
             with instance.get_session() as session:
                 instance.run_history.load_from_db(session)
             # We always need to do the db cleanups after a purge
@@ -101,7 +122,7 @@ class PurgeTask(RecorderTask):
             return
         # Schedule a new purge task if this one didn't finish
         instance.queue_task(
-            PurgeTask(self.purge_before, self.repack, self.apply_filter)
+            PurgeTask(self.purge_before, self.repack, self.apply_filter, self.cursor)
         )
 
 
@@ -144,22 +165,62 @@ class StatisticsTask(RecorderTask):
 
 @dataclass
 class ImportStatisticsTask(RecorderTask):
-    """An object to insert into the recorder queue to run an import statistics task."""
+    """An object to insert into the recorder queue to run an import statistics task.
+
+    Statistics are imported in batches of MAX_ROWS_TO_IMPORT, the task is queued
+    again until all statistics are imported so other tasks and events can be
+    processed in between batches. Progress events are only fired for imports
+    which are not done in a single batch or which are passed as an iterator,
+    the caller of a single batch import knows it is done when the task ran.
+    """
 
     metadata: StatisticMetaData
     statistics: Iterable[StatisticData]
     table: type[Statistics | StatisticsShortTerm]
+    imported: int = 0
 
     def run(self, instance: Recorder) -> None:
         """Run statistics task."""
-        if statistics.import_statistics(
-            instance, self.metadata, self.statistics, self.table
-        ):
+        statistics_iter = iter(self.statistics)
+        try:
+            batch = list(islice(statistics_iter, MAX_ROWS_TO_IMPORT))
+        except HomeAssistantError as err:
+            _LOGGER.error(
+                "Stopped importing statistics for %s after %s rows: %s",
+                self.metadata["statistic_id"],
+                self.imported,
+                err,
+            )
             return
-        # Schedule a new statistics task if this one didn't finish
-        instance.queue_task(
-            ImportStatisticsTask(self.metadata, self.statistics, self.table)
-        )
+        is_sequence = isinstance(self.statistics, Sequence)
+        if not statistics.import_statistics(instance, self.metadata, batch, self.table):
+            # Schedule a new statistics task if this one didn't finish
+            instance.queue_task(
+                ImportStatisticsTask(
+                    self.metadata,
+                    self.statistics if is_sequence else chain(batch, statistics_iter),
+                    self.table,
+                    self.imported,
+                )
+            )
+            return
+        imported = self.imported + len(batch)
+        done = len(batch) < MAX_ROWS_TO_IMPORT
+        if self.imported or not done or not is_sequence:
+            instance.hass.bus.fire(
+                EVENT_RECORDER_STATISTICS_IMPORT_PROGRESS,
+                {
+                    "statistic_id": self.metadata["statistic_id"],
+                    "imported": imported,
+                    "done": done,
+                },
+            )
+        if not done:
+            instance.queue_task(
+                ImportStatisticsTask(
+                    self.metadata, statistics_iter, self.table, imported
+                )
+            )
 
 
 @dataclass
@@ -192,6 +253,115 @@ class AdjustStatisticsTask(RecorderTask):
         )
 
 
+@dataclass
+class EntityIDMigrationTask(RecorderTask):
+    """An object to insert into the recorder queue to migrate entity_ids to StatesMeta."""
+
+    def run(self, instance: Recorder) -> None:
+        """Run entity_id migration task."""
+        if migration.migrate_entity_ids(instance):
+            instance.states_meta_active = True
+            return
+        # Schedule a new migration task if this one didn't finish
+        instance.queue_task(EntityIDMigrationTask())
+
+
+@dataclass
+class EventsContextIDMigrationTask(RecorderTask):
+    """An object to insert into the recorder queue to migrate the context ids of the events."""
+
+    def run(self, instance: Recorder) -> None:
+        """Run context id migration task."""
+        if not migration.migrate_events_context_ids(instance):
+            # Schedule a new migration task if this one didn't finish
+            instance.queue_task(EventsContextIDMigrationTask())
+
+
+@dataclass
+class StatesContextIDMigrationTask(RecorderTask):
+    """An object to insert into the recorder queue to migrate the context ids of the states."""
+
+    def run(self, instance: Recorder) -> None:
+        """Run context id migration task."""
+        if not migration.migrate_states_context_ids(instance):
+            # Schedule a new migration task if this one didn't finish
+            instance.queue_task(StatesContextIDMigrationTask())
+
+
+@dataclass
+class EventsTimestampMigrationTask(RecorderTask):
+    """An object to insert into the recorder queue to migrate the timestamps of the events."""
+
+    def run(self, instance: Recorder) -> None:
+        """Run timestamp migration task."""
+        if not migration.migrate_events_timestamps(instance):
+            # Schedule a new migration task if this one didn't finish
+            instance.queue_task(EventsTimestampMigrationTask())
+
+
+@dataclass
+class StatesTimestampMigrationTask(RecorderTask):
+    """An object to insert into the recorder queue to migrate the timestamps of the states."""
+
+    def run(self, instance: Recorder) -> None:
+        """Run timestamp migration task."""
+        if not migration.migrate_states_timestamps(instance):
+            # Schedule a new migration task if this one didn't finish
+            instance.queue_task(StatesTimestampMigrationTask())
+
+
+@dataclass
+class CompressAttributesTask(RecorderTask):
+    """An object to insert into the recorder queue to compress the shared attributes."""
+
+    start_id: int = 0
+
+    def run(self, instance: Recorder) -> None:
+        """Run shared attributes compression task."""
+        next_id = migration.compress_state_attributes(instance, self.start_id)
+        if next_id is not None:
+            # Schedule a new compression task if this one didn't finish
+            instance.queue_task(CompressAttributesTask(next_id))
+
+
+@dataclass
+class SharedHashesTask(RecorderTask):
+    """An object to insert into the recorder queue to load the hashes of shared data.
+
+    The hashes of a table are loaded into a bloom filter in batches so the
+    recorder can keep processing events, the shared data is looked up in the
+    database until all hashes are loaded. Rows written in between batches
+    have a higher id and are picked up by the next batch.
+    """
+
+    table: str
+    hashes: HashBloomFilter | None = None
+    start_id: int = 0
+
+    def run(self, instance: Recorder) -> None:
+        """Run shared hashes task."""
+        # pylint: disable-next=[protected-access]
+        hashes, next_id = instance._load_shared_hashes(
+            self.table, self.hashes, self.start_id
+        )
+        if next_id is not None:
+            # Schedule a new task to load the next batch
+            instance.queue_task(SharedHashesTask(self.table, hashes, next_id))
+
+
+@dataclass
+class StatisticsRollupsBackfillTask(RecorderTask):
+    """An object to insert into the recorder queue to roll up long term statistics."""
+
+    def run(self, instance: Recorder) -> None:
+        """Run statistics rollups backfill task."""
+        if statistics.backfill_statistics_rollups(instance):
+            instance.statistics_rollups_active = True
+            return
+        # Schedule a new backfill task if this one didn't finish
+        instance.queue_task(StatisticsRollupsBackfillTask())
+
+
 @dataclass
 class WaitTask(RecorderTask):
     """An object to insert into the recorder queue to tell it set the _queue_watch event."""
@@ -282,6 +452,10 @@ class AddRecorderPlatformTask(RecorderTask):
         platforms[domain] = platform
         if hasattr(self.platform, "exclude_attributes"):
             hass.data[EXCLUDE_ATTRIBUTES][domain] = platform.exclude_attributes(hass)
+        if hasattr(self.platform, "process_state_changed_event"):
+            instance.state_changed_event_processors.append(
+                partial(platform.process_state_changed_event, hass)
+            )
 
 
 @dataclass
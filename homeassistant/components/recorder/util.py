@@ -410,6 +410,11 @@ def setup_connection_for_dialect(
         if first_connection:
             old_isolation = dbapi_connection.isolation_level
             dbapi_connection.isolation_level = None
+            # New databases keep track of their free pages so the pages freed
+            # by a purge can be given back to the file system by
+            # periodic_db_cleanups without rewriting the whole database. The
+            # mode of existing databases is changed when they are repacked.
+            execute_on_connection(dbapi_connection, "PRAGMA auto_vacuum=INCREMENTAL")
             execute_on_connection(dbapi_connection, "PRAGMA journal_mode=WAL")
             dbapi_connection.isolation_level = old_isolation
             # WAL mode only needs to be setup once
@@ -536,9 +541,15 @@ def periodic_db_cleanups(instance: Recorder) -> None:
     """
     assert instance.engine is not None
     if instance.engine.dialect.name == SupportedDialect.SQLITE:
-        # Execute sqlite to create a wal checkpoint and free up disk space
-        _LOGGER.debug("WAL checkpoint")
         with instance.engine.connect() as connection:
+            # Give the free pages back to the file system, this does
+            # nothing if the database is not in incremental auto_vacuum mode.
+            # sqlite frees one page per step of the statement so it is run
+            # with executescript which steps it until it is done.
+            _LOGGER.debug("Incremental vacuum")
+            connection.connection.executescript("PRAGMA incremental_vacuum;")
+            # Execute sqlite to create a wal checkpoint and free up disk space
+            _LOGGER.debug("WAL checkpoint")
             connection.execute(text("PRAGMA wal_checkpoint(TRUNCATE);"))
 
 
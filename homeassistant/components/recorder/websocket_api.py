@@ -1,6 +1,7 @@
 """The Recorder websocket API."""
 from __future__ import annotations
 
+from dataclasses import asdict
 from datetime import datetime as dt
 import logging
 from typing import Any, Literal
@@ -409,6 +410,8 @@ def ws_info(
         "migration_is_live": migration_is_live,
         "recording": recording,
         "thread_running": thread_alive,
+        "metrics": asdict(instance.metrics) if instance else None,
+        "purge_metrics": asdict(instance.purge_metrics) if instance else None,
     }
     connection.send_result(msg["id"], recorder_info)
 
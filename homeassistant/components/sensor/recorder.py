@@ -7,6 +7,7 @@ import datetime
 import itertools
 import logging
 import math
+import threading
 from typing import Any
 
 from sqlalchemy.orm.session import Session
@@ -29,7 +30,7 @@ from homeassistant.const import (
     VOLUME_CUBIC_FEET,
     VOLUME_CUBIC_METERS,
 )
-from homeassistant.core import HomeAssistant, State, split_entity_id
+from homeassistant.core import Event, HomeAssistant, State, split_entity_id
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity import entity_sources
 from homeassistant.util import dt as dt_util
@@ -68,6 +69,103 @@ WARN_UNSUPPORTED_UNIT = "sensor_warn_unsupported_unit"
 WARN_UNSTABLE_UNIT = "sensor_warn_unstable_unit"
 # Link to dev statistics where issues around LTS can be fixed
 LINK_DEV_STATISTICS = "https://my.home-assistant.io/redirect/developer_statistics"
+# The recent states of statistics sensors, fed by the recorder
+DATA_STATES_ACCUMULATOR = "sensor_statistics_states_accumulator"
+
+
+class _StatesAccumulator:
+    """Keep the recorded states of statistics sensors in memory.
+
+    The states are fed from the recorder thread as they are recorded. A sensor
+    can be compiled from memory once all its states since the start of the
+    period are known, otherwise it is compiled from the database.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the accumulator."""
+        self._lock = threading.Lock()
+        # (timestamp, state) by entity_id, None means the entity was removed
+        self._states: dict[str, list[tuple[float, State | None]]] = {}
+        # All states of an entity are known since this timestamp
+        self._known_since: dict[str, float] = {}
+
+    def add(self, entity_id: str, timestamp: float, state: State | None) -> None:
+        """Add a recorded state."""
+        with self._lock:
+            if (states := self._states.get(entity_id)) is not None:
+                states.append((timestamp, state))
+            elif state is not None:
+                self._states[entity_id] = [(timestamp, state)]
+                self._known_since[entity_id] = timestamp
+
+    def flush(
+        self,
+        wanted_statistics: dict[str, set[str]],
+        start: datetime.datetime,
+        end: datetime.datetime,
+    ) -> dict[str, list[State]]:
+        """Return the history of the sensors which are known since start.
+
+        The history is shaped like the history from the database, the state at
+        start followed by the states during the period. Only significant states
+        are included for sensors without a sum. States before end are dropped
+        except for the state at end.
+        """
+        start_ts = start.timestamp()
+        end_ts = end.timestamp()
+        history_list: dict[str, list[State]] = {}
+        with self._lock:
+            for entity_id in list(self._states):
+                if entity_id not in wanted_statistics:
+                    del self._states[entity_id]
+                    del self._known_since[entity_id]
+                    continue
+
+                states = self._states[entity_id]
+                idx = 0
+                start_state: State | None = None
+                for timestamp, state in states:
+                    if timestamp >= start_ts:
+                        break
+                    start_state = state
+                    idx += 1
+
+                end_idx = idx
+                if self._known_since[entity_id] <= start_ts:
+                    significant_only = "sum" not in wanted_statistics[entity_id]
+                    entity_history = [] if start_state is None else [start_state]
+                    for timestamp, state in states[idx:]:
+                        if timestamp >= end_ts:
+                            break
+                        end_idx += 1
+                        if state is None or (
+                            significant_only
+                            and state.last_changed != state.last_updated
+                        ):
+                            continue
+                        entity_history.append(state)
+                    history_list[entity_id] = entity_history
+                else:
+                    for timestamp, _ in states[idx:]:
+                        if timestamp >= end_ts:
+                            break
+                        end_idx += 1
+
+                if self._known_since[entity_id] <= end_ts:
+                    # Keep the state at end as the start state of the next period
+                    del states[: max(end_idx - 1, 0)]
+                    self._known_since[entity_id] = end_ts
+
+        return history_list
+
+
+def _get_states_accumulator(hass: HomeAssistant) -> _StatesAccumulator:
+    """Return the states accumulator."""
+    if (accumulator := hass.data.get(DATA_STATES_ACCUMULATOR)) is None:
+        accumulator = hass.data.setdefault(
+            DATA_STATES_ACCUMULATOR, _StatesAccumulator()
+        )
+    return accumulator  # type: ignore[no-any-return]
 
 
 def _get_sensor_states(hass: HomeAssistant) -> list[State]:
@@ -94,33 +192,33 @@ def _time_weighted_average(
     state changes.
     Note: there's no interpolation of values between state changes.
     """
+    start_ts = dt_util.utc_to_timestamp(start)
+    end_ts = dt_util.utc_to_timestamp(end)
     old_fstate: float | None = None
-    old_start_time: datetime.datetime | None = None
+    old_start_ts: float | None = None
     accumulated = 0.0
 
     for fstate, state in fstates:
         # The recorder will give us the last known state, which may be well
         # before the requested start time for the statistics
-        start_time = start if state.last_updated < start else state.last_updated
-        if old_start_time is None:
+        start_time_ts = max(start_ts, dt_util.utc_to_timestamp(state.last_updated))
+        if old_start_ts is None:
             # Adjust start time, if there was no last known state
-            start = start_time
+            start_ts = start_time_ts
         else:
-            duration = start_time - old_start_time
             # Accumulate the value, weighted by duration until next state change
             assert old_fstate is not None
-            accumulated += old_fstate * duration.total_seconds()
+            accumulated += old_fstate * (start_time_ts - old_start_ts)
 
         old_fstate = fstate
-        old_start_time = start_time
+        old_start_ts = start_time_ts
 
     if old_fstate is not None:
         # Accumulate the value, weighted by duration until end of the period
-        assert old_start_time is not None
-        duration = end - old_start_time
-        accumulated += old_fstate * duration.total_seconds()
+        assert old_start_ts is not None
+        accumulated += old_fstate * (end_ts - old_start_ts)
 
-    return accumulated / (end - start).total_seconds()
+    return accumulated / (end_ts - start_ts)
 
 
 def _get_units(fstates: list[tuple[float, State]]) -> set[str | None]:
@@ -363,6 +461,24 @@ def _last_reset_as_utc_isoformat(last_reset_s: Any, entity_id: str) -> str | Non
     return dt_util.as_utc(last_reset).isoformat()
 
 
+def process_state_changed_event(hass: HomeAssistant, event: Event) -> None:
+    """Add a recorded state of a statistics sensor to the states accumulator.
+
+    Note: This is called from the recorder thread
+    """
+    entity_id: str = event.data["entity_id"]
+    if not entity_id.startswith(f"{DOMAIN}."):
+        return
+    if (new_state := event.data.get("new_state")) is None:
+        _get_states_accumulator(hass).add(entity_id, event.time_fired.timestamp(), None)
+        return
+    if new_state.attributes.get(ATTR_STATE_CLASS) not in STATE_CLASSES:
+        return
+    _get_states_accumulator(hass).add(
+        entity_id, new_state.last_updated.timestamp(), new_state
+    )
+
+
 def compile_statistics(
     hass: HomeAssistant, start: datetime.datetime, end: datetime.datetime
 ) -> statistics.PlatformCompiledStatistics:
@@ -390,13 +506,18 @@ def _compile_statistics(  # noqa: C901
         session, statistic_ids=[i.entity_id for i in sensor_states]
     )
 
-    # Get history between start and end
+    # Get history between start and end, from memory for the sensors
+    # whose states have all been recorded since start
+    history_list: MutableMapping[str, list[State]] = _get_states_accumulator(
+        hass
+    ).flush(wanted_statistics, start, end)
     entities_full_history = [
-        i.entity_id for i in sensor_states if "sum" in wanted_statistics[i.entity_id]
+        i.entity_id
+        for i in sensor_states
+        if "sum" in wanted_statistics[i.entity_id] and i.entity_id not in history_list
     ]
-    history_list: MutableMapping[str, list[State]] = {}
     if entities_full_history:
-        history_list = history.get_full_significant_states_with_session(
+        _history_list = history.get_full_significant_states_with_session(
             hass,
             session,
             start - datetime.timedelta.resolution,
@@ -404,10 +525,12 @@ def _compile_statistics(  # noqa: C901
             entity_ids=entities_full_history,
             significant_changes_only=False,
         )
+        history_list = {**history_list, **_history_list}
     entities_significant_history = [
         i.entity_id
         for i in sensor_states
         if "sum" not in wanted_statistics[i.entity_id]
+        and i.entity_id not in history_list
     ]
     if entities_significant_history:
         _history_list = history.get_full_significant_states_with_session(
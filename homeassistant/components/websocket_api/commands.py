@@ -43,7 +43,7 @@ from homeassistant.util.json import (
     format_unserializable_data,
 )
 
-from . import const, decorators, messages
+from . import const, decorators, fanout, messages
 from .connection import ActiveConnection
 from .const import ERR_NOT_FOUND
 
@@ -235,6 +235,18 @@ def _async_get_allowed_states(
     ]
 
 
+def _async_get_allowed_changed_states(
+    hass: HomeAssistant, connection: ActiveConnection, entity_ids: set[str]
+) -> list[State]:
+    entity_perm = connection.user.permissions.check_entity
+    return [
+        state
+        for entity_id in entity_ids
+        if (state := hass.states.get(entity_id)) is not None
+        and entity_perm(entity_id, POLICY_READ)
+    ]
+
+
 @callback
 @decorators.websocket_command({vol.Required("type"): "get_states"})
 def handle_get_states(
@@ -279,43 +291,62 @@ def handle_get_states(
     {
         vol.Required("type"): "subscribe_entities",
         vol.Optional("entity_ids"): cv.entity_ids,
+        vol.Optional("since"): vol.Any(str, None),
+        vol.Optional("min_interval"): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1, max=60)
+        ),
     }
 )
 def handle_subscribe_entities(
     hass: HomeAssistant, connection: ActiveConnection, msg: dict[str, Any]
 ) -> None:
-    """Handle subscribe entities command."""
-    entity_ids = set(msg.get("entity_ids", []))
-
-    @callback
-    def forward_entity_changes(event: Event) -> None:
-        """Forward entity state changed events to websocket."""
-        if not connection.user.permissions.check_entity(
-            event.data["entity_id"], POLICY_READ
-        ):
-            return
-        if entity_ids and event.data["entity_id"] not in entity_ids:
-            return
+    """Handle subscribe entities command.
 
-        connection.send_message(
-            lambda: messages.cached_state_diff_message(msg["id"], event)
-        )
+    Clients passing since get the resync token after each change and
+    only the states changed since the token they pass, if it is known.
+    Clients passing min_interval get the changes merged at most once
+    per interval.
+    """
+    entity_ids = set(msg.get("entity_ids", []))
+    resync = "since" in msg
+    changed_entity_ids: set[str] | None = None
+    if (since := msg.get("since")) is not None:
+        changed_entity_ids = hass.states.async_entity_ids_changed_since(since)
 
     # We must never await between sending the states and listening for
     # state changed events or we will introduce a race condition
     # where some states are missed
-    states = _async_get_allowed_states(hass, connection)
-    connection.subscriptions[msg["id"]] = hass.bus.async_listen(
-        EVENT_STATE_CHANGED, forward_entity_changes, run_immediately=True
+    if changed_entity_ids is None:
+        states = _async_get_allowed_states(hass, connection)
+    else:
+        states = _async_get_allowed_changed_states(hass, connection, changed_entity_ids)
+    connection.subscriptions[msg["id"]] = fanout.async_subscribe_entities(
+        hass, connection, msg["id"], entity_ids, resync, msg.get("min_interval")
     )
-    connection.send_result(msg["id"])
-    data: dict[str, dict[str, dict]] = {
+    if resync:
+        connection.send_result(
+            msg["id"], {"incremental": changed_entity_ids is not None}
+        )
+    else:
+        connection.send_result(msg["id"])
+    data: dict[str, Any] = {
         messages.ENTITY_EVENT_ADD: {
             state.entity_id: messages.compressed_state_dict_add(state)
             for state in states
             if not entity_ids or state.entity_id in entity_ids
         }
     }
+    if changed_entity_ids is not None:
+        entity_perm = connection.user.permissions.check_entity
+        data[messages.ENTITY_EVENT_REMOVE] = [
+            entity_id
+            for entity_id in changed_entity_ids
+            if hass.states.get(entity_id) is None
+            and (not entity_ids or entity_id in entity_ids)
+            and entity_perm(entity_id, POLICY_READ)
+        ]
+    if resync:
+        data[messages.ENTITY_EVENT_RESYNC_TOKEN] = hass.states.async_resync_token()
 
     # JSON serialize here so we can recover if it blows up due to the
     # state machine containing unserializable data. This command is required
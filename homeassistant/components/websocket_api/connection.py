@@ -43,6 +43,8 @@ class ActiveConnection:
         self.subscriptions: dict[Hashable, Callable[[], Any]] = {}
         self.last_id = 0
         self.supported_features: dict[str, float] = {}
+        # Set while the client is not reading the messages fast enough
+        self.coalesce_state_changes = False
         current_connection.set(self)
 
     def context(self, msg: dict[str, Any]) -> Context:
@@ -50,6 +50,9 @@ SIGNAL_WEBSOCKET_DISCONNECTED: Final = "websocket_disconnected"
 # Data used to store the current connection list
 DATA_CONNECTIONS: Final = f"{DOMAIN}.connections"
 
+# Data used to store the fan out of the subscribe_entities subscriptions
+DATA_ENTITIES_FANOUT: Final = f"{DOMAIN}.entities_fanout"
+
 COMPRESSED_STATE_STATE = "s"
 COMPRESSED_STATE_ATTRIBUTES = "a"
 COMPRESSED_STATE_CONTEXT = "c"
@@ -57,3 +60,14 @@ COMPRESSED_STATE_LAST_CHANGED = "lc"
 COMPRESSED_STATE_LAST_UPDATED = "lu"
 
 FEATURE_COALESCE_MESSAGES = "coalesce_messages"
+
+# How often the state changes of subscribe_entities are sent to
+# connections which fell behind
+COALESCE_STATE_CHANGES_INTERVAL: Final = 1
+FEATURE_COMPRESS_MESSAGES = "compress_messages"
+
+# Messages of clients supporting compressed messages are sent as zlib
+# compressed binary frames from this size. permessage-deflate is also
+# negotiated by aiohttp but always compresses at the fastest level.
+MIN_SIZE_TO_COMPRESS_MESSAGE: Final = 8192
+MESSAGE_COMPRESSION_LEVEL: Final = 6
@@ -0,0 +1,235 @@
+"""Fan out state changes to the subscribe_entities subscriptions."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime
+
+from homeassistant.auth.models import User
+from homeassistant.auth.permissions.const import POLICY_READ
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, State, callback
+from homeassistant.helpers.event import async_call_later
+
+from . import messages
+from .connection import ActiveConnection
+from .const import COALESCE_STATE_CHANGES_INTERVAL, DATA_ENTITIES_FANOUT
+
+
+class _Subscription:
+    """A subscribe_entities subscription of a connection.
+
+    The changes are coalesced while the connection is behind or if the
+    subscription asked for a minimum interval. Only the first old state
+    and the last new state of each entity are kept and sent together
+    when the interval is over.
+    """
+
+    __slots__ = (
+        "hass",
+        "connection",
+        "msg_id",
+        "resync",
+        "min_interval",
+        "pending",
+        "_unsub_flush",
+    )
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        connection: ActiveConnection,
+        msg_id: int,
+        resync: bool,
+        min_interval: float | None,
+    ) -> None:
+        """Initialize the subscription."""
+        self.hass = hass
+        self.connection = connection
+        self.msg_id = msg_id
+        self.resync = resync
+        self.min_interval = min_interval
+        self.pending: dict[str, tuple[State | None, State | None]] = {}
+        self._unsub_flush: CALLBACK_TYPE | None = None
+
+    @property
+    def coalesce(self) -> bool:
+        """Return if changes should be coalesced instead of sent."""
+        return bool(
+            self.pending
+            or self.min_interval is not None
+            or self.connection.coalesce_state_changes
+        )
+
+    @callback
+    def async_add_pending(self, event: Event) -> None:
+        """Merge a state change into the pending changes."""
+        entity_id: str = event.data["entity_id"]
+        if (pending := self.pending.get(entity_id)) is None:
+            old_state = event.data["old_state"]
+        else:
+            old_state = pending[0]
+        self.pending[entity_id] = (old_state, event.data["new_state"])
+        if self._unsub_flush is None:
+            self._unsub_flush = async_call_later(
+                self.hass,
+                self.min_interval or COALESCE_STATE_CHANGES_INTERVAL,
+                self._async_flush,
+            )
+
+    @callback
+    def _async_flush(self, _now: datetime) -> None:
+        """Send the pending changes."""
+        self._unsub_flush = None
+        data = messages.merged_state_diff_event(
+            (entity_id, old_state, new_state)
+            for entity_id, (old_state, new_state) in self.pending.items()
+        )
+        self.pending.clear()
+        if not data:
+            return
+        if self.resync:
+            data[
+                messages.ENTITY_EVENT_RESYNC_TOKEN
+            ] = self.hass.states.async_resync_token()
+        self.connection.send_message(messages.event_message(self.msg_id, data))
+
+    @callback
+    def async_cancel(self) -> None:
+        """Cancel sending the pending changes."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+
+
+class _SubscriberGroup:
+    """Subscriptions of one user with the same entity filter."""
+
+    __slots__ = ("user", "entity_ids", "resync", "subscriptions")
+
+    def __init__(
+        self, user: User, entity_ids: frozenset[str] | None, resync: bool
+    ) -> None:
+        """Initialize the group."""
+        self.user = user
+        self.entity_ids = entity_ids
+        self.resync = resync
+        self.subscriptions: dict[tuple[ActiveConnection, int], _Subscription] = {}
+
+
+class EntitiesFanOut:
+    """Send state changes to all subscribe_entities subscriptions.
+
+    A single state_changed listener serves every subscription. The
+    subscriptions are grouped by user, entity filter and whether they get
+    resync tokens so the filter and the permission check run once per
+    group, and the diff is serialized once per event instead of once per
+    connection.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the fan out."""
+        self.hass = hass
+        self._groups: dict[
+            tuple[str, frozenset[str] | None, bool], _SubscriberGroup
+        ] = {}
+        self._unsub_state_changed: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_subscribe(
+        self,
+        connection: ActiveConnection,
+        msg_id: int,
+        entity_ids: Iterable[str],
+        resync: bool,
+        min_interval: float | None,
+    ) -> CALLBACK_TYPE:
+        """Subscribe a connection to the state changes of entities.
+
+        All entities are subscribed if entity_ids is empty. The changes
+        include the resync token after the change if resync is set and
+        are sent at most once per min_interval if it is set.
+        """
+        entity_filter = frozenset(entity_ids) or None
+        key = (connection.user.id, entity_filter, resync)
+        if (group := self._groups.get(key)) is None:
+            group = self._groups[key] = _SubscriberGroup(
+                connection.user, entity_filter, resync
+            )
+        subscription_key = (connection, msg_id)
+        subscription = group.subscriptions[subscription_key] = _Subscription(
+            self.hass, connection, msg_id, resync, min_interval
+        )
+        if self._unsub_state_changed is None:
+            self._unsub_state_changed = self.hass.bus.async_listen(
+                EVENT_STATE_CHANGED, self._async_state_changed, run_immediately=True
+            )
+
+        @callback
+        def _async_unsubscribe() -> None:
+            """Unsubscribe the connection."""
+            subscription.async_cancel()
+            del group.subscriptions[subscription_key]
+            if group.subscriptions:
+                return
+            del self._groups[key]
+            if not self._groups and self._unsub_state_changed is not None:
+                self._unsub_state_changed()
+                self._unsub_state_changed = None
+
+        return _async_unsubscribe
+
+    @callback
+    def _async_state_changed(self, event: Event) -> None:
+        """Send a state change to the subscriptions allowed to see it."""
+        entity_id: str = event.data["entity_id"]
+        allowed_users: dict[str, bool] = {}
+        templates: dict[bool, tuple[str, str]] = {}
+        for group in self._groups.values():
+            if group.entity_ids is not None and entity_id not in group.entity_ids:
+                continue
+            user = group.user
+            if (allowed := allowed_users.get(user.id)) is None:
+                allowed = allowed_users[user.id] = user.permissions.check_entity(
+                    entity_id, POLICY_READ
+                )
+            if not allowed:
+                continue
+            for subscription in group.subscriptions.values():
+                if subscription.coalesce:
+                    subscription.async_add_pending(event)
+                    continue
+                if (template := templates.get(group.resync)) is None:
+                    template = templates[group.resync] = self._async_template(
+                        event, group.resync
+                    )
+                prefix, suffix = template
+                subscription.connection.send_message(
+                    f"{prefix}{subscription.msg_id}{suffix}"
+                )
+
+    @callback
+    def _async_template(self, event: Event, resync: bool) -> tuple[str, str]:
+        """Serialize a state change and split it around the iden."""
+        if resync:
+            message = messages.state_diff_message_template_with_token(
+                event, self.hass.states.async_resync_token()
+            )
+        else:
+            message = messages.cached_state_diff_message_template(event)
+        prefix, _, suffix = message.partition(messages.IDEN_JSON_TEMPLATE)
+        return prefix, suffix
+
+
+@callback
+def async_subscribe_entities(
+    hass: HomeAssistant,
+    connection: ActiveConnection,
+    msg_id: int,
+    entity_ids: Iterable[str],
+    resync: bool = False,
+    min_interval: float | None = None,
+) -> CALLBACK_TYPE:
+    """Subscribe a connection to the state changes of entities."""
+    if (fanout := hass.data.get(DATA_ENTITIES_FANOUT)) is None:
+        fanout = hass.data[DATA_ENTITIES_FANOUT] = EntitiesFanOut(hass)
+    return fanout.async_subscribe(connection, msg_id, entity_ids, resync, min_interval)
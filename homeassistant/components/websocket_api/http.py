@@ -23,7 +23,9 @@ from .const import (
     CANCELLATION_ERRORS,
     DATA_CONNECTIONS,
     FEATURE_COALESCE_MESSAGES,
+    FEATURE_COMPRESS_MESSAGES,
     MAX_PENDING_MSG,
+    MIN_SIZE_TO_COMPRESS_MESSAGE,
     PENDING_MSG_PEAK,
     PENDING_MSG_PEAK_TIME,
     SIGNAL_WEBSOCKET_CONNECTED,
@@ -31,7 +33,7 @@ from .const import (
     URL,
 )
 from .error import Disconnect
-from .messages import message_to_json
+from .messages import compress_message, message_to_json
 
 if TYPE_CHECKING:
     from .connection import ActiveConnection
@@ -80,12 +82,13 @@ class WebSocketHandler:
         # Exceptions if Socket disconnected or cancelled by connection handler
         to_write = self._to_write
         logger = self._logger
-        wsock = self.wsock
         try:
             with suppress(RuntimeError, ConnectionResetError, *CANCELLATION_ERRORS):
                 while not self.wsock.closed:
                     if (process := await to_write.get()) is None:
                         return
+                    if to_write.empty() and self.connection:
+                        self.connection.coalesce_state_changes = False
                     message = process if isinstance(process, str) else process()
 
                     if (
@@ -95,7 +98,7 @@ class WebSocketHandler:
                         not in self.connection.supported_features
                     ):
                         logger.debug("Sending %s", message)
-                        await wsock.send_str(message)
+                        await self._async_send_str(message)
                         continue
 
                     messages: list[str] = [message]
@@ -108,13 +111,31 @@ class WebSocketHandler:
 
                     coalesced_messages = "[" + ",".join(messages) + "]"
                     self._logger.debug("Sending %s", coalesced_messages)
-                    await self.wsock.send_str(coalesced_messages)
+                    await self._async_send_str(coalesced_messages)
         finally:
             # Clean up the peaker checker when we shut down the writer
             if self._peak_checker_unsub is not None:
                 self._peak_checker_unsub()
                 self._peak_checker_unsub = None
 
+    async def _async_send_str(self, message: str) -> None:
+        """Send a message to the client.
+
+        Large messages are compressed in a binary frame if the client
+        supports it. They are compressed in the executor so the event
+        loop is not blocked by the initial states of large installs.
+        """
+        if (
+            len(message) < MIN_SIZE_TO_COMPRESS_MESSAGE
+            or not self.connection
+            or FEATURE_COMPRESS_MESSAGES not in self.connection.supported_features
+        ):
+            await self.wsock.send_str(message)
+            return
+        await self.wsock.send_bytes(
+            await self.hass.async_add_executor_job(compress_message, message)
+        )
+
     @callback
     def _send_message(self, message: str | dict[str, Any] | Callable[[], str]) -> None:
         """Send a message to the client.
@@ -141,6 +162,10 @@ class WebSocketHandler:
                 self._peak_checker_unsub = None
             return
 
+        # Coalesce the state changes until the client caught up
+        if self.connection:
+            self.connection.coalesce_state_changes = True
+
         if self._peak_checker_unsub is None:
             self._peak_checker_unsub = async_call_later(
                 self.hass, PENDING_MSG_PEAK_TIME, self._check_write_peak
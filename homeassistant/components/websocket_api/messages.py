@@ -1,9 +1,11 @@
 """Message templates for websocket commands."""
 from __future__ import annotations
 
+from collections.abc import Iterable
 from functools import lru_cache
 import logging
 from typing import Any, Final
+import zlib
 
 import voluptuous as vol
 
@@ -23,6 +25,7 @@ from .const import (
     COMPRESSED_STATE_LAST_CHANGED,
     COMPRESSED_STATE_LAST_UPDATED,
     COMPRESSED_STATE_STATE,
+    MESSAGE_COMPRESSION_LEVEL,
 )
 
 _LOGGER: Final = logging.getLogger(__name__)
@@ -45,6 +48,7 @@ STATE_DIFF_REMOVALS = "-"
 ENTITY_EVENT_ADD = "a"
 ENTITY_EVENT_REMOVE = "r"
 ENTITY_EVENT_CHANGE = "c"
+ENTITY_EVENT_RESYNC_TOKEN = "t"
 
 
 def result_message(iden: int, result: Any = None) -> dict[str, Any]:
@@ -98,19 +102,34 @@ def cached_state_diff_message(iden: int, event: Event) -> str:
     all getting many of the same events (mostly state changed)
     we can avoid serializing the same data for each connection.
     """
-    return _cached_state_diff_message(event).replace(IDEN_JSON_TEMPLATE, str(iden), 1)
+    return cached_state_diff_message_template(event).replace(
+        IDEN_JSON_TEMPLATE, str(iden), 1
+    )
 
 
 @lru_cache(maxsize=128)
-def _cached_state_diff_message(event: Event) -> str:
+def cached_state_diff_message_template(event: Event) -> str:
     """Cache and serialize the event to json.
 
     The IDEN_TEMPLATE is used which will be replaced
-    with the actual iden in cached_event_message
+    with the actual iden in cached_state_diff_message
     """
     return message_to_json(event_message(IDEN_TEMPLATE, _state_diff_event(event)))
 
 
+def state_diff_message_template_with_token(event: Event, resync_token: str) -> str:
+    """Serialize the event to json with the resync token after the change.
+
+    The IDEN_TEMPLATE is used which will be replaced with the actual iden.
+    """
+    return message_to_json(
+        event_message(
+            IDEN_TEMPLATE,
+            {**_state_diff_event(event), ENTITY_EVENT_RESYNC_TOKEN: resync_token},
+        )
+    )
+
+
 def _state_diff_event(event: Event) -> dict:
     """Convert a state_changed event to the minimal version.
 
@@ -135,6 +154,30 @@ def _state_diff_event(event: Event) -> dict:
     return _state_diff(event_old_state, event_new_state)
 
 
+def merged_state_diff_event(
+    changes: Iterable[tuple[str, State | None, State | None]]
+) -> dict[str, Any]:
+    """Merge state changes to an event with one change per entity.
+
+    The changes are the entity_id with the state before the first change
+    and the state after the last change.
+    """
+    data: dict[str, Any] = {}
+    for entity_id, old_state, new_state in changes:
+        if new_state is None:
+            if old_state is not None:
+                data.setdefault(ENTITY_EVENT_REMOVE, []).append(entity_id)
+        elif old_state is None:
+            data.setdefault(ENTITY_EVENT_ADD, {})[
+                entity_id
+            ] = compressed_state_dict_add(new_state)
+        else:
+            data.setdefault(ENTITY_EVENT_CHANGE, {}).update(
+                _state_diff(old_state, new_state)[ENTITY_EVENT_CHANGE]
+            )
+    return data
+
+
 def _state_diff(
     old_state: State, new_state: State
 ) -> dict[str, dict[str, dict[str, dict[str, str | list[str]]]]]:
@@ -207,3 +250,8 @@ def message_to_json(message: dict[str, Any]) -> str:
                 message["id"], const.ERR_UNKNOWN_ERROR, "Invalid JSON in response"
             )
         )
+
+
+def compress_message(message: str) -> bytes:
+    """Compress a serialized websocket message for a binary frame."""
+    return zlib.compress(message.encode("utf-8"), MESSAGE_COMPRESSION_LEVEL)
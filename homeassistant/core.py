@@ -7,6 +7,7 @@ of entities and react to changes.
 from __future__ import annotations
 
 import asyncio
+from collections import deque
 from collections.abc import (
     Awaitable,
     Callable,
@@ -143,6 +144,10 @@ TIMEOUT_EVENT_START = 15
 
 MAX_EXPECTED_ENTITY_IDS = 16384
 
+# How many state changes the state machine remembers so clients
+# can catch up on the changes since a resync token
+MAX_RECENT_STATE_CHANGES = 4096
+
 _LOGGER = logging.getLogger(__name__)
 
 _cv_hass: ContextVar[HomeAssistant] = ContextVar("current_entry")
@@ -854,6 +859,14 @@ class EventBus:
     def __init__(self, hass: HomeAssistant) -> None:
         """Initialize a new event bus."""
         self._listeners: dict[str, list[_FilterableJob]] = {}
+        # Precompiled listeners per event type, including the MATCH_ALL
+        # listeners. Rebuilt lazily when the listeners change.
+        self._dispatch: dict[str, tuple[_FilterableJob, ...]] = {}
+        # Listeners for EVENT_STATE_CHANGED indexed by entity_id or domain
+        self._state_changed_index: dict[
+            str, list[HassJob[[Event], Coroutine[Any, Any, None] | None]]
+        ] = {}
+        self._state_changed_unsub: CALLBACK_TYPE | None = None
         self._hass = hass
 
     @callback
@@ -869,6 +882,14 @@ class EventBus:
         """Return dictionary with events and the number of listeners."""
         return run_callback_threadsafe(self._hass.loop, self.async_listeners).result()
 
+    @callback
+    def async_state_changed_listeners(self) -> dict[str, int]:
+        """Return dictionary with entity_ids and domains and the number of listeners.
+
+        This method must be run in the event loop.
+        """
+        return {key: len(jobs) for key, jobs in self._state_changed_index.items()}
+
     def fire(
         self,
         event_type: str,
@@ -892,6 +913,14 @@ class EventBus:
     ) -> None:
         """Fire an event.
 
+        The Event is only created when there are listeners for the event type.
+        It is still created when every listener filters it out since the
+        filters get the Event. An event without listeners is not the
+        origin_event of its context, the first event with listeners fired with
+        the context is. The logbook describes the context of a live event with
+        its origin_event, the recorder listens to all events so this only
+        differs when the recorder is not running.
+
         This method must be run in the event loop.
         """
         if len(event_type) > MAX_LENGTH_EVENT_EVENT_TYPE:
@@ -899,12 +928,18 @@ class EventBus:
                 event_type, "event_type", MAX_LENGTH_EVENT_EVENT_TYPE
             )
 
-        listeners = self._listeners.get(event_type, [])
+        if (listeners := self._dispatch.get(event_type)) is None:
+            listeners = self._async_build_dispatch(event_type)
 
-        # EVENT_HOMEASSISTANT_CLOSE should go only to this listeners
-        match_all_listeners = self._listeners.get(MATCH_ALL)
-        if match_all_listeners is not None and event_type != EVENT_HOMEASSISTANT_CLOSE:
-            listeners = match_all_listeners + listeners
+        if not listeners:
+            # Nobody will ever see this event, avoid creating it unless
+            # it is needed for debug logging.
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug(
+                    "Bus:Handling %s",
+                    Event(event_type, event_data, origin, time_fired, context),
+                )
+            return
 
         event = Event(event_type, event_data, origin, time_fired, context)
         if not event.context.origin_event:
@@ -912,9 +947,6 @@ class EventBus:
 
         _LOGGER.debug("Bus:Handling %s", event)
 
-        if not listeners:
-            return
-
         for job, event_filter, run_immediately in listeners:
             if event_filter is not None:
                 try:
@@ -931,6 +963,30 @@ class EventBus:
             else:
                 self._hass.async_add_hass_job(job, event)
 
+    @callback
+    def _async_build_dispatch(self, event_type: str) -> tuple[_FilterableJob, ...]:
+        """Build and cache the listeners to run for an event type.
+
+        This method must be run in the event loop.
+        """
+        listeners: Iterable[_FilterableJob] = self._listeners.get(event_type, ())
+
+        # EVENT_HOMEASSISTANT_CLOSE should go only to this listeners
+        match_all_listeners = self._listeners.get(MATCH_ALL)
+        if match_all_listeners is not None and event_type != EVENT_HOMEASSISTANT_CLOSE:
+            listeners = (*match_all_listeners, *listeners)
+
+        dispatch = self._dispatch[event_type] = tuple(listeners)
+        return dispatch
+
+    @callback
+    def _async_invalidate_dispatch(self, event_type: str) -> None:
+        """Invalidate the precompiled listeners for an event type."""
+        if event_type == MATCH_ALL:
+            self._dispatch.clear()
+        else:
+            self._dispatch.pop(event_type, None)
+
     def listen(
         self,
         event_type: str,
@@ -987,6 +1043,7 @@ class EventBus:
         self, event_type: str, filterable_job: _FilterableJob
     ) -> CALLBACK_TYPE:
         self._listeners.setdefault(event_type, []).append(filterable_job)
+        self._async_invalidate_dispatch(event_type)
 
         def remove_listener() -> None:
             """Remove the listener."""
@@ -994,6 +1051,90 @@ class EventBus:
 
         return remove_listener
 
+    @callback
+    def async_listen_state_changed(
+        self,
+        listener: Callable[[Event], Coroutine[Any, Any, None] | None],
+        entity_ids: Iterable[str] | None = None,
+        domains: Iterable[str] | None = None,
+    ) -> CALLBACK_TYPE:
+        """Listen for state changed events of specific entities or domains.
+
+        Events are routed with a dict lookup on the entity_id and its domain
+        instead of running a filter for every listener. The entity_ids and
+        domains must be lower case.
+
+        The lookup is done in the event filter. Matching events are
+        dispatched from a job scheduled like any other listener, which
+        runs the callbacks and schedules the other listeners.
+
+        This method must be run in the event loop.
+        """
+        keys = [*(entity_ids or ()), *(domains or ())]
+        if not keys:
+            return _async_remove_no_listener
+
+        job: HassJob[[Event], Coroutine[Any, Any, None] | None] = HassJob(listener)
+        index = self._state_changed_index
+        for key in keys:
+            index.setdefault(key, []).append(job)
+
+        if self._state_changed_unsub is None:
+            self._state_changed_unsub = self.async_listen(
+                EVENT_STATE_CHANGED,
+                self._async_dispatch_state_changed,
+                event_filter=self._async_state_changed_filter,
+            )
+
+        @callback
+        def remove_listener() -> None:
+            """Remove the listener."""
+            for key in keys:
+                index[key].remove(job)
+                if not index[key]:
+                    del index[key]
+
+            if not index and self._state_changed_unsub is not None:
+                self._state_changed_unsub()
+                self._state_changed_unsub = None
+
+        return remove_listener
+
+    @callback
+    def _async_state_changed_filter(self, event: Event) -> bool:
+        """Filter state changed events by the entity_id and domain index."""
+        if (entity_id := event.data.get("entity_id")) is None:
+            return False
+        index = self._state_changed_index
+        return entity_id in index or entity_id.partition(".")[0] in index
+
+    @callback
+    def _async_dispatch_state_changed(self, event: Event) -> None:
+        """Dispatch a state changed event to the listeners indexed by it.
+
+        This method must be run in the event loop.
+        """
+        if (entity_id := event.data.get("entity_id")) is None:
+            return
+
+        index = self._state_changed_index
+        jobs = index.get(entity_id)
+        if (domain_jobs := index.get(entity_id.partition(".")[0])) is not None:
+            # A listener may track both the entity and its domain
+            jobs = domain_jobs if jobs is None else [*dict.fromkeys(jobs + domain_jobs)]
+
+        if jobs is None:
+            return
+
+        # Listeners may remove themselves while we are dispatching
+        for job in jobs[:]:
+            try:
+                self._hass.async_run_hass_job(job, event)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception(
+                    "Error while processing state change for %s", entity_id
+                )
+
     def listen_once(
         self,
         event_type: str,
@@ -1067,6 +1208,7 @@ class EventBus:
         """
         try:
             self._listeners[event_type].remove(filterable_job)
+            self._async_invalidate_dispatch(event_type)
 
             # delete event_type list if empty
             if not self._listeners[event_type]:
@@ -1079,6 +1221,11 @@ class EventBus:
             )
 
 
+@callback
+def _async_remove_no_listener() -> None:
+    """Remove a listener that was never registered."""
+
+
 _StateT = TypeVar("_StateT", bound="State")
 
 
@@ -1261,6 +1408,9 @@ class StateMachine:
         self._reservations: set[str] = set()
         self._bus = bus
         self._loop = loop
+        self._resync_id = ulid_util.ulid_hex()
+        self._change_seq = 0
+        self._recent_changes: deque[str] = deque(maxlen=MAX_RECENT_STATE_CHANGES)
 
     def entity_ids(self, domain_filter: str | None = None) -> list[str]:
         """List of entity ids that are being tracked."""
@@ -1331,6 +1481,31 @@ class StateMachine:
             state for state in self._states.values() if state.domain in domain_filter
         ]
 
+    @callback
+    def async_resync_token(self) -> str:
+        """Return a token for the current state of the state machine.
+
+        This method must be run in the event loop.
+        """
+        return f"{self._resync_id}:{self._change_seq}"
+
+    @callback
+    def async_entity_ids_changed_since(self, token: str) -> set[str] | None:
+        """Return the entity ids which changed since a resync token.
+
+        Returns None if the token is not from this state machine or if
+        the changes since the token are no longer remembered.
+
+        This method must be run in the event loop.
+        """
+        resync_id, _, seq = token.partition(":")
+        if resync_id != self._resync_id or not seq.isdigit():
+            return None
+        recent_changes = self._recent_changes
+        if (missed := self._change_seq - int(seq)) > len(recent_changes) or missed < 0:
+            return None
+        return {recent_changes[-idx] for idx in range(1, missed + 1)}
+
     def get(self, entity_id: str) -> State | None:
         """Retrieve state of entity_id or None if not found.
 
@@ -1373,6 +1548,8 @@ class StateMachine:
             return False
 
         old_state.expire()
+        self._change_seq += 1
+        self._recent_changes.append(entity_id)
         self._bus.async_fire(
             EVENT_STATE_CHANGED,
             {"entity_id": entity_id, "old_state": old_state, "new_state": None},
@@ -1478,6 +1655,8 @@ class StateMachine:
         if old_state is not None:
             old_state.expire()
         self._states[entity_id] = state
+        self._change_seq += 1
+        self._recent_changes.append(entity_id)
         self._bus.async_fire(
             EVENT_STATE_CHANGED,
             {"entity_id": entity_id, "old_state": old_state, "new_state": state},
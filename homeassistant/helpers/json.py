@@ -3,6 +3,7 @@ import datetime
 import json
 from pathlib import Path
 from typing import Any, Final
+from uuid import uuid4
 
 import orjson
 
@@ -98,6 +99,46 @@ def json_dumps_sorted(data: Any) -> str:
     ).decode("utf-8")
 
 
+class JSONFragment:
+    """Already encoded json which json_dumps_with_fragments inserts as is."""
+
+    __slots__ = ("json",)
+
+    def __init__(self, json_str: str) -> None:
+        """Initialize the fragment."""
+        self.json = json_str
+
+
+def json_dumps_with_fragments(data: Any) -> str:
+    """Dump json string inserting the JSONFragments in data as they are.
+
+    The fragments are dumped as strings with a random prefix which
+    are then replaced with the fragments so they never have to be
+    decoded and encoded again.
+    """
+    fragments: list[str] = []
+    prefix = uuid4().hex
+
+    def _default(obj: Any) -> Any:
+        if isinstance(obj, JSONFragment):
+            fragments.append(obj.json)
+            return f"{prefix}{len(fragments) - 1}"
+        return json_encoder_default(obj)
+
+    dumped = orjson.dumps(
+        data, option=orjson.OPT_NON_STR_KEYS, default=_default
+    ).decode("utf-8")
+    if not fragments:
+        return dumped
+    head, *tails = dumped.split(f'"{prefix}')
+    parts = [head]
+    for tail in tails:
+        index, _, rest = tail.partition('"')
+        parts.append(fragments[int(index)])
+        parts.append(rest)
+    return "".join(parts)
+
+
 json_loads = orjson.loads
 
 
@@ -6,6 +6,7 @@ import asyncio
 import collections
 from collections.abc import Callable
 from contextlib import suppress
+from datetime import timedelta
 import json
 import logging
 from timeit import default_timer as timer
@@ -19,6 +20,7 @@ from homeassistant.helpers.event import (
     async_track_state_change_event,
 )
 from homeassistant.helpers.json import JSON_DUMP, JSONEncoder
+from homeassistant.util import dt as dt_util
 
 # mypy: allow-untyped-calls, allow-untyped-defs, no-check-untyped-defs
 # mypy: no-warn-return-any
@@ -120,6 +122,58 @@ async def fire_events_with_filter(hass):
     return timer() - start
 
 
+@benchmark
+async def fire_events_many_filtered_listeners(hass):
+    """Fire 100k events at 100 listeners with filters where only one matches."""
+    count = 0
+    event_name = "benchmark_event"
+    events_to_fire = 10**5
+    listeners = 100
+
+    @core.callback
+    def listener(_):
+        """Handle event."""
+        nonlocal count
+        count += 1
+
+    for idx in range(listeners):
+
+        @core.callback
+        def event_filter(event, idx=idx):
+            """Filter event."""
+            return event.data["idx"] == idx
+
+        hass.bus.async_listen(event_name, listener, event_filter=event_filter)
+
+    event_data = {"idx": 0}
+    start = timer()
+
+    for _ in range(events_to_fire):
+        hass.bus.async_fire(event_name, event_data)
+
+    await hass.async_block_till_done()
+
+    assert count == events_to_fire
+
+    return timer() - start
+
+
+@benchmark
+async def fire_events_no_listeners(hass):
+    """Fire a million events that nobody listens to."""
+    event_name = "benchmark_event"
+    events_to_fire = 10**6
+
+    start = timer()
+
+    for _ in range(events_to_fire):
+        hass.bus.async_fire(event_name)
+
+    await hass.async_block_till_done()
+
+    return timer() - start
+
+
 @benchmark
 async def state_changed_helper(hass):
     """Run a million events through state changed helper with 1000 entities."""
@@ -311,8 +365,120 @@ async def json_serialize_states(hass):
     return timer() - start
 
 
+@benchmark
+async def compress_subscribe_entities_message(hass):
+    """Serialize and compress the initial subscribe_entities message of 6k states."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.components.websocket_api import messages
+
+    states = {
+        f"sensor.room_{idx % 80}_{idx}": messages.compressed_state_dict_add(
+            core.State(
+                f"sensor.room_{idx % 80}_{idx}",
+                str(idx * 0.25),
+                {
+                    "unit_of_measurement": "°C",
+                    "device_class": "temperature",
+                    "state_class": "measurement",
+                    "friendly_name": f"Room {idx % 80} Temperature {idx}",
+                },
+            )
+        )
+        for idx in range(6000)
+    }
+
+    start = timer()
+    message = messages.message_to_json(messages.event_message(1, {"a": states}))
+    messages.compress_message(message)
+    return timer() - start
+
+
+@benchmark
+async def reduce_statistics(hass):
+    """Reduce a year of hourly statistics of 500 sensors to days, weeks and months."""
+    # pylint: disable=import-outside-toplevel,protected-access
+    from homeassistant.components.recorder import statistics
+
+    start = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    stats = {
+        f"sensor.test_{idx}": [
+            {
+                "start": start + timedelta(hours=hour),
+                "mean": float(hour % 24),
+                "min": float(hour % 24 - 1),
+                "max": float(hour % 24 + 1),
+                "last_reset": None,
+                "state": float(hour),
+                "sum": float(hour),
+            }
+            for hour in range(365 * 24)
+        ]
+        for idx in range(500)
+    }
+
+    start = timer()
+    statistics._reduce_statistics_per_day(stats)
+    statistics._reduce_statistics_per_week(stats)
+    statistics._reduce_statistics_per_month(stats)
+    return timer() - start
+
+
+@benchmark
+async def subscribe_entities_fanout(hass):
+    """Send 100k state changes to 30 subscribe_entities connections."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.auth.models import User
+    from homeassistant.components.websocket_api import fanout
+
+    count = 0
+    connections = 30
+    events_to_fire = 10**5
+
+    class _Connection:
+        """Connection which counts the messages sent to it."""
+
+        def __init__(self, user):
+            """Initialize the connection."""
+            self.user = user
+            self.coalesce_state_changes = False
+
+        def send_message(self, message):
+            """Count the message."""
+            nonlocal count
+            count += 1
+
+    users = [
+        User(name=name, perm_lookup=None, is_owner=True, is_active=True)
+        for name in ("Owner", "Partner")
+    ]
+    for idx in range(connections):
+        fanout.async_subscribe_entities(
+            hass, _Connection(users[idx % len(users)]), 1, []
+        )
+
+    old_state = core.State("light.kitchen", "off", {"friendly_name": "Kitchen"})
+    new_state = core.State("light.kitchen", "on", {"friendly_name": "Kitchen"})
+    start = timer()
+
+    for _ in range(events_to_fire):
+        hass.bus.async_fire(
+            EVENT_STATE_CHANGED,
+            {
+                "entity_id": "light.kitchen",
+                "old_state": old_state,
+                "new_state": new_state,
+            },
+        )
+
+    await hass.async_block_till_done()
+
+    assert count == events_to_fire * connections
+
+    return timer() - start
+
+
 def _create_state_changed_event_from_old_new(
-    entity_id, event_time_fired, old_state, new_state
+    entity_id, event_time_fired_ts, old_state, new_state
 ):
     """Create a state changed event from a old and new state."""
     attributes = {}
@@ -326,9 +492,10 @@ def _create_state_changed_event_from_old_new(
         [
             "event_type"
             "event_data"
-            "time_fired"
-            "context_id"
-            "context_user_id"
+            "time_fired_ts"
+            "context_id_bin"
+            "context_user_id_bin"
+            "context_parent_id_bin"
             "state"
             "entity_id"
             "domain"
@@ -341,12 +508,13 @@ def _create_state_changed_event_from_old_new(
     row.event_type = EVENT_STATE_CHANGED
     row.event_data = "{}"
     row.attributes = attributes_json
-    row.time_fired = event_time_fired
+    row.time_fired_ts = event_time_fired_ts
     row.state = new_state and new_state.get("state")
     row.entity_id = entity_id
     row.domain = entity_id and core.split_entity_id(entity_id)[0]
-    row.context_id = None
-    row.context_user_id = None
+    row.context_id_bin = None
+    row.context_user_id_bin = None
+    row.context_parent_id_bin = None
     row.old_state_id = old_state and 1
     row.state_id = new_state and 1
 
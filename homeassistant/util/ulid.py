@@ -4,6 +4,12 @@ from __future__ import annotations
 from random import getrandbits
 import time
 
+_CROCKFORD_BASE32 = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_CROCKFORD_BASE32_DECODE = {
+    **{char: value for value, char in enumerate(_CROCKFORD_BASE32)},
+    **{char.lower(): value for value, char in enumerate(_CROCKFORD_BASE32)},
+}
+
 
 def ulid_hex() -> str:
     """Generate a ULID in lowercase hex that will work for a UUID.
@@ -35,16 +41,20 @@ def ulid(timestamp: float | None = None) -> str:
     import ulid
     ulid.parse(ulid_util.ulid())
     """
-    ulid_bytes = int((timestamp or time.time()) * 1000).to_bytes(
-        6, byteorder="big"
-    ) + int(getrandbits(80)).to_bytes(10, byteorder="big")
+    return bytes_to_ulid(
+        int((timestamp or time.time()) * 1000).to_bytes(6, byteorder="big")
+        + int(getrandbits(80)).to_bytes(10, byteorder="big")
+    )
 
+
+def bytes_to_ulid(ulid_bytes: bytes) -> str:
+    """Encode the 16 bytes of a ULID to its string representation."""
     # This is base32 crockford encoding with the loop unrolled for performance
     #
     # This code is adapted from:
     # https://github.com/ahawker/ulid/blob/06289583e9de4286b4d80b4ad000d137816502ca/ulid/base32.py#L102
     #
-    enc = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+    enc = _CROCKFORD_BASE32
     return (
         enc[(ulid_bytes[0] & 224) >> 5]
         + enc[ulid_bytes[0] & 31]
@@ -73,3 +83,19 @@ def ulid(timestamp: float | None = None) -> str:
         + enc[((ulid_bytes[14] & 3) << 3) | ((ulid_bytes[15] & 224) >> 5)]
         + enc[ulid_bytes[15] & 31]
     )
+
+
+def ulid_to_bytes(value: str) -> bytes:
+    """Decode a ULID string to its 16 bytes representation.
+
+    Raises ValueError if the string is not a valid ULID.
+    """
+    if len(value) != 26:
+        raise ValueError(f"Invalid ULID {value!r}")
+    int_value = 0
+    try:
+        for char in value:
+            int_value = (int_value << 5) | _CROCKFORD_BASE32_DECODE[char]
+        return int_value.to_bytes(16, byteorder="big")
+    except (KeyError, OverflowError) as err:
+        raise ValueError(f"Invalid ULID {value!r}") from err
@@ -3,6 +3,8 @@
 from datetime import timedelta
 from http import HTTPStatus
 import json
+import math
+import struct
 from unittest.mock import patch, sentinel
 
 import pytest
@@ -647,6 +649,88 @@ async def test_fetch_period_api_with_minimal_response(recorder_mock, hass, hass_
     ).replace('"', "")
 
 
+async def test_fetch_period_api_packed(recorder_mock, hass, hass_client):
+    """Test the fetch period view for history with the packed columnar format."""
+    now = dt_util.utcnow()
+    await async_setup_component(hass, "history", {})
+
+    hass.states.async_set("sensor.power", 0, {"attr": "any"})
+    await async_wait_recording_done(hass)
+    hass.states.async_set("sensor.power", "unavailable", {"attr": "any"})
+    await async_wait_recording_done(hass)
+    hass.states.async_set("sensor.power", 23.5, {"attr": "any"})
+    await async_wait_recording_done(hass)
+    client = await hass_client()
+    response = await client.get(
+        f"/api/history/period/{now.isoformat()}?filter_entity_id=sensor.power&packed"
+    )
+    assert response.status == HTTPStatus.OK
+    assert response.content_type == history.PACKED_COLUMNS_CONTENT_TYPE
+    body = await response.read()
+
+    magic, version, entity_count = struct.unpack_from("<4sBI", body)
+    assert magic == history.PACKED_COLUMNS_MAGIC
+    assert version == history.PACKED_COLUMNS_VERSION
+    assert entity_count == 1
+    offset = struct.calcsize("<4sBI")
+    (entity_id_length,) = struct.unpack_from("<H", body, offset)
+    offset += 2
+    assert body[offset : offset + entity_id_length] == b"sensor.power"
+    offset += entity_id_length
+    (points,) = struct.unpack_from("<I", body, offset)
+    offset += 4
+    assert points == 3
+    timestamps = struct.unpack_from(f"<{points}d", body, offset)
+    offset += points * 8
+    values = struct.unpack_from(f"<{points}d", body, offset)
+    offset += points * 8
+    assert offset == len(body)
+
+    assert list(timestamps) == sorted(timestamps)
+    assert values[0] == 0
+    assert math.isnan(values[1])
+    assert values[2] == 23.5
+
+
+async def test_fetch_period_api_max_points(recorder_mock, hass, hass_client):
+    """Test the fetch period view for history downsamples to max_points."""
+    now = dt_util.utcnow()
+    await async_setup_component(hass, "history", {})
+    await async_recorder_block_till_done(hass)
+    for value in range(50):
+        hass.states.async_set("sensor.power", value)
+        await async_recorder_block_till_done(hass)
+    await async_wait_recording_done(hass)
+    client = await hass_client()
+
+    response = await client.get(
+        f"/api/history/period/{now.isoformat()}"
+        "?filter_entity_id=sensor.power&columnar&max_points=5"
+    )
+    assert response.status == HTTPStatus.OK
+    states = (await response.json())["sensor.power"]["s"]
+    assert 2 <= len(states) < 50
+    assert states[0] == "0"
+    assert states[-1] == "49"
+
+    response = await client.get(
+        f"/api/history/period/{now.isoformat()}"
+        "?filter_entity_id=sensor.power&minimal_response&max_points=5"
+    )
+    assert response.status == HTTPStatus.OK
+    history_states = (await response.json())[0]
+    assert 2 <= len(history_states) < 50
+    assert history_states[0]["state"] == "0"
+    assert history_states[-1]["state"] == "49"
+
+    for max_points in ("1", "many"):
+        response = await client.get(
+            f"/api/history/period/{now.isoformat()}"
+            f"?filter_entity_id=sensor.power&packed&max_points={max_points}"
+        )
+        assert response.status == HTTPStatus.BAD_REQUEST
+
+
 async def test_fetch_period_api_with_no_timestamp(recorder_mock, hass, hass_client):
     """Test the fetch period view for history with no timestamp."""
     await async_setup_component(hass, "history", {})
@@ -1046,6 +1130,155 @@ async def test_history_during_period(recorder_mock, hass, hass_ws_client):
     assert sensor_test_history[2]["a"] == {"any": "attr"}
 
 
+async def test_history_during_period_passes_attributes_through(
+    recorder_mock, hass, hass_ws_client
+):
+    """Test history_during_period inserts the stored attributes without decoding them."""
+    now = dt_util.utcnow()
+
+    await async_setup_component(hass, "history", {})
+    await async_recorder_block_till_done(hass)
+    attributes = {"forecast": [{"temperature": 20.5, "condition": "sunny"}], "n": None}
+    hass.states.async_set("weather.home", "sunny", attributes=attributes)
+    await async_recorder_block_till_done(hass)
+    hass.states.async_set("weather.home", "rainy", attributes={})
+    await async_wait_recording_done(hass)
+
+    client = await hass_ws_client()
+    with patch(
+        "homeassistant.components.recorder.models.decode_attributes_from_row"
+    ) as decode_mock:
+        await client.send_json(
+            {
+                "id": 1,
+                "type": "history/history_during_period",
+                "start_time": now.isoformat(),
+                "entity_ids": ["weather.home"],
+                "significant_changes_only": False,
+            }
+        )
+        response = await client.receive_json()
+    assert not decode_mock.called
+    assert response["success"]
+    weather_history = response["result"]["weather.home"]
+    assert [state["s"] for state in weather_history] == ["sunny", "rainy"]
+    assert weather_history[0]["a"] == attributes
+    assert weather_history[1]["a"] == {}
+
+
+async def test_history_during_period_columnar(recorder_mock, hass, hass_ws_client):
+    """Test history_during_period with the columnar format."""
+    now = dt_util.utcnow()
+
+    await async_setup_component(hass, "history", {})
+    await async_setup_component(hass, "sensor", {})
+    await async_recorder_block_till_done(hass)
+    hass.states.async_set("sensor.test", "1.5", attributes={"any": "attr"})
+    await async_recorder_block_till_done(hass)
+    hass.states.async_set("sensor.test", "unknown", attributes={"any": "attr"})
+    await async_recorder_block_till_done(hass)
+    hass.states.async_set("sensor.test", "2", attributes={"any": "changed"})
+    await async_recorder_block_till_done(hass)
+    hass.states.async_set("sensor.other", "on")
+    await async_wait_recording_done(hass)
+
+    client = await hass_ws_client()
+    await client.send_json(
+        {
+            "id": 1,
+            "type": "history/history_during_period",
+            "start_time": now.isoformat(),
+            "entity_ids": ["sensor.test", "sensor.other"],
+            "columnar": True,
+        }
+    )
+    response = await client.receive_json()
+    assert response["success"]
+    result = response["result"]
+    assert list(result) == ["sensor.test", "sensor.other"]
+    assert result["sensor.test"]["s"] == ["1.5", "unknown", "2"]
+    assert len(result["sensor.test"]["lu"]) == 3
+    assert all(isinstance(ts, float) for ts in result["sensor.test"]["lu"])
+    assert result["sensor.other"]["s"] == ["on"]
+
+    await client.send_json(
+        {
+            "id": 2,
+            "type": "history/history_during_period",
+            "start_time": now.isoformat(),
+            "entity_ids": ["sensor.test", "sensor.other"],
+            "columnar": True,
+            "numeric_only": True,
+        }
+    )
+    response = await client.receive_json()
+    assert response["success"]
+    result = response["result"]
+    assert result["sensor.test"]["s"] == [1.5, None, 2.0]
+    assert result["sensor.other"]["s"] == [None]
+
+
+async def test_history_during_period_max_points(recorder_mock, hass, hass_ws_client):
+    """Test history_during_period downsamples to max_points."""
+    now = dt_util.utcnow()
+
+    await async_setup_component(hass, "history", {})
+    await async_setup_component(hass, "sensor", {})
+    await async_recorder_block_till_done(hass)
+    for value in range(50):
+        hass.states.async_set("sensor.power", value)
+        await async_recorder_block_till_done(hass)
+    await async_wait_recording_done(hass)
+
+    client = await hass_ws_client()
+    await client.send_json(
+        {
+            "id": 1,
+            "type": "history/history_during_period",
+            "start_time": now.isoformat(),
+            "entity_ids": ["sensor.power"],
+            "columnar": True,
+            "max_points": 5,
+        }
+    )
+    response = await client.receive_json()
+    assert response["success"]
+    states = response["result"]["sensor.power"]["s"]
+    assert 2 <= len(states) < 50
+    assert states[0] == "0"
+    assert states[-1] == "49"
+
+    await client.send_json(
+        {
+            "id": 2,
+            "type": "history/history_during_period",
+            "start_time": now.isoformat(),
+            "entity_ids": ["sensor.power"],
+            "minimal_response": True,
+            "no_attributes": True,
+            "max_points": 5,
+        }
+    )
+    response = await client.receive_json()
+    assert response["success"]
+    history_states = response["result"]["sensor.power"]
+    assert 2 <= len(history_states) < 50
+    assert history_states[0]["s"] == "0"
+    assert history_states[-1]["s"] == "49"
+
+    await client.send_json(
+        {
+            "id": 3,
+            "type": "history/history_during_period",
+            "start_time": now.isoformat(),
+            "entity_ids": ["sensor.power"],
+            "max_points": 1,
+        }
+    )
+    response = await client.receive_json()
+    assert not response["success"]
+
+
 async def test_history_during_period_impossible_conditions(
     recorder_mock, hass, hass_ws_client
 ):
@@ -17,6 +17,12 @@ from homeassistant.components.automation import EVENT_AUTOMATION_TRIGGERED
 from homeassistant.components.logbook.models import LazyEventPartialState
 from homeassistant.components.logbook.processor import EventProcessor
 from homeassistant.components.logbook.queries.common import PSUEDO_EVENT_STATE_CHANGED
+from homeassistant.components.recorder.db_schema import Events, States
+from homeassistant.components.recorder.models import (
+    bytes_to_ulid_or_none,
+    bytes_to_uuid_hex_or_none,
+)
+from homeassistant.components.recorder.util import session_scope
 from homeassistant.components.script import EVENT_SCRIPT_STARTED
 from homeassistant.components.sensor import SensorStateClass
 from homeassistant.const import (
@@ -315,10 +321,10 @@ def create_state_changed_event_from_old_new(
         [
             "event_type"
             "event_data"
-            "time_fired"
-            "context_id"
-            "context_user_id"
-            "context_parent_id"
+            "time_fired_ts"
+            "context_id_bin"
+            "context_user_id_bin"
+            "context_parent_id_bin"
             "state"
             "entity_id"
             "domain"
@@ -336,17 +342,17 @@ def create_state_changed_event_from_old_new(
     row.shared_data = "{}"
     row.attributes = attributes_json
     row.shared_attrs = attributes_json
-    row.time_fired = event_time_fired
+    row.time_fired_ts = dt_util.utc_to_timestamp(event_time_fired)
     row.state = new_state and new_state.get("state")
     row.entity_id = entity_id
     row.domain = entity_id and ha.split_entity_id(entity_id)[0]
     row.context_only = False
-    row.context_id = None
+    row.context_id_bin = None
     row.friendly_name = None
     row.icon = None
     row.old_format_icon = None
-    row.context_user_id = None
-    row.context_parent_id = None
+    row.context_user_id_bin = None
+    row.context_parent_id_bin = None
     row.old_state_id = old_state and 1
     row.state_id = new_state and 1
     return LazyEventPartialState(row, {})
@@ -903,7 +909,7 @@ async def test_logbook_entity_context_id(recorder_mock, hass, hass_client):
     await async_recorder_block_till_done(hass)
 
     context = ha.Context(
-        id="ac5bd62de45711eaaeb351041eec8dd9",
+        id="5CBFB2VS2Q27NAXCTH0GFES3ES",
         user_id="b400facee45711eaa9308bfd3d19e474",
     )
 
@@ -964,7 +970,7 @@ async def test_logbook_entity_context_id(recorder_mock, hass, hass_client):
 
     # A service call
     light_turn_off_service_context = ha.Context(
-        id="9c5bd62de45711eaaeb351041eec8dd9",
+        id="4WBFB2VS2Q27NAXCTH0GFES3ES",
         user_id="9400facee45711eaa9308bfd3d19e474",
     )
     hass.states.async_set("light.switch", STATE_ON)
@@ -1057,7 +1063,7 @@ async def test_logbook_context_id_automation_script_started_manually(
     # An Automation
     automation_entity_id_test = "automation.alarm"
     automation_context = ha.Context(
-        id="fc5bd62de45711eaaeb351041eec8dd9",
+        id="7WBFB2VS2Q27NAXCTH0GFES3ES",
         user_id="f400facee45711eaa9308bfd3d19e474",
     )
     hass.bus.async_fire(
@@ -1066,7 +1072,7 @@ async def test_logbook_context_id_automation_script_started_manually(
         context=automation_context,
     )
     script_context = ha.Context(
-        id="ac5bd62de45711eaaeb351041eec8dd9",
+        id="5CBFB2VS2Q27NAXCTH0GFES3ES",
         user_id="b400facee45711eaa9308bfd3d19e474",
     )
     hass.bus.async_fire(
@@ -1078,7 +1084,7 @@ async def test_logbook_context_id_automation_script_started_manually(
     hass.bus.async_fire(EVENT_HOMEASSISTANT_START)
 
     script_2_context = ha.Context(
-        id="1234",
+        id="01GTDGKBCH00GW0X476W5TVDDD",
         user_id="b400facee45711eaa9308bfd3d19e474",
     )
     hass.bus.async_fire(
@@ -1109,12 +1115,12 @@ async def test_logbook_context_id_automation_script_started_manually(
     assert json_dict[0]["entity_id"] == "automation.alarm"
     assert "context_entity_id" not in json_dict[0]
     assert json_dict[0]["context_user_id"] == "f400facee45711eaa9308bfd3d19e474"
-    assert json_dict[0]["context_id"] == "fc5bd62de45711eaaeb351041eec8dd9"
+    assert json_dict[0]["context_id"] == "7WBFB2VS2Q27NAXCTH0GFES3ES"
 
     assert json_dict[1]["entity_id"] == "script.mock_script"
     assert "context_entity_id" not in json_dict[1]
     assert json_dict[1]["context_user_id"] == "b400facee45711eaa9308bfd3d19e474"
-    assert json_dict[1]["context_id"] == "ac5bd62de45711eaaeb351041eec8dd9"
+    assert json_dict[1]["context_id"] == "5CBFB2VS2Q27NAXCTH0GFES3ES"
 
     assert json_dict[2]["domain"] == "homeassistant"
 
@@ -1122,7 +1128,7 @@ async def test_logbook_context_id_automation_script_started_manually(
     assert json_dict[3]["name"] == "Mock script"
     assert "context_entity_id" not in json_dict[1]
     assert json_dict[3]["context_user_id"] == "b400facee45711eaa9308bfd3d19e474"
-    assert json_dict[3]["context_id"] == "1234"
+    assert json_dict[3]["context_id"] == "01GTDGKBCH00GW0X476W5TVDDD"
 
     assert json_dict[4]["entity_id"] == "switch.new"
     assert json_dict[4]["state"] == "off"
@@ -1144,7 +1150,7 @@ async def test_logbook_entity_context_parent_id(recorder_mock, hass, hass_client
     await async_recorder_block_till_done(hass)
 
     context = ha.Context(
-        id="ac5bd62de45711eaaeb351041eec8dd9",
+        id="5CBFB2VS2Q27NAXCTH0GFES3ES",
         user_id="b400facee45711eaa9308bfd3d19e474",
     )
 
@@ -1157,8 +1163,8 @@ async def test_logbook_entity_context_parent_id(recorder_mock, hass, hass_client
     )
 
     child_context = ha.Context(
-        id="2798bfedf8234b5e9f4009c91f48f30c",
-        parent_id="ac5bd62de45711eaaeb351041eec8dd9",
+        id="17K2ZYVY139DF9YG09S4FMHWRC",
+        parent_id="5CBFB2VS2Q27NAXCTH0GFES3ES",
         user_id="b400facee45711eaa9308bfd3d19e474",
     )
     hass.bus.async_fire(
@@ -1209,8 +1215,8 @@ async def test_logbook_entity_context_parent_id(recorder_mock, hass, hass_client
 
     # A state change via service call with the script as the parent
     light_turn_off_service_context = ha.Context(
-        id="9c5bd62de45711eaaeb351041eec8dd9",
-        parent_id="2798bfedf8234b5e9f4009c91f48f30c",
+        id="4WBFB2VS2Q27NAXCTH0GFES3ES",
+        parent_id="17K2ZYVY139DF9YG09S4FMHWRC",
         user_id="9400facee45711eaa9308bfd3d19e474",
     )
     hass.states.async_set("light.switch", STATE_ON)
@@ -1234,8 +1240,8 @@ async def test_logbook_entity_context_parent_id(recorder_mock, hass, hass_client
 
     # An event with a parent event, but the parent event isn't available
     missing_parent_context = ha.Context(
-        id="fc40b9a0d1f246f98c34b33c76228ee6",
-        parent_id="c8ce515fe58e442f8664246c65ed964f",
+        id="7W82WT1MFJ8VWRRD5K7HV253Q6",
+        parent_id="68SS8NZSCE8GQRCS14DHJYV5JF",
         user_id="485cacf93ef84d25a99ced3126b921d2",
     )
     logbook.async_log_entry(
@@ -1356,7 +1362,7 @@ async def test_logbook_context_from_template(recorder_mock, hass, hass_client):
     await hass.async_block_till_done()
 
     switch_turn_off_context = ha.Context(
-        id="9c5bd62de45711eaaeb351041eec8dd9",
+        id="4WBFB2VS2Q27NAXCTH0GFES3ES",
         user_id="9400facee45711eaa9308bfd3d19e474",
     )
     hass.states.async_set(
@@ -1437,7 +1443,7 @@ async def test_logbook_(recorder_mock, hass, hass_client):
     await hass.async_block_till_done()
 
     switch_turn_off_context = ha.Context(
-        id="9c5bd62de45711eaaeb351041eec8dd9",
+        id="4WBFB2VS2Q27NAXCTH0GFES3ES",
         user_id="9400facee45711eaa9308bfd3d19e474",
     )
     hass.states.async_set(
@@ -1617,7 +1623,7 @@ async def test_logbook_multiple_entities(recorder_mock, hass, hass_client):
     await hass.async_block_till_done()
 
     switch_turn_off_context = ha.Context(
-        id="9c5bd62de45711eaaeb351041eec8dd9",
+        id="4WBFB2VS2Q27NAXCTH0GFES3ES",
         user_id="9400facee45711eaa9308bfd3d19e474",
     )
     hass.states.async_set(
@@ -2229,6 +2235,112 @@ async def test_context_filter(recorder_mock, hass, hass_client):
     assert response.status == HTTPStatus.BAD_REQUEST
 
 
+async def test_context_filter_before_context_ids_are_migrated(
+    recorder_mock, hass, hass_client
+):
+    """Test we can filter by context while the context ids are still strings."""
+    assert await async_setup_component(hass, "logbook", {})
+    await async_recorder_block_till_done(hass)
+
+    entity_id = "switch.blu"
+    context = ha.Context(user_id="b400facee45711eaa9308bfd3d19e474")
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_START)
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    hass.states.async_set(entity_id, None)
+    hass.states.async_set(entity_id, "on", context=context)
+    hass.states.async_set(entity_id, "off")
+    hass.states.async_set(entity_id, "unknown", context=context)
+
+    await async_wait_recording_done(hass)
+
+    def _unmigrate_context_ids():
+        with session_scope(hass=hass) as session:
+            for table in (Events, States):
+                for row in session.query(table):
+                    row.context_id = bytes_to_ulid_or_none(row.context_id_bin)
+                    row.context_user_id = bytes_to_uuid_hex_or_none(
+                        row.context_user_id_bin
+                    )
+                    row.context_parent_id = bytes_to_ulid_or_none(
+                        row.context_parent_id_bin
+                    )
+                    row.context_id_bin = None
+                    row.context_user_id_bin = None
+                    row.context_parent_id_bin = None
+
+    instance = recorder.get_instance(hass)
+    await instance.async_add_executor_job(_unmigrate_context_ids)
+    await instance.async_add_executor_job(_unmigrate_timestamps, hass)
+    client = await hass_client()
+
+    with patch.object(instance, "schema_version", 31):
+        entries = await _async_fetch_logbook(client, {"context_id": context.id})
+
+    assert len(entries) == 2
+    _assert_entry(entries[0], entity_id=entity_id, state="on")
+    _assert_entry(entries[1], entity_id=entity_id, state="unknown")
+    assert entries[0]["context_user_id"] == "b400facee45711eaa9308bfd3d19e474"
+
+
+async def test_logbook_before_timestamps_are_migrated(recorder_mock, hass, hass_client):
+    """Test we can fetch the logbook while the timestamps are still datetimes."""
+    assert await async_setup_component(hass, "logbook", {})
+    await async_recorder_block_till_done(hass)
+
+    entity_id = "switch.blu"
+    context = ha.Context()
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_START)
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    hass.states.async_set(entity_id, None)
+    hass.states.async_set(entity_id, "on", context=context)
+    hass.states.async_set(entity_id, "off")
+    hass.states.async_set(entity_id, "unknown", context=context)
+    hass.bus.async_fire(
+        logbook.EVENT_LOGBOOK_ENTRY,
+        {
+            logbook.ATTR_NAME: "Alarm",
+            logbook.ATTR_MESSAGE: "is triggered",
+            logbook.ATTR_DOMAIN: "switch",
+            logbook.ATTR_ENTITY_ID: entity_id,
+        },
+    )
+
+    await async_wait_recording_done(hass)
+    instance = recorder.get_instance(hass)
+    await instance.async_add_executor_job(_unmigrate_timestamps, hass)
+    client = await hass_client()
+
+    with patch.object(instance, "schema_version", 32):
+        entries = await _async_fetch_logbook(client)
+        entity_entries = await _async_fetch_logbook(client, {"entity": entity_id})
+        context_entries = await _async_fetch_logbook(client, {"context_id": context.id})
+
+    assert len(entries) == 4
+    _assert_entry(entries[0], entity_id=entity_id, state="on")
+    _assert_entry(entries[1], entity_id=entity_id, state="off")
+    _assert_entry(entries[2], entity_id=entity_id, state="unknown")
+    _assert_entry(entries[3], name="Alarm", message="is triggered")
+    assert entity_entries == entries
+    assert len(context_entries) == 2
+    _assert_entry(context_entries[1], entity_id=entity_id, state="unknown")
+
+
+def _unmigrate_timestamps(hass: HomeAssistant) -> None:
+    """Move the timestamps of the rows back to the columns used before schema 33."""
+    with session_scope(hass=hass) as session:
+        for event in session.query(Events):
+            event.time_fired = dt_util.utc_from_timestamp(event.time_fired_ts)
+            event.time_fired_ts = None
+        for state in session.query(States):
+            state.last_updated = dt_util.utc_from_timestamp(state.last_updated_ts)
+            state.last_updated_ts = None
+            if state.last_changed_ts is not None:
+                state.last_changed = dt_util.utc_from_timestamp(state.last_changed_ts)
+                state.last_changed_ts = None
+
+
 async def _async_fetch_logbook(client, params=None):
     if params is None:
         params = {}
@@ -2293,7 +2405,7 @@ async def test_get_events(recorder_mock, hass, hass_ws_client):
     hass.states.async_set("light.kitchen", STATE_ON, {"brightness": 400})
     await hass.async_block_till_done()
     context = ha.Context(
-        id="ac5bd62de45711eaaeb351041eec8dd9",
+        id="5CBFB2VS2Q27NAXCTH0GFES3ES",
         user_id="b400facee45711eaa9308bfd3d19e474",
     )
 
@@ -2373,7 +2485,7 @@ async def test_get_events(recorder_mock, hass, hass_ws_client):
             "id": 5,
             "type": "logbook/get_events",
             "start_time": now.isoformat(),
-            "context_id": "ac5bd62de45711eaaeb351041eec8dd9",
+            "context_id": "5CBFB2VS2Q27NAXCTH0GFES3ES",
         }
     )
     response = await client.receive_json()
@@ -2538,7 +2650,7 @@ async def test_get_events_with_device_ids(recorder_mock, hass, hass_ws_client):
     hass.states.async_set("light.kitchen", STATE_ON, {"brightness": 400})
     await hass.async_block_till_done()
     context = ha.Context(
-        id="ac5bd62de45711eaaeb351041eec8dd9",
+        id="5CBFB2VS2Q27NAXCTH0GFES3ES",
         user_id="b400facee45711eaa9308bfd3d19e474",
     )
 
@@ -2625,7 +2737,7 @@ async def test_logbook_select_entities_context_id(recorder_mock, hass, hass_clie
     await async_recorder_block_till_done(hass)
 
     context = ha.Context(
-        id="ac5bd62de45711eaaeb351041eec8dd9",
+        id="5CBFB2VS2Q27NAXCTH0GFES3ES",
         user_id="b400facee45711eaa9308bfd3d19e474",
     )
 
@@ -2684,7 +2796,7 @@ async def test_logbook_select_entities_context_id(recorder_mock, hass, hass_clie
 
     # A service call
     light_turn_off_service_context = ha.Context(
-        id="9c5bd62de45711eaaeb351041eec8dd9",
+        id="4WBFB2VS2Q27NAXCTH0GFES3ES",
         user_id="9400facee45711eaa9308bfd3d19e474",
     )
     hass.states.async_set("light.switch", STATE_ON)
@@ -2763,7 +2875,7 @@ async def test_get_events_with_context_state(recorder_mock, hass, hass_ws_client
     hass.states.async_set("light.kitchen2", STATE_OFF)
 
     context = ha.Context(
-        id="ac5bd62de45711eaaeb351041eec8dd9",
+        id="5CBFB2VS2Q27NAXCTH0GFES3ES",
         user_id="b400facee45711eaa9308bfd3d19e474",
     )
     hass.states.async_set("binary_sensor.is_light", STATE_OFF, context=context)
@@ -2,7 +2,7 @@
 import asyncio
 from collections.abc import Callable
 from datetime import timedelta
-from unittest.mock import ANY, patch
+from unittest.mock import ANY, Mock, patch
 
 from freezegun import freeze_time
 import pytest
@@ -31,6 +31,7 @@ from homeassistant.const import (
 from homeassistant.core import Event, HomeAssistant, State
 from homeassistant.helpers import device_registry, entity_registry
 from homeassistant.helpers.entityfilter import CONF_ENTITY_GLOBS
+from homeassistant.helpers.json import json_loads
 from homeassistant.setup import async_setup_component
 import homeassistant.util.dt as dt_util
 
@@ -147,7 +148,7 @@ async def test_get_events(recorder_mock, hass, hass_ws_client):
     hass.states.async_set("light.kitchen", STATE_ON, {"brightness": 400})
     await hass.async_block_till_done()
     context = core.Context(
-        id="ac5bd62de45711eaaeb351041eec8dd9",
+        id="5CBFB2VS2Q27NAXCTH0GFES3ES",
         user_id="b400facee45711eaa9308bfd3d19e474",
     )
 
@@ -227,7 +228,7 @@ async def test_get_events(recorder_mock, hass, hass_ws_client):
             "id": 5,
             "type": "logbook/get_events",
             "start_time": now.isoformat(),
-            "context_id": "ac5bd62de45711eaaeb351041eec8dd9",
+            "context_id": "5CBFB2VS2Q27NAXCTH0GFES3ES",
         }
     )
     response = await client.receive_json()
@@ -421,7 +422,7 @@ async def test_get_events_with_device_ids(recorder_mock, hass, hass_ws_client):
     hass.states.async_set("light.kitchen", STATE_ON, {"brightness": 400})
     await hass.async_block_till_done()
     context = core.Context(
-        id="ac5bd62de45711eaaeb351041eec8dd9",
+        id="5CBFB2VS2Q27NAXCTH0GFES3ES",
         user_id="b400facee45711eaa9308bfd3d19e474",
     )
 
@@ -1229,7 +1230,7 @@ async def test_subscribe_unsubscribe_logbook_stream(
     ]
 
     context = core.Context(
-        id="ac5bd62de45711eaaeb351041eec8dd9",
+        id="5CBFB2VS2Q27NAXCTH0GFES3ES",
         user_id="b400facee45711eaa9308bfd3d19e474",
     )
     automation_entity_id_test = "automation.alarm"
@@ -1267,7 +1268,7 @@ async def test_subscribe_unsubscribe_logbook_stream(
     assert msg["type"] == "event"
     assert msg["event"]["events"] == [
         {
-            "context_id": "ac5bd62de45711eaaeb351041eec8dd9",
+            "context_id": "5CBFB2VS2Q27NAXCTH0GFES3ES",
             "context_user_id": "b400facee45711eaa9308bfd3d19e474",
             "domain": "automation",
             "entity_id": "automation.alarm",
@@ -1280,7 +1281,7 @@ async def test_subscribe_unsubscribe_logbook_stream(
             "context_domain": "automation",
             "context_entity_id": "automation.alarm",
             "context_event_type": "automation_triggered",
-            "context_id": "ac5bd62de45711eaaeb351041eec8dd9",
+            "context_id": "5CBFB2VS2Q27NAXCTH0GFES3ES",
             "context_message": "triggered by state of " "binary_sensor.dog_food_ready",
             "context_name": "Mock automation",
             "context_source": "state of binary_sensor.dog_food_ready",
@@ -1332,7 +1333,7 @@ async def test_subscribe_unsubscribe_logbook_stream(
             "context_domain": "automation",
             "context_entity_id": "automation.alarm",
             "context_event_type": "automation_triggered",
-            "context_id": "ac5bd62de45711eaaeb351041eec8dd9",
+            "context_id": "5CBFB2VS2Q27NAXCTH0GFES3ES",
             "context_message": "triggered by state of binary_sensor.dog_food_ready",
             "context_name": "Mock automation",
             "context_source": "state of binary_sensor.dog_food_ready",
@@ -1362,7 +1363,7 @@ async def test_subscribe_unsubscribe_logbook_stream(
             "context_domain": "automation",
             "context_entity_id": "automation.alarm",
             "context_event_type": "automation_triggered",
-            "context_id": "ac5bd62de45711eaaeb351041eec8dd9",
+            "context_id": "5CBFB2VS2Q27NAXCTH0GFES3ES",
             "context_message": "triggered by state of binary_sensor.dog_food_ready",
             "context_name": "Mock automation",
             "context_source": "state of binary_sensor.dog_food_ready",
@@ -1924,7 +1925,7 @@ async def test_logbook_stream_match_multiple_entities(
     hass.states.async_set("binary_sensor.should_not_appear", STATE_ON)
     hass.states.async_set("binary_sensor.should_not_appear", STATE_OFF)
     context = core.Context(
-        id="ac5bd62de45711eaaeb351041eec8dd9",
+        id="5CBFB2VS2Q27NAXCTH0GFES3ES",
         user_id="b400facee45711eaa9308bfd3d19e474",
     )
     hass.bus.async_fire(
@@ -2704,3 +2705,223 @@ async def test_subscribe_all_entities_are_continuous_with_device(
 
     # Check our listener got unsubscribed
     assert hass.bus.async_listeners() == init_listeners
+
+
+@patch("homeassistant.components.logbook.websocket_api.EVENT_COALESCE_TIME", 0)
+async def test_live_streams_share_humanified_events(
+    recorder_mock, hass, hass_ws_client
+):
+    """Test unfiltered live streams share the events of the live hub."""
+    now = dt_util.utcnow()
+    await asyncio.gather(
+        *[
+            async_setup_component(hass, comp, {})
+            for comp in ("homeassistant", "logbook", "automation", "script")
+        ]
+    )
+    hass.states.async_set("binary_sensor.is_light", STATE_ON)
+    hass.states.async_set("binary_sensor.is_light", STATE_OFF)
+    await async_wait_recording_done(hass)
+
+    websocket_client = await hass_ws_client()
+    init_listeners = hass.bus.async_listeners()
+    await websocket_client.send_json(
+        {"id": 7, "type": "logbook/event_stream", "start_time": now.isoformat()}
+    )
+    msg = await asyncio.wait_for(websocket_client.receive_json(), 2)
+    assert msg["id"] == 7
+    assert msg["type"] == TYPE_RESULT
+    assert msg["success"]
+    msg = await asyncio.wait_for(websocket_client.receive_json(), 2)
+    assert msg["event"]["partial"] is True
+    await hass.async_block_till_done()
+    msg = await asyncio.wait_for(websocket_client.receive_json(), 2)
+    assert msg["event"]["events"] == []
+
+    window_start = dt_util.utcnow()
+    hass.states.async_set("light.alpha", STATE_ON)
+    hass.states.async_set("light.alpha", STATE_OFF)
+    alpha_off_state: State = hass.states.get("light.alpha")
+    await hass.async_block_till_done()
+    alpha_entries = [
+        {
+            "entity_id": "light.alpha",
+            "state": "off",
+            "when": alpha_off_state.last_updated.timestamp(),
+        }
+    ]
+    msg = await asyncio.wait_for(websocket_client.receive_json(), 2)
+    assert msg["id"] == 7
+    assert msg["event"]["events"] == alpha_entries
+
+    # A stream which starts after the first one went live
+    # is answered from the buffer instead of the database
+    with patch.object(websocket_api, "_async_get_ws_stream_events") as get_events:
+        await websocket_client.send_json(
+            {
+                "id": 8,
+                "type": "logbook/event_stream",
+                "start_time": window_start.isoformat(),
+            }
+        )
+        msg = await asyncio.wait_for(websocket_client.receive_json(), 2)
+        assert msg["id"] == 8
+        assert msg["type"] == TYPE_RESULT
+        assert msg["success"]
+        msg = await asyncio.wait_for(websocket_client.receive_json(), 2)
+        assert msg["id"] == 8
+        assert msg["event"]["events"] == alpha_entries
+        assert msg["event"]["start_time"] == window_start.timestamp()
+        assert "partial" not in msg["event"]
+    assert not get_events.called
+
+    # The live events are humanified once for both streams
+    humanify = websocket_api.EventProcessor.humanify
+    with patch.object(
+        websocket_api.EventProcessor, "humanify", autospec=True, side_effect=humanify
+    ) as mock_humanify:
+        hass.states.async_set("light.beta", STATE_ON)
+        hass.states.async_set("light.beta", STATE_OFF)
+        beta_off_state: State = hass.states.get("light.beta")
+        await hass.async_block_till_done()
+        for msg_id in (7, 8):
+            msg = await asyncio.wait_for(websocket_client.receive_json(), 2)
+            assert msg["id"] == msg_id
+            assert msg["event"]["events"] == [
+                {
+                    "entity_id": "light.beta",
+                    "state": "off",
+                    "when": beta_off_state.last_updated.timestamp(),
+                }
+            ]
+    assert mock_humanify.call_count == 1
+
+    for msg_id in (9, 10):
+        await websocket_client.send_json(
+            {"id": msg_id, "type": "unsubscribe_events", "subscription": msg_id - 2}
+        )
+        msg = await asyncio.wait_for(websocket_client.receive_json(), 2)
+        assert msg["id"] == msg_id
+        assert msg["type"] == TYPE_RESULT
+        assert msg["success"]
+
+    # Check our listener got unsubscribed
+    assert hass.bus.async_listeners() == init_listeners
+
+
+@patch("homeassistant.components.logbook.websocket_api.EVENT_COALESCE_TIME", 0)
+async def test_live_streams_with_other_event_types_use_their_own_hub(
+    recorder_mock, hass, hass_ws_client
+):
+    """Test a live stream with new event types does not change the running ones."""
+    now = dt_util.utcnow()
+    await asyncio.gather(
+        *[
+            async_setup_component(hass, comp, {})
+            for comp in ("homeassistant", "logbook", "automation", "script")
+        ]
+    )
+    hass.states.async_set("binary_sensor.is_light", STATE_ON)
+    hass.states.async_set("binary_sensor.is_light", STATE_OFF)
+    await async_wait_recording_done(hass)
+
+    websocket_client = await hass_ws_client()
+    init_listeners = hass.bus.async_listeners()
+
+    async def _async_subscribe(msg_id: int) -> None:
+        await websocket_client.send_json(
+            {
+                "id": msg_id,
+                "type": "logbook/event_stream",
+                "start_time": now.isoformat(),
+            }
+        )
+        msg = await asyncio.wait_for(websocket_client.receive_json(), 2)
+        assert msg["id"] == msg_id
+        assert msg["success"]
+        msg = await asyncio.wait_for(websocket_client.receive_json(), 2)
+        assert msg["event"]["partial"] is True
+        await hass.async_block_till_done()
+        msg = await asyncio.wait_for(websocket_client.receive_json(), 2)
+        assert msg["event"]["events"] == []
+
+    await _async_subscribe(7)
+    hub = websocket_api.async_get_live_hub(
+        hass, websocket_api.async_determine_event_types(hass, None, None)
+    )
+
+    # A logbook platform adds an event type after the first stream started
+    await _async_mock_logbook_platform(hass)
+    with patch.object(
+        websocket_api,
+        "async_subscribe_events",
+        wraps=websocket_api.async_subscribe_events,
+    ) as subscribe_events:
+        await _async_subscribe(8)
+    assert subscribe_events.call_count == 1
+    assert (
+        websocket_api.async_get_live_hub(
+            hass, websocket_api.async_determine_event_types(hass, None, None)
+        )
+        is not hub
+    )
+
+    hass.bus.async_fire("mock_event", {"message": "is on fire"})
+    hass.states.async_set("light.alpha", STATE_ON)
+    hass.states.async_set("light.alpha", STATE_OFF)
+    await hass.async_block_till_done()
+    received = {}
+    for _ in range(2):
+        msg = await asyncio.wait_for(websocket_client.receive_json(), 2)
+        received[msg["id"]] = [
+            event.get("entity_id", event.get("name"))
+            for event in msg["event"]["events"]
+        ]
+    # The first stream keeps its event types
+    assert received == {7: ["light.alpha"], 8: ["device name", "light.alpha"]}
+
+    await websocket_client.send_json(
+        {"id": 9, "type": "unsubscribe_events", "subscription": 8}
+    )
+    msg = await asyncio.wait_for(websocket_client.receive_json(), 2)
+    assert msg["id"] == 9
+    assert msg["success"]
+
+    # The first stream is still live when the second one stops
+    hass.states.async_set("light.alpha", STATE_ON)
+    await hass.async_block_till_done()
+    msg = await asyncio.wait_for(websocket_client.receive_json(), 2)
+    assert msg["id"] == 7
+    assert [event["entity_id"] for event in msg["event"]["events"]] == ["light.alpha"]
+
+    await websocket_client.send_json(
+        {"id": 10, "type": "unsubscribe_events", "subscription": 7}
+    )
+    msg = await asyncio.wait_for(websocket_client.receive_json(), 2)
+    assert msg["id"] == 10
+    assert msg["success"]
+
+    # Check our listener got unsubscribed
+    assert hass.bus.async_listeners() == init_listeners
+    assert hass.data[websocket_api.LOGBOOK_LIVE_HUB] == {}
+
+
+async def test_live_subscriber_skips_events_sent_from_the_database(hass):
+    """Test events before going live are not sent again by a later batch."""
+    connection = Mock()
+    subscriber = websocket_api._LiveSubscriber(connection, 5, Mock(), 0.0)
+    subscriber.live_after = 10.0
+    subscriber.async_send([{"when": 9.0}], "template")
+    subscriber.async_go_live()
+    assert not connection.send_message.called
+
+    # The batch was humanified after going live but has an event
+    # which was in the database when the historical events were sent
+    subscriber.async_send([{"when": 10.0}, {"when": 11.0}], "template")
+    assert connection.send_message.call_count == 1
+    msg = json_loads(connection.send_message.call_args[0][0])
+    assert msg["id"] == 5
+    assert msg["event"]["events"] == [{"when": 11.0}]
+
+    subscriber.async_send([{"when": 12.0}], '{"id":"__IDEN__"}')
+    assert connection.send_message.call_args[0][0] == '{"id":5}'
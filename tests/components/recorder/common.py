@@ -14,7 +14,7 @@ from homeassistant import core as ha
 from homeassistant.components import recorder
 from homeassistant.components.recorder import get_instance, statistics
 from homeassistant.components.recorder.core import Recorder
-from homeassistant.components.recorder.db_schema import RecorderRuns
+from homeassistant.components.recorder.db_schema import RecorderRuns, States, StatesMeta
 from homeassistant.components.recorder.tasks import RecorderTask, StatisticsTask
 from homeassistant.core import HomeAssistant
 from homeassistant.util import dt as dt_util
@@ -137,3 +137,19 @@ def run_information_with_session(
         session.expunge(res)
         return cast(RecorderRuns, res)
     return res
+
+
+def convert_pending_states_to_meta(instance: Recorder, session: Session) -> None:
+    """Link the pending states of a session to states_meta like the recorder does."""
+    states_meta: dict[str, StatesMeta] = {}
+    with session.no_autoflush:
+        for state in [obj for obj in session.new if isinstance(obj, States)]:
+            if (entity_id := state.entity_id) is None or state.metadata_id:
+                continue
+            if entity_id not in states_meta:
+                states_meta[entity_id] = session.query(StatesMeta).filter(
+                    StatesMeta.entity_id == entity_id
+                ).first() or StatesMeta(entity_id=entity_id)
+            state.states_meta_rel = states_meta[entity_id]
+            if instance.states_meta_active:
+                state.entity_id = None
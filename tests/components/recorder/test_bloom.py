@@ -0,0 +1,33 @@
+"""The tests for the recorder bloom filter."""
+from homeassistant.components.recorder.bloom import (
+    MAX_BLOOM_FILTER_BITS_LOG2,
+    MIN_BLOOM_FILTER_BITS_LOG2,
+    HashBloomFilter,
+)
+from homeassistant.components.recorder.db_schema import StateAttributes
+
+
+def test_hash_bloom_filter():
+    """Test the bloom filter has no false negatives and few false positives."""
+    bloom = HashBloomFilter(bits_log2=16)
+    hashes = [
+        StateAttributes.hash_shared_attrs_bytes(f'{{"attr":{i}}}'.encode())
+        for i in range(2000)
+    ]
+    bloom.update(hashes[:1000])
+    bloom.update([None])
+
+    assert all(hash_ in bloom for hash_ in hashes[:1000])
+    assert sum(hash_ in bloom for hash_ in hashes[1000:]) < 10
+
+    bloom.add(hashes[1500])
+    assert hashes[1500] in bloom
+
+
+def test_hash_bloom_filter_for_count():
+    """Test the bloom filter is sized for the number of hashes."""
+    assert HashBloomFilter.for_count(0).bits_log2 == MIN_BLOOM_FILTER_BITS_LOG2
+    assert HashBloomFilter.for_count(4096).bits_log2 == MIN_BLOOM_FILTER_BITS_LOG2
+    assert HashBloomFilter.for_count(4097).bits_log2 == 17
+    assert HashBloomFilter.for_count(500000).bits_log2 == 23
+    assert HashBloomFilter.for_count(2**30).bits_log2 == MAX_BLOOM_FILTER_BITS_LOG2
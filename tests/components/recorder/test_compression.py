@@ -0,0 +1,158 @@
+"""The tests for the recorder attributes compression."""
+import os
+from unittest.mock import patch
+
+import pytest
+
+from homeassistant.components.recorder import history, migration
+from homeassistant.components.recorder.compression import (
+    DICTIONARY_MAX_SIZE,
+    add_dictionary,
+    compress_attributes,
+    decompress_attributes,
+    should_compress,
+    train_dictionary,
+)
+from homeassistant.components.recorder.db_schema import StateAttributes
+from homeassistant.components.recorder.tasks import CompressAttributesTask
+from homeassistant.components.recorder.util import session_scope
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.json import json_bytes
+import homeassistant.util.dt as dt_util
+
+from .common import async_wait_recording_done
+
+from tests.common import SetupRecorderInstanceT
+
+
+def _forecast_attributes(temperature: int) -> dict:
+    """Return the attributes of a weather entity with a forecast."""
+    return {
+        "temperature": temperature,
+        "temperature_unit": "°C",
+        "forecast": [
+            {
+                "datetime": f"2023-03-0{day}T12:00:00+00:00",
+                "condition": "sunny",
+                "temperature": temperature + day,
+                "precipitation": 0.0,
+            }
+            for day in range(1, 6)
+        ],
+        "friendly_name": "Home",
+    }
+
+
+def test_should_compress():
+    """Test only large attributes not matched with sql are compressed."""
+    assert not should_compress(b'{"friendly_name":"Home"}')
+    assert should_compress(json_bytes(_forecast_attributes(20)))
+    assert not should_compress(
+        json_bytes({**_forecast_attributes(20), "unit_of_measurement": "W"})
+    )
+    assert not should_compress(
+        json_bytes({**_forecast_attributes(20), "icon": "mdi:weather-sunny"})
+    )
+
+
+def test_compress_attributes_with_trained_dictionary():
+    """Test attributes compressed with a trained dictionary can be decompressed."""
+    samples = [json_bytes(_forecast_attributes(temp)) for temp in range(100)]
+    zdict = train_dictionary(samples)
+    assert 0 < len(zdict) <= DICTIONARY_MAX_SIZE
+    assert b'"condition":"sunny"' in zdict
+    # The temperatures are only used by one sample each
+    assert b'{"temperature":' not in zdict
+
+    shared_attrs_bytes = json_bytes(_forecast_attributes(200))
+    shared_attrs_bin = compress_attributes(shared_attrs_bytes, zdict)
+    assert shared_attrs_bin is not None
+    assert len(shared_attrs_bin) < len(shared_attrs_bytes) / 4
+    # The dictionary makes the compressed attributes smaller
+    assert len(shared_attrs_bin) < len(compress_attributes(shared_attrs_bytes, b"x"))
+
+    add_dictionary(1000, zdict)
+    assert decompress_attributes(shared_attrs_bin, 1000) == shared_attrs_bytes
+    with pytest.raises(ValueError):
+        decompress_attributes(shared_attrs_bin, 1001)
+
+    # Attributes which do not get smaller are not compressed
+    assert compress_attributes(os.urandom(512), zdict) is None
+
+
+async def test_compress_state_attributes(
+    async_setup_recorder_instance: SetupRecorderInstanceT, hass: HomeAssistant
+) -> None:
+    """Test the shared attributes are compressed in the background."""
+    with patch.object(migration, "DICTIONARY_MIN_TRAINING_SAMPLES", 5):
+        instance = await async_setup_recorder_instance(
+            hass, {"compress_attributes": True}
+        )
+        start = dt_util.utcnow()
+        for temperature in range(10):
+            hass.states.async_set(
+                f"weather.home_{temperature}",
+                "sunny",
+                _forecast_attributes(temperature),
+            )
+        sensor_attributes = {
+            "unit_of_measurement": "W",
+            "friendly_name": "Power " * 50,
+        }
+        hass.states.async_set("sensor.power", "5", sensor_attributes)
+        await async_wait_recording_done(hass)
+        # There were no attributes to train a dictionary from at startup
+        assert instance.attributes_dictionary is None
+
+        instance.queue_task(CompressAttributesTask())
+        await async_wait_recording_done(hass)
+
+    assert instance.attributes_dictionary is not None
+    dictionary_id = instance.attributes_dictionary[0]
+
+    def _get_state_attributes() -> list[StateAttributes]:
+        with session_scope(hass=hass) as session:
+            attributes = session.query(StateAttributes).all()
+            session.expunge_all()
+            return attributes
+
+    state_attributes = await instance.async_add_executor_job(_get_state_attributes)
+    assert len(state_attributes) == 11
+    compressed = [attrs for attrs in state_attributes if attrs.shared_attrs is None]
+    assert len(compressed) == 10
+    for attrs in compressed:
+        assert attrs.dictionary_id == dictionary_id
+        assert attrs.to_native()["forecast"][0]["condition"] == "sunny"
+    # Attributes with a unit of measurement are matched by the logbook with sql
+    assert [attrs.to_native() for attrs in state_attributes if attrs.shared_attrs] == [
+        sensor_attributes
+    ]
+
+    # Attributes are decompressed when the states are read
+    states = await instance.async_add_executor_job(
+        history.get_significant_states, hass, start
+    )
+    for temperature in range(10):
+        (state,) = states[f"weather.home_{temperature}"]
+        assert state.attributes == _forecast_attributes(temperature)
+    assert states["sensor.power"][0].attributes == sensor_attributes
+
+    # Compressed attributes are matched when they are looked up in the database
+    instance._state_attributes_ids.clear()
+    hass.states.async_set("weather.home_3", "cloudy", _forecast_attributes(3))
+    # New attributes are compressed when they are written
+    hass.states.async_set("weather.home_4", "cloudy", _forecast_attributes(40))
+    await async_wait_recording_done(hass)
+
+    state_attributes = await instance.async_add_executor_job(_get_state_attributes)
+    assert len(state_attributes) == 12
+    assert all(
+        attrs.shared_attrs is None
+        for attrs in state_attributes
+        if attrs.to_native() != sensor_attributes
+    )
+    states = await instance.async_add_executor_job(
+        history.get_significant_states, hass, start
+    )
+    assert states["weather.home_3"][-1].attributes == _forecast_attributes(3)
+    assert states["weather.home_4"][-1].attributes == _forecast_attributes(40)
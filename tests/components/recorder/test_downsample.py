@@ -0,0 +1,67 @@
+"""The tests for downsampling recorder history."""
+import math
+
+from homeassistant.components.recorder.downsample import downsample
+
+
+def _downsample(points, start, end, max_points):
+    return list(
+        downsample(
+            points,
+            lambda point: point[0],
+            lambda point: point[1],
+            start,
+            end,
+            max_points,
+        )
+    )
+
+
+def test_downsample_numeric_keeps_first_last_and_bounds_points():
+    """Test numeric states are reduced to about max_points."""
+    points = [(float(idx), str(math.sin(idx / 50))) for idx in range(10000)]
+
+    result = _downsample(points, 0, 10000, 100)
+
+    assert result[0] == points[0]
+    assert result[-1] == points[-1]
+    assert len(result) <= 102
+    assert [point[0] for point in result] == sorted(point[0] for point in result)
+
+
+def test_downsample_keeps_extremes():
+    """Test the selected points keep the peaks of the signal."""
+    points = [(float(idx), "0") for idx in range(1000)]
+    points[505] = (505.0, "100")
+    points[707] = (707.0, "-100")
+
+    result = _downsample(points, 0, 1000, 10)
+
+    assert (505.0, "100") in result
+    assert (707.0, "-100") in result
+
+
+def test_downsample_compresses_non_numeric_runs():
+    """Test runs of the same non-numeric state are compressed."""
+    points = [(1, "on"), (2, "on"), (3, "off"), (4, "off"), (5, "on")]
+
+    assert _downsample(points, 0, 10, 5) == [(1, "on"), (3, "off"), (5, "on")]
+
+
+def test_downsample_mixed_states():
+    """Test non-numeric states interrupt numeric series and are kept."""
+    points = [
+        *((float(idx), str(idx)) for idx in range(100)),
+        (100.0, "unavailable"),
+        (101.0, "unavailable"),
+        *((float(idx), str(idx)) for idx in range(102, 200)),
+    ]
+
+    result = _downsample(points, 0, 200, 10)
+
+    assert (99.0, "99") in result
+    assert (100.0, "unavailable") in result
+    assert (101.0, "unavailable") not in result
+    assert (102.0, "102") in result
+    assert result[-1] == (199.0, "199")
+    assert len(result) < 30
@@ -0,0 +1,75 @@
+"""Test the database executor."""
+from concurrent.futures.thread import _WorkItem
+from functools import partial
+import queue
+import threading
+
+import pytest
+
+from homeassistant.components.recorder.executor import (
+    DBInterruptibleThreadPoolExecutor,
+    FairWorkQueue,
+)
+
+
+def _job_for_module(module: str):
+    """Return a job that appears to be submitted by a module."""
+
+    def _job():
+        return module
+
+    _job.__module__ = module
+    return _job
+
+
+def test_fair_work_queue_takes_turns_between_modules():
+    """Test a burst of jobs from one module does not starve another module."""
+    work_queue = FairWorkQueue()
+    history_job = _job_for_module("homeassistant.components.history")
+    logbook_job = partial(_job_for_module("homeassistant.components.logbook"))
+
+    for _ in range(3):
+        work_queue.put(_WorkItem(None, history_job, (), {}))
+    work_queue.put(_WorkItem(None, logbook_job, (), {}))
+    work_queue.put(None)
+
+    assert [
+        work_item.fn if work_item else None
+        for work_item in (work_queue.get() for _ in range(5))
+    ] == [history_job, logbook_job, None, history_job, history_job]
+
+    with pytest.raises(queue.Empty):
+        work_queue.get_nowait()
+
+
+def test_fair_work_queue_keeps_order_within_module():
+    """Test jobs from the same module run in the order they were submitted."""
+    work_queue = FairWorkQueue()
+    job = _job_for_module("homeassistant.components.history")
+    work_items = [_WorkItem(None, job, (idx,), {}) for idx in range(3)]
+
+    for work_item in work_items:
+        work_queue.put(work_item)
+
+    assert [work_queue.get() for _ in range(3)] == work_items
+
+
+def test_executor_runs_jobs_and_shutdown_hook():
+    """Test the executor runs jobs from the fair queue and calls the hook."""
+    hook_called = threading.Event()
+    executor = DBInterruptibleThreadPoolExecutor(
+        max_workers=2, shutdown_hook=hook_called.set
+    )
+
+    futures = [
+        executor.submit(_job_for_module(f"module_{idx % 2}")) for idx in range(4)
+    ]
+    assert sorted(future.result(timeout=5) for future in futures) == [
+        "module_0",
+        "module_0",
+        "module_1",
+        "module_1",
+    ]
+
+    executor.shutdown()
+    assert hook_called.wait(timeout=5)
@@ -72,6 +72,7 @@ def _add_db_entries(
                     event_data="{}",
                     origin="LOCAL",
                     time_fired=point,
+                    time_fired_ts=dt_util.utc_to_timestamp(point),
                 )
             )
             session.add(
@@ -80,7 +81,9 @@ def _add_db_entries(
                     state="on",
                     attributes='{"name":"the light"}',
                     last_changed=None,
+                    last_changed_ts=None,
                     last_updated=point,
+                    last_updated_ts=dt_util.utc_to_timestamp(point),
                     event_id=1001 + idx,
                     attributes_id=1002 + idx,
                 )
@@ -670,6 +673,8 @@ async def test_state_changes_during_period_query_during_migration_to_schema_25(
         return
 
     instance = await async_setup_recorder_instance(hass, {})
+    # Databases older than schema 31 still have the entity_id in the states table
+    instance.states_meta_active = False
 
     start = dt_util.utcnow()
     point = start + timedelta(seconds=1)
@@ -725,6 +730,7 @@ async def test_get_states_query_during_migration_to_schema_25(
         return
 
     instance = await async_setup_recorder_instance(hass, {})
+    instance.states_meta_active = False
 
     start = dt_util.utcnow()
     point = start + timedelta(seconds=1)
@@ -776,6 +782,7 @@ async def test_get_states_query_during_migration_to_schema_25_multiple_entities(
         return
 
     instance = await async_setup_recorder_instance(hass, {})
+    instance.states_meta_active = False
 
     start = dt_util.utcnow()
     point = start + timedelta(seconds=1)
@@ -819,6 +826,57 @@ async def test_get_states_query_during_migration_to_schema_25_multiple_entities(
         assert hist[1].attributes == {"name": "the light"}
 
 
+async def test_history_query_during_migration_to_schema_33(
+    async_setup_recorder_instance: SetupRecorderInstanceT,
+    hass: ha.HomeAssistant,
+):
+    """Test we can query states which only have datetime timestamps."""
+    instance = await async_setup_recorder_instance(hass, {})
+    instance.states_meta_active = False
+
+    start = dt_util.utcnow()
+    point = start + timedelta(seconds=1)
+    end = point + timedelta(seconds=1)
+    entity_id = "light.test"
+    await recorder.get_instance(hass).async_add_executor_job(
+        _add_db_entries, hass, point, [entity_id]
+    )
+
+    with instance.engine.connect() as conn:
+        conn.execute(text("update states set last_updated_ts=NULL;"))
+        conn.commit()
+
+    with patch.object(instance, "schema_version", 32):
+        for no_attributes in (True, False):
+            hist = history.state_changes_during_period(
+                hass,
+                start,
+                end,
+                entity_id,
+                no_attributes,
+                include_start_time_state=False,
+            )
+            assert hist[entity_id][0].last_updated == point
+
+            hist = history.get_significant_states(
+                hass,
+                start,
+                end,
+                [entity_id],
+                no_attributes=no_attributes,
+                significant_changes_only=False,
+            )
+            assert hist[entity_id][0].last_updated == point
+
+            states = await _async_get_states(
+                hass, end, [entity_id], no_attributes=no_attributes
+            )
+            assert states[0].last_updated == point
+
+        hist = history.get_last_state_changes(hass, 1, entity_id)
+        assert hist[entity_id][0].last_updated == point
+
+
 async def test_get_full_significant_states_handles_empty_last_changed(
     async_setup_recorder_instance: SetupRecorderInstanceT,
     hass: ha.HomeAssistant,
@@ -893,13 +951,17 @@ async def test_get_full_significant_states_handles_empty_last_changed(
     db_sensor_one_states = await recorder.get_instance(hass).async_add_executor_job(
         _fetch_db_states
     )
-    assert db_sensor_one_states[0].last_changed is None
+    assert db_sensor_one_states[0].last_changed_ts is None
+    assert (
+        dt_util.utc_from_timestamp(db_sensor_one_states[1].last_changed_ts)
+        == state0.last_changed
+    )
+    assert db_sensor_one_states[0].last_updated_ts is not None
+    assert db_sensor_one_states[1].last_updated_ts is not None
     assert (
-        process_timestamp(db_sensor_one_states[1].last_changed) == state0.last_changed
+        db_sensor_one_states[0].last_updated_ts
+        != db_sensor_one_states[1].last_updated_ts
     )
-    assert db_sensor_one_states[0].last_updated is not None
-    assert db_sensor_one_states[1].last_updated is not None
-    assert db_sensor_one_states[0].last_updated != db_sensor_one_states[1].last_updated
 
 
 def test_state_changes_during_period_multiple_entities_single_test(hass_recorder):
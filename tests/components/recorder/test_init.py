@@ -7,7 +7,7 @@ from datetime import datetime, timedelta
 import sqlite3
 import threading
 from typing import cast
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, PropertyMock, patch
 
 import pytest
 from sqlalchemy.exc import DatabaseError, OperationalError, SQLAlchemyError
@@ -24,17 +24,21 @@ from homeassistant.components.recorder import (
     DOMAIN,
     SQLITE_URL_PREFIX,
     Recorder,
+    bulk_insert,
     get_instance,
     pool,
 )
+from homeassistant.components.recorder.bloom import MIN_BLOOM_FILTER_BITS_LOG2
 from homeassistant.components.recorder.const import KEEPALIVE_TIME
 from homeassistant.components.recorder.db_schema import (
     SCHEMA_VERSION,
+    TABLE_STATE_ATTRIBUTES,
     EventData,
     Events,
     RecorderRuns,
     StateAttributes,
     States,
+    StatesMeta,
     StatisticsRuns,
 )
 from homeassistant.components.recorder.models import process_timestamp
@@ -44,6 +48,7 @@ from homeassistant.components.recorder.services import (
     SERVICE_PURGE,
     SERVICE_PURGE_ENTITIES,
 )
+from homeassistant.components.recorder.tasks import SharedHashesTask
 from homeassistant.components.recorder.util import session_scope
 from homeassistant.const import (
     EVENT_HOMEASSISTANT_FINAL_WRITE,
@@ -85,9 +90,11 @@ def _default_recorder(hass):
         uri="sqlite://",
         db_max_retries=10,
         db_retry_wait=3,
+        db_max_readers=4,
         entity_filter=CONFIG_SCHEMA({DOMAIN: {}}),
         exclude_t=[],
         exclude_attributes_by_domain={},
+        compress_attributes=False,
     )
 
 
@@ -279,17 +286,14 @@ def test_saving_state_with_exception(hass, hass_recorder, caplog):
     state = "restoring_from_db"
     attributes = {"test_attr": 5, "test_attr_10": "nice"}
 
-    def _throw_if_state_in_session(*args, **kwargs):
-        for obj in get_instance(hass).event_session:
-            if isinstance(obj, States):
-                raise OperationalError(
-                    "insert the state", "fake params", "forced to fail"
-                )
+    def _throw_if_state_pending(*args, **kwargs):
+        if get_instance(hass)._pending_states:
+            raise OperationalError("insert the state", "fake params", "forced to fail")
 
     with patch("time.sleep"), patch.object(
         get_instance(hass).event_session,
         "flush",
-        side_effect=_throw_if_state_in_session,
+        side_effect=_throw_if_state_pending,
     ):
         hass.states.set(entity_id, "fail", attributes)
         wait_recording_done(hass)
@@ -317,17 +321,14 @@ def test_saving_state_with_sqlalchemy_exception(hass, hass_recorder, caplog):
     state = "restoring_from_db"
     attributes = {"test_attr": 5, "test_attr_10": "nice"}
 
-    def _throw_if_state_in_session(*args, **kwargs):
-        for obj in get_instance(hass).event_session:
-            if isinstance(obj, States):
-                raise SQLAlchemyError(
-                    "insert the state", "fake params", "forced to fail"
-                )
+    def _throw_if_state_pending(*args, **kwargs):
+        if get_instance(hass)._pending_states:
+            raise SQLAlchemyError("insert the state", "fake params", "forced to fail")
 
     with patch("time.sleep"), patch.object(
         get_instance(hass).event_session,
         "flush",
-        side_effect=_throw_if_state_in_session,
+        side_effect=_throw_if_state_pending,
     ):
         hass.states.set(entity_id, "fail", attributes)
         wait_recording_done(hass)
@@ -642,11 +643,11 @@ def test_saving_state_and_removing_entity(hass, hass_recorder):
     with session_scope(hass=hass) as session:
         states = list(session.query(States))
         assert len(states) == 3
-        assert states[0].entity_id == entity_id
+        assert states[0].states_meta_rel.entity_id == entity_id
         assert states[0].state == STATE_LOCKED
-        assert states[1].entity_id == entity_id
+        assert states[1].states_meta_rel.entity_id == entity_id
         assert states[1].state == STATE_UNLOCKED
-        assert states[2].entity_id == entity_id
+        assert states[2].states_meta_rel.entity_id == entity_id
         assert states[2].state is None
 
 
@@ -714,6 +715,7 @@ async def test_defaults_set(hass):
     assert recorder_config["auto_purge"]
     assert recorder_config["auto_repack"]
     assert recorder_config["purge_keep_days"] == 10
+    assert recorder_config["db_max_readers"] == 4
 
 
 def run_tasks_at_time(hass, test_time):
@@ -1061,10 +1063,10 @@ def test_saving_sets_old_state(hass_recorder):
         states = list(session.query(States))
         assert len(states) == 4
 
-        assert states[0].entity_id == "test.one"
-        assert states[1].entity_id == "test.two"
-        assert states[2].entity_id == "test.one"
-        assert states[3].entity_id == "test.two"
+        assert states[0].states_meta_rel.entity_id == "test.one"
+        assert states[1].states_meta_rel.entity_id == "test.two"
+        assert states[2].states_meta_rel.entity_id == "test.one"
+        assert states[3].states_meta_rel.entity_id == "test.two"
 
         assert states[0].old_state_id is None
         assert states[1].old_state_id is None
@@ -1072,6 +1074,86 @@ def test_saving_sets_old_state(hass_recorder):
         assert states[3].old_state_id == states[1].state_id
 
 
+def test_saving_sets_old_state_inside_commit_interval(hass_recorder):
+    """Test saving sets old state for states written in the same commit."""
+    hass = hass_recorder()
+
+    hass.states.set("test.one", "on", {})
+    wait_recording_done(hass)
+    hass.states.set("test.one", "off", {})
+    hass.states.set("test.two", "on", {})
+    hass.states.set("test.one", "on", {})
+    hass.states.remove("test.two")
+    hass.states.set("test.two", "off", {})
+    hass.states.set("test.one", "off", {})
+    wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        states = list(session.query(States).order_by(States.state_id))
+        assert len(states) == 7
+
+        assert [state.states_meta_rel.entity_id for state in states] == [
+            "test.one",
+            "test.one",
+            "test.two",
+            "test.one",
+            "test.two",
+            "test.two",
+            "test.one",
+        ]
+        assert [state.state for state in states] == [
+            "on",
+            "off",
+            "on",
+            "on",
+            None,
+            "off",
+            "off",
+        ]
+
+        assert states[0].old_state_id is None
+        assert states[1].old_state_id == states[0].state_id
+        assert states[2].old_state_id is None
+        assert states[3].old_state_id == states[1].state_id
+        assert states[4].old_state_id == states[2].state_id
+        assert states[5].old_state_id is None
+        assert states[6].old_state_id == states[3].state_id
+
+
+def test_saving_states_in_batches_inside_commit_interval(hass_recorder):
+    """Test states of a commit are written with multi-VALUES inserts on SQLite."""
+    hass = hass_recorder({"commit_interval": 30})
+    entity_ids = [f"test.entity_{idx}" for idx in range(100)]
+    assert len(entity_ids) > bulk_insert.SQLITE_MAX_STATES_TO_INSERT
+
+    with patch.object(
+        bulk_insert,
+        "_insert_states_consecutive",
+        wraps=bulk_insert._insert_states_consecutive,
+    ) as insert_states_mock:
+        for state in ("on", "off"):
+            for entity_id in entity_ids:
+                hass.states.set(entity_id, state, {})
+        wait_recording_done(hass)
+
+    # One call per generation, each split into two inserts
+    assert insert_states_mock.call_count == 2
+
+    with session_scope(hass=hass) as session:
+        states = list(
+            session.query(States.state_id, States.old_state_id, States.state)
+            .join(StatesMeta, States.metadata_id == StatesMeta.metadata_id)
+            .filter(StatesMeta.entity_id.in_(entity_ids))
+            .order_by(States.state_id)
+        )
+        assert len(states) == 200
+        assert [state.state for state in states] == ["on"] * 100 + ["off"] * 100
+        assert all(state.old_state_id is None for state in states[:100])
+        assert [state.old_state_id for state in states[100:]] == [
+            state.state_id for state in states[:100]
+        ]
+
+
 def test_saving_state_with_serializable_data(hass_recorder, caplog):
     """Test saving data that cannot be serialized does not crash."""
     hass = hass_recorder()
@@ -1088,8 +1170,8 @@ def test_saving_state_with_serializable_data(hass_recorder, caplog):
         states = list(session.query(States))
         assert len(states) == 2
 
-        assert states[0].entity_id == "test.two"
-        assert states[1].entity_id == "test.two"
+        assert states[0].states_meta_rel.entity_id == "test.two"
+        assert states[1].states_meta_rel.entity_id == "test.two"
         assert states[0].old_state_id is None
         assert states[1].old_state_id == states[0].state_id
 
@@ -1450,6 +1532,63 @@ async def test_database_lock_and_overflow(
         assert not instance.unlock_database()
 
 
+def test_commit_interval_adapts_to_backlog(hass_recorder):
+    """Test the commit interval grows with the backlog and shrinks when idle."""
+    hass = hass_recorder({CONF_COMMIT_INTERVAL: 1})
+    instance = get_instance(hass)
+
+    hass.states.set("test.one", "on", {})
+    wait_recording_done(hass)
+    assert instance.metrics.rows_committed >= 1
+    assert instance.metrics.commit_interval == 1
+
+    with patch.object(
+        Recorder,
+        "backlog",
+        PropertyMock(return_value=recorder.core.COMMIT_INTERVAL_BACKLOG_THRESHOLD + 1),
+    ):
+        instance._update_commit_metrics(0, 0, 0)
+        assert instance.metrics.commit_interval == 2
+        instance._update_commit_metrics(0, 0, 0)
+        instance._update_commit_metrics(0, 0, 0)
+        assert instance.metrics.commit_interval == 5
+
+    with patch.object(Recorder, "backlog", PropertyMock(return_value=0)):
+        instance._update_commit_metrics(0, 0, 0)
+        assert instance.metrics.commit_interval == 2.5
+        instance._update_commit_metrics(0, 0, 0)
+        instance._update_commit_metrics(0, 0, 0)
+        assert instance.metrics.commit_interval == 1
+
+
+async def test_dropped_events_are_counted(
+    async_setup_recorder_instance: SetupRecorderInstanceT,
+    hass: HomeAssistant,
+):
+    """Test events are counted once the queue overflowed."""
+    instance = await async_setup_recorder_instance(hass)
+    await async_wait_recording_done(hass)
+
+    with patch.object(recorder.core, "MAX_QUEUE_BACKLOG", -1):
+        instance._async_check_queue()
+    assert not instance.recording
+
+    hass.bus.async_fire("test_event")
+    hass.states.async_set("test.one", "on")
+    await hass.async_block_till_done()
+    assert instance.metrics.dropped_events == 2
+
+    # The dropped events are no longer counted once recording resumes
+    listeners = hass.bus.async_listeners()[MATCH_ALL]
+    instance.async_initialize()
+    assert instance.recording
+    assert hass.bus.async_listeners()[MATCH_ALL] == listeners
+
+    hass.bus.async_fire("test_event")
+    await async_wait_recording_done(hass)
+    assert instance.metrics.dropped_events == 2
+
+
 async def test_database_lock_timeout(recorder_mock, hass, recorder_db_url):
     """Test locking database timeout when recorder stopped."""
     if recorder_db_url.startswith("mysql://"):
@@ -1588,7 +1727,8 @@ def test_deduplication_state_attributes_inside_commit_interval(hass_recorder, ca
     with session_scope(hass=hass) as session:
         states = list(
             session.query(States)
-            .filter(States.entity_id == entity_id)
+            .join(StatesMeta, States.metadata_id == StatesMeta.metadata_id)
+            .filter(StatesMeta.entity_id == entity_id)
             .outerjoin(
                 StateAttributes, (States.attributes_id == StateAttributes.attributes_id)
             )
@@ -1599,6 +1739,44 @@ def test_deduplication_state_attributes_inside_commit_interval(hass_recorder, ca
         assert first_attributes_id == last_attributes_id
 
 
+@patch("homeassistant.components.recorder.core.MAX_HASHES_TO_LOAD", 2)
+@patch("homeassistant.components.recorder.queries.MAX_HASHES_TO_LOAD", 2)
+def test_shared_hashes_are_loaded_in_batches(hass_recorder):
+    """Test the hashes of the shared attributes are loaded in the background."""
+    hass = hass_recorder()
+    instance = recorder.get_instance(hass)
+
+    for attr_id in range(5):
+        hass.states.set("test.recorder", "on", {"test_attr": attr_id})
+    wait_recording_done(hass)
+
+    # The shared attributes are looked up in the database
+    # until all hashes are loaded into the bloom filter
+    instance._state_attributes_hashes = None
+    load_shared_hashes = instance._load_shared_hashes
+    hashes_before_batches = []
+
+    def _load_shared_hashes(table, *args):
+        if table == TABLE_STATE_ATTRIBUTES:
+            hashes_before_batches.append(instance._state_attributes_hashes)
+        return load_shared_hashes(table, *args)
+
+    with patch.object(instance, "_load_shared_hashes", side_effect=_load_shared_hashes):
+        instance.queue_task(SharedHashesTask(TABLE_STATE_ATTRIBUTES))
+        for _ in range(3):
+            wait_recording_done(hass)
+
+    # Five shared attributes are loaded in three batches
+    assert hashes_before_batches == [None, None, None]
+    hashes = instance._state_attributes_hashes
+    assert hashes is not None
+    assert hashes.bits_log2 == MIN_BLOOM_FILTER_BITS_LOG2
+    with session_scope(hass=hass) as session:
+        shared_attrs = list(session.query(StateAttributes))
+        assert len(shared_attrs) == 5
+        assert all(attributes.hash in hashes for attributes in shared_attrs)
+
+
 async def test_async_block_till_done(async_setup_recorder_instance, hass):
     """Test we can block until recordering is done."""
     instance = await async_setup_recorder_instance(hass)
@@ -1612,7 +1790,11 @@ async def test_async_block_till_done(async_setup_recorder_instance, hass):
 
     def _fetch_states():
         with session_scope(hass=hass) as session:
-            return list(session.query(States).filter(States.entity_id == entity_id))
+            return list(
+                session.query(States)
+                .join(StatesMeta, States.metadata_id == StatesMeta.metadata_id)
+                .filter(StatesMeta.entity_id == entity_id)
+            )
 
     await async_block_recorder(hass, 0.1)
     await instance.async_block_till_done()
@@ -1764,7 +1946,8 @@ async def test_connect_args_priority(hass, config_url):
             return MockDialect
 
     with patch("sqlalchemy.engine.url.URL._get_entrypoint", MockEntrypoint), patch(
-        "sqlalchemy.engine.create.util.get_cls_kwargs", return_value=["echo"]
+        "sqlalchemy.engine.create.util.get_cls_kwargs",
+        return_value=["echo", "pool_size"],
     ):
         await async_setup_component(
             hass,
@@ -23,14 +23,23 @@ from homeassistant.components import persistent_notification as pn, recorder
 from homeassistant.components.recorder import db_schema, migration
 from homeassistant.components.recorder.db_schema import (
     SCHEMA_VERSION,
+    Events,
     RecorderRuns,
     States,
+    StatesMeta,
 )
+from homeassistant.components.recorder.models import process_timestamp
+from homeassistant.components.recorder.tasks import EntityIDMigrationTask
 from homeassistant.components.recorder.util import session_scope
 from homeassistant.helpers import recorder as recorder_helper
 import homeassistant.util.dt as dt_util
+from homeassistant.util.ulid import ulid_to_bytes
 
-from .common import async_wait_recording_done, create_engine_test
+from .common import (
+    async_recorder_block_till_done,
+    async_wait_recording_done,
+    create_engine_test,
+)
 
 from tests.common import async_fire_time_changed
 
@@ -41,7 +50,9 @@ def _get_native_states(hass, entity_id):
     with session_scope(hass=hass) as session:
         return [
             state.to_native()
-            for state in session.query(States).filter(States.entity_id == entity_id)
+            for state in session.query(States)
+            .join(StatesMeta, States.metadata_id == StatesMeta.metadata_id)
+            .filter(StatesMeta.entity_id == entity_id)
         ]
 
 
@@ -410,6 +421,29 @@ def test_forgiving_add_column():
         )
 
 
+def test_mark_shared_data_used():
+    """Test last_used_ts of the shared data is set in batches."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with Session(engine) as session:
+        session.execute(
+            text("CREATE TABLE event_data (data_id INTEGER, last_used_ts FLOAT)")
+        )
+        for data_id in (1, 2, 3, 5, 8):
+            session.execute(
+                text("INSERT INTO event_data (data_id) VALUES (:data_id)"),
+                {"data_id": data_id},
+            )
+        instance = Mock()
+        instance.get_session = Mock(return_value=session)
+        with patch.object(migration, "MAX_ROWS_TO_MIGRATE", 2):
+            migration._mark_shared_data_used(
+                instance.get_session, "event_data", "data_id", 1234.5
+            )
+        assert session.execute(
+            text("SELECT data_id, last_used_ts FROM event_data ORDER BY data_id")
+        ).all() == [(1, 1234.5), (2, 1234.5), (3, 1234.5), (5, 1234.5), (8, 1234.5)]
+
+
 def test_forgiving_add_index():
     """Test that add index will continue if index exists."""
     engine = create_engine("sqlite://", poolclass=StaticPool)
@@ -478,3 +512,262 @@ def test_raise_if_exception_missing_empty_cause_str():
 
     with pytest.raises(ProgrammingError):
         migration.raise_if_exception_missing_str(programming_exc, ["not present"])
+
+
+async def test_migrate_entity_ids(async_setup_recorder_instance, hass):
+    """Test entity_ids of existing states are migrated to the states_meta table."""
+    instance = await async_setup_recorder_instance(hass)
+    await async_wait_recording_done(hass)
+    # Simulate a database with states written before schema 31
+    instance.states_meta_active = False
+    now = dt_util.utcnow()
+
+    def _insert_states():
+        with session_scope(hass=hass) as session:
+            session.add_all(
+                (
+                    States(
+                        entity_id="sensor.one",
+                        state="1",
+                        last_updated_ts=dt_util.utc_to_timestamp(now),
+                    ),
+                    States(
+                        entity_id="sensor.one",
+                        state="2",
+                        last_updated_ts=dt_util.utc_to_timestamp(now),
+                    ),
+                    States(
+                        entity_id="sensor.two",
+                        state="3",
+                        last_updated_ts=dt_util.utc_to_timestamp(now),
+                    ),
+                )
+            )
+
+    await instance.async_add_executor_job(_insert_states)
+
+    instance.queue_task(EntityIDMigrationTask())
+    await async_recorder_block_till_done(hass)
+    assert instance.states_meta_active is True
+
+    def _fetch_migrated_states():
+        with session_scope(hass=hass) as session:
+            return [
+                (state.entity_id, state.states_meta_rel.entity_id, state.state)
+                for state in session.query(States).order_by(States.state_id)
+            ]
+
+    assert await instance.async_add_executor_job(_fetch_migrated_states) == [
+        ("sensor.one", "sensor.one", "1"),
+        ("sensor.one", "sensor.one", "2"),
+        ("sensor.two", "sensor.two", "3"),
+    ]
+
+    hass.states.async_set("sensor.two", "4")
+    await async_wait_recording_done(hass)
+
+    def _fetch_states_meta():
+        with session_scope(hass=hass) as session:
+            return {
+                states_meta.entity_id: states_meta.metadata_id
+                for states_meta in session.query(StatesMeta)
+            }
+
+    states_meta = await instance.async_add_executor_job(_fetch_states_meta)
+    assert set(states_meta) == {"sensor.one", "sensor.two"}
+
+    def _fetch_new_state():
+        with session_scope(hass=hass) as session:
+            state = session.query(States).filter(States.state == "4").one()
+            return state.entity_id, state.metadata_id
+
+    assert await instance.async_add_executor_job(_fetch_new_state) == (
+        None,
+        states_meta["sensor.two"],
+    )
+
+
+async def test_migrate_context_ids(async_setup_recorder_instance, hass):
+    """Test string context ids are converted to bytes in batches in the background."""
+    instance = await async_setup_recorder_instance(hass)
+    await async_wait_recording_done(hass)
+    now = dt_util.utcnow()
+
+    def _insert_rows():
+        with session_scope(hass=hass) as session:
+            session.add_all(
+                (
+                    Events(
+                        event_type="ulid_context",
+                        origin_idx=0,
+                        time_fired_ts=dt_util.utc_to_timestamp(now),
+                        context_id="01GTDGKBCH00GW0X476W5TVAAA",
+                        context_user_id="b400facee45711eaa9308bfd3d19e474",
+                        context_parent_id="01GTDGKBCH00GW0X476W5TVBBB",
+                    ),
+                    Events(
+                        event_type="uuid_context",
+                        origin_idx=0,
+                        time_fired_ts=dt_util.utc_to_timestamp(now),
+                        context_id="ac5bd62de45711eaaeb351041eec8dd9",
+                    ),
+                    Events(
+                        event_type="invalid_context",
+                        origin_idx=0,
+                        time_fired_ts=dt_util.utc_to_timestamp(now),
+                        context_id="invalid",
+                    ),
+                    States(
+                        entity_id="sensor.one",
+                        state="on",
+                        last_updated_ts=dt_util.utc_to_timestamp(now),
+                        context_id="01GTDGKBCH00GW0X476W5TVAAA",
+                        context_user_id="b400facee45711eaa9308bfd3d19e474",
+                    ),
+                )
+            )
+
+    await instance.async_add_executor_job(_insert_rows)
+
+    def _schedule_context_ids_migration():
+        with session_scope(hass=hass) as session:
+            instance._schedule_context_ids_migration(session)
+
+    with patch.object(migration, "MAX_ROWS_TO_MIGRATE", 1), patch.object(
+        recorder.queries, "MAX_ROWS_TO_MIGRATE", 1
+    ), patch.object(
+        migration, "_drop_index", wraps=migration._drop_index
+    ) as drop_index:
+        await instance.async_add_executor_job(_schedule_context_ids_migration)
+        # Each batch is migrated by a new task queued by the previous one
+        for _ in range(4):
+            await async_recorder_block_till_done(hass)
+    assert drop_index.call_args_list == [
+        call(instance.get_session, "states", "ix_states_context_id"),
+        call(instance.get_session, "events", "ix_events_context_id"),
+    ]
+
+    def _fetch_rows():
+        with session_scope(hass=hass) as session:
+            events = {
+                event.event_type: (
+                    event.context_id,
+                    event.context_id_bin,
+                    event.to_native().context.as_dict(),
+                )
+                for event in session.query(Events).filter(
+                    Events.event_type.like("%_context")
+                )
+            }
+            state = session.query(States).one()
+            return events, (state.context_id, state.to_native().context.as_dict())
+
+    events, state = await instance.async_add_executor_job(_fetch_rows)
+    assert events["ulid_context"] == (
+        None,
+        ulid_to_bytes("01GTDGKBCH00GW0X476W5TVAAA"),
+        {
+            "id": "01GTDGKBCH00GW0X476W5TVAAA",
+            "parent_id": "01GTDGKBCH00GW0X476W5TVBBB",
+            "user_id": "b400facee45711eaa9308bfd3d19e474",
+        },
+    )
+    assert events["uuid_context"][:2] == (
+        None,
+        bytes.fromhex("ac5bd62de45711eaaeb351041eec8dd9"),
+    )
+    assert events["invalid_context"][:2] == (None, None)
+    assert state == (
+        None,
+        {
+            "id": "01GTDGKBCH00GW0X476W5TVAAA",
+            "parent_id": None,
+            "user_id": "b400facee45711eaa9308bfd3d19e474",
+        },
+    )
+
+
+async def test_migrate_timestamps(async_setup_recorder_instance, hass):
+    """Test datetime timestamps are converted to epoch floats in the background."""
+    instance = await async_setup_recorder_instance(hass)
+    await async_wait_recording_done(hass)
+    one = datetime.datetime(2023, 1, 2, 3, 4, 5, 678901, tzinfo=dt_util.UTC)
+    two = one + datetime.timedelta(minutes=1)
+
+    def _insert_rows():
+        with session_scope(hass=hass) as session:
+            session.add_all(
+                (
+                    Events(event_type="old_timestamp", origin_idx=0, time_fired=one),
+                    Events(event_type="old_timestamp", origin_idx=0, time_fired=two),
+                    States(
+                        entity_id="sensor.one",
+                        state="on",
+                        last_updated=two,
+                        last_changed=one,
+                    ),
+                    States(
+                        entity_id="sensor.two",
+                        state="on",
+                        last_updated=two,
+                        last_changed=None,
+                    ),
+                )
+            )
+            # Remove the default last_updated_ts of the ORM
+            session.flush()
+            session.query(States).filter(
+                States.entity_id.in_(["sensor.one", "sensor.two"])
+            ).update({States.last_updated_ts: None})
+
+    await instance.async_add_executor_job(_insert_rows)
+
+    def _schedule_timestamps_migration():
+        with session_scope(hass=hass) as session:
+            instance._schedule_timestamps_migration(session)
+
+    with patch.object(migration, "MAX_ROWS_TO_MIGRATE", 1), patch.object(
+        recorder.queries, "MAX_ROWS_TO_MIGRATE", 1
+    ), patch.object(
+        migration, "_drop_index", wraps=migration._drop_index
+    ) as drop_index:
+        await instance.async_add_executor_job(_schedule_timestamps_migration)
+        # Each batch is migrated by a new task queued by the previous one
+        for _ in range(3):
+            await async_recorder_block_till_done(hass)
+    # The old indexes are only dropped once all rows are converted
+    assert drop_index.call_args_list == [
+        call(instance.get_session, "events", "ix_events_time_fired"),
+        call(instance.get_session, "events", "ix_events_event_type_time_fired"),
+        call(instance.get_session, "states", "ix_states_last_updated"),
+        call(instance.get_session, "states", "ix_states_metadata_id_last_updated"),
+    ]
+
+    def _fetch_rows():
+        with session_scope(hass=hass) as session:
+            events = [
+                (process_timestamp(event.time_fired), event.time_fired_ts)
+                for event in session.query(Events)
+                .filter(Events.event_type == "old_timestamp")
+                .order_by(Events.event_id)
+            ]
+            states = {
+                state.entity_id: (
+                    process_timestamp(state.last_updated),
+                    process_timestamp(state.last_changed),
+                    state.to_native(),
+                )
+                for state in session.query(States).filter(
+                    States.entity_id.in_(["sensor.one", "sensor.two"])
+                )
+            }
+            return events, states
+
+    events, states = await instance.async_add_executor_job(_fetch_rows)
+    assert events == [(None, one.timestamp()), (None, two.timestamp())]
+    assert states["sensor.one"][:2] == (None, None)
+    assert states["sensor.one"][2].last_updated == two
+    assert states["sensor.one"][2].last_changed == one
+    assert states["sensor.two"][:2] == (None, None)
+    assert states["sensor.two"][2].last_updated == two
+    assert states["sensor.two"][2].last_changed == two
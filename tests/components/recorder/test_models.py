@@ -1,6 +1,6 @@
 """The tests for the Recorder component."""
 from datetime import datetime, timedelta
-from unittest.mock import PropertyMock
+from unittest.mock import PropertyMock, patch
 
 from freezegun import freeze_time
 import pytest
@@ -17,13 +17,19 @@ from homeassistant.components.recorder.db_schema import (
 )
 from homeassistant.components.recorder.models import (
     LazyState,
+    bytes_to_ulid_or_none,
+    bytes_to_uuid_hex_or_none,
     process_datetime_to_timestamp,
     process_timestamp,
     process_timestamp_to_utc_isoformat,
+    raw_attributes_from_row,
+    ulid_to_bytes_or_none,
+    uuid_hex_to_bytes_or_none,
 )
 from homeassistant.const import EVENT_STATE_CHANGED
 import homeassistant.core as ha
 from homeassistant.exceptions import InvalidEntityFormatError
+from homeassistant.helpers.json import JSONFragment, json_loads
 from homeassistant.util import dt, dt as dt_util
 
 
@@ -81,8 +87,8 @@ def test_from_event_to_delete_state():
 
     assert db_state.entity_id == "sensor.temperature"
     assert db_state.state == ""
-    assert db_state.last_changed is None
-    assert db_state.last_updated == event.time_fired
+    assert db_state.last_changed_ts is None
+    assert db_state.last_updated_ts == event.time_fired.timestamp()
 
 
 def test_entity_ids():
@@ -119,16 +125,16 @@ def test_entity_ids():
         States(
             entity_id="sensor.temperature",
             state="20",
-            last_changed=before_run,
-            last_updated=before_run,
+            last_changed_ts=before_run.timestamp(),
+            last_updated_ts=before_run.timestamp(),
         )
     )
     session.add(
         States(
             entity_id="sensor.sound",
             state="10",
-            last_changed=after_run,
-            last_updated=after_run,
+            last_changed_ts=after_run.timestamp(),
+            last_updated_ts=after_run.timestamp(),
         )
     )
 
@@ -136,16 +142,16 @@ def test_entity_ids():
         States(
             entity_id="sensor.humidity",
             state="76",
-            last_changed=in_run,
-            last_updated=in_run,
+            last_changed_ts=in_run.timestamp(),
+            last_updated_ts=in_run.timestamp(),
         )
     )
     session.add(
         States(
             entity_id="sensor.lux",
             state="5",
-            last_changed=in_run3,
-            last_updated=in_run3,
+            last_changed_ts=in_run3.timestamp(),
+            last_updated_ts=in_run3.timestamp(),
         )
     )
 
@@ -245,6 +251,48 @@ async def test_event_to_db_model():
     assert native == event
 
 
+async def test_context_to_db_model():
+    """Test the context of events and states round trips as bytes."""
+    context = ha.Context(
+        id="01GTDGKBCH00GW0X476W5TVAAA",
+        user_id="b400facee45711eaa9308bfd3d19e474",
+        parent_id="01GTDGKBCH00GW0X476W5TVBBB",
+    )
+    event = ha.Event("test_event", {}, context=context)
+    db_event = Events.from_event(event)
+    assert db_event.context_id is None
+    assert len(db_event.context_id_bin) == 16
+    assert db_event.to_native().context.as_dict() == context.as_dict()
+
+    state = ha.State("sensor.temperature", "18", context=context)
+    event = ha.Event(
+        EVENT_STATE_CHANGED,
+        {"entity_id": "sensor.temperature", "old_state": None, "new_state": state},
+        context=context,
+    )
+    assert States.from_event(event).to_native().context.as_dict() == context.as_dict()
+
+
+def test_context_id_conversion():
+    """Test converting context ids to bytes and back."""
+    ulid = "01GTDGKBCH00GW0X476W5TVAAA"
+    assert bytes_to_ulid_or_none(ulid_to_bytes_or_none(ulid)) == ulid
+    # Legacy uuid hex context ids fit in the same 16 bytes
+    assert ulid_to_bytes_or_none("ac5bd62de45711eaaeb351041eec8dd9") == bytes.fromhex(
+        "ac5bd62de45711eaaeb351041eec8dd9"
+    )
+    assert ulid_to_bytes_or_none("invalid") is None
+    assert ulid_to_bytes_or_none(None) is None
+    assert bytes_to_ulid_or_none(None) is None
+    assert bytes_to_ulid_or_none(b"short") is None
+
+    user_id = "b400facee45711eaa9308bfd3d19e474"
+    assert bytes_to_uuid_hex_or_none(uuid_hex_to_bytes_or_none(user_id)) == user_id
+    assert uuid_hex_to_bytes_or_none("invalid") is None
+    assert uuid_hex_to_bytes_or_none(None) is None
+    assert bytes_to_uuid_hex_or_none(None) is None
+
+
 async def test_lazy_state_handles_include_json(caplog):
     """Test that the LazyState class handles invalid json."""
     row = PropertyMock(
@@ -255,6 +303,49 @@ async def test_lazy_state_handles_include_json(caplog):
     assert "Error converting row to state attributes" in caplog.text
 
 
+@pytest.mark.parametrize(
+    "shared_attrs", ["{INVALID_JSON}", '{"truncated":', "[1, 2]", "null"]
+)
+def test_raw_attributes_handles_invalid_json(caplog, shared_attrs):
+    """Test raw attributes which are not a json object are not passed through."""
+    row = PropertyMock(shared_attrs=shared_attrs, attributes=None)
+    assert raw_attributes_from_row(row, {}) == {}
+    assert "Error converting row to state attributes" in caplog.text
+
+
+def test_raw_attributes_passes_json_object_through():
+    """Test raw attributes which are a json object are passed through as is."""
+    row = PropertyMock(shared_attrs='{"shared": true}', attributes=None)
+    raw_attributes = raw_attributes_from_row(row, {})
+    assert isinstance(raw_attributes, JSONFragment)
+    assert raw_attributes.json == '{"shared": true}'
+
+
+def test_raw_attributes_are_parsed_once_per_source():
+    """Test raw attributes shared by many rows are only parsed once."""
+    attr_cache = {}
+    rows = [
+        PropertyMock(shared_attrs='{"shared": true}', attributes=None),
+        PropertyMock(shared_attrs='{"shared": true}', attributes=None),
+        PropertyMock(shared_attrs='{"shared": false}', attributes=None),
+        PropertyMock(shared_attrs="[1, 2]", attributes=None),
+        PropertyMock(shared_attrs="[1, 2]", attributes=None),
+    ]
+    with patch(
+        "homeassistant.components.recorder.models.json_loads",
+        wraps=json_loads,
+    ) as json_loads_mock:
+        raw_attributes = [raw_attributes_from_row(row, attr_cache) for row in rows]
+    assert json_loads_mock.call_count == 3
+    assert [getattr(attrs, "json", attrs) for attrs in raw_attributes] == [
+        '{"shared": true}',
+        '{"shared": true}',
+        '{"shared": false}',
+        {},
+        {},
+    ]
+
+
 async def test_lazy_state_prefers_shared_attrs_over_attrs(caplog):
     """Test that the LazyState prefers shared_attrs over attributes."""
     row = PropertyMock(
@@ -272,8 +363,8 @@ async def test_lazy_state_handles_different_last_updated_and_last_changed(caplog
         entity_id="sensor.valid",
         state="off",
         shared_attrs='{"shared":true}',
-        last_updated=now,
-        last_changed=now - timedelta(seconds=60),
+        last_updated_ts=now.timestamp(),
+        last_changed_ts=(now - timedelta(seconds=60)).timestamp(),
     )
     lstate = LazyState(row, {})
     assert lstate.as_dict() == {
@@ -283,8 +374,8 @@ async def test_lazy_state_handles_different_last_updated_and_last_changed(caplog
         "last_updated": "2021-06-12T03:04:01.000323+00:00",
         "state": "off",
     }
-    assert lstate.last_updated == row.last_updated
-    assert lstate.last_changed == row.last_changed
+    assert lstate.last_updated.timestamp() == row.last_updated_ts
+    assert lstate.last_changed.timestamp() == row.last_changed_ts
     assert lstate.as_dict() == {
         "attributes": {"shared": True},
         "entity_id": "sensor.valid",
@@ -301,8 +392,8 @@ async def test_lazy_state_handles_same_last_updated_and_last_changed(caplog):
         entity_id="sensor.valid",
         state="off",
         shared_attrs='{"shared":true}',
-        last_updated=now,
-        last_changed=now,
+        last_updated_ts=now.timestamp(),
+        last_changed_ts=now.timestamp(),
     )
     lstate = LazyState(row, {})
     assert lstate.as_dict() == {
@@ -312,8 +403,8 @@ async def test_lazy_state_handles_same_last_updated_and_last_changed(caplog):
         "last_updated": "2021-06-12T03:04:01.000323+00:00",
         "state": "off",
     }
-    assert lstate.last_updated == row.last_updated
-    assert lstate.last_changed == row.last_changed
+    assert lstate.last_updated.timestamp() == row.last_updated_ts
+    assert lstate.last_changed.timestamp() == row.last_changed_ts
     assert lstate.as_dict() == {
         "attributes": {"shared": True},
         "entity_id": "sensor.valid",
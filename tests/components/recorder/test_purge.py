@@ -2,13 +2,16 @@
 from datetime import datetime, timedelta
 import json
 import sqlite3
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
+from pytest import approx
 from sqlalchemy.exc import DatabaseError, OperationalError
 from sqlalchemy.orm.session import Session
 
 from homeassistant.components import recorder
+from homeassistant.components.recorder import purge
 from homeassistant.components.recorder.const import MAX_ROWS_TO_PURGE, SupportedDialect
 from homeassistant.components.recorder.db_schema import (
     EventData,
@@ -16,10 +19,11 @@ from homeassistant.components.recorder.db_schema import (
     RecorderRuns,
     StateAttributes,
     States,
+    StatesMeta,
     StatisticsRuns,
     StatisticsShortTerm,
 )
-from homeassistant.components.recorder.purge import purge_old_data
+from homeassistant.components.recorder.purge import PurgeCursor, purge_old_data
 from homeassistant.components.recorder.services import (
     SERVICE_PURGE,
     SERVICE_PURGE_ENTITIES,
@@ -35,6 +39,7 @@ from .common import (
     async_recorder_block_till_done,
     async_wait_purge_done,
     async_wait_recording_done,
+    convert_pending_states_to_meta,
 )
 
 from tests.common import SetupRecorderInstanceT
@@ -134,6 +139,146 @@ async def test_purge_old_states(
         assert state_attributes.count() == 3
 
 
+async def test_purge_old_data_time_budget(
+    async_setup_recorder_instance: SetupRecorderInstanceT, hass: HomeAssistant
+):
+    """Test purging with a time budget resumes from the cursor."""
+    instance = await async_setup_recorder_instance(hass)
+    await async_wait_recording_done(hass)
+
+    timestamp = dt_util.utc_to_timestamp(dt_util.utcnow() - timedelta(days=5))
+    with session_scope(hass=hass) as session:
+        for i in range(MAX_ROWS_TO_PURGE * 2 + 10):
+            session.add(
+                States(
+                    state="purgeme",
+                    last_changed_ts=timestamp + i,
+                    last_updated_ts=timestamp + i,
+                )
+            )
+            session.add(
+                Events(event_type="EVENT_TEST_PURGE", time_fired_ts=timestamp + i)
+            )
+
+    purge_before = dt_util.utcnow() - timedelta(days=4)
+    cursor = PurgeCursor()
+    with session_scope(hass=hass) as session:
+        states = session.query(States).filter(States.state == "purgeme")
+        events = session.query(Events).filter(Events.event_type == "EVENT_TEST_PURGE")
+
+        # A run stops after one batch of states and events when the budget is spent
+        assert not purge_old_data(
+            instance, purge_before, repack=False, time_budget=0, cursor=cursor
+        )
+        assert states.count() == MAX_ROWS_TO_PURGE + 10
+        assert events.count() == MAX_ROWS_TO_PURGE + 10
+        assert cursor.states_ts == timestamp + MAX_ROWS_TO_PURGE - 1
+        assert cursor.events_ts == timestamp + MAX_ROWS_TO_PURGE - 1
+        metrics = instance.purge_metrics
+        assert metrics.purge_before == purge_before
+        assert metrics.in_progress
+        assert metrics.runs == 1
+        assert metrics.states_purged == MAX_ROWS_TO_PURGE
+        assert metrics.events_purged == MAX_ROWS_TO_PURGE
+
+        finished = False
+        while not finished:
+            finished = purge_old_data(
+                instance, purge_before, repack=False, time_budget=0, cursor=cursor
+            )
+        assert states.count() == 0
+        assert events.count() == 0
+        metrics = instance.purge_metrics
+        assert not metrics.in_progress
+        assert metrics.runs == 4
+        assert metrics.states_purged == MAX_ROWS_TO_PURGE * 2 + 10
+        assert metrics.events_purged == MAX_ROWS_TO_PURGE * 2 + 10
+        assert metrics.purge_time > 0
+        assert metrics.rows_per_second > 0
+
+
+async def test_purge_shared_data_by_last_used(
+    async_setup_recorder_instance: SetupRecorderInstanceT, hass: HomeAssistant
+):
+    """Test shared event data and attributes are purged by their last use."""
+    instance = await async_setup_recorder_instance(hass)
+    await async_wait_recording_done(hass)
+
+    ten_days_ago = dt_util.utcnow() - timedelta(days=10)
+    ten_days_ago_ts = dt_util.utc_to_timestamp(ten_days_ago)
+
+    def get_last_used_ts():
+        with session_scope(hass=hass) as session:
+            return (
+                session.query(EventData.last_used_ts)
+                .filter(EventData.shared_data == '{"shared":true}')
+                .scalar()
+            )
+
+    # The last use is written at most once per SHARED_DATA_LAST_USED_INTERVAL
+    for delta, last_used_ts in (
+        (timedelta(), ten_days_ago_ts),
+        (timedelta(minutes=30), ten_days_ago_ts),
+        (timedelta(hours=2), ten_days_ago_ts + 7200),
+    ):
+        hass.bus.async_fire(
+            "EVENT_TEST_SHARED", {"shared": True}, time_fired=ten_days_ago + delta
+        )
+        await async_wait_recording_done(hass)
+        assert get_last_used_ts() == last_used_ts
+
+    hass.states.async_set("test.shared", "on", {"shared": True})
+    await async_wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        assert session.query(StateAttributes.last_used_ts).filter(
+            StateAttributes.shared_attrs == '{"shared":true}'
+        ).scalar() == approx(time.time(), abs=60)
+        # Unused rows which are not linked to any purged event or state
+        session.add(
+            EventData(
+                shared_data='{"orphan":true}', hash=1, last_used_ts=ten_days_ago_ts
+            )
+        )
+        session.add(
+            StateAttributes(
+                shared_attrs='{"orphan":true}', hash=1, last_used_ts=ten_days_ago_ts
+            )
+        )
+
+    purge_before = dt_util.utcnow() - timedelta(days=5)
+    with patch(
+        "homeassistant.components.recorder.purge._select_unused_event_data_ids",
+        wraps=purge._select_unused_event_data_ids,
+    ) as select_unused_event_data_ids:
+        finished = False
+        while not finished:
+            finished = purge_old_data(instance, purge_before, repack=False)
+
+    # The event data was last used long enough before purge_before to
+    # purge it without checking if it is still used by any events
+    assert all(not call.args[1] for call in select_unused_event_data_ids.call_args_list)
+    with session_scope(hass=hass) as session:
+        assert (
+            session.query(Events)
+            .filter(Events.event_type == "EVENT_TEST_SHARED")
+            .count()
+            == 0
+        )
+        assert (
+            session.query(EventData)
+            .filter(EventData.shared_data.in_(['{"shared":true}', '{"orphan":true}']))
+            .count()
+            == 0
+        )
+        assert [
+            attributes.shared_attrs
+            for attributes in session.query(StateAttributes).filter(
+                StateAttributes.shared_attrs.in_(['{"shared":true}', '{"orphan":true}'])
+            )
+        ] == ['{"shared":true}']
+
+
 async def test_purge_old_states_encouters_database_corruption(
     async_setup_recorder_instance: SetupRecorderInstanceT,
     hass: HomeAssistant,
@@ -460,7 +605,7 @@ async def test_purge_edge_case(
                     event_type="EVENT_TEST_PURGE",
                     event_data="{}",
                     origin="LOCAL",
-                    time_fired=timestamp,
+                    time_fired_ts=dt_util.utc_to_timestamp(timestamp),
                 )
             )
             session.add(
@@ -468,8 +613,8 @@ async def test_purge_edge_case(
                     entity_id="test.recorder2",
                     state="purgeme",
                     attributes="{}",
-                    last_changed=timestamp,
-                    last_updated=timestamp,
+                    last_changed_ts=dt_util.utc_to_timestamp(timestamp),
+                    last_updated_ts=dt_util.utc_to_timestamp(timestamp),
                     event_id=1001,
                     attributes_id=1002,
                 )
@@ -529,7 +674,7 @@ async def test_purge_cutoff_date(
                     event_type="KEEP",
                     event_data="{}",
                     origin="LOCAL",
-                    time_fired=timestamp_keep,
+                    time_fired_ts=dt_util.utc_to_timestamp(timestamp_keep),
                 )
             )
             session.add(
@@ -537,8 +682,8 @@ async def test_purge_cutoff_date(
                     entity_id="test.cutoff",
                     state="keep",
                     attributes="{}",
-                    last_changed=timestamp_keep,
-                    last_updated=timestamp_keep,
+                    last_changed_ts=dt_util.utc_to_timestamp(timestamp_keep),
+                    last_updated_ts=dt_util.utc_to_timestamp(timestamp_keep),
                     event_id=1000,
                     attributes_id=1000,
                 )
@@ -557,7 +702,7 @@ async def test_purge_cutoff_date(
                         event_type="PURGE",
                         event_data="{}",
                         origin="LOCAL",
-                        time_fired=timestamp_purge,
+                        time_fired_ts=dt_util.utc_to_timestamp(timestamp_purge),
                     )
                 )
                 session.add(
@@ -565,8 +710,8 @@ async def test_purge_cutoff_date(
                         entity_id="test.cutoff",
                         state="purge",
                         attributes="{}",
-                        last_changed=timestamp_purge,
-                        last_updated=timestamp_purge,
+                        last_changed_ts=dt_util.utc_to_timestamp(timestamp_purge),
+                        last_updated_ts=dt_util.utc_to_timestamp(timestamp_purge),
                         event_id=1000 + row,
                         attributes_id=1000 + row,
                     )
@@ -690,8 +835,8 @@ async def test_purge_filtered_states(
                     entity_id="sensor.excluded",
                     state="purgeme",
                     attributes="{}",
-                    last_changed=timestamp,
-                    last_updated=timestamp,
+                    last_changed_ts=dt_util.utc_to_timestamp(timestamp),
+                    last_updated_ts=dt_util.utc_to_timestamp(timestamp),
                 )
             )
             # Add states and state_changed events that should be keeped
@@ -716,8 +861,8 @@ async def test_purge_filtered_states(
                 entity_id="sensor.linked_old_state_id",
                 state="keep",
                 attributes="{}",
-                last_changed=timestamp,
-                last_updated=timestamp,
+                last_changed_ts=dt_util.utc_to_timestamp(timestamp),
+                last_updated_ts=dt_util.utc_to_timestamp(timestamp),
                 old_state_id=1,
                 state_attributes=state_attrs,
             )
@@ -726,8 +871,8 @@ async def test_purge_filtered_states(
                 entity_id="sensor.linked_old_state_id",
                 state="keep",
                 attributes="{}",
-                last_changed=timestamp,
-                last_updated=timestamp,
+                last_changed_ts=dt_util.utc_to_timestamp(timestamp),
+                last_updated_ts=dt_util.utc_to_timestamp(timestamp),
                 old_state_id=2,
                 state_attributes=state_attrs,
             )
@@ -735,8 +880,8 @@ async def test_purge_filtered_states(
                 entity_id="sensor.linked_old_state_id",
                 state="keep",
                 attributes="{}",
-                last_changed=timestamp,
-                last_updated=timestamp,
+                last_changed_ts=dt_util.utc_to_timestamp(timestamp),
+                last_updated_ts=dt_util.utc_to_timestamp(timestamp),
                 old_state_id=62,  # keep
                 state_attributes=state_attrs,
             )
@@ -748,9 +893,10 @@ async def test_purge_filtered_states(
                     event_type="EVENT_KEEP",
                     event_data="{}",
                     origin="LOCAL",
-                    time_fired=timestamp,
+                    time_fired_ts=dt_util.utc_to_timestamp(timestamp),
                 )
             )
+            convert_pending_states_to_meta(instance, session)
 
     service_data = {"keep_days": 10}
     _add_db_entries(hass)
@@ -804,8 +950,10 @@ async def test_purge_filtered_states(
         events_keep = session.query(Events).filter(Events.event_type == "EVENT_KEEP")
         assert events_keep.count() == 1
 
-        states_sensor_excluded = session.query(States).filter(
-            States.entity_id == "sensor.excluded"
+        states_sensor_excluded = (
+            session.query(States)
+            .join(StatesMeta, States.metadata_id == StatesMeta.metadata_id)
+            .filter(StatesMeta.entity_id == "sensor.excluded")
         )
         assert states_sensor_excluded.count() == 0
 
@@ -869,6 +1017,7 @@ async def test_purge_filtered_states_to_empty(
                         timestamp,
                         event_id * days,
                     )
+            convert_pending_states_to_meta(instance, session)
 
     service_data = {"keep_days": 10}
     _add_db_entries(hass)
@@ -920,8 +1069,8 @@ async def test_purge_without_state_attributes_filtered_states_to_empty(
                     entity_id="sensor.old_format",
                     state=STATE_ON,
                     attributes=json.dumps({"old": "not_using_state_attributes"}),
-                    last_changed=timestamp,
-                    last_updated=timestamp,
+                    last_changed_ts=dt_util.utc_to_timestamp(timestamp),
+                    last_updated_ts=dt_util.utc_to_timestamp(timestamp),
                     event_id=event_id,
                     state_attributes=None,
                 )
@@ -932,7 +1081,7 @@ async def test_purge_without_state_attributes_filtered_states_to_empty(
                     event_type=EVENT_STATE_CHANGED,
                     event_data="{}",
                     origin="LOCAL",
-                    time_fired=timestamp,
+                    time_fired_ts=dt_util.utc_to_timestamp(timestamp),
                 )
             )
             session.add(
@@ -941,9 +1090,10 @@ async def test_purge_without_state_attributes_filtered_states_to_empty(
                     event_type=EVENT_THEMES_UPDATED,
                     event_data="{}",
                     origin="LOCAL",
-                    time_fired=timestamp,
+                    time_fired_ts=dt_util.utc_to_timestamp(timestamp),
                 )
             )
+            convert_pending_states_to_meta(instance, session)
 
     service_data = {"keep_days": 10}
     _add_db_entries(hass)
@@ -993,7 +1143,7 @@ async def test_purge_filtered_events(
                             event_type="EVENT_PURGE",
                             event_data="{}",
                             origin="LOCAL",
-                            time_fired=timestamp,
+                            time_fired_ts=dt_util.utc_to_timestamp(timestamp),
                         )
                     )
 
@@ -1093,7 +1243,7 @@ async def test_purge_filtered_events_state_changed(
                         event_type="EVENT_KEEP",
                         event_data="{}",
                         origin="LOCAL",
-                        time_fired=timestamp,
+                        time_fired_ts=dt_util.utc_to_timestamp(timestamp),
                     )
                 )
             # Add states with linked old_state_ids that need to be handled
@@ -1102,8 +1252,8 @@ async def test_purge_filtered_events_state_changed(
                 entity_id="sensor.linked_old_state_id",
                 state="keep",
                 attributes="{}",
-                last_changed=timestamp,
-                last_updated=timestamp,
+                last_changed_ts=dt_util.utc_to_timestamp(timestamp),
+                last_updated_ts=dt_util.utc_to_timestamp(timestamp),
                 old_state_id=1,
             )
             timestamp = dt_util.utcnow() - timedelta(days=4)
@@ -1111,16 +1261,16 @@ async def test_purge_filtered_events_state_changed(
                 entity_id="sensor.linked_old_state_id",
                 state="keep",
                 attributes="{}",
-                last_changed=timestamp,
-                last_updated=timestamp,
+                last_changed_ts=dt_util.utc_to_timestamp(timestamp),
+                last_updated_ts=dt_util.utc_to_timestamp(timestamp),
                 old_state_id=2,
             )
             state_3 = States(
                 entity_id="sensor.linked_old_state_id",
                 state="keep",
                 attributes="{}",
-                last_changed=timestamp,
-                last_updated=timestamp,
+                last_changed_ts=dt_util.utc_to_timestamp(timestamp),
+                last_updated_ts=dt_util.utc_to_timestamp(timestamp),
                 old_state_id=62,  # keep
             )
             session.add_all((state_1, state_2, state_3))
@@ -1168,7 +1318,7 @@ async def test_purge_entities(
     async_setup_recorder_instance: SetupRecorderInstanceT, hass: HomeAssistant
 ):
     """Test purging of specific entities."""
-    await async_setup_recorder_instance(hass)
+    instance = await async_setup_recorder_instance(hass)
 
     async def _purge_entities(hass, entity_ids, domains, entity_globs):
         service_data = {
@@ -1216,6 +1366,7 @@ async def test_purge_entities(
                         timestamp,
                         event_id * days,
                     )
+            convert_pending_states_to_meta(instance, session)
 
     def _add_keep_records(hass: HomeAssistant) -> None:
         with session_scope(hass=hass) as session:
@@ -1229,6 +1380,7 @@ async def test_purge_entities(
                     timestamp,
                     event_id,
                 )
+            convert_pending_states_to_meta(instance, session)
 
     _add_purge_records(hass)
     _add_keep_records(hass)
@@ -1244,8 +1396,10 @@ async def test_purge_entities(
         states = session.query(States)
         assert states.count() == 10
 
-        states_sensor_kept = session.query(States).filter(
-            States.entity_id == "sensor.keep"
+        states_sensor_kept = (
+            session.query(States)
+            .join(StatesMeta, States.metadata_id == StatesMeta.metadata_id)
+            .filter(StatesMeta.entity_id == "sensor.keep")
         )
         assert states_sensor_kept.count() == 10
 
@@ -1274,8 +1428,10 @@ async def test_purge_entities(
         states = session.query(States)
         assert states.count() == 10
 
-        states_sensor_kept = session.query(States).filter(
-            States.entity_id == "sensor.keep"
+        states_sensor_kept = (
+            session.query(States)
+            .join(StatesMeta, States.metadata_id == StatesMeta.metadata_id)
+            .filter(StatesMeta.entity_id == "sensor.keep")
         )
         assert states_sensor_kept.count() == 10
 
@@ -1355,7 +1511,7 @@ async def _add_test_events(hass: HomeAssistant, iterations: int = 1):
                         event_type=event_type,
                         event_data=json.dumps(event_data),
                         origin="LOCAL",
-                        time_fired=timestamp,
+                        time_fired_ts=dt_util.utc_to_timestamp(timestamp),
                     )
                 )
 
@@ -1392,7 +1548,7 @@ async def _add_events_with_event_data(hass: HomeAssistant, iterations: int = 1):
                     Events(
                         event_type=event_type,
                         origin="LOCAL",
-                        time_fired=timestamp,
+                        time_fired_ts=dt_util.utc_to_timestamp(timestamp),
                         event_data_rel=event_data,
                     )
                 )
@@ -1494,8 +1650,8 @@ def _add_state_without_event_linkage(
             entity_id=entity_id,
             state=state,
             attributes=None,
-            last_changed=timestamp,
-            last_updated=timestamp,
+            last_changed_ts=dt_util.utc_to_timestamp(timestamp),
+            last_updated_ts=dt_util.utc_to_timestamp(timestamp),
             event_id=None,
             state_attributes=state_attrs,
         )
@@ -1519,8 +1675,8 @@ def _add_state_and_state_changed_event(
             entity_id=entity_id,
             state=state,
             attributes=None,
-            last_changed=timestamp,
-            last_updated=timestamp,
+            last_changed_ts=dt_util.utc_to_timestamp(timestamp),
+            last_updated_ts=dt_util.utc_to_timestamp(timestamp),
             event_id=event_id,
             state_attributes=state_attrs,
         )
@@ -1531,7 +1687,7 @@ def _add_state_and_state_changed_event(
             event_type=EVENT_STATE_CHANGED,
             event_data="{}",
             origin="LOCAL",
-            time_fired=timestamp,
+            time_fired_ts=dt_util.utc_to_timestamp(timestamp),
         )
     )
 
@@ -1600,8 +1756,8 @@ async def test_purge_can_mix_legacy_and_new_format(
         broken_state_no_time = States(
             event_id=None,
             entity_id="orphened.state",
-            last_updated=None,
-            last_changed=None,
+            last_updated_ts=None,
+            last_changed_ts=None,
         )
         session.add(broken_state_no_time)
         start_id = 50000
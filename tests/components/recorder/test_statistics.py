@@ -12,9 +12,19 @@ from sqlalchemy.orm import Session
 
 from homeassistant.components import recorder
 from homeassistant.components.recorder import history, statistics
-from homeassistant.components.recorder.const import SQLITE_URL_PREFIX
-from homeassistant.components.recorder.db_schema import StatisticsShortTerm
-from homeassistant.components.recorder.models import process_timestamp_to_utc_isoformat
+from homeassistant.components.recorder.const import (
+    EVENT_RECORDER_STATISTICS_IMPORT_PROGRESS,
+    SQLITE_URL_PREFIX,
+)
+from homeassistant.components.recorder.db_schema import (
+    StatisticsDaily,
+    StatisticsMonthly,
+    StatisticsShortTerm,
+)
+from homeassistant.components.recorder.models import (
+    process_timestamp,
+    process_timestamp_to_utc_isoformat,
+)
 from homeassistant.components.recorder.statistics import (
     async_add_external_statistics,
     async_import_statistics,
@@ -27,6 +37,7 @@ from homeassistant.components.recorder.statistics import (
     list_statistic_ids,
     statistics_during_period,
 )
+from homeassistant.components.recorder.tasks import StatisticsRollupsBackfillTask
 from homeassistant.components.recorder.util import session_scope
 from homeassistant.const import TEMP_CELSIUS
 from homeassistant.core import callback
@@ -885,6 +896,117 @@ def test_import_statistics_errors(hass_recorder, caplog):
     assert get_metadata(hass, statistic_ids=("sensor.total_energy_import",)) == {}
 
 
+def test_import_statistics_in_batches(hass_recorder, caplog):
+    """Test importing statistics from a generator in batches."""
+    hass = hass_recorder()
+    wait_recording_done(hass)
+
+    progress = []
+
+    @callback
+    def async_progress_listener(event):
+        progress.append(event.data)
+
+    hass.bus.listen(EVENT_RECORDER_STATISTICS_IMPORT_PROGRESS, async_progress_listener)
+
+    zero = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    external_metadata = {
+        "has_mean": False,
+        "has_sum": True,
+        "name": "Total imported energy",
+        "source": "test",
+        "statistic_id": "test:total_energy_import",
+        "unit_of_measurement": "kWh",
+    }
+
+    def generate_statistics(first, count, offset=0, invalid_at=None):
+        for i in range(first, first + count):
+            start = zero - timedelta(hours=100 - i)
+            if i == invalid_at:
+                start = start.replace(tzinfo=None)
+            yield {"start": start, "state": i, "sum": i + offset}
+
+    def wait_import_done():
+        # Each batch is imported by a new task queued by the previous one
+        for _ in range(4):
+            wait_recording_done(hass)
+
+    def get_sums():
+        stats = statistics_during_period(
+            hass, zero - timedelta(hours=100), period="hour"
+        )
+        return [row["sum"] for row in stats["test:total_energy_import"]]
+
+    with patch("homeassistant.components.recorder.tasks.MAX_ROWS_TO_IMPORT", 10):
+        async_add_external_statistics(
+            hass, external_metadata, generate_statistics(0, 25)
+        )
+        wait_import_done()
+        assert progress == [
+            {"statistic_id": "test:total_energy_import", "imported": 10, "done": False},
+            {"statistic_id": "test:total_energy_import", "imported": 20, "done": False},
+            {"statistic_id": "test:total_energy_import", "imported": 25, "done": True},
+        ]
+        assert get_sums() == [approx(i) for i in range(25)]
+
+        # Existing statistics are updated, new statistics are added
+        progress.clear()
+        async_add_external_statistics(
+            hass, external_metadata, generate_statistics(20, 10, offset=100)
+        )
+        wait_import_done()
+        assert progress == [
+            {"statistic_id": "test:total_energy_import", "imported": 10, "done": False},
+            {"statistic_id": "test:total_energy_import", "imported": 10, "done": True},
+        ]
+        assert get_sums() == [approx(i) for i in range(20)] + [
+            approx(i + 100) for i in range(20, 30)
+        ]
+
+        # Statistics from a generator are validated when imported, import
+        # stops at the batch with an invalid statistic
+        progress.clear()
+        async_add_external_statistics(
+            hass,
+            external_metadata,
+            generate_statistics(30, 30, offset=100, invalid_at=45),
+        )
+        wait_import_done()
+        assert progress == [
+            {"statistic_id": "test:total_energy_import", "imported": 10, "done": False},
+        ]
+        assert get_sums() == [approx(i) for i in range(20)] + [
+            approx(i + 100) for i in range(20, 40)
+        ]
+        assert "Stopped importing statistics for test:total_energy_import" in (
+            caplog.text
+        )
+
+        # No progress is reported for a list imported in a single batch
+        progress.clear()
+        async_add_external_statistics(
+            hass, external_metadata, list(generate_statistics(40, 5, offset=100))
+        )
+        wait_import_done()
+        assert progress == []
+        assert get_sums() == [approx(i) for i in range(20)] + [
+            approx(i + 100) for i in range(20, 45)
+        ]
+
+        # A list spanning several batches reports progress
+        async_add_external_statistics(
+            hass, external_metadata, list(generate_statistics(45, 15, offset=100))
+        )
+        wait_import_done()
+        assert progress == [
+            {"statistic_id": "test:total_energy_import", "imported": 10, "done": False},
+            {"statistic_id": "test:total_energy_import", "imported": 15, "done": True},
+        ]
+
+    with session_scope(hass=hass) as session:
+        assert session.query(recorder.db_schema.Statistics).count() == 60
+
+
 @pytest.mark.parametrize("timezone", ["America/Regina", "Europe/Vienna", "UTC"])
 @pytest.mark.freeze_time("2022-10-01 00:00:00+00:00")
 def test_weekly_statistics(hass_recorder, caplog, timezone):
@@ -1165,6 +1287,469 @@ def test_monthly_statistics(hass_recorder, caplog, timezone):
     dt_util.set_default_time_zone(dt_util.get_time_zone("UTC"))
 
 
+def _rolled_up_periods(hass) -> tuple[int, int]:
+    """Return the number of rolled up days and months."""
+    with session_scope(hass=hass) as session:
+        return (
+            session.query(StatisticsDaily).count(),
+            session.query(StatisticsMonthly).count(),
+        )
+
+
+@pytest.mark.parametrize(
+    "timezone", ["America/Regina", "Asia/Kolkata", "Europe/Vienna", "UTC"]
+)
+@pytest.mark.freeze_time("2021-11-15 12:00:00+00:00")
+def test_statistics_rollups(hass_recorder, timezone):
+    """Test daily and monthly statistics are read from rolled up statistics."""
+    dt_util.set_default_time_zone(dt_util.get_time_zone(timezone))
+
+    hass = hass_recorder()
+    wait_recording_done(hass)
+    instance = recorder.get_instance(hass)
+    assert instance.statistics_rollups_active
+
+    # The hourly statistics start with whole UTC hours
+    start = dt_util.as_utc(dt_util.parse_datetime("2021-09-20 00:00:00")).replace(
+        minute=0
+    )
+    external_statistics = [
+        {
+            "start": start + timedelta(hours=hour),
+            "mean": float(hour % 7),
+            "min": float(hour % 5),
+            "max": float(hour % 11),
+            "last_reset": None,
+            "state": float(hour),
+            "sum": float(hour),
+        }
+        for hour in range(0, 24 * 50, 5)
+    ]
+    external_metadata = {
+        "has_mean": True,
+        "has_sum": True,
+        "name": "Total imported energy",
+        "source": "test",
+        "statistic_id": "test:total_energy_import",
+        "unit_of_measurement": "kWh",
+    }
+    async_add_external_statistics(hass, external_metadata, external_statistics)
+    wait_recording_done(hass)
+
+    # Only complete days and months are rolled up
+    days = {dt_util.as_local(stat["start"]).date() for stat in external_statistics}
+    assert _rolled_up_periods(hass) == (len(days), 2)
+
+    def assert_same_as_hourly(start_time, end_time):
+        for period in ("day", "month"):
+            stats = statistics_during_period(hass, start_time, end_time, period=period)
+            instance.statistics_rollups_active = False
+            instance.statistics_cache.invalidate(None, None)
+            hourly_stats = statistics_during_period(
+                hass, start_time, end_time, period=period
+            )
+            instance.statistics_rollups_active = True
+            assert stats == hourly_stats
+            assert stats["test:total_energy_import"]
+
+    assert_same_as_hourly(start - timedelta(days=30), None)
+    assert_same_as_hourly(start + timedelta(hours=13), start + timedelta(days=44))
+    assert_same_as_hourly(
+        dt_util.as_utc(dt_util.parse_datetime("2021-10-01 00:00:00")),
+        dt_util.as_utc(dt_util.parse_datetime("2021-11-01 00:00:00")),
+    )
+
+    # Adjusting the sum adjusts the rolled up statistics
+    instance.async_adjust_statistics(
+        "test:total_energy_import",
+        start + timedelta(days=20, hours=5),
+        100,
+        "kWh",
+    )
+    wait_recording_done(hass)
+    assert_same_as_hourly(start - timedelta(days=30), None)
+
+    dt_util.set_default_time_zone(dt_util.get_time_zone("UTC"))
+
+
+@pytest.mark.freeze_time("2021-11-15 12:00:00+00:00")
+def test_statistics_rollups_backfill(hass_recorder):
+    """Test the rolled up statistics are backfilled and rebuilt."""
+    dt_util.set_default_time_zone(dt_util.get_time_zone("Europe/Vienna"))
+
+    hass = hass_recorder()
+    wait_recording_done(hass)
+    instance = recorder.get_instance(hass)
+
+    start = dt_util.as_utc(dt_util.parse_datetime("2021-09-20 00:00:00"))
+    external_statistics = [
+        {
+            "start": start + timedelta(hours=hour),
+            "last_reset": None,
+            "state": float(hour),
+            "sum": float(hour),
+        }
+        for hour in range(0, 24 * 50, 5)
+    ]
+    external_metadata = {
+        "has_mean": False,
+        "has_sum": True,
+        "name": "Total imported energy",
+        "source": "test",
+        "statistic_id": "test:total_energy_import",
+        "unit_of_measurement": "kWh",
+    }
+    instance.statistics_rollups_active = False
+    async_add_external_statistics(hass, external_metadata, external_statistics)
+    wait_recording_done(hass)
+
+    # Nothing is rolled up until the backfill has started
+    assert _rolled_up_periods(hass) == (0, 0)
+
+    with patch(
+        "homeassistant.components.recorder.statistics.MAX_PERIODS_TO_ROLL_UP", 10
+    ):
+        instance.queue_task(StatisticsRollupsBackfillTask())
+        # The backfill is done in batches of 10 days or months
+        for _ in range(6):
+            wait_recording_done(hass)
+    assert instance.statistics_rollups_active
+    assert _rolled_up_periods(hass) == (50, 2)
+    stats = statistics_during_period(hass, start, period="month")
+
+    # The rolled up statistics are rebuilt after a time zone change
+    dt_util.set_default_time_zone(dt_util.get_time_zone("America/Regina"))
+    instance.statistics_rollups_active = False
+    assert statistics_during_period(hass, start, period="month") != stats
+    instance.queue_task(StatisticsRollupsBackfillTask())
+    wait_recording_done(hass)
+    assert instance.statistics_rollups_active
+    instance.statistics_cache.invalidate(None, None)
+    stats = statistics_during_period(hass, start, period="month")
+    instance.statistics_rollups_active = False
+    instance.statistics_cache.invalidate(None, None)
+    assert statistics_during_period(hass, start, period="month") == stats
+
+    dt_util.set_default_time_zone(dt_util.get_time_zone("UTC"))
+
+
+@pytest.mark.parametrize("removed_days", [[3, 4, 10], list(range(0, 40, 2))])
+@pytest.mark.freeze_time("2021-11-15 12:00:00+00:00")
+def test_statistics_rollups_gaps(hass_recorder, removed_days):
+    """Test days and months which are not rolled up are read from hourly statistics."""
+    dt_util.set_default_time_zone(dt_util.get_time_zone("Europe/Vienna"))
+
+    hass = hass_recorder()
+    wait_recording_done(hass)
+    instance = recorder.get_instance(hass)
+
+    start = dt_util.as_utc(dt_util.parse_datetime("2021-09-20 00:00:00"))
+    external_statistics = [
+        {
+            "start": start + timedelta(hours=hour),
+            "last_reset": None,
+            "state": float(hour),
+            "sum": float(hour),
+        }
+        for hour in range(0, 24 * 50, 5)
+    ]
+    external_metadata = {
+        "has_mean": False,
+        "has_sum": True,
+        "name": "Total imported energy",
+        "source": "test",
+        "statistic_id": "test:total_energy_import",
+        "unit_of_measurement": "kWh",
+    }
+    async_add_external_statistics(hass, external_metadata, external_statistics)
+    wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        for day in removed_days:
+            session.query(StatisticsDaily).filter(
+                StatisticsDaily.start
+                == statistics.day_start_end(start + timedelta(days=day))[0]
+            ).delete()
+        session.query(StatisticsMonthly).filter(
+            StatisticsMonthly.start
+            == dt_util.as_utc(dt_util.parse_datetime("2021-10-01 00:00:00"))
+        ).delete()
+
+    for period in ("day", "month"):
+        stats = statistics_during_period(hass, start, period=period)
+        instance.statistics_rollups_active = False
+        instance.statistics_cache.invalidate(None, None)
+        assert statistics_during_period(hass, start, period=period) == stats
+        instance.statistics_rollups_active = True
+
+    dt_util.set_default_time_zone(dt_util.get_time_zone("UTC"))
+
+
+@pytest.mark.freeze_time("2021-11-15 12:00:00+00:00")
+def test_compile_statistics_rollups_half_hour_offset(hass_recorder):
+    """Test days are rolled up when they don't end with an hour."""
+    dt_util.set_default_time_zone(dt_util.get_time_zone("Asia/Kolkata"))
+
+    hass = hass_recorder()
+    wait_recording_done(hass)
+    instance = recorder.get_instance(hass)
+
+    # The local day starts at 18:30 UTC, the hourly statistic starting
+    # at 18:00 UTC is the last hour of the previous day
+    start = dt_util.as_utc(dt_util.parse_datetime("2021-11-01 00:00:00"))
+    first_hour = start + timedelta(minutes=30)
+    external_statistics = [
+        {
+            "start": first_hour + timedelta(hours=hour),
+            "last_reset": None,
+            "state": float(hour),
+            "sum": float(hour),
+        }
+        for hour in range(-1, 25)
+    ]
+    external_metadata = {
+        "has_mean": False,
+        "has_sum": True,
+        "name": "Total imported energy",
+        "source": "test",
+        "statistic_id": "test:total_energy_import",
+        "unit_of_measurement": "kWh",
+    }
+    instance.statistics_rollups_active = False
+    async_add_external_statistics(hass, external_metadata, external_statistics)
+    wait_recording_done(hass)
+    assert _rolled_up_periods(hass) == (0, 0)
+
+    instance.statistics_rollups_active = True
+    with session_scope(hass=hass) as session:
+        for hour in range(24):
+            statistics._compile_statistics_rollups(
+                instance, session, first_hour + timedelta(hours=hour)
+            )
+            session.flush()
+            assert session.query(StatisticsDaily).count() == (hour == 23)
+        rolled_up = session.query(StatisticsDaily).one()
+        assert process_timestamp(rolled_up.start) == start
+        assert rolled_up.sum == 23.0
+
+    stats = statistics_during_period(hass, start, period="day")
+    instance.statistics_rollups_active = False
+    instance.statistics_cache.invalidate(None, None)
+    assert statistics_during_period(hass, start, period="day") == stats
+
+    dt_util.set_default_time_zone(dt_util.get_time_zone("UTC"))
+
+
+@pytest.mark.parametrize(
+    ("day", "hours"), [("2022-03-27", 23), ("2022-10-30", 25), ("2022-11-15", 24)]
+)
+def test_day_start_end_dst(day, hours):
+    """Test the bounds of a day are local midnights also on DST transition days."""
+    dt_util.set_default_time_zone(dt_util.get_time_zone("Europe/Vienna"))
+
+    start = dt_util.as_utc(dt_util.parse_datetime(f"{day} 00:00:00"))
+    end = start + timedelta(hours=hours)
+    assert dt_util.as_local(end).time() == dt_util.parse_time("00:00:00")
+    for hour in range(hours):
+        assert statistics.day_start_end(start + timedelta(hours=hour)) == (start, end)
+    assert statistics.day_start_end(end)[0] == end
+
+    dt_util.set_default_time_zone(dt_util.get_time_zone("UTC"))
+
+
+@pytest.mark.parametrize(
+    ("reduce_statistics", "period_starts"),
+    [
+        (
+            statistics._reduce_statistics_per_day,
+            ["2022-03-26", "2022-03-27", "2022-03-28", "2022-03-29"],
+        ),
+        (
+            statistics._reduce_statistics_per_day,
+            ["2022-10-29", "2022-10-30", "2022-10-31", "2022-11-01"],
+        ),
+        (
+            statistics._reduce_statistics_per_week,
+            ["2022-03-21", "2022-03-28", "2022-04-04"],
+        ),
+        (
+            statistics._reduce_statistics_per_week,
+            ["2022-10-24", "2022-10-31", "2022-11-07"],
+        ),
+        (
+            statistics._reduce_statistics_per_month,
+            ["2022-02-01", "2022-03-01", "2022-04-01"],
+        ),
+        (
+            statistics._reduce_statistics_per_month,
+            ["2022-10-01", "2022-11-01", "2022-12-01"],
+        ),
+    ],
+)
+def test_reduce_statistics_dst(reduce_statistics, period_starts):
+    """Test reducing hourly statistics to periods which span a DST transition."""
+    dt_util.set_default_time_zone(dt_util.get_time_zone("Europe/Vienna"))
+
+    bounds = [
+        dt_util.as_utc(dt_util.parse_datetime(f"{day} 00:00:00"))
+        for day in period_starts
+    ]
+    hours = int((bounds[-1] - bounds[0]).total_seconds() // 3600)
+    hourly_stats = [
+        {
+            "start": bounds[0] + timedelta(hours=hour),
+            "mean": float(hour),
+            "min": float(hour),
+            "max": float(hour),
+            "last_reset": None,
+            "state": float(hour),
+            "sum": float(hour),
+        }
+        for hour in range(hours)
+    ]
+
+    expected = []
+    for start, end in zip(bounds, bounds[1:]):
+        first = int((start - bounds[0]).total_seconds() // 3600)
+        last = int((end - bounds[0]).total_seconds() // 3600) - 1
+        expected.append(
+            {
+                "statistic_id": "sensor.test",
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "mean": approx((first + last) / 2),
+                "min": float(first),
+                "max": float(last),
+                "last_reset": None,
+                "state": float(last),
+                "sum": float(last),
+            }
+        )
+    assert reduce_statistics({"sensor.test": hourly_stats}) == {"sensor.test": expected}
+
+    dt_util.set_default_time_zone(dt_util.get_time_zone("UTC"))
+
+
+def test_replace_statistics_from_keeps_the_order():
+    """Test replacing cached statistics keeps the order of the statistic ids."""
+    start = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    before = {"start": start - timedelta(hours=1), "sum": 1.0}
+    after = {"start": start, "sum": 2.0}
+    cached = {"sensor.b": [before], "sensor.a": [before], "sensor.d": [before]}
+    fresh = {"sensor.c": [after], "sensor.a": [after], "sensor.e": [after]}
+
+    result = statistics._replace_statistics_from(cached, fresh, start)
+    assert list(result) == ["sensor.b", "sensor.c", "sensor.a", "sensor.d", "sensor.e"]
+    assert result["sensor.a"] == [before, after]
+    assert result["sensor.b"] == [before]
+    assert result["sensor.c"] == [after]
+
+
+def test_statistics_during_period_cache(hass_recorder):
+    """Test statistics_during_period results are cached until statistics change."""
+    hass = hass_recorder()
+    wait_recording_done(hass)
+    instance = recorder.get_instance(hass)
+
+    zero = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    start = zero - timedelta(hours=6)
+    external_metadata = {
+        "has_mean": False,
+        "has_sum": True,
+        "name": "Total imported energy",
+        "source": "test",
+        "statistic_id": "test:total_energy_import",
+        "unit_of_measurement": "kWh",
+    }
+
+    def import_hours(first_hour, last_hour, offset=0):
+        async_add_external_statistics(
+            hass,
+            external_metadata,
+            [
+                {
+                    "start": start + timedelta(hours=hour),
+                    "last_reset": None,
+                    "state": float(hour),
+                    "sum": float(hour + offset),
+                }
+                for hour in range(first_hour, last_hour)
+            ],
+        )
+        wait_recording_done(hass)
+
+    def uncached_statistics(period):
+        instance.statistics_cache = statistics.StatisticsDuringPeriodCache()
+        return statistics_during_period(hass, start, period=period)
+
+    import_hours(0, 3)
+    stats = statistics_during_period(hass, start, period="hour")
+    assert len(stats["test:total_energy_import"]) == 3
+
+    with patch.object(
+        statistics,
+        "_statistics_during_period_with_session",
+        wraps=statistics._statistics_during_period_with_session,
+    ) as during_period_mock:
+        cached_stats = statistics_during_period(hass, start, period="hour")
+        assert cached_stats == stats
+        assert cached_stats is not stats
+        assert during_period_mock.call_count == 0
+
+        # Changing a result does not change the cached statistics
+        cached_stats["test:total_energy_import"][0]["sum"] = 100.0
+        cached_stats["test:total_energy_import"].pop()
+        assert statistics_during_period(hass, start, period="hour") == stats
+        assert during_period_mock.call_count == 0
+
+        # Only the hours from the first changed hour are read again
+        import_hours(4, 6)
+        stats = statistics_during_period(hass, start, period="hour")
+        assert during_period_mock.call_count == 1
+        assert during_period_mock.call_args[0][3] == start + timedelta(hours=4)
+        cached = instance.statistics_cache
+        assert stats == uncached_statistics("hour")
+        assert len(stats["test:total_energy_import"]) == 5
+
+        instance.statistics_cache = cached
+        import_hours(1, 2, offset=10)
+        stats = statistics_during_period(hass, start, period="hour")
+        assert during_period_mock.call_args[0][3] == start + timedelta(hours=1)
+        assert stats == uncached_statistics("hour")
+
+    # Statistics ending before the change are not invalidated
+    stats = statistics_during_period(
+        hass, start, start + timedelta(hours=2), period="hour"
+    )
+    import_hours(5, 6, offset=20)
+    with patch.object(
+        statistics,
+        "_statistics_during_period_with_session",
+        wraps=statistics._statistics_during_period_with_session,
+    ) as during_period_mock:
+        assert (
+            statistics_during_period(
+                hass, start, start + timedelta(hours=2), period="hour"
+            )
+            == stats
+        )
+        assert during_period_mock.call_count == 0
+
+    # Changing the metadata invalidates the statistics
+    statistics_during_period(hass, start, period="hour")
+    instance.async_update_statistics_metadata(
+        "test:total_energy_import", new_unit_of_measurement="Wh"
+    )
+    wait_recording_done(hass)
+    with patch.object(
+        statistics,
+        "_statistics_during_period_with_session",
+        wraps=statistics._statistics_during_period_with_session,
+    ) as during_period_mock:
+        statistics_during_period(hass, start, period="hour")
+        assert during_period_mock.call_count == 1
+
+
 def test_delete_duplicates_no_duplicates(hass_recorder, caplog):
     """Test removal of duplicated statistics."""
     hass = hass_recorder()
@@ -1210,9 +1795,11 @@ def test_duplicate_statistics_handle_integrity_error(hass_recorder, caplog):
     ]
 
     with patch.object(
-        statistics, "_statistics_exists", return_value=False
+        statistics, "_statistics_ids_by_start", return_value={}
     ), patch.object(
-        statistics, "_insert_statistics", wraps=statistics._insert_statistics
+        statistics,
+        "_bulk_insert_statistics",
+        wraps=statistics._bulk_insert_statistics,
     ) as insert_statistics_mock:
         async_add_external_statistics(
             hass, external_energy_metadata_1, external_energy_statistics_1
@@ -30,6 +30,13 @@ async def test_recorder_system_health(recorder_mock, hass, recorder_db_url):
         "estimated_db_size": ANY,
         "database_engine": SupportedDialect.SQLITE.value,
         "database_version": ANY,
+        "commit_interval": 0,
+        "queue_wait": ANY,
+        "build_time": ANY,
+        "flush_time": ANY,
+        "commit_time": ANY,
+        "rows_per_second": ANY,
+        "dropped_events": 0,
     }
 
 
@@ -54,6 +61,13 @@ async def test_recorder_system_health_alternate_dbms(recorder_mock, hass, dialec
         "estimated_db_size": "1.00 MiB",
         "database_engine": dialect_name.value,
         "database_version": ANY,
+        "commit_interval": 0,
+        "queue_wait": ANY,
+        "build_time": ANY,
+        "flush_time": ANY,
+        "commit_time": ANY,
+        "rows_per_second": ANY,
+        "dropped_events": 0,
     }
 
 
@@ -85,6 +99,13 @@ async def test_recorder_system_health_db_url_missing_host(
         "estimated_db_size": "1.00 MiB",
         "database_engine": dialect_name.value,
         "database_version": ANY,
+        "commit_interval": 0,
+        "queue_wait": ANY,
+        "build_time": ANY,
+        "flush_time": ANY,
+        "commit_time": ANY,
+        "rows_per_second": ANY,
+        "dropped_events": 0,
     }
 
 
@@ -109,4 +130,11 @@ async def test_recorder_system_health_crashed_recorder_runs_table(
         "estimated_db_size": ANY,
         "database_engine": SupportedDialect.SQLITE.value,
         "database_version": ANY,
+        "commit_interval": 0,
+        "queue_wait": ANY,
+        "build_time": ANY,
+        "flush_time": ANY,
+        "commit_time": ANY,
+        "rows_per_second": ANY,
+        "dropped_events": 0,
     }
@@ -230,12 +230,13 @@ def test_setup_connection_for_dialect_sqlite(sqlite_version):
 
     util.setup_connection_for_dialect(instance_mock, "sqlite", dbapi_connection, True)
 
-    assert len(execute_args) == 5
-    assert execute_args[0] == "PRAGMA journal_mode=WAL"
-    assert execute_args[1] == "SELECT sqlite_version()"
-    assert execute_args[2] == "PRAGMA cache_size = -16384"
-    assert execute_args[3] == "PRAGMA synchronous=NORMAL"
-    assert execute_args[4] == "PRAGMA foreign_keys=ON"
+    assert len(execute_args) == 6
+    assert execute_args[0] == "PRAGMA auto_vacuum=INCREMENTAL"
+    assert execute_args[1] == "PRAGMA journal_mode=WAL"
+    assert execute_args[2] == "SELECT sqlite_version()"
+    assert execute_args[3] == "PRAGMA cache_size = -16384"
+    assert execute_args[4] == "PRAGMA synchronous=NORMAL"
+    assert execute_args[5] == "PRAGMA foreign_keys=ON"
 
     execute_args = []
     util.setup_connection_for_dialect(instance_mock, "sqlite", dbapi_connection, False)
@@ -275,12 +276,13 @@ def test_setup_connection_for_dialect_sqlite_zero_commit_interval(
 
     util.setup_connection_for_dialect(instance_mock, "sqlite", dbapi_connection, True)
 
-    assert len(execute_args) == 5
-    assert execute_args[0] == "PRAGMA journal_mode=WAL"
-    assert execute_args[1] == "SELECT sqlite_version()"
-    assert execute_args[2] == "PRAGMA cache_size = -16384"
-    assert execute_args[3] == "PRAGMA synchronous=FULL"
-    assert execute_args[4] == "PRAGMA foreign_keys=ON"
+    assert len(execute_args) == 6
+    assert execute_args[0] == "PRAGMA auto_vacuum=INCREMENTAL"
+    assert execute_args[1] == "PRAGMA journal_mode=WAL"
+    assert execute_args[2] == "SELECT sqlite_version()"
+    assert execute_args[3] == "PRAGMA cache_size = -16384"
+    assert execute_args[4] == "PRAGMA synchronous=FULL"
+    assert execute_args[5] == "PRAGMA foreign_keys=ON"
 
     execute_args = []
     util.setup_connection_for_dialect(instance_mock, "sqlite", dbapi_connection, False)
@@ -659,13 +661,40 @@ def test_periodic_db_cleanups(hass_recorder, recorder_db_url):
     with patch.object(util.get_instance(hass).engine, "connect") as connect_mock:
         util.periodic_db_cleanups(util.get_instance(hass))
 
-    text_obj = connect_mock.return_value.__enter__.return_value.execute.mock_calls[0][
-        1
-    ][0]
+    connection = connect_mock.return_value.__enter__.return_value
+    connection.connection.executescript.assert_called_once_with(
+        "PRAGMA incremental_vacuum;"
+    )
+    text_obj = connection.execute.mock_calls[0][1][0]
     assert isinstance(text_obj, TextClause)
     assert str(text_obj) == "PRAGMA wal_checkpoint(TRUNCATE);"
 
 
+def test_purged_pages_are_given_back(hass_recorder, recorder_db_url):
+    """Test new sqlite databases give the pages freed by a purge back."""
+    if not recorder_db_url.startswith("sqlite://"):
+        # This test is specific for SQLite
+        return
+
+    hass = hass_recorder()
+    instance = util.get_instance(hass)
+    with instance.engine.connect() as connection:
+        assert connection.execute(text("PRAGMA auto_vacuum")).scalar() == 2
+        connection.execute(text("CREATE TABLE filler (data TEXT)"))
+        connection.execute(
+            text("INSERT INTO filler VALUES (:data)"),
+            [{"data": "x" * 4000} for _ in range(100)],
+        )
+        connection.execute(text("DELETE FROM filler"))
+        connection.commit()
+        assert connection.execute(text("PRAGMA freelist_count")).scalar() > 0
+
+    util.periodic_db_cleanups(instance)
+
+    with instance.engine.connect() as connection:
+        assert connection.execute(text("PRAGMA freelist_count")).scalar() == 0
+
+
 @patch("homeassistant.components.recorder.pool.check_loop")
 async def test_write_lock_db(
     skip_check_loop,
@@ -753,7 +782,11 @@ def test_execute_stmt_lambda_element(hass_recorder):
     with session_scope(hass=hass) as session:
         # No time window, we always get a list
         stmt = history._get_single_entity_states_stmt(
-            instance.schema_version, dt_util.utcnow(), "sensor.on", False
+            instance.schema_version,
+            instance.states_meta_active,
+            dt_util.utcnow(),
+            "sensor.on",
+            False,
         )
         rows = util.execute_stmt_lambda_element(session, stmt)
         assert isinstance(rows, list)
@@ -2,7 +2,7 @@
 # pylint: disable=protected-access,invalid-name
 from datetime import timedelta
 import threading
-from unittest.mock import patch
+from unittest.mock import ANY, patch
 
 from freezegun import freeze_time
 import pytest
@@ -1247,6 +1247,25 @@ async def test_recorder_info(recorder_mock, hass, hass_ws_client):
         "migration_is_live": False,
         "recording": True,
         "thread_running": True,
+        "metrics": {
+            "commit_interval": 0,
+            "queue_wait": ANY,
+            "build_time": ANY,
+            "flush_time": ANY,
+            "commit_time": ANY,
+            "rows_per_second": ANY,
+            "rows_committed": ANY,
+            "dropped_events": 0,
+        },
+        "purge_metrics": {
+            "purge_before": None,
+            "in_progress": False,
+            "runs": 0,
+            "states_purged": 0,
+            "events_purged": 0,
+            "purge_time": 0.0,
+            "rows_per_second": 0.0,
+        },
     }
 
 
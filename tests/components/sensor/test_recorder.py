@@ -1223,6 +1223,80 @@ def test_compile_hourly_sum_statistics_total_increasing(
     assert "Detected new cycle for sensor.test1, value dropped" in caplog.text
 
 
+def test_compile_statistics_from_recorded_states(hass_recorder):
+    """Test periods whose states have all been recorded are compiled from memory."""
+    period0 = dt_util.utcnow()
+    period1 = period0 + timedelta(minutes=5)
+    hass = hass_recorder()
+    setup_component(hass, "sensor", {})
+    wait_recording_done(hass)  # Wait for the sensor recorder platform to be added
+    attributes = {
+        "device_class": "energy",
+        "state_class": "total_increasing",
+        "unit_of_measurement": "kWh",
+    }
+    seq = [10, 15, 20, 10, 30, 40, 50, 60, 70]
+    record_meter_states(hass, period0, "sensor.test1", attributes, seq)
+    wait_recording_done(hass)
+
+    with patch.object(
+        history,
+        "get_full_significant_states_with_session",
+        wraps=history.get_full_significant_states_with_session,
+    ) as get_history:
+        do_adhoc_statistics(hass, start=period0)
+        wait_recording_done(hass)
+        do_adhoc_statistics(hass, start=period1)
+        wait_recording_done(hass)
+    get_history.assert_not_called()
+
+    stats = statistics_during_period(hass, period0, period="5minute")
+    assert [(stat["state"], stat["sum"]) for stat in stats["sensor.test1"]] == [
+        (approx(20.0), approx(10.0)),
+        (approx(40.0), approx(50.0)),
+    ]
+
+
+def test_compile_statistics_falls_back_to_database(hass_recorder):
+    """Test a sensor is compiled from the database until its states are known."""
+    period0 = dt_util.utcnow()
+    period1 = period0 + timedelta(minutes=5)
+    hass = hass_recorder()
+    setup_component(hass, "sensor", {})
+    wait_recording_done(hass)  # Wait for the sensor recorder platform to be added
+    with patch(
+        "homeassistant.components.recorder.core.dt_util.utcnow",
+        return_value=period0 + timedelta(minutes=1),
+    ):
+        hass.states.set("sensor.test1", "10", attributes=POWER_SENSOR_ATTRIBUTES)
+    with patch(
+        "homeassistant.components.recorder.core.dt_util.utcnow",
+        return_value=period0 + timedelta(minutes=6),
+    ):
+        hass.states.set("sensor.test1", "20", attributes=POWER_SENSOR_ATTRIBUTES)
+    wait_recording_done(hass)
+
+    with patch.object(
+        history,
+        "get_full_significant_states_with_session",
+        wraps=history.get_full_significant_states_with_session,
+    ) as get_history:
+        do_adhoc_statistics(hass, start=period0)
+        wait_recording_done(hass)
+        do_adhoc_statistics(hass, start=period1)
+        wait_recording_done(hass)
+    # Only the first period needs the database
+    assert get_history.call_count == 1
+
+    stats = statistics_during_period(hass, period0, period="5minute")
+    assert [
+        (stat["mean"], stat["min"], stat["max"]) for stat in stats["sensor.test1"]
+    ] == [
+        (approx(10.0), approx(10.0), approx(10.0)),
+        (approx(18.0), approx(10.0), approx(20.0)),
+    ]
+
+
 @pytest.mark.parametrize(
     "device_class, state_unit, display_unit, statistics_unit, unit_class, factor",
     [("energy", "kWh", "kWh", "kWh", "energy", 1)],
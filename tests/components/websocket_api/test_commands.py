@@ -2,6 +2,7 @@
 from copy import deepcopy
 import datetime
 from unittest.mock import ANY, patch
+import zlib
 
 from async_timeout import timeout
 import pytest
@@ -13,8 +14,13 @@ from homeassistant.components.websocket_api.auth import (
     TYPE_AUTH_OK,
     TYPE_AUTH_REQUIRED,
 )
-from homeassistant.components.websocket_api.const import FEATURE_COALESCE_MESSAGES, URL
-from homeassistant.const import SIGNAL_BOOTSTRAP_INTEGRATIONS
+from homeassistant.components.websocket_api.const import (
+    FEATURE_COALESCE_MESSAGES,
+    FEATURE_COMPRESS_MESSAGES,
+    MIN_SIZE_TO_COMPRESS_MESSAGE,
+    URL,
+)
+from homeassistant.const import EVENT_STATE_CHANGED, SIGNAL_BOOTSTRAP_INTEGRATIONS
 from homeassistant.core import Context, HomeAssistant, State, callback
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import entity
@@ -22,8 +28,14 @@ from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.json import json_loads
 from homeassistant.loader import async_get_integration
 from homeassistant.setup import DATA_SETUP_TIME, async_setup_component
+import homeassistant.util.dt as dt_util
 
-from tests.common import MockEntity, MockEntityPlatform, async_mock_service
+from tests.common import (
+    MockEntity,
+    MockEntityPlatform,
+    async_fire_time_changed,
+    async_mock_service,
+)
 
 STATE_KEY_SHORT_NAMES = {
     "entity_id": "e",
@@ -1047,6 +1059,162 @@ async def test_subscribe_unsubscribe_entities_specific_entities(
     }
 
 
+async def test_subscribe_entities_shares_one_listener(
+    hass, websocket_client, hass_ws_client
+):
+    """Test subscriptions of several connections share one state_changed listener."""
+    listeners_before = hass.bus.async_listeners().get(EVENT_STATE_CHANGED, 0)
+    other_client = await hass_ws_client(hass)
+
+    await websocket_client.send_json({"id": 7, "type": "subscribe_entities"})
+    await other_client.send_json(
+        {"id": 3, "type": "subscribe_entities", "entity_ids": ["light.kitchen"]}
+    )
+    await other_client.send_json({"id": 4, "type": "subscribe_entities"})
+    for client, iden in ((websocket_client, 7), (other_client, 3), (other_client, 4)):
+        msg = await client.receive_json()
+        assert msg["id"] == iden
+        assert msg["success"]
+        msg = await client.receive_json()
+        assert msg["id"] == iden
+        assert msg["event"] == {"a": {}}
+
+    assert hass.bus.async_listeners()[EVENT_STATE_CHANGED] == listeners_before + 1
+
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("light.hall", "on")
+
+    for client, iden, entity_id in (
+        (websocket_client, 7, "light.kitchen"),
+        (websocket_client, 7, "light.hall"),
+    ):
+        msg = await client.receive_json()
+        assert msg["id"] == iden
+        assert list(msg["event"]["a"]) == [entity_id]
+    received = [await other_client.receive_json() for _ in range(3)]
+    assert sorted((msg["id"], *msg["event"]["a"]) for msg in received) == [
+        (3, "light.kitchen"),
+        (4, "light.hall"),
+        (4, "light.kitchen"),
+    ]
+
+    await websocket_client.send_json(
+        {"id": 8, "type": "unsubscribe_events", "subscription": 7}
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["success"]
+    assert hass.bus.async_listeners()[EVENT_STATE_CHANGED] == listeners_before + 1
+
+    await other_client.close()
+    await hass.async_block_till_done()
+    assert hass.bus.async_listeners().get(EVENT_STATE_CHANGED, 0) == listeners_before
+
+
+async def test_subscribe_entities_since_resync_token(
+    hass, websocket_client, hass_ws_client
+):
+    """Test resubscribing with a resync token only sends the changed states."""
+    hass.states.async_set("light.kitchen", "off")
+    hass.states.async_set("light.hall", "off")
+
+    await websocket_client.send_json(
+        {"id": 7, "type": "subscribe_entities", "since": None}
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 7
+    assert msg["success"]
+    assert msg["result"] == {"incremental": False}
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 7
+    assert set(msg["event"]["a"]) == {"light.kitchen", "light.hall"}
+    assert msg["event"]["t"] == hass.states.async_resync_token()
+
+    hass.states.async_set("light.kitchen", "on")
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 7
+    assert msg["event"] == {
+        "c": {"light.kitchen": {"+": {"c": ANY, "lc": ANY, "s": "on"}}},
+        "t": hass.states.async_resync_token(),
+    }
+    token = msg["event"]["t"]
+    await websocket_client.close()
+    await hass.async_block_till_done()
+
+    hass.states.async_set("light.hall", "on")
+    hass.states.async_remove("light.kitchen")
+    hass.states.async_set("light.porch", "on")
+
+    websocket_client = await hass_ws_client(hass)
+    await websocket_client.send_json(
+        {"id": 7, "type": "subscribe_entities", "since": token}
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["result"] == {"incremental": True}
+    msg = await websocket_client.receive_json()
+    assert msg["event"] == {
+        "a": {
+            "light.hall": {"a": {}, "c": ANY, "lc": ANY, "s": "on"},
+            "light.porch": {"a": {}, "c": ANY, "lc": ANY, "s": "on"},
+        },
+        "r": ["light.kitchen"],
+        "t": hass.states.async_resync_token(),
+    }
+
+    await websocket_client.send_json(
+        {"id": 8, "type": "subscribe_entities", "since": "unknown:0"}
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["result"] == {"incremental": False}
+    msg = await websocket_client.receive_json()
+    assert set(msg["event"]["a"]) == {"light.hall", "light.porch"}
+    assert "r" not in msg["event"]
+
+
+async def test_subscribe_entities_min_interval(hass, websocket_client):
+    """Test subscribe entities with a minimum interval merges the changes."""
+    hass.states.async_set("light.kitchen", "off")
+    hass.states.async_set("light.hall", "off")
+
+    await websocket_client.send_json(
+        {"id": 7, "type": "subscribe_entities", "min_interval": 5}
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["success"]
+    msg = await websocket_client.receive_json()
+    assert set(msg["event"]["a"]) == {"light.kitchen", "light.hall"}
+
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("light.kitchen", "off", {"color": "red"})
+    hass.states.async_remove("light.hall")
+    hass.states.async_set("light.porch", "on")
+    hass.states.async_remove("light.porch")
+    await hass.async_block_till_done()
+
+    async_fire_time_changed(hass, dt_util.utcnow() + datetime.timedelta(seconds=6))
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 7
+    assert msg["event"] == {
+        "c": {"light.kitchen": {"+": {"a": {"color": "red"}, "c": ANY, "lc": ANY}}},
+        "r": ["light.hall"],
+    }
+
+    # Merged changes which cancel out are not sent
+    hass.states.async_set("light.porch", "on")
+    hass.states.async_remove("light.porch")
+    async_fire_time_changed(hass, dt_util.utcnow() + datetime.timedelta(seconds=12))
+    hass.states.async_set("light.kitchen", "on")
+    async_fire_time_changed(hass, dt_util.utcnow() + datetime.timedelta(seconds=18))
+    msg = await websocket_client.receive_json()
+    assert msg["event"] == {
+        "c": {
+            "light.kitchen": {
+                "+": {"c": ANY, "lc": ANY, "s": "on"},
+                "-": {"a": ["color"]},
+            }
+        }
+    }
+
+
 async def test_render_template_renders_template(hass, websocket_client):
     """Test simple template is rendered and updated."""
     hass.states.async_set("light.test", "on")
@@ -1900,6 +2068,48 @@ async def test_message_coalescing_not_supported_by_websocket_client(
     await hass.async_block_till_done()
 
 
+async def test_message_compression(hass, websocket_client, hass_admin_user):
+    """Test large messages are compressed in binary frames when supported."""
+    for idx in range(200):
+        hass.states.async_set(f"light.kitchen_{idx}", "on", {"color": "red"})
+
+    await websocket_client.send_json(
+        {
+            "id": 1,
+            "type": "supported_features",
+            "features": {FEATURE_COMPRESS_MESSAGES: 1},
+        }
+    )
+    msg = json_loads(await websocket_client.receive_str())
+    assert msg["id"] == 1
+    assert msg["success"]
+
+    await websocket_client.send_json({"id": 7, "type": "subscribe_entities"})
+    msg = json_loads(await websocket_client.receive_str())
+    assert msg["id"] == 7
+    assert msg["success"]
+
+    data = await websocket_client.receive_bytes()
+    assert len(data) < MIN_SIZE_TO_COMPRESS_MESSAGE
+    msg = json_loads(zlib.decompress(data))
+    assert msg["id"] == 7
+    assert msg["type"] == "event"
+    assert len(msg["event"]["a"]) == 200
+    assert msg["event"]["a"]["light.kitchen_0"] == {
+        "a": {"color": "red"},
+        "c": ANY,
+        "lc": ANY,
+        "s": "on",
+    }
+
+    hass.states.async_set("light.kitchen_0", "on", {"color": "blue"})
+    msg = json_loads(await websocket_client.receive_str())
+    assert msg["id"] == 7
+    assert msg["event"] == {
+        "c": {"light.kitchen_0": {"+": {"a": {"color": "blue"}, "c": ANY, "lu": ANY}}}
+    }
+
+
 async def test_client_message_coalescing(hass, websocket_client, hass_admin_user):
     """Test client message coalescing."""
     await websocket_client.send_json(
@@ -1,7 +1,7 @@
 """Test Websocket API http module."""
 import asyncio
 from datetime import timedelta
-from unittest.mock import patch
+from unittest.mock import ANY, patch
 
 from aiohttp import ServerDisconnectedError, WSMsgType, web
 import pytest
@@ -67,6 +67,64 @@ async def test_pending_msg_peak(hass, mock_low_peak, hass_ws_client, caplog):
     assert "Client unable to keep up with pending messages" in caplog.text
 
 
+async def test_state_changes_coalesced_while_behind(
+    hass, mock_low_peak, hass_ws_client
+):
+    """Test state changes are merged while the client is behind."""
+    orig_handler = http.WebSocketHandler
+    instance = None
+
+    def instantiate_handler(*args):
+        nonlocal instance
+        instance = orig_handler(*args)
+        return instance
+
+    with patch(
+        "homeassistant.components.websocket_api.http.WebSocketHandler",
+        instantiate_handler,
+    ):
+        websocket_client = await hass_ws_client()
+
+    hass.states.async_set("light.kitchen", "off")
+    await websocket_client.send_json({"id": 5, "type": "subscribe_entities"})
+    msg = await websocket_client.receive_json()
+    assert msg["success"]
+    msg = await websocket_client.receive_json()
+    assert list(msg["event"]["a"]) == ["light.kitchen"]
+
+    # Fill the queue to the peak
+    for idx in range(5):
+        instance._send_message({"id": idx, "type": "filler"})
+    assert instance.connection.coalesce_state_changes
+
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("light.kitchen", "off", {"color": "red"})
+    hass.states.async_set("light.hall", "on")
+
+    for idx in range(5):
+        msg = await websocket_client.receive_json()
+        assert msg == {"id": idx, "type": "filler"}
+    assert not instance.connection.coalesce_state_changes
+
+    async_fire_time_changed(
+        hass,
+        utcnow() + timedelta(seconds=const.COALESCE_STATE_CHANGES_INTERVAL + 1),
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 5
+    assert msg["event"] == {
+        "c": {"light.kitchen": {"+": {"a": {"color": "red"}, "c": ANY, "lc": ANY}}},
+        "a": {"light.hall": {"a": {}, "c": ANY, "lc": ANY, "s": "on"}},
+    }
+
+    # Changes are sent right away again once the client caught up
+    hass.states.async_set("light.hall", "off")
+    msg = await websocket_client.receive_json()
+    assert msg["event"] == {
+        "c": {"light.hall": {"+": {"c": ANY, "lc": ANY, "s": "off"}}}
+    }
+
+
 async def test_non_json_message(hass, websocket_client, caplog):
     """Test trying to serialize non JSON objects."""
     bad_data = object()
@@ -10,8 +10,10 @@ from homeassistant import core
 from homeassistant.helpers.json import (
     ExtendedJSONEncoder,
     JSONEncoder,
+    JSONFragment,
     json_dumps,
     json_dumps_sorted,
+    json_dumps_with_fragments,
 )
 from homeassistant.util import dt as dt_util
 from homeassistant.util.color import RGBColor
@@ -118,3 +120,17 @@ def test_json_dumps_rgb_color_subclass():
     rgb = RGBColor(4, 2, 1)
 
     assert json_dumps(rgb) == "[4,2,1]"
+
+
+def test_json_dumps_with_fragments():
+    """Test the json dumps with fragments inserts the fragments as they are."""
+    data = {
+        "a": JSONFragment('{"b":[1,2.50,"c"]}'),
+        "d": [JSONFragment("null"), "e", JSONFragment('"f\\"g"')],
+        "h": {1, 2},
+    }
+    assert (
+        json_dumps_with_fragments(data)
+        == '{"a":{"b":[1,2.50,"c"]},"d":[null,"e","f\\"g"],"h":[1,2]}'
+    )
+    assert json_dumps_with_fragments({"a": [1, 2]}) == json_dumps({"a": [1, 2]})
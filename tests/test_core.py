@@ -448,6 +448,131 @@ async def test_eventbus_filtered_listener(hass):
     unsub()
 
 
+async def test_eventbus_dispatch_follows_listener_changes(hass):
+    """Test the precompiled listeners are rebuilt when listeners change."""
+    calls = []
+    match_all_calls = []
+
+    @ha.callback
+    def listener(event):
+        """Mock listener."""
+        calls.append(event)
+
+    @ha.callback
+    def match_all_listener(event):
+        """Mock match all listener."""
+        match_all_calls.append(event)
+
+    hass.bus.async_fire("test")
+    await hass.async_block_till_done()
+
+    unsub = hass.bus.async_listen("test", listener)
+    hass.bus.async_fire("test")
+    await hass.async_block_till_done()
+    assert len(calls) == 1
+
+    unsub_match_all = hass.bus.async_listen(MATCH_ALL, match_all_listener)
+    hass.bus.async_fire("test")
+    await hass.async_block_till_done()
+    assert len(calls) == 2
+    assert len(match_all_calls) == 1
+
+    unsub()
+    hass.bus.async_fire("test")
+    await hass.async_block_till_done()
+    assert len(calls) == 2
+    assert len(match_all_calls) == 2
+
+    unsub_match_all()
+    hass.bus.async_fire("test")
+    await hass.async_block_till_done()
+    assert len(match_all_calls) == 2
+
+
+async def test_eventbus_no_listeners_skips_event_creation(hass):
+    """Test no event is created when there are no listeners."""
+    context = ha.Context()
+
+    with patch.object(ha._LOGGER, "isEnabledFor", return_value=False), patch(
+        "homeassistant.core.Event"
+    ) as mock_event:
+        hass.bus.async_fire("test_no_listeners", context=context)
+
+    assert not mock_event.called
+    assert context.origin_event is None
+
+    # The first event with listeners becomes the origin event of the context
+    events = async_capture_events(hass, "test_listeners")
+    hass.bus.async_fire("test_listeners", context=context)
+    await hass.async_block_till_done()
+    assert len(events) == 1
+    assert context.origin_event is events[0]
+
+
+async def test_eventbus_listen_state_changed(hass):
+    """Test listening for state changes indexed by entity_id and domain."""
+    entity_calls = []
+    domain_calls = []
+    both_calls = []
+
+    @ha.callback
+    def entity_listener(event):
+        """Mock entity listener."""
+        entity_calls.append(event)
+
+    @ha.callback
+    def domain_listener(event):
+        """Mock domain listener."""
+        domain_calls.append(event)
+
+    @ha.callback
+    def both_listener(event):
+        """Mock listener for an entity and its domain."""
+        both_calls.append(event)
+
+    unsub_entity = hass.bus.async_listen_state_changed(
+        entity_listener, entity_ids=["light.kitchen"]
+    )
+    unsub_domain = hass.bus.async_listen_state_changed(
+        domain_listener, domains=["switch"]
+    )
+    unsub_both = hass.bus.async_listen_state_changed(
+        both_listener, entity_ids=["switch.tv"], domains=["switch"]
+    )
+    assert hass.bus.async_listeners()[EVENT_STATE_CHANGED] == 1
+    assert hass.bus.async_state_changed_listeners() == {
+        "light.kitchen": 1,
+        "switch": 2,
+        "switch.tv": 1,
+    }
+
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("light.other", "on")
+    hass.states.async_set("switch.tv", "on")
+    hass.states.async_set("switch.radio", "on")
+    await hass.async_block_till_done()
+
+    assert [event.data["entity_id"] for event in entity_calls] == ["light.kitchen"]
+    assert [event.data["entity_id"] for event in domain_calls] == [
+        "switch.tv",
+        "switch.radio",
+    ]
+    assert [event.data["entity_id"] for event in both_calls] == [
+        "switch.tv",
+        "switch.radio",
+    ]
+
+    unsub_entity()
+    unsub_domain()
+    assert hass.bus.async_state_changed_listeners() == {"switch": 1, "switch.tv": 1}
+    unsub_both()
+    assert hass.bus.async_state_changed_listeners() == {}
+    assert EVENT_STATE_CHANGED not in hass.bus.async_listeners()
+
+    hass.bus.async_listen_state_changed(entity_listener)()
+    assert EVENT_STATE_CHANGED not in hass.bus.async_listeners()
+
+
 async def test_eventbus_run_immediately(hass):
     """Test we can call events immediately."""
     calls = []
@@ -722,6 +847,45 @@ async def test_statemachine_remove(hass):
     assert len(events) == 1
 
 
+async def test_statemachine_entity_ids_changed_since(hass):
+    """Test the entity ids changed since a resync token."""
+    hass.states.async_set("light.bowl", "on")
+    token = hass.states.async_resync_token()
+    assert hass.states.async_entity_ids_changed_since(token) == set()
+
+    hass.states.async_set("light.bowl", "on")
+    assert hass.states.async_resync_token() == token
+
+    hass.states.async_set("light.bowl", "off")
+    hass.states.async_set("light.lamp", "on")
+    hass.states.async_remove("light.lamp")
+    assert hass.states.async_entity_ids_changed_since(token) == {
+        "light.bowl",
+        "light.lamp",
+    }
+    assert (
+        hass.states.async_entity_ids_changed_since(hass.states.async_resync_token())
+        == set()
+    )
+
+    # Tokens of another state machine, from the future or too old are unknown
+    assert hass.states.async_entity_ids_changed_since("abc:0") is None
+    resync_id = token.partition(":")[0]
+    assert hass.states.async_entity_ids_changed_since(f"{resync_id}:1000") is None
+    assert hass.states.async_entity_ids_changed_since(f"{resync_id}:x") is None
+    with patch.object(ha, "MAX_RECENT_STATE_CHANGES", 2):
+        states = ha.StateMachine(hass.bus, hass.loop)
+    token = states.async_resync_token()
+    states.async_set("light.bowl", "on")
+    states.async_set("light.lamp", "on")
+    assert states.async_entity_ids_changed_since(token) == {
+        "light.bowl",
+        "light.lamp",
+    }
+    states.async_set("light.bowl", "off")
+    assert states.async_entity_ids_changed_since(token) is None
+
+
 async def test_statemachine_case_insensitivty(hass):
     """Test insensitivty."""
     events = async_capture_events(hass, EVENT_STATE_CHANGED)